@@ -1,4 +1,4 @@
-from .catalog import get_model, get_model_display_name, list_models, load_catalog
+from .catalog import get_model, get_model_display_name, list_models, load_catalog, resolve_model
 from .types import (
     ApiMode,
     LocalizedDescription,
@@ -27,4 +27,5 @@ __all__ = [
     "get_model_display_name",
     "list_models",
     "load_catalog",
+    "resolve_model",
 ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from functools import lru_cache
 from importlib.resources import files
 from typing import Any
@@ -42,6 +43,49 @@ def _parse_model(provider: str, raw: dict[str, Any]) -> ModelCard:
     )
 
 
+@dataclass(frozen=True, slots=True)
+class _CatalogIndex:
+    catalog: ModelCatalog
+    by_provider_id: dict[tuple[str, str], ModelCard]
+    by_qualified_id: dict[str, ModelCard]
+    by_id: dict[str, tuple[ModelCard, ...]]
+
+
+_catalog_index_cache: _CatalogIndex | None = None
+
+
+def _build_index(catalog: ModelCatalog) -> _CatalogIndex:
+    by_provider_id: dict[tuple[str, str], ModelCard] = {}
+    by_qualified_id: dict[str, ModelCard] = {}
+    by_id: dict[str, list[ModelCard]] = {}
+    for model in catalog.models:
+        model_key = model.id.casefold()
+        by_provider_id.setdefault((model.provider, model_key), model)
+        by_qualified_id.setdefault(f"{model.provider}/{model_key}", model)
+        by_id.setdefault(model_key, []).append(model)
+    return _CatalogIndex(
+        catalog=catalog,
+        by_provider_id=by_provider_id,
+        by_qualified_id=by_qualified_id,
+        by_id={key: tuple(models) for key, models in by_id.items()},
+    )
+
+
+def _catalog_index() -> _CatalogIndex:
+    """Return the lookup index for the currently loaded catalog.
+
+    The index is rebuilt whenever ``load_catalog`` returns a new object, so
+    ``load_catalog.cache_clear()`` is enough to reload both.
+    """
+    global _catalog_index_cache
+    catalog = load_catalog()
+    index = _catalog_index_cache
+    if index is None or index.catalog is not catalog:
+        index = _build_index(catalog)
+        _catalog_index_cache = index
+    return index
+
+
 @lru_cache(maxsize=1)
 def load_catalog() -> ModelCatalog:
     """Load and parse the catalog stored in the project models module."""
@@ -59,26 +103,45 @@ def load_catalog() -> ModelCatalog:
             raise ValueError(f"Provider mismatch in {provider_entry['file']}")
         models.extend(_parse_model(provider_data["provider"], model) for model in provider_data["models"])
 
-    return ModelCatalog(
+    catalog = ModelCatalog(
         schema_version=raw["schema_version"],
         catalog_version=raw["catalog_version"],
         updated_at=raw["updated_at"],
         models=tuple(models),
     )
+    global _catalog_index_cache
+    _catalog_index_cache = _build_index(catalog)
+    return catalog
 
 
 def get_model(provider: str, model_id: str) -> ModelCard | None:
     """Return a model card, or ``None`` when the model is not cataloged."""
-    provider_key = provider.strip().lower()
-    model_key = model_id.strip().lower()
-    return next(
-        (
-            model
-            for model in load_catalog().models
-            if model.provider == provider_key and model.id.lower() == model_key
-        ),
-        None,
-    )
+    provider_key = provider.strip().casefold()
+    model_key = model_id.strip().casefold()
+    return _catalog_index().by_provider_id.get((provider_key, model_key))
+
+
+def resolve_model(provider: str, model_id: str) -> ModelCard | None:
+    """Resolve a possibly proxy-prefixed model id to a catalog card.
+
+    ``openrouter/google/gemini-2.5-flash`` is tried as-is and with leading path
+    segments stripped: first under ``provider``, then as a provider-prefixed id,
+    and finally as a bare id when exactly one provider catalogs it.
+    """
+    index = _catalog_index()
+    provider_key = provider.strip().casefold()
+    candidates = _model_id_candidates(model_id)
+    for candidate in candidates:
+        if card := index.by_provider_id.get((provider_key, candidate)):
+            return card
+    for candidate in candidates:
+        if card := index.by_qualified_id.get(candidate):
+            return card
+    for candidate in candidates:
+        matches = index.by_id.get(candidate, ())
+        if len(matches) == 1:
+            return matches[0]
+    return None
 
 
 @lru_cache(maxsize=1)
@@ -121,8 +184,9 @@ def get_model_display_name(provider: str, model_id: str) -> str:
         if display_name := provider_names.get(candidate):
             return display_name
 
+    index = _catalog_index()
     for candidate in candidates:
-        if card := get_model(provider_key, candidate):
+        if card := index.by_provider_id.get((provider_key, candidate)):
             return card.display_name
 
     for candidate in candidates:
@@ -134,9 +198,8 @@ def get_model_display_name(provider: str, model_id: str) -> str:
         if len(matches) == 1:
             return next(iter(matches.values()))
 
-    catalog = load_catalog().models
     for candidate in candidates:
-        matches = [model for model in catalog if model.id.casefold() == candidate]
+        matches = index.by_id.get(candidate, ())
         if len(matches) == 1:
             return matches[0].display_name
     return model_id
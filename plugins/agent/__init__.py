@@ -10,6 +10,7 @@ from typing import Any
 from langchain.messages import AIMessage
 from nonebot import get_bot, get_driver, logger, on_message, require
 from nonebot.adapters.milky.event import MessageEvent
+from nonebot.exception import MatcherException
 
 require("nonebot_plugin_alconna")
 require("nonebot_plugin_apscheduler")
@@ -20,13 +21,21 @@ from utils.agents import FrontierCognitive, ProgressEvent, ProgressReporter, age
 from utils.agents.acp import acp_service
 from utils.alconna import UniMessage
 from utils.configs import EnvConfig
-from utils.database import MessageDatabase, build_message_metadata
-from utils.media import resolve_media, standard_media_block
+from utils.database import (
+    AlertTimingDatabase,
+    MessageDatabase,
+    build_message_metadata,
+    run_wal_checkpoint_cycle,
+    warm_database_cache,
+)
+from utils.db_executor import get_database_executor
+from utils.media import resolve_media_async, standard_media_block
 from utils.message import (
     _get_wake_words,
     download_media,
     extract_message_files,
     format_staged_message_files,
+    load_reply_check_prompt,
     message_check,
     message_extract,
     message_gateway,
@@ -37,9 +46,12 @@ from utils.message import (
     stage_message_files,
 )
 from utils.message_normalizer import NORMALIZED_VERSION, normalize_segments
+from utils.metrics import REGISTRY
 from utils.reply_context import build_reply_context, reply_seq_from_segments
+from utils.tracing import set_trace_attribute, start_trace, trace_span
 
 messages_db = MessageDatabase()
+alert_timings = AlertTimingDatabase(messages_db.engine)
 f_cognitive = FrontierCognitive()
 driver = get_driver()
 
@@ -47,7 +59,11 @@ common = on_message(priority=10)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 CACHE_CLEANUP_JOB_ID = "frontier_daily_cache_cleanup"
+WAL_CHECKPOINT_JOB_ID = "frontier_wal_checkpoint"
+DATABASE_WARMUP_JOB_ID = "frontier_database_warmup"
 EMPTY_CURRENT_MESSAGE_PROMPT = "[用户叫了你一声]"
+MESSAGES_RECEIVED = REGISTRY.counter("frontier_messages_received_total", "收到的 QQ 消息数", ("scene",))
+GATEWAY_DECISIONS = REGISTRY.counter("frontier_gateway_decisions_total", "消息网关判定结果", ("result",))
 
 
 @dataclass(slots=True)
@@ -176,18 +192,18 @@ async def _process_agent_request(context: AgentRequestContext, history_messages:
             ),
         }
     ]
-    if inline_quoted_images:
-        current_content.append({"type": "text", "text": "以下图片来自上面的引用消息："})
-        current_content.extend(standard_media_block(resolve_media(image, "image")) for image in inline_quoted_images)
-    if inline_images:
-        current_content.append({"type": "text", "text": "以下图片来自当前消息："})
-        current_content.extend(standard_media_block(resolve_media(image, "image")) for image in inline_images)
-    if inline_audio:
-        current_content.append({"type": "text", "text": "以下语音来自当前消息："})
-        current_content.extend(standard_media_block(resolve_media(audio, "audio")) for audio in inline_audio)
-    if inline_videos:
-        current_content.append({"type": "text", "text": "以下视频来自当前消息："})
-        current_content.extend(standard_media_block(resolve_media(video, "video")) for video in inline_videos)
+    inline_sections = (
+        ("以下图片来自上面的引用消息：", inline_quoted_images, "image"),
+        ("以下图片来自当前消息：", inline_images, "image"),
+        ("以下语音来自当前消息：", inline_audio, "audio"),
+        ("以下视频来自当前消息：", inline_videos, "video"),
+    )
+    for label, items, kind in inline_sections:
+        if not items:
+            continue
+        resolved = await asyncio.gather(*(resolve_media_async(item, kind) for item in items))
+        current_content.append({"type": "text", "text": label})
+        current_content.extend(standard_media_block(media) for media in resolved)
     omitted_labels = [
         f"引用图片 {omitted_quoted_images} 张" if omitted_quoted_images else "",
         f"当前图片 {omitted_images} 张" if omitted_images else "",
@@ -225,21 +241,27 @@ async def _process_agent_request(context: AgentRequestContext, history_messages:
                 triggered_wake = w
                 break
 
-    result = await f_cognitive.chat_agent(
-        messages,
-        context.user_id,
-        context.user_name,
-        capability,
-        group_id=context.group_id,
-        image_inputs=context.quoted_images + context.images,
-        audio_inputs=context.audio,
-        video_inputs=context.videos,
-        wake_word=triggered_wake or None,
-        group_member_role=_group_member_role(context.event),
-        progress_reporter=_chat_progress_reporter(context.group_id),
-        user_text=context.text,
-    )
+    with trace_span("agent"):
+        result = await f_cognitive.chat_agent(
+            messages,
+            context.user_id,
+            context.user_name,
+            capability,
+            group_id=context.group_id,
+            image_inputs=context.quoted_images + context.images,
+            audio_inputs=context.audio,
+            video_inputs=context.videos,
+            wake_word=triggered_wake or None,
+            group_member_role=_group_member_role(context.event),
+            progress_reporter=_chat_progress_reporter(context.group_id),
+            user_text=context.text,
+        )
+
+    with trace_span("send"):
+        return await _send_agent_result(context, result)
 
+
+async def _send_agent_result(context: AgentRequestContext, result: Any) -> bool:
     if not isinstance(result, dict) or "response" not in result:
         await UniMessage.text(f"{EnvConfig.BOT_NAME}飞升了，暂时不可用").send()
         return True
@@ -283,14 +305,23 @@ async def on_shutdown():
 
     clear_ens_professional_cache()
     from utils.browser_capture import close_browser
+    from utils.db_executor import shutdown_database_executor
     from utils.http_client import aclose_all
+    from utils.media import shutdown_media_executor
 
     await close_browser()
     await aclose_all()
+    shutdown_media_executor()
+    shutdown_database_executor()
 
 
 @driver.on_startup
 async def on_startup():
+    try:
+        load_reply_check_prompt()
+    except OSError as exc:
+        logger.warning("回复门控提示词预加载失败: %s: %s", type(exc).__name__, exc)
+
     if EnvConfig.IMAGE_AUTO_CLEANUP:
         try:
             cleaned_attachments = await messages_db.cleanup_expired_attachments()
@@ -316,6 +347,35 @@ async def on_startup():
         max_instances=1,
         misfire_grace_time=3600,
     )
+    if EnvConfig.WAL_CHECKPOINT_INTERVAL_SECONDS > 0:
+        scheduler.add_job(
+            run_wal_checkpoint,
+            "interval",
+            id=WAL_CHECKPOINT_JOB_ID,
+            seconds=EnvConfig.WAL_CHECKPOINT_INTERVAL_SECONDS,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    if EnvConfig.DATABASE_WARMUP:
+        # 不带触发器的任务会立即在后台执行一次，不阻塞启动。
+        scheduler.add_job(run_database_warmup, id=DATABASE_WARMUP_JOB_ID, replace_existing=True)
+
+
+async def run_wal_checkpoint() -> None:
+    """Checkpoint the WAL in the background instead of on a random write."""
+    try:
+        await run_wal_checkpoint_cycle(messages_db.engine)
+    except Exception as exc:
+        logger.warning("WAL 检查点失败: %s: %s", type(exc).__name__, exc)
+
+
+async def run_database_warmup() -> None:
+    """Read hot indexes once after startup so the first queries hit the page cache."""
+    try:
+        await get_database_executor().read(warm_database_cache, messages_db.engine)
+    except Exception as exc:
+        logger.warning("数据库预热失败: %s: %s", type(exc).__name__, exc)
 
 
 async def run_daily_cache_cleanup() -> None:
@@ -328,6 +388,16 @@ async def run_daily_cache_cleanup() -> None:
         except Exception as exc:
             logger.warning("每日消息附件清理失败: %s: %s", type(exc).__name__, exc)
 
+    if EnvConfig.MESSAGE_RETENTION_DAYS > 0:
+        try:
+            archived_messages = await messages_db.archive_old_messages()
+            if archived_messages:
+                logger.info("每日归档早期聊天记录: %s", archived_messages)
+        except Exception as exc:
+            logger.warning("每日聊天记录归档失败: %s: %s", type(exc).__name__, exc)
+
+    await _prune_alert_timings()
+
     try:
         cleaned_scopes = await acp_service.cleanup_cache()
         if cleaned_scopes:
@@ -336,8 +406,30 @@ async def run_daily_cache_cleanup() -> None:
         logger.warning("每日 ACP 缓存清理失败: %s: %s", type(exc).__name__, exc)
 
 
+async def _prune_alert_timings() -> None:
+    try:
+        pruned = await alert_timings.prune()
+        if pruned:
+            logger.info("每日清理过期预警时间线: %s", pruned)
+    except Exception as exc:
+        logger.warning("每日预警时间线清理失败: %s: %s", type(exc).__name__, exc)
+
+
 @common.handle()
-async def handle_common(event: MessageEvent):  # noqa: C901
+async def handle_common(event: MessageEvent):
+    group = event.data.group
+    MESSAGES_RECEIVED.inc(scene="group" if group else "private")
+    with start_trace(
+        "handle_common",
+        non_error=(MatcherException,),
+        user_id=event.get_user_id(),
+        group_id=group.group_id if group else None,
+        message_seq=event.data.message_seq,
+    ):
+        await _handle_common(event)
+
+
+async def _handle_common(event: MessageEvent):  # noqa: C901
     if EnvConfig.AGENT_MODULE_ENABLED is False:
         await common.finish(f"{EnvConfig.BOT_NAME}飞升了,暂时不可用")
 
@@ -353,9 +445,11 @@ async def handle_common(event: MessageEvent):  # noqa: C901
     group_id = event.data.group.group_id if event.data.group else None
 
     # ── Phase 1: 快速提取文本（不下载媒体）──
-    text, image_downloaders, audio_downloaders, video_downloaders = await message_extract(event.data.segments)
-    file_items = extract_message_files(event.data.segments)
-    normalized_message = await normalize_segments(bot, event.data.segments)
+    with trace_span("extract"):
+        text, image_downloaders, audio_downloaders, video_downloaders = await message_extract(event.data.segments)
+        file_items = extract_message_files(event.data.segments)
+    with trace_span("normalize"):
+        normalized_message = await normalize_segments(bot, event.data.segments)
     if normalized_message.content:
         text = normalized_message.content
     current_text = text
@@ -363,14 +457,15 @@ async def handle_common(event: MessageEvent):  # noqa: C901
     reply_seq = reply_seq_from_segments(event.data.segments)
     quote_text = ""
     if reply_seq:
-        quote_text, _ = await build_reply_context(
-            bot,
-            event,
-            reply_seq,
-            group_id,
-            messages_db,
-            load_images=False,
-        )
+        with trace_span("reply_context"):
+            quote_text, _ = await build_reply_context(
+                bot,
+                event,
+                reply_seq,
+                group_id,
+                messages_db,
+                load_images=False,
+            )
     if video_downloaders and "[视频" not in current_text:
         current_text = f"{current_text}\n{' '.join('[视频]' for _ in video_downloaders)}".strip()
     if audio_downloaders and "[语音" not in current_text:
@@ -385,37 +480,42 @@ async def handle_common(event: MessageEvent):  # noqa: C901
     text = f"{current_text}{quote_text}".strip()
 
     # ── Phase 2: 存储消息文本与结构化元数据 + 快速网关检查 ──
-    await messages_db.insert(
-        time=msg_time,
-        msg_id=event_id,
-        user_id=int(user_id),
-        group_id=group_id,
-        user_name=user_name,
-        role="user" if user_id != str(event.self_id) else "assistant",
-        content=text,
-        raw_segments_json=normalized_message.raw_segments_json,
-        normalized_version=normalized_message.normalized_version,
-        normalized_status=normalized_message.status,
-    )
-    if normalized_message.derived_messages:
-        await messages_db.replace_derived_messages(
-            parent_msg_time=msg_time,
-            parent_msg_id=event_id,
+    with trace_span("db_insert"):
+        await messages_db.insert(
+            time=msg_time,
+            msg_id=event_id,
             user_id=int(user_id),
             group_id=group_id,
+            user_name=user_name,
             role="user" if user_id != str(event.self_id) else "assistant",
-            derived_messages=normalized_message.derived_messages,
-            normalized_version=NORMALIZED_VERSION,
+            content=text,
+            raw_segments_json=normalized_message.raw_segments_json,
+            normalized_version=normalized_message.normalized_version,
+            normalized_status=normalized_message.status,
         )
+        if normalized_message.derived_messages:
+            await messages_db.replace_derived_messages(
+                parent_msg_time=msg_time,
+                parent_msg_id=event_id,
+                user_id=int(user_id),
+                group_id=group_id,
+                role="user" if user_id != str(event.self_id) else "assistant",
+                derived_messages=normalized_message.derived_messages,
+                normalized_version=NORMALIZED_VERSION,
+            )
 
-    messages = await messages_db.prepare_message(
-        int(user_id),
-        group_id,
-        query_numbers=EnvConfig.QUERY_MESSAGE_NUMBERS,
-        before_time=msg_time,
-    )
+    with trace_span("history_load"):
+        messages = await messages_db.prepare_message(
+            int(user_id),
+            group_id,
+            query_numbers=EnvConfig.QUERY_MESSAGE_NUMBERS,
+            before_time=msg_time,
+        )
 
-    if not await message_gateway(event, messages):
+    with trace_span("gateway"):
+        passed = await message_gateway(event, messages)
+    GATEWAY_DECISIONS.inc(result="passed" if passed else "rejected")
+    if not passed:
         await common.finish()
 
     # ── Phase 3: 网关通过后才下载当前消息及引用消息中的媒体 ──
@@ -428,66 +528,74 @@ async def handle_common(event: MessageEvent):  # noqa: C901
         user_id=user_id,
         group_id=group_id,
     )
-    if reply_seq:
-        quote_task = build_reply_context(bot, event, reply_seq, group_id, messages_db)
-        (images, audio, videos), staged_files, (agent_quote_text, quoted_images) = await asyncio.gather(
-            media_task,
-            files_task,
-            quote_task,
-        )
-    else:
-        (images, audio, videos), staged_files = await asyncio.gather(media_task, files_task)
-        agent_quote_text, quoted_images = "", []
+    with trace_span("media_download"):
+        if reply_seq:
+            quote_task = build_reply_context(bot, event, reply_seq, group_id, messages_db)
+            (images, audio, videos), staged_files, (agent_quote_text, quoted_images) = await asyncio.gather(
+                media_task,
+                files_task,
+                quote_task,
+            )
+        else:
+            (images, audio, videos), staged_files = await asyncio.gather(media_task, files_task)
+            agent_quote_text, quoted_images = "", []
 
     agent_text = _remove_attached_image_placeholders(current_text, len(images))
     if staged_file_text := format_staged_message_files(staged_files):
         agent_text = f"{agent_text}\n{staged_file_text}".strip()
 
-    persisted_media = []
-    if EnvConfig.IMAGE_ENABLED:
-        persisted_media.extend(resolve_media(image, "image") for image in images)
-    persisted_media.extend(resolve_media(item, "audio") for item in audio)
-    persisted_media.extend(resolve_media(item, "video") for item in videos)
-    persisted_attachments = []
-    if persisted_media and hasattr(messages_db, "insert_media"):
-        try:
-            persisted_attachments = await messages_db.insert_media(
-                msg_time=msg_time,
-                msg_id=event_id,
-                user_id=int(user_id),
-                group_id=group_id,
-                media=persisted_media,
+    with trace_span("staging"):
+        persisted_media = list(
+            await asyncio.gather(
+                *(resolve_media_async(image, "image") for image in (images if EnvConfig.IMAGE_ENABLED else [])),
+                *(resolve_media_async(item, "audio") for item in audio),
+                *(resolve_media_async(item, "video") for item in videos),
             )
-        except Exception as e:
-            logger.warning(f"⚠️ 媒体保存失败（不影响主流程）: {e}")
-    elif images and EnvConfig.IMAGE_ENABLED and hasattr(messages_db, "insert_images"):
-        try:
-            await messages_db.insert_images(
-                msg_time=msg_time,
-                user_id=int(user_id),
-                group_id=group_id,
-                images=images,
-            )
-        except Exception as e:
-            logger.warning(f"⚠️ 图片保存失败（不影响主流程）: {e}")
-
-    if staged_files and hasattr(messages_db, "insert_attachment"):
-        expires_at = int(time.time() * 1000) + EnvConfig.MEDIA_TTL_DAYS * 86400 * 1000
-        for staged_file in staged_files:
+        )
+        persisted_attachments = []
+        if persisted_media and hasattr(messages_db, "insert_media"):
             try:
-                await messages_db.insert_attachment(
+                persisted_attachments = await messages_db.insert_media(
                     msg_time=msg_time,
                     msg_id=event_id,
                     user_id=int(user_id),
                     group_id=group_id,
-                    kind="file",
-                    physical_path=str(staged_file.local_path),
-                    virtual_path=staged_file.virtual_path,
-                    file_name=staged_file.file_name,
-                    mime_type=staged_file.mime_type,
-                    file_size=staged_file.file_size,
-                    sha256=staged_file.sha256,
-                    expires_at=expires_at,
+                    media=persisted_media,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 媒体保存失败（不影响主流程）: {e}")
+        elif images and EnvConfig.IMAGE_ENABLED and hasattr(messages_db, "insert_images"):
+            try:
+                await messages_db.insert_images(
+                    msg_time=msg_time,
+                    user_id=int(user_id),
+                    group_id=group_id,
+                    images=images,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 图片保存失败（不影响主流程）: {e}")
+
+        if staged_files and hasattr(messages_db, "insert_attachments"):
+            expires_at = int(time.time() * 1000) + EnvConfig.MEDIA_TTL_DAYS * 86400 * 1000
+            try:
+                await messages_db.insert_attachments(
+                    [
+                        {
+                            "msg_time": msg_time,
+                            "msg_id": event_id,
+                            "user_id": int(user_id),
+                            "group_id": group_id,
+                            "kind": "file",
+                            "physical_path": str(staged_file.local_path),
+                            "virtual_path": staged_file.virtual_path,
+                            "file_name": staged_file.file_name,
+                            "mime_type": staged_file.mime_type,
+                            "file_size": staged_file.file_size,
+                            "sha256": staged_file.sha256,
+                            "expires_at": expires_at,
+                        }
+                        for staged_file in staged_files
+                    ]
                 )
             except Exception as e:
                 logger.warning(f"⚠️ 文件附件索引失败（不影响主流程）: {e}")
@@ -499,26 +607,27 @@ async def handle_common(event: MessageEvent):  # noqa: C901
         agent_text = f"{agent_text}\n{paths}".strip()
 
     # ── Phase 4: 内容安全 + Agent 处理 ──
-    if EnvConfig.CONTENT_CHECK_ENABLED:
-        risk_check = await message_check(f"{agent_text}{agent_quote_text}".strip(), quoted_images + images)
-    else:
-        risk_check = "Safe"
-    match risk_check:
-        case "Safe":
-            if group_id:
-                await bot.send_group_message_reaction(
-                    group_id=group_id, message_seq=event_id, reaction="32", is_add=True
-                )
-        case "Controversial":
-            if group_id:
-                await bot.send_group_message_reaction(
-                    group_id=group_id, message_seq=event_id, reaction="212", is_add=True
-                )
-        case "Unsafe":
-            if group_id:
-                await bot.send_group_message_reaction(
-                    group_id=group_id, message_seq=event_id, reaction="26", is_add=True
-                )
+    with trace_span("safety_check"):
+        if EnvConfig.CONTENT_CHECK_ENABLED:
+            risk_check = await message_check(f"{agent_text}{agent_quote_text}".strip(), quoted_images + images)
+        else:
+            risk_check = "Safe"
+        match risk_check:
+            case "Safe":
+                if group_id:
+                    await bot.send_group_message_reaction(
+                        group_id=group_id, message_seq=event_id, reaction="32", is_add=True
+                    )
+            case "Controversial":
+                if group_id:
+                    await bot.send_group_message_reaction(
+                        group_id=group_id, message_seq=event_id, reaction="212", is_add=True
+                    )
+            case "Unsafe":
+                if group_id:
+                    await bot.send_group_message_reaction(
+                        group_id=group_id, message_seq=event_id, reaction="26", is_add=True
+                    )
 
     context = AgentRequestContext(
         bot=bot,
@@ -536,6 +645,7 @@ async def handle_common(event: MessageEvent):  # noqa: C901
         quoted_text=agent_quote_text,
     )
     thread_id = agent_thread_id(user_id, group_id)
+    set_trace_attribute("thread_id", str(thread_id))
     from utils.ens_gate import _ens_caller_allowed, _ens_prefix
 
     cleaned = text.strip().lstrip("/")
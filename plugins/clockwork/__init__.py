@@ -72,8 +72,10 @@ async def init_task_system():
         except Exception as e:
             logger.error(f"注册任务 {task.job_id} 到调度器失败: {e}")
 
-    # 4. 同步群组配置到 EnvConfig
+    # 4. 同步群组配置到 EnvConfig，并预热任务快照和处理函数
     await task_manager.initialize()
+    resolved = await task_executor.preload_handlers()
+    logger.info(f"已预先解析 {resolved} 个任务处理函数")
 
     # 5. 注册 NRC 远行商人商品提醒推送（每天 8:10、12:10、16:10、20:10）
     try:
@@ -108,4 +110,9 @@ async def init_task_system():
 async def shutdown_task_system():
     from utils.http_client import aclose_all
 
+    await task_executor.shutdown()
+    try:
+        await task_manager.flush_execution_history()
+    except Exception as exc:
+        logger.error(f"关闭前写入任务执行历史失败: {exc}")
     await aclose_all()
@@ -1,7 +1,15 @@
-"""统一自动任务 Agent 执行 handler。"""
+"""统一自动任务 Agent 执行 handler。
+
+同一协同窗口内触发的自动任务共用一个已初始化的 FrontierCognitive，并共享公开数据工具
+（天气、空间天气、地震等）的调用结果。周期性任务的随机错峰由 ``TaskExecutor`` 在取得
+执行名额之前完成，一次性提醒不参与错峰。
+"""
 
 import json
 import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
 from nonebot import get_bot, logger
 from nonebot.adapters.milky.message import MessageSegment
@@ -11,9 +19,45 @@ from utils.agents import FrontierCognitive
 from utils.configs import EnvConfig
 from utils.database import build_message_metadata
 from utils.message import outgoing_message_content, sanitize_outgoing_text
+from utils.tool_helpers import ToolResultCache, use_tool_result_cache
 
 from .task_models import TaskRunResult
 
+AGENT_TASK_WINDOW_SECONDS = 120
+
+
+@dataclass(slots=True)
+class _CoalescingWindow:
+    cache: ToolResultCache = field(default_factory=ToolResultCache)
+    active: int = 0
+
+
+_windows: dict[int, _CoalescingWindow] = {}
+_shared_cognitive: FrontierCognitive | None = None
+
+
+def _get_cognitive() -> FrontierCognitive:
+    global _shared_cognitive
+    if _shared_cognitive is None:
+        _shared_cognitive = FrontierCognitive()
+    return _shared_cognitive
+
+
+@asynccontextmanager
+async def coalesced_window(now: float | None = None) -> AsyncIterator[None]:
+    """加入 ``now`` 所在的协同窗口，窗口内的任务共享工具结果缓存。"""
+    window_id = int((time.time() if now is None else now) // AGENT_TASK_WINDOW_SECONDS)
+    window = _windows.setdefault(window_id, _CoalescingWindow())
+    window.active += 1
+    try:
+        with use_tool_result_cache(window.cache):
+            yield
+    finally:
+        window.active -= 1
+        # 窗口结束前保留缓存供同窗口后续任务复用；更早且已空闲的窗口随即释放。
+        for stale_id in [key for key, item in _windows.items() if key < window_id and item.active == 0]:
+            _windows.pop(stale_id, None)
+
 
 def _target(metadata):
     if metadata.target_type == "group":
@@ -70,15 +114,15 @@ async def run_agent_task(job_id: str = "", **kwargs) -> TaskRunResult:
         }
     ]
 
-    cognitive = FrontierCognitive()
-    result = await cognitive.chat_agent(
-        messages,
-        owner_user_id,
-        f"ScheduledTask:{job_id}",
-        EnvConfig.AGENT_CAPABILITY,
-        group_id=group_id,
-        thread_id_override=f"scheduled-task:{job_id}",
-    )
+    async with coalesced_window():
+        result = await _get_cognitive().chat_agent(
+            messages,
+            owner_user_id,
+            f"ScheduledTask:{job_id}",
+            EnvConfig.AGENT_CAPABILITY,
+            group_id=group_id,
+            thread_id_override=f"scheduled-task:{job_id}",
+        )
     if not isinstance(result, dict) or "response" not in result:
         raise RuntimeError("Agent 自动任务没有返回有效响应")
 
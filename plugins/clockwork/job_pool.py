@@ -0,0 +1,129 @@
+"""按优先级分类、限制并发的定时任务准入池。
+
+APScheduler 到点后把每个任务作为独立协程放到主循环上，彼此没有上限。任务先在这里
+排队拿到执行名额：全局名额和分类名额都有余量时才开始，排队的任务按分类优先级
+（告警 > 提醒 > 每日播报 > Agent 任务）依次放行，同一分类内先到先得。低优先级分类
+的名额之和小于全局上限，所以批量 Agent 任务占满自己的名额后，提醒仍有空位。
+"""
+
+import asyncio
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from utils.metrics import REGISTRY
+
+JOB_QUEUE_WAIT = REGISTRY.histogram(
+    "frontier_scheduler_job_queue_wait_seconds",
+    "定时任务等待执行名额的耗时（秒）",
+    ("job_class",),
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOBS_RUNNING = REGISTRY.gauge("frontier_scheduler_jobs_running", "正在执行的定时任务数", ("job_class",))
+JOBS_WAITING = REGISTRY.gauge("frontier_scheduler_jobs_waiting", "等待执行名额的定时任务数", ("job_class",))
+
+
+@dataclass(frozen=True, slots=True)
+class JobClass:
+    """任务分类：priority 越小越先放行，limit 为该分类的并发上限，timeout 为默认超时秒数。
+
+    start_jitter 大于 0 时，同类任务已在排队或执行的情况下，新任务在排队前随机等待至多
+    这么多秒再开始，用于错开整点批量触发的周期性任务。
+    """
+
+    name: str
+    priority: int
+    limit: int
+    timeout: float
+    start_jitter: float = 0.0
+
+
+JOB_CLASSES: dict[str, JobClass] = {
+    job_class.name: job_class
+    for job_class in (
+        JobClass("alert", priority=0, limit=4, timeout=120),
+        JobClass("reminder", priority=1, limit=4, timeout=300),
+        JobClass("broadcast", priority=2, limit=2, timeout=900),
+        JobClass("agent", priority=3, limit=2, timeout=600, start_jitter=15.0),
+    )
+}
+JOB_GLOBAL_LIMIT = 6
+
+
+class JobTimeoutError(TimeoutError):
+    """任务超过执行时限后被取消。"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"执行超时（{timeout:g} 秒）")
+        self.timeout = timeout
+
+
+class JobPool:
+    """全局 + 分类双重并发限制的优先级准入池。"""
+
+    def __init__(self, classes: dict[str, JobClass] | None = None, *, limit: int = JOB_GLOBAL_LIMIT):
+        self.classes = dict(classes or JOB_CLASSES)
+        self.limit = max(1, limit)
+        self._running = dict.fromkeys(self.classes, 0)
+        self._total = 0
+        self._waiters: list[tuple[int, int, str, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    def running(self, name: str | None = None) -> int:
+        return self._total if name is None else self._running[name]
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        """等待并占用一个 ``name`` 分类的执行名额，退出时归还。"""
+        await self._acquire(name)
+        try:
+            yield
+        finally:
+            self._release(name)
+
+    async def _acquire(self, name: str) -> None:
+        job_class = self.classes[name]
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (job_class.priority, next(self._sequence), name, future)
+        self._waiters.append(entry)
+        JOBS_WAITING.inc(job_class=name)
+        queued_at = time.perf_counter()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                JOBS_WAITING.dec(job_class=name)
+            elif future.done() and not future.cancelled():
+                # 名额已分配但任务在恢复执行前被取消，归还名额。
+                self._release(name)
+            raise
+        JOB_QUEUE_WAIT.observe(time.perf_counter() - queued_at, job_class=name)
+
+    def _release(self, name: str) -> None:
+        self._running[name] -= 1
+        self._total -= 1
+        JOBS_RUNNING.dec(job_class=name)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for entry in sorted(self._waiters, key=lambda item: item[:2]):
+            if self._total >= self.limit:
+                return
+            _priority, _sequence, name, future = entry
+            if future.done():
+                continue
+            if self._running[name] >= self.classes[name].limit:
+                continue
+            self._waiters.remove(entry)
+            JOBS_WAITING.dec(job_class=name)
+            self._running[name] += 1
+            self._total += 1
+            JOBS_RUNNING.inc(job_class=name)
+            future.set_result(None)
@@ -1,8 +1,13 @@
 import asyncio
 import importlib
 import json
+import random
 import time
 import traceback
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Any
 
 from apscheduler.events import EVENT_JOB_MISSED
@@ -12,9 +17,40 @@ from sqlalchemy import inspect, text
 from sqlalchemy.engine import Engine
 from sqlmodel import Session, col, select
 
-from utils.database import ensure_database_performance_indexes
-
-from .task_models import ScheduledTaskMetadata, TaskConfig, TaskExecutionHistory, TaskGroupMapping, TaskRunResult
+from utils.database import ensure_database_performance_indexes, run_database
+from utils.metrics import REGISTRY
+
+from .job_pool import JobPool, JobTimeoutError
+from .task_models import (
+    ScheduledTaskMetadata,
+    TaskConfig,
+    TaskExecutionHistory,
+    TaskGroupMapping,
+    TaskOverview,
+    TaskRunResult,
+    TaskSnapshot,
+)
+
+JOB_DURATION = REGISTRY.histogram(
+    "frontier_scheduler_job_duration_seconds", "定时任务执行耗时（秒）", ("handler", "status")
+)
+EXECUTION_HISTORY_FLUSH_DELAY = 0.5
+EXECUTION_HISTORY_FLUSH_BATCH = 200
+EXECUTION_HISTORY_FLUSH_SIZE = REGISTRY.histogram(
+    "frontier_scheduler_history_flush_rows",
+    "单次批量写入的任务执行历史条数",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+TASK_OVERVIEW_CACHE_TTL = 5.0
+
+
+@dataclass(slots=True)
+class _PendingExecution:
+    """等待批量落盘的执行记录，附带记录时从调度器读到的 next_run_time。"""
+
+    history: TaskExecutionHistory
+    sync_next_run: bool
+    next_run_time: int | None
 
 
 class TaskManager:
@@ -37,10 +73,32 @@ class TaskManager:
         self.engine = engine
         self.logger = logger
         self._job_func = None  # 由 TaskExecutor 设置
+        self._pending_history: list[_PendingExecution] = []
+        self._history_flush_task: asyncio.Task | None = None
+        self._history_flush_lock = asyncio.Lock()
+        # 任务列表短暂缓存；任何任务变更都会递增 generation 使其失效。
+        self._overview_cache: dict[tuple, tuple[float, list[TaskOverview]]] = {}
+        self._overview_generation = 0
+        # TaskExecutor 触发任务时读取的配置快照，任务变更时按 job_id 失效。
+        self._task_snapshots: dict[str, TaskSnapshot] = {}
+        self._snapshot_generation = 0
 
         # 只监听 missed 事件（成功/失败由 TaskExecutor 处理）
         self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
 
+    def _invalidate_task_overviews(self) -> None:
+        self._overview_generation += 1
+        self._overview_cache.clear()
+
+    def _invalidate_task(self, job_id: str | None = None) -> None:
+        """任务配置变更：清空列表缓存并丢弃对应快照，job_id 为空时丢弃全部快照。"""
+        self._invalidate_task_overviews()
+        self._snapshot_generation += 1
+        if job_id is None:
+            self._task_snapshots.clear()
+        else:
+            self._task_snapshots.pop(job_id, None)
+
     def set_job_func(self, func):
         """设置任务执行函数（由 TaskExecutor.execute 提供）"""
         self._job_func = func
@@ -54,6 +112,11 @@ class TaskManager:
             if "output_summary" not in columns:
                 with self.engine.begin() as conn:
                     conn.execute(text("ALTER TABLE taskexecutionhistory ADD COLUMN output_summary VARCHAR"))
+        if "taskconfig" in table_names:
+            columns = {column["name"] for column in inspector.get_columns("taskconfig")}
+            if "timeout_seconds" not in columns:
+                with self.engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE taskconfig ADD COLUMN timeout_seconds INTEGER"))
         ensure_database_performance_indexes(self.engine)
 
     def add_job_to_scheduler(self, task: TaskConfig):
@@ -77,6 +140,80 @@ class TaskManager:
 
     # ==================== 任务配置管理 ====================
 
+    def _update_existing_task(
+        self,
+        session: Session,
+        existing_task: TaskConfig,
+        *,
+        trigger_type: str,
+        trigger_args: dict,
+        handler_module: str,
+        handler_function: str,
+        timeout_seconds: int | None,
+        group_ids: list[int],
+    ) -> TaskConfig:
+        """按注册参数更新已存在的任务（触发器、处理函数、超时与群组），配置未变时不写库"""
+        job_id = existing_task.job_id
+        updated = False
+        new_trigger_args_str = json.dumps(trigger_args, sort_keys=True)
+        old_trigger_args_str = json.dumps(
+            json.loads(existing_task.trigger_args)
+            if isinstance(existing_task.trigger_args, str)
+            else existing_task.trigger_args,
+            sort_keys=True,
+        )
+
+        if existing_task.trigger_type != trigger_type or old_trigger_args_str != new_trigger_args_str:
+            self.logger.info(
+                f"任务 {job_id} 触发器变更: {existing_task.trigger_type}/{old_trigger_args_str} → {trigger_type}/{new_trigger_args_str}"
+            )
+            try:
+                self.scheduler.reschedule_job(job_id, trigger=trigger_type, **trigger_args)
+            except Exception as e:
+                self.logger.error(f"更新调度器任务 {job_id} 失败: {e}")
+                return existing_task
+            existing_task.trigger_type = trigger_type
+            existing_task.trigger_args = new_trigger_args_str
+            existing_task.updated_at = int(time.time())
+            updated = True
+
+        if existing_task.handler_module != handler_module or existing_task.handler_function != handler_function:
+            existing_task.handler_module = handler_module
+            existing_task.handler_function = handler_function
+            existing_task.updated_at = int(time.time())
+            updated = True
+
+        if existing_task.timeout_seconds != timeout_seconds:
+            existing_task.timeout_seconds = timeout_seconds
+            existing_task.updated_at = int(time.time())
+            updated = True
+
+        if self._sync_task_group_mappings(session, job_id, group_ids):
+            updated = True
+
+        if updated:
+            session.add(existing_task)
+            session.commit()
+            session.refresh(existing_task)
+            self._sync_group_config(job_id, group_ids)
+            self.logger.info(f"任务 {job_id} 已更新")
+        else:
+            self.logger.info(f"任务 {job_id} 已存在且配置未变，跳过")
+        return existing_task
+
+    @staticmethod
+    def _sync_task_group_mappings(session: Session, job_id: str, group_ids: list[int]) -> bool:
+        """同步任务的群组映射，返回是否有变更"""
+        mappings = session.exec(select(TaskGroupMapping).where(TaskGroupMapping.job_id == job_id)).all()
+        new_groups = sorted(set(group_ids))
+        if [m.group_id for m in mappings] == new_groups:
+            return False
+        for m in mappings:
+            session.delete(m)
+        for gid in new_groups:
+            session.add(TaskGroupMapping(job_id=job_id, group_id=gid))
+        return True
+
     async def register_task(
         self,
         job_id: str,
@@ -90,69 +227,27 @@ class TaskManager:
         enabled: bool = True,
         misfire_grace_time: int = 60,
         metadata: ScheduledTaskMetadata | dict[str, Any] | None = None,
+        timeout_seconds: int | None = None,
     ) -> TaskConfig:
         """注册新任务到数据库和调度器"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             # 检查任务是否已存在
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
             existing_task = session.exec(statement).first()
 
             if existing_task:
-                updated = False
-                new_trigger_args_str = json.dumps(trigger_args, sort_keys=True)
-                old_trigger_args_str = json.dumps(
-                    json.loads(existing_task.trigger_args)
-                    if isinstance(existing_task.trigger_args, str)
-                    else existing_task.trigger_args,
-                    sort_keys=True,
+                return self._update_existing_task(
+                    session,
+                    existing_task,
+                    trigger_type=trigger_type,
+                    trigger_args=trigger_args,
+                    handler_module=handler_module,
+                    handler_function=handler_function,
+                    timeout_seconds=timeout_seconds,
+                    group_ids=group_ids,
                 )
 
-                if existing_task.trigger_type != trigger_type or old_trigger_args_str != new_trigger_args_str:
-                    self.logger.info(
-                        f"任务 {job_id} 触发器变更: {existing_task.trigger_type}/{old_trigger_args_str} → {trigger_type}/{new_trigger_args_str}"
-                    )
-                    try:
-                        self.scheduler.reschedule_job(job_id, trigger=trigger_type, **trigger_args)
-                    except Exception as e:
-                        self.logger.error(f"更新调度器任务 {job_id} 失败: {e}")
-                        return existing_task
-                    existing_task.trigger_type = trigger_type
-                    existing_task.trigger_args = new_trigger_args_str
-                    existing_task.updated_at = int(time.time())
-                    updated = True
-
-                if (
-                    existing_task.handler_module != handler_module
-                    or existing_task.handler_function != handler_function
-                ):
-                    existing_task.handler_module = handler_module
-                    existing_task.handler_function = handler_function
-                    existing_task.updated_at = int(time.time())
-                    updated = True
-
-                # 同步群组
-                old_groups = [
-                    m.group_id
-                    for m in session.exec(select(TaskGroupMapping).where(TaskGroupMapping.job_id == job_id)).all()
-                ]
-                new_groups = sorted(set(group_ids))
-                if old_groups != new_groups:
-                    for m in session.exec(select(TaskGroupMapping).where(TaskGroupMapping.job_id == job_id)).all():
-                        session.delete(m)
-                    for gid in new_groups:
-                        session.add(TaskGroupMapping(job_id=job_id, group_id=gid))
-                    updated = True
-
-                if updated:
-                    session.add(existing_task)
-                    session.commit()
-                    session.refresh(existing_task)
-                    self._sync_group_config(job_id, group_ids)
-                    self.logger.info(f"任务 {job_id} 已更新")
-                else:
-                    self.logger.info(f"任务 {job_id} 已存在且配置未变，跳过")
-                return existing_task
-
             # 创建任务配置
             task = TaskConfig(
                 job_id=job_id,
@@ -164,6 +259,7 @@ class TaskManager:
                 trigger_args=json.dumps(trigger_args),
                 enabled=enabled,
                 misfire_grace_time=misfire_grace_time,
+                timeout_seconds=timeout_seconds,
             )
             session.add(task)
 
@@ -247,6 +343,7 @@ class TaskManager:
 
     async def update_task_trigger(self, job_id: str, trigger_type: str, trigger_args: dict) -> bool:
         """修改任务触发器"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
 
@@ -275,6 +372,7 @@ class TaskManager:
 
     async def update_task_groups(self, job_id: str, group_ids: list[int]) -> bool:
         """修改任务推送群组"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
 
@@ -304,6 +402,7 @@ class TaskManager:
 
     async def enable_task(self, job_id: str) -> bool:
         """启用任务"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
 
@@ -342,6 +441,7 @@ class TaskManager:
 
     async def disable_task(self, job_id: str) -> bool:
         """禁用任务（暂停）"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
 
@@ -367,6 +467,7 @@ class TaskManager:
 
     async def delete_task(self, job_id: str) -> bool:
         """删除任务"""
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
 
@@ -403,6 +504,9 @@ class TaskManager:
 
     async def archive_task(self, job_id: str) -> bool:
         """归档任务并从 APScheduler 移除，保留配置和历史。"""
+        # 先落盘待写的执行记录，避免其中缓存的 next_run_time 覆盖归档后的空值。
+        await self.flush_execution_history()
+        self._invalidate_task(job_id)
         with Session(self.engine) as session:
             task = session.exec(select(TaskConfig).where(TaskConfig.job_id == job_id)).first()
             if not task:
@@ -450,9 +554,13 @@ class TaskManager:
 
     async def get_task(self, job_id: str) -> TaskConfig | None:
         """获取任务配置"""
-        with Session(self.engine) as session:
-            statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
-            return session.exec(statement).first()
+
+        def _do() -> TaskConfig | None:
+            with Session(self.engine) as session:
+                statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
+                return session.exec(statement).first()
+
+        return await run_database(self.engine, _do)
 
     async def list_tasks(
         self,
@@ -462,49 +570,170 @@ class TaskManager:
         include_archived: bool = False,
     ) -> list[TaskConfig]:
         """列出任务。enabled=True 只返回启用的，enabled=False 只返回禁用的，enabled=None 返回全部"""
-        with Session(self.engine) as session:
-            statement = select(TaskConfig)
 
-            if enabled is not None:
-                statement = statement.where(TaskConfig.enabled == enabled)
+        def _do() -> list[TaskConfig]:
+            with Session(self.engine) as session:
+                statement = select(TaskConfig)
 
-            if keyword:
-                statement = statement.where(
-                    (TaskConfig.name.contains(keyword)) | (TaskConfig.job_id.contains(keyword))  # type: ignore
-                )
+                if enabled is not None:
+                    statement = statement.where(TaskConfig.enabled == enabled)
 
-            results = session.exec(statement).all()
-            tasks = list(results)
-            if not tasks:
-                return []
+                if keyword:
+                    statement = statement.where(
+                        (TaskConfig.name.contains(keyword)) | (TaskConfig.job_id.contains(keyword))  # type: ignore
+                    )
 
-            metadata_items = session.exec(select(ScheduledTaskMetadata)).all()
-            metadata_by_job_id = {item.job_id: item for item in metadata_items}
-            filtered_tasks = []
-            for task in tasks:
-                metadata = metadata_by_job_id.get(task.job_id)
-                if owner_user_id is not None:
-                    if not metadata or metadata.owner_user_id != str(owner_user_id):
+                results = session.exec(statement).all()
+                tasks = list(results)
+                if not tasks:
+                    return []
+
+                metadata_items = session.exec(select(ScheduledTaskMetadata)).all()
+                metadata_by_job_id = {item.job_id: item for item in metadata_items}
+                filtered_tasks = []
+                for task in tasks:
+                    metadata = metadata_by_job_id.get(task.job_id)
+                    if owner_user_id is not None:
+                        if not metadata or metadata.owner_user_id != str(owner_user_id):
+                            continue
+                    if not include_archived and metadata and metadata.archived:
                         continue
-                if not include_archived and metadata and metadata.archived:
-                    continue
-                filtered_tasks.append(task)
-            return filtered_tasks
+                    filtered_tasks.append(task)
+                return filtered_tasks
+
+        return await run_database(self.engine, _do)
+
+    async def list_task_overviews(
+        self,
+        enabled: bool | None = None,
+        keyword: str | None = None,
+        owner_user_id: str | None = None,
+        include_archived: bool = False,
+        use_cache: bool = True,
+    ) -> list[TaskOverview]:
+        """批量列出任务及其推送群组和元数据，过滤条件与 list_tasks 相同。
+
+        任务与元数据用一次 LEFT JOIN 取出，群组映射再用一次 IN 查询补齐；结果按过滤条件
+        缓存 TASK_OVERVIEW_CACHE_TTL 秒，任务变更或执行历史落盘后立即失效。
+        """
+        key = (enabled, keyword, owner_user_id, include_archived)
+        now = time.monotonic()
+        cached = self._overview_cache.get(key)
+        if use_cache and cached is not None and now - cached[0] < TASK_OVERVIEW_CACHE_TTL:
+            return list(cached[1])
+        generation = self._overview_generation
+
+        def _do() -> list[TaskOverview]:
+            with Session(self.engine) as session:
+                statement = select(TaskConfig, ScheduledTaskMetadata).outerjoin(
+                    ScheduledTaskMetadata, col(ScheduledTaskMetadata.job_id) == col(TaskConfig.job_id)
+                )
+                if enabled is not None:
+                    statement = statement.where(TaskConfig.enabled == enabled)
+                if keyword:
+                    statement = statement.where(
+                        (TaskConfig.name.contains(keyword)) | (TaskConfig.job_id.contains(keyword))  # type: ignore
+                    )
+                if owner_user_id is not None:
+                    statement = statement.where(ScheduledTaskMetadata.owner_user_id == str(owner_user_id))
+                if not include_archived:
+                    # 没有元数据的系统任务在 LEFT JOIN 后 archived 为 NULL，同样保留。
+                    statement = statement.where(col(ScheduledTaskMetadata.archived).is_not(True))
+                rows = session.exec(statement.order_by(col(TaskConfig.id))).all()
+                if not rows:
+                    return []
+
+                groups_by_job_id: dict[str, list[int]] = {task.job_id: [] for task, _ in rows}
+                mappings = session.exec(
+                    select(TaskGroupMapping)
+                    .where(col(TaskGroupMapping.job_id).in_(list(groups_by_job_id)))
+                    .order_by(col(TaskGroupMapping.id))
+                ).all()
+                for mapping in mappings:
+                    groups_by_job_id[mapping.job_id].append(mapping.group_id)
+                return [
+                    TaskOverview(task=task, groups=groups_by_job_id[task.job_id], metadata=metadata)
+                    for task, metadata in rows
+                ]
+
+        overviews = await run_database(self.engine, _do)
+        if use_cache and generation == self._overview_generation:
+            self._overview_cache[key] = (now, overviews)
+        return list(overviews)
+
+    @staticmethod
+    def _build_snapshot(task: TaskConfig, groups: list[int], metadata: ScheduledTaskMetadata | None) -> TaskSnapshot:
+        return TaskSnapshot(
+            job_id=task.job_id,
+            handler_module=task.handler_module,
+            handler_function=task.handler_function,
+            trigger_type=task.trigger_type,
+            enabled=task.enabled,
+            archived=bool(metadata and metadata.archived),
+            groups=list(groups),
+            timeout_seconds=task.timeout_seconds,
+        )
+
+    async def load_task_snapshots(self) -> dict[str, TaskSnapshot]:
+        """一次性载入全部任务的配置快照，供启动时预热。"""
+        generation = self._snapshot_generation
+        overviews = await self.list_task_overviews(include_archived=True, use_cache=False)
+        snapshots = {
+            item.task.job_id: self._build_snapshot(item.task, item.groups, item.metadata) for item in overviews
+        }
+        if generation == self._snapshot_generation:
+            self._task_snapshots = dict(snapshots)
+        return snapshots
+
+    async def get_task_snapshot(self, job_id: str) -> TaskSnapshot | None:
+        """返回任务配置快照；命中时不访问数据库，未命中时读取一次并缓存。"""
+        snapshot = self._task_snapshots.get(job_id)
+        if snapshot is not None:
+            return snapshot
+        generation = self._snapshot_generation
+
+        def _do() -> TaskSnapshot | None:
+            with Session(self.engine) as session:
+                task = session.exec(select(TaskConfig).where(TaskConfig.job_id == job_id)).first()
+                if task is None:
+                    return None
+                metadata = session.exec(
+                    select(ScheduledTaskMetadata).where(ScheduledTaskMetadata.job_id == job_id)
+                ).first()
+                groups = session.exec(
+                    select(TaskGroupMapping.group_id)
+                    .where(TaskGroupMapping.job_id == job_id)
+                    .order_by(col(TaskGroupMapping.id))
+                ).all()
+                return self._build_snapshot(task, list(groups), metadata)
+
+        snapshot = await run_database(self.engine, _do)
+        if snapshot is not None and generation == self._snapshot_generation:
+            self._task_snapshots[job_id] = snapshot
+        return snapshot
 
     async def get_task_metadata(self, job_id: str) -> ScheduledTaskMetadata | None:
         """获取统一自动任务元数据。"""
-        with Session(self.engine) as session:
-            statement = select(ScheduledTaskMetadata).where(ScheduledTaskMetadata.job_id == job_id)
-            return session.exec(statement).first()
+
+        def _do() -> ScheduledTaskMetadata | None:
+            with Session(self.engine) as session:
+                statement = select(ScheduledTaskMetadata).where(ScheduledTaskMetadata.job_id == job_id)
+                return session.exec(statement).first()
+
+        return await run_database(self.engine, _do)
 
     async def get_task_metadata_map(self, job_ids: list[str] | None = None) -> dict[str, ScheduledTaskMetadata]:
         """批量获取任务元数据。"""
-        with Session(self.engine) as session:
-            statement = select(ScheduledTaskMetadata)
-            if job_ids:
-                statement = statement.where(col(ScheduledTaskMetadata.job_id).in_(job_ids))
-            items = session.exec(statement).all()
-            return {item.job_id: item for item in items}
+
+        def _do() -> dict[str, ScheduledTaskMetadata]:
+            with Session(self.engine) as session:
+                statement = select(ScheduledTaskMetadata)
+                if job_ids:
+                    statement = statement.where(col(ScheduledTaskMetadata.job_id).in_(job_ids))
+                items = session.exec(statement).all()
+                return {item.job_id: item for item in items}
+
+        return await run_database(self.engine, _do)
 
     async def user_can_manage_task(self, job_id: str, user_id: str, is_superuser: bool = False) -> bool:
         """检查用户是否可以管理指定任务。"""
@@ -515,10 +744,14 @@ class TaskManager:
 
     async def get_task_groups(self, job_id: str) -> list[int]:
         """获取任务的推送群组"""
-        with Session(self.engine) as session:
-            statement = select(TaskGroupMapping).where(TaskGroupMapping.job_id == job_id)
-            mappings = session.exec(statement).all()
-            return [mapping.group_id for mapping in mappings]
+
+        def _do() -> list[int]:
+            with Session(self.engine) as session:
+                statement = select(TaskGroupMapping).where(TaskGroupMapping.job_id == job_id)
+                mappings = session.exec(statement).all()
+                return [mapping.group_id for mapping in mappings]
+
+        return await run_database(self.engine, _do)
 
     # ==================== 执行历史 ====================
 
@@ -535,9 +768,13 @@ class TaskManager:
         messages_sent: int = 0,
         scheduled_time: int | None = None,
     ) -> None:
-        """记录任务执行历史"""
-        with Session(self.engine) as session:
-            history = TaskExecutionHistory(
+        """记录任务执行历史。
+
+        记录先进入内存缓冲，由短暂延迟后的一次写事务批量落盘，同一时刻触发的一批任务
+        只占用写线程一次；读取历史或统计前会先落盘缓冲。
+        """
+        self._buffer_execution(
+            TaskExecutionHistory(
                 job_id=job_id,
                 execution_time=execution_time,
                 status=status,
@@ -549,33 +786,87 @@ class TaskManager:
                 messages_sent=messages_sent,
                 scheduled_time=scheduled_time,
             )
-            session.add(history)
-
-            # 更新任务统计信息
-            statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
+        )
+        if len(self._pending_history) >= EXECUTION_HISTORY_FLUSH_BATCH:
+            await self.flush_execution_history()
 
-            task = session.exec(statement).first()
-            if task:
-                task.last_run_time = execution_time
-                task.total_runs += 1
-                if status == "success":
-                    task.success_runs += 1
-                elif status == "failed":
-                    task.failed_runs += 1
-
-                # 从 APScheduler 同步 next_run_time
-                try:
-                    job = self.scheduler.get_job(job_id)
-                    if job and job.next_run_time:
-                        task.next_run_time = int(job.next_run_time.timestamp())
-                    else:
-                        task.next_run_time = None
-                except Exception as e:
-                    self.logger.debug(f"同步任务 {job_id} next_run_time 失败: {e}")
+    def _buffer_execution(self, history: TaskExecutionHistory) -> None:
+        # next_run_time 在记录时从 APScheduler 读取，落盘线程不再访问调度器。
+        sync_next_run = True
+        next_run_time = None
+        try:
+            job = self.scheduler.get_job(history.job_id)
+            if job and job.next_run_time:
+                next_run_time = int(job.next_run_time.timestamp())
+        except Exception as e:
+            sync_next_run = False
+            self.logger.debug(f"同步任务 {history.job_id} next_run_time 失败: {e}")
+        self._pending_history.append(_PendingExecution(history, sync_next_run, next_run_time))
+        self._schedule_history_flush()
+
+    def _schedule_history_flush(self) -> None:
+        if self._history_flush_task is None:
+            self._history_flush_task = asyncio.create_task(self._flush_history_later())
+
+    async def _flush_history_later(self) -> None:
+        await asyncio.sleep(EXECUTION_HISTORY_FLUSH_DELAY)
+        self._history_flush_task = None
+        try:
+            await self.flush_execution_history()
+        except Exception as e:
+            self.logger.error(f"批量写入任务执行历史失败: {e}")
+
+    async def flush_execution_history(self) -> int:
+        """把缓冲的执行记录和任务统计在一个写事务中落盘，返回写入条数。"""
+        # 还在等待的延迟落盘任务由本次调用接管。
+        flush_task, self._history_flush_task = self._history_flush_task, None
+        if flush_task is not None:
+            flush_task.cancel()
+        async with self._history_flush_lock:
+            pending, self._pending_history = self._pending_history, []
+            if not pending:
+                return 0
+
+            def _do() -> None:
+                with Session(self.engine) as session:
+                    session.add_all([entry.history for entry in pending])
+                    job_ids = {entry.history.job_id for entry in pending}
+                    tasks = {
+                        task.job_id: task
+                        for task in session.exec(select(TaskConfig).where(col(TaskConfig.job_id).in_(job_ids))).all()
+                    }
+                    for entry in pending:
+                        task = tasks.get(entry.history.job_id)
+                        if task is None:
+                            continue
+                        task.last_run_time = entry.history.execution_time
+                        task.total_runs += 1
+                        if entry.history.status == "success":
+                            task.success_runs += 1
+                        elif entry.history.status in {"failed", "timeout"}:
+                            task.failed_runs += 1
+                        if entry.sync_next_run:
+                            task.next_run_time = entry.next_run_time
+                    session.add_all(tasks.values())
+                    session.commit()
 
-                session.add(task)
+            try:
+                await run_database(self.engine, _do, write=True)
+            except Exception:
+                # 写入失败时放回缓冲，并安排一次延迟落盘重试。
+                self._pending_history[:0] = pending
+                self._schedule_history_flush()
+                raise
+            self._invalidate_task_overviews()
+            EXECUTION_HISTORY_FLUSH_SIZE.observe(len(pending))
+            return len(pending)
 
-            session.commit()
+    async def _flush_before_read(self) -> None:
+        """读取前尽量落盘缓冲；写入失败只记录日志，查询照常返回已落盘的数据。"""
+        try:
+            await self.flush_execution_history()
+        except Exception as e:
+            self.logger.warning(f"读取前写入任务执行历史失败，稍后重试: {e}")
 
     async def get_execution_history(
         self,
@@ -584,65 +875,75 @@ class TaskManager:
         status: str | None = None,
     ) -> list[TaskExecutionHistory]:
         """查询执行历史"""
-        with Session(self.engine) as session:
-            statement = select(TaskExecutionHistory)
+        await self._flush_before_read()
+
+        def _do() -> list[TaskExecutionHistory]:
+            with Session(self.engine) as session:
+                statement = select(TaskExecutionHistory)
+
+                if job_id:
+                    statement = statement.where(TaskExecutionHistory.job_id == job_id)
 
-            if job_id:
-                statement = statement.where(TaskExecutionHistory.job_id == job_id)
+                if status:
+                    statement = statement.where(TaskExecutionHistory.status == status)
 
-            if status:
-                statement = statement.where(TaskExecutionHistory.status == status)
+                statement = statement.order_by(TaskExecutionHistory.execution_time.desc()).limit(limit)  # type: ignore
+                results = session.exec(statement).all()
+                return list(results)
 
-            statement = statement.order_by(TaskExecutionHistory.execution_time.desc()).limit(limit)  # type: ignore
-            results = session.exec(statement).all()
-            return list(results)
+        return await run_database(self.engine, _do)
 
     async def get_task_statistics(self, job_id: str) -> dict[str, Any]:
         """获取任务统计信息"""
-        with Session(self.engine) as session:
-            statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
-
-            task = session.exec(statement).first()
-            if not task:
-                return {}
-
-            # 获取最近执行记录
-            statement = (
-                select(TaskExecutionHistory)
-                .where(TaskExecutionHistory.job_id == job_id)
-                .order_by(TaskExecutionHistory.execution_time.desc())  # type: ignore
-                .limit(10)
-            )
-            recent_history = session.exec(statement).all()
-
-            return {
-                "job_id": task.job_id,
-                "name": task.name,
-                "enabled": task.enabled,
-                "total_runs": task.total_runs,
-                "success_runs": task.success_runs,
-                "failed_runs": task.failed_runs,
-                "success_rate": task.success_runs / task.total_runs if task.total_runs > 0 else 0,
-                "last_run_time": task.last_run_time,
-                "next_run_time": task.next_run_time,
-                "recent_history": [
-                    {
-                        "execution_time": h.execution_time,
-                        "status": h.status,
-                        "duration_ms": h.duration_ms,
-                        "output_summary": h.output_summary,
-                    }
-                    for h in recent_history
-                ],
-            }
+        await self._flush_before_read()
+
+        def _do() -> dict[str, Any]:
+            with Session(self.engine) as session:
+                statement = select(TaskConfig).where(TaskConfig.job_id == job_id)
+
+                task = session.exec(statement).first()
+                if not task:
+                    return {}
+
+                # 获取最近执行记录
+                statement = (
+                    select(TaskExecutionHistory)
+                    .where(TaskExecutionHistory.job_id == job_id)
+                    .order_by(TaskExecutionHistory.execution_time.desc())  # type: ignore
+                    .limit(10)
+                )
+                recent_history = session.exec(statement).all()
+
+                return {
+                    "job_id": task.job_id,
+                    "name": task.name,
+                    "enabled": task.enabled,
+                    "total_runs": task.total_runs,
+                    "success_runs": task.success_runs,
+                    "failed_runs": task.failed_runs,
+                    "success_rate": task.success_runs / task.total_runs if task.total_runs > 0 else 0,
+                    "last_run_time": task.last_run_time,
+                    "next_run_time": task.next_run_time,
+                    "recent_history": [
+                        {
+                            "execution_time": h.execution_time,
+                            "status": h.status,
+                            "duration_ms": h.duration_ms,
+                            "output_summary": h.output_summary,
+                        }
+                        for h in recent_history
+                    ],
+                }
+
+        return await run_database(self.engine, _do)
 
     # ==================== 事件监听 ====================
 
     def _on_job_missed(self, event):
         """APScheduler missed事件回调 - 任务因超过 misfire_grace_time 被跳过"""
         job_id = event.job_id
-        asyncio.create_task(
-            self.log_execution(
+        self._buffer_execution(
+            TaskExecutionHistory(
                 job_id=job_id,
                 status="missed",
                 execution_time=int(time.time()),
@@ -657,18 +958,16 @@ class TaskManager:
         """初始化时同步群组配置到EnvConfig"""
         from utils.configs import EnvConfig
 
-        tasks = await self.list_tasks()
-
-        for task in tasks:
-            group_ids = await self.get_task_groups(task.job_id)
-            config_key = self.JOB_ID_TO_CONFIG_KEY.get(task.job_id)
+        for overview in await self.list_task_overviews(use_cache=False):
+            config_key = self.JOB_ID_TO_CONFIG_KEY.get(overview.task.job_id)
             if config_key:
-                setattr(EnvConfig, config_key, group_ids)
-                self.logger.info(f"同步群组配置: {config_key} = {group_ids}")
+                setattr(EnvConfig, config_key, overview.groups)
+                self.logger.info(f"同步群组配置: {config_key} = {overview.groups}")
 
     async def migrate_legacy_reminders(self) -> int:
         """将旧 reminder_handler 任务迁移到统一 Scheduled Agent Task。"""
         migrated = 0
+        self._invalidate_task()
         with Session(self.engine) as session:
             statement = select(TaskConfig).where(TaskConfig.job_id.startswith("reminder_"))  # type: ignore[attr-defined]
             tasks = session.exec(statement).all()
@@ -734,46 +1033,128 @@ class TaskManager:
 
 
 class TaskExecutor:
-    """任务执行器 - 包装原始任务函数，添加监控和群组管理"""
+    """任务执行器 - 包装原始任务函数，添加监控、群组管理、并发限制和超时"""
+
+    ALERT_HANDLERS = frozenset({"eq_usgs", "nrc_merchant_alert"})
+    REMINDER_HANDLERS = frozenset({"fire_reminder"})
 
-    def __init__(self, task_manager: TaskManager):
+    def __init__(self, task_manager: TaskManager, pool: JobPool | None = None):
         self.task_manager = task_manager
+        self.pool = pool or JobPool()
+        # 处理函数按 (模块, 函数名) 解析一次后常驻；任务改用其他处理函数时自然按新键解析。
+        self._handlers: dict[tuple[str, str], Callable[..., Awaitable[Any]]] = {}
+        self._running_tasks: set[asyncio.Task] = set()
+        self._in_flight: Counter[str] = Counter()
+
+    @classmethod
+    def classify(cls, snapshot: TaskSnapshot) -> str:
+        """按处理函数划分任务分类；一次性的 Agent 任务视为提醒，周期性的视为 Agent 任务。"""
+        if snapshot.handler_function in cls.ALERT_HANDLERS:
+            return "alert"
+        if snapshot.handler_function in cls.REMINDER_HANDLERS:
+            return "reminder"
+        if (snapshot.handler_module, snapshot.handler_function) == (
+            TaskManager.AGENT_TASK_HANDLER_MODULE,
+            TaskManager.AGENT_TASK_HANDLER_FUNCTION,
+        ):
+            return "reminder" if snapshot.trigger_type == "date" else "agent"
+        return "broadcast"
+
+    @asynccontextmanager
+    async def _admit(self, job_class: str) -> AsyncIterator[None]:
+        """取得 ``job_class`` 的执行名额；同类任务已在途时先按分类的 start_jitter 随机错开。
+
+        错峰等待发生在排队之前，不占用执行名额，也不计入任务超时。
+        """
+        self._in_flight[job_class] += 1
+        try:
+            start_jitter = self.pool.classes[job_class].start_jitter
+            if start_jitter > 0 and self._in_flight[job_class] > 1:
+                await asyncio.sleep(random.uniform(0, start_jitter))  # noqa: S311
+            async with self.pool.slot(job_class):
+                yield
+        finally:
+            self._in_flight[job_class] -= 1
+
+    async def shutdown(self) -> None:
+        """取消排队和执行中的任务，等待它们写入 cancelled 执行记录。"""
+        current = asyncio.current_task()
+        tasks = [task for task in self._running_tasks if task is not current]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def preload_handlers(self) -> int:
+        """启动时载入全部任务快照并预先解析处理函数，返回解析成功的数量。
+
+        解析失败只记录日志，任务触发时会再次尝试并按失败记录执行历史。
+        """
+        resolved = 0
+        for snapshot in (await self.task_manager.load_task_snapshots()).values():
+            if not snapshot.enabled or snapshot.archived:
+                continue
+            try:
+                self._load_handler(snapshot.handler_module, snapshot.handler_function)
+            except Exception as e:
+                self.task_manager.logger.warning(
+                    f"任务 {snapshot.job_id} 处理函数 {snapshot.handler_module}.{snapshot.handler_function} 解析失败: {e}"
+                )
+                continue
+            resolved += 1
+        return resolved
 
     async def execute(self, job_id: str) -> None:
         """
         执行任务的统一入口
         1. 检查任务是否启用
-        2. 获取任务配置和群组列表
-        3. 执行原始任务函数
+        2. 从内存快照获取任务配置和群组列表（未命中时读取一次数据库）
+        3. 按任务分类排队取得执行名额，在超时限制内执行原始任务函数
         4. 记录执行结果
         """
+        task = asyncio.current_task()
+        if task is not None:
+            self._running_tasks.add(task)
+        try:
+            await self._execute(job_id)
+        finally:
+            if task is not None:
+                self._running_tasks.discard(task)
+
+    async def _execute(self, job_id: str) -> None:  # noqa: C901
         start_time = time.time()
         execution_time = int(start_time)
+        handler_name = "unknown"
 
         try:
-            # 获取任务配置
-            task = await self.task_manager.get_task(job_id)
-            if not task or not task.enabled:
-                await self.task_manager.log_execution(job_id, "skipped", execution_time)
-                return
-            metadata = await self.task_manager.get_task_metadata(job_id)
-            if metadata and metadata.archived:
+            # 获取任务配置快照
+            snapshot = await self.task_manager.get_task_snapshot(job_id)
+            if not snapshot or not snapshot.enabled or snapshot.archived:
                 await self.task_manager.log_execution(job_id, "skipped", execution_time)
                 return
 
-            # 动态导入任务处理函数
-            handler = self._load_handler(task.handler_module, task.handler_function)
+            handler_name = snapshot.handler_function
+            handler = self._load_handler(snapshot.handler_module, snapshot.handler_function)
+            group_ids = list(snapshot.groups)
+            job_class = self.classify(snapshot)
+            timeout = snapshot.timeout_seconds or self.pool.classes[job_class].timeout
 
-            # 获取推送群组
-            group_ids = await self.task_manager.get_task_groups(job_id)
-
-            # 执行任务
-            result = await handler(job_id=job_id)
+            # 排队取得执行名额后执行任务；耗时从拿到名额开始计算
+            async with self._admit(job_class):
+                start_time = time.time()
+                try:
+                    async with asyncio.timeout(timeout) as deadline:
+                        result = await handler(job_id=job_id)
+                except TimeoutError:
+                    if not deadline.expired():
+                        raise
+                    raise JobTimeoutError(timeout) from None
             if not isinstance(result, TaskRunResult):
                 result = TaskRunResult(groups_sent=group_ids, messages_sent=len(group_ids))
 
             # 记录成功
             duration = int((time.time() - start_time) * 1000)
+            JOB_DURATION.observe(duration / 1000, handler=handler_name, status="success")
             await self.task_manager.log_execution(
                 job_id=job_id,
                 status="success",
@@ -783,11 +1164,36 @@ class TaskExecutor:
                 groups_sent=result.groups_sent if result.groups_sent is not None else group_ids,
                 messages_sent=result.messages_sent,
             )
-            if task.trigger_type == "date":
+            if snapshot.trigger_type == "date":
                 await self.task_manager.archive_task(job_id)
 
+        except JobTimeoutError as e:
+            duration = int((time.time() - start_time) * 1000)
+            JOB_DURATION.observe(duration / 1000, handler=handler_name, status="timeout")
+            await self.task_manager.log_execution(
+                job_id=job_id,
+                status="timeout",
+                execution_time=execution_time,
+                duration_ms=duration,
+                error_message=str(e),
+            )
+            self.task_manager.logger.error(f"任务 {job_id} {e}，已取消")
+
+        except asyncio.CancelledError:
+            duration = int((time.time() - start_time) * 1000)
+            JOB_DURATION.observe(duration / 1000, handler=handler_name, status="cancelled")
+            await self.task_manager.log_execution(
+                job_id=job_id,
+                status="cancelled",
+                execution_time=execution_time,
+                duration_ms=duration,
+            )
+            self.task_manager.logger.warning(f"任务 {job_id} 已被取消")
+            raise
+
         except Exception as e:
             duration = int((time.time() - start_time) * 1000)
+            JOB_DURATION.observe(duration / 1000, handler=handler_name, status="failed")
             error_traceback = traceback.format_exc()
             await self.task_manager.log_execution(
                 job_id=job_id,
@@ -800,6 +1206,10 @@ class TaskExecutor:
             self.task_manager.logger.error(f"任务 {job_id} 执行失败: {e}\n{error_traceback}")
 
     def _load_handler(self, module_name: str, function_name: str):
-        """动态加载任务处理函数"""
-        module = importlib.import_module(module_name)
-        return getattr(module, function_name)
+        """动态加载任务处理函数，解析结果按 (模块, 函数名) 缓存"""
+        key = (module_name, function_name)
+        handler = self._handlers.get(key)
+        if handler is None:
+            module = importlib.import_module(module_name)
+            handler = self._handlers[key] = getattr(module, function_name)
+        return handler
@@ -28,6 +28,7 @@ class TaskConfig(SQLModel, table=True):
     # 状态和元信息
     enabled: bool = Field(default=True, index=True)  # 是否启用
     misfire_grace_time: int = Field(default=60)  # 容错时间（秒）
+    timeout_seconds: int | None = Field(default=None)  # 执行超时（秒），为空时使用任务分类的默认值
 
     # 时间戳
     created_at: int = Field(default_factory=lambda: int(datetime.datetime.now().timestamp()))
@@ -61,7 +62,7 @@ class TaskExecutionHistory(SQLModel, table=True):
 
     # 执行信息
     execution_time: int = Field(index=True)  # 执行时间戳
-    status: str  # "success" | "failed" | "missed" | "skipped"
+    status: str  # "success" | "failed" | "timeout" | "cancelled" | "missed" | "skipped"
 
     # 执行结果
     duration_ms: int | None = Field(default=None)  # 执行耗时（毫秒）
@@ -105,3 +106,26 @@ class TaskRunResult:
     groups_sent: list[int] | None = None
     messages_sent: int = 0
     output_summary: str | None = None
+
+
+@dataclass(slots=True)
+class TaskOverview:
+    """任务列表批量查询的结果：任务配置、推送群组和自动任务元数据。"""
+
+    task: TaskConfig
+    groups: list[int]
+    metadata: ScheduledTaskMetadata | None = None
+
+
+@dataclass(slots=True)
+class TaskSnapshot:
+    """TaskExecutor 触发任务时所需的配置快照，常驻内存，任务变更时失效。"""
+
+    job_id: str
+    handler_module: str
+    handler_function: str
+    trigger_type: str
+    enabled: bool
+    archived: bool
+    groups: list[int]
+    timeout_seconds: int | None = None
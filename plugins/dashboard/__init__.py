@@ -4,6 +4,7 @@ from fastapi.staticfiles import StaticFiles
 from nonebot import get_app, get_driver, logger
 
 from .api import router as api_router
+from .api.metrics_routes import router as metrics_router
 
 driver = get_driver()
 
@@ -15,6 +16,8 @@ async def mount_dashboard():
 
     # 挂载 API 路由
     app.include_router(api_router, prefix="/api/dashboard")
+    # Prometheus 约定的抓取路径，不挂在 Dashboard API 前缀下
+    app.include_router(metrics_router, tags=["metrics"])
 
     # 挂载静态文件（前端）
     web_dir = Path(__file__).parent / "web"
@@ -1,7 +1,20 @@
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, col, func, select
+import time
+from collections import OrderedDict
 
-from utils.database import Message, get_engine
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, func, select
+
+from utils.database import (
+    MESSAGE_FTS_MIN_QUERY_LENGTH,
+    Message,
+    count_messages_from_stats,
+    get_engine,
+    list_daily_message_stats,
+    list_group_message_stats,
+    list_user_message_stats,
+    message_fts_condition,
+    message_fts_ready,
+)
 
 from ..auth import require_auth
 
@@ -10,6 +23,28 @@ engine = get_engine()
 router = APIRouter()
 AUTH_DEPENDENCY = Depends(require_auth)
 
+# 带过滤条件的总数只数到上限并短暂缓存，翻页时不再重复全量 COUNT。
+TOTAL_COUNT_CAP = 10_000
+TOTAL_CACHE_TTL = 60.0
+TOTAL_CACHE_SIZE = 256
+_total_cache: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+
+def _cached_total(key: tuple, statement) -> tuple[int, bool]:
+    now = time.monotonic()
+    cached = _total_cache.get(key)
+    if cached is not None and now - cached[0] < TOTAL_CACHE_TTL:
+        _total_cache.move_to_end(key)
+        return cached[1], cached[1] >= TOTAL_COUNT_CAP
+    with Session(engine) as session:
+        capped = statement.with_only_columns(Message.time).limit(TOTAL_COUNT_CAP).subquery()
+        total = int(session.exec(select(func.count()).select_from(capped)).one())
+    _total_cache[key] = (now, total)
+    _total_cache.move_to_end(key)
+    while len(_total_cache) > TOTAL_CACHE_SIZE:
+        _total_cache.popitem(last=False)
+    return total, total >= TOTAL_COUNT_CAP
+
 
 @router.get("/")
 async def list_messages(
@@ -17,95 +52,79 @@ async def list_messages(
     user_id: int | None = None,
     role: str | None = None,
     search: str | None = None,
-    page: int = Query(default=1, ge=1),
+    before: int | None = None,
     page_size: int = Query(default=50, ge=1, le=200),
     start_time: int | None = None,
     end_time: int | None = None,
     user: dict = AUTH_DEPENDENCY,
 ):
-    """分页查询消息列表"""
-    with Session(engine) as session:
-        statement = select(Message)
-
-        if group_id is not None:
-            statement = statement.where(Message.group_id == group_id)
-        if user_id is not None:
-            statement = statement.where(Message.user_id == user_id)
-        if role:
-            statement = statement.where(Message.role == role)
-        if search:
+    """按时间倒序的游标分页查询消息列表；``before`` 传上一页返回的 ``next_cursor``。"""
+    statement = select(Message)
+
+    if group_id is not None:
+        statement = statement.where(Message.group_id == group_id)
+    if user_id is not None:
+        statement = statement.where(Message.user_id == user_id)
+    if role:
+        statement = statement.where(Message.role == role)
+    if search:
+        if len(search.strip()) >= MESSAGE_FTS_MIN_QUERY_LENGTH and message_fts_ready(engine):
+            statement = statement.where(message_fts_condition(search))
+        else:
             statement = statement.where(Message.content.contains(search))  # type: ignore
-        if start_time is not None:
-            statement = statement.where(Message.time >= start_time)
-        if end_time is not None:
-            statement = statement.where(Message.time <= end_time)
-
-        # 总数
-        count_stmt = select(func.count()).select_from(statement.subquery())
-        total = session.exec(count_stmt).one()
-
-        # 分页查询
-        statement = (
-            statement.order_by(Message.time.desc())  # type: ignore
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-        messages = session.exec(statement).all()
-
-        return {
-            "messages": [
-                {
-                    "time": m.time,
-                    "msg_id": m.msg_id,
-                    "user_id": m.user_id,
-                    "group_id": m.group_id,
-                    "user_name": m.user_name,
-                    "role": m.role,
-                    "content": m.content,
-                }
-                for m in messages
-            ],
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size if total > 0 else 1,
-        }
+    if start_time is not None:
+        statement = statement.where(Message.time >= start_time)
+    if end_time is not None:
+        statement = statement.where(Message.time <= end_time)
+
+    # 总数：无额外过滤时直接读统计表，否则为带上限的缓存计数
+    if user_id is None and not role and not search and start_time is None and end_time is None:
+        total, total_capped = count_messages_from_stats(engine, group_id=group_id), False
+    else:
+        total, total_capped = _cached_total((group_id, user_id, role, search, start_time, end_time), statement)
+
+    if before is not None:
+        statement = statement.where(Message.time < before)
+    statement = statement.order_by(Message.time.desc()).limit(page_size + 1)  # type: ignore
+    with Session(engine) as session:
+        messages = list(session.exec(statement).all())
+
+    has_more = len(messages) > page_size
+    messages = messages[:page_size]
+    return {
+        "messages": [
+            {
+                "time": m.time,
+                "msg_id": m.msg_id,
+                "user_id": m.user_id,
+                "group_id": m.group_id,
+                "user_name": m.user_name,
+                "role": m.role,
+                "content": m.content,
+            }
+            for m in messages
+        ],
+        "total": total,
+        "total_capped": total_capped,
+        "page_size": page_size,
+        "has_more": has_more,
+        "next_cursor": messages[-1].time if has_more else None,
+    }
 
 
 @router.get("/groups")
 async def list_groups(user: dict = AUTH_DEPENDENCY):
-    """获取所有群组及其消息数量"""
-    with Session(engine) as session:
-        statement = (
-            select(Message.group_id, func.count().label("count"))
-            .where(col(Message.group_id).is_not(None))
-            .group_by(col(Message.group_id))
-            .order_by(func.count().desc())
-        )
-        results = session.exec(statement).all()
-
-        return {"groups": [{"group_id": row[0], "message_count": row[1]} for row in results if row[0] is not None]}
+    """获取所有群组及其消息数量（读取触发器维护的统计表）"""
+    return {"groups": list_group_message_stats(engine)}
 
 
 @router.get("/users")
 async def list_users(user: dict = AUTH_DEPENDENCY):
-    """获取所有用户及其消息数量"""
-    with Session(engine) as session:
-        statement = (
-            select(Message.user_id, Message.user_name, func.count().label("count"))
-            .group_by(col(Message.user_id))
-            .order_by(func.count().desc())
-            .limit(200)
-        )
-        results = session.exec(statement).all()
-
-        return {
-            "users": [
-                {
-                    "user_id": row[0],
-                    "user_name": row[1],
-                    "message_count": row[2],
-                }
-                for row in results
-            ]
-        }
+    """获取所有用户及其消息数量（读取触发器维护的统计表）"""
+    return {"users": list_user_message_stats(engine, limit=200)}
+
+
+@router.get("/daily")
+async def list_daily_volume(days: int = Query(default=30, ge=1, le=366), user: dict = AUTH_DEPENDENCY):
+    """获取最近若干天的每日消息量"""
+    return {"days": list_daily_message_stats(engine, days=days)}
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics import REGISTRY
+
+from ..auth import require_metrics_access
+
+router = APIRouter()
+METRICS_DEPENDENCY = Depends(require_metrics_access)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(_access: None = METRICS_DEPENDENCY):
+    """以 Prometheus text format 导出进程内指标"""
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -26,7 +26,7 @@ SENSITIVE_FIELDS = {
         "nasa_api_key",
         "github_pat",
     },
-    "dashboard": {"jwt_secret", "password"},
+    "dashboard": {"jwt_secret", "password", "metrics_token"},
 }
 
 
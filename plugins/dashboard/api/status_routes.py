@@ -8,12 +8,23 @@ from fastapi import APIRouter, Depends
 from nonebot import get_bots
 from sqlmodel import Session, func, select
 
+from utils.alert_latency import AlertTimeline, alert_latency_summary
 from utils.configs import EnvConfig
-from utils.database import Message, User, get_engine
+from utils.database import (
+    ALERT_TIMING_RETENTION_DAYS,
+    AlertTimingDatabase,
+    User,
+    count_messages_from_stats,
+    get_engine,
+)
+from utils.tool_helpers import tool_metrics_summary
+from utils.tracing import recent_traces, stage_breakdown
 
 from ..auth import require_auth
 
 engine = get_engine()
+alert_timings = AlertTimingDatabase(engine)
+ALERT_SUMMARY_MAX_ROWS = 2000
 
 router = APIRouter()
 AUTH_DEPENDENCY = Depends(require_auth)
@@ -60,9 +71,9 @@ async def get_status_overview(user: dict = AUTH_DEPENDENCY):
     bots = get_bots()
     uptime_seconds = int(time.time() - _start_time)
 
-    # 数据库统计
+    # 数据库统计；消息总数来自统计表，User / TaskConfig 都是小表
+    message_count = count_messages_from_stats(engine)
     with Session(engine) as session:
-        message_count = session.exec(select(func.count()).select_from(Message)).one()
         user_count = session.exec(select(func.count()).select_from(User)).one()
 
         # 任务数量（如果 clockwork 插件已加载）
@@ -126,3 +137,34 @@ async def get_system_status(user: dict = AUTH_DEPENDENCY):
             "percent": round(disk_usage.used / disk_usage.total * 100, 1),
         },
     }
+
+
+@router.get("/tools")
+async def get_tool_metrics(user: dict = AUTH_DEPENDENCY):
+    """获取工具调用耗时分位数、错误分布与在途数"""
+    return {"tools": tool_metrics_summary()}
+
+
+@router.get("/pipeline")
+async def get_pipeline_breakdown(limit: int = 20, user: dict = AUTH_DEPENDENCY):
+    """获取消息处理流水线各阶段耗时分布与最近的 trace"""
+    limit = max(1, min(limit, 200))
+    return {"stages": stage_breakdown("handle_common"), "recent": recent_traces(limit)}
+
+
+@router.get("/alerts")
+async def get_alert_latency(source: str = "cenc", days: int = 30, limit: int = 20, user: dict = AUTH_DEPENDENCY):
+    """获取预警从发布、接收到各群送达的耗时分位数与最近的时间线"""
+    days = max(1, min(days, ALERT_TIMING_RETENTION_DAYS))
+    limit = max(1, min(limit, 200))
+    since_ms = int((time.time() - days * 86400) * 1000)
+    # 分位数只看已推送的报文；重复、低于阈值等结果单独计数，不挤占取样窗口。
+    sent_rows = await alert_timings.recent(source, since_ms=since_ms, outcome="sent", limit=ALERT_SUMMARY_MAX_ROWS)
+    recent_rows = await alert_timings.recent(source, since_ms=since_ms, limit=limit)
+    outcomes = await alert_timings.count_outcomes(source, since_ms=since_ms)
+    summary = alert_latency_summary(AlertTimeline.from_row(row) for row in sent_rows)
+    return {
+        **summary,
+        "outcomes": outcomes,
+        "recent": [AlertTimeline.from_row(row).to_dict() for row in recent_rows],
+    }
@@ -47,13 +47,13 @@ async def list_tasks(
     except ImportError:
         raise HTTPException(status_code=503, detail="任务管理系统未加载")
 
-    tasks = await task_manager.list_tasks(enabled=enabled, keyword=keyword, include_archived=include_archived)
-    metadata_map = await task_manager.get_task_metadata_map([task.job_id for task in tasks])
+    overviews = await task_manager.list_task_overviews(
+        enabled=enabled, keyword=keyword, include_archived=include_archived
+    )
 
     result = []
-    for task in tasks:
-        groups = await task_manager.get_task_groups(task.job_id)
-        metadata = metadata_map.get(task.job_id)
+    for overview in overviews:
+        task, groups, metadata = overview.task, overview.groups, overview.metadata
         result.append(
             {
                 "job_id": task.job_id,
@@ -103,6 +103,7 @@ async def get_task(job_id: str, user: dict = Depends(require_auth)):
         "trigger_args": json.loads(task.trigger_args),
         "enabled": task.enabled,
         "misfire_grace_time": task.misfire_grace_time,
+        "timeout_seconds": task.timeout_seconds,
         "total_runs": task.total_runs,
         "success_runs": task.success_runs,
         "failed_runs": task.failed_runs,
@@ -71,6 +71,25 @@ async def require_auth(
     return verify_token(token)
 
 
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+async def require_metrics_access(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = SECURITY_DEPENDENCY,
+) -> None:
+    """FastAPI 依赖：配置了 metrics_token 时校验 Bearer token，否则只允许本机抓取。"""
+    expected = EnvConfig.DASHBOARD_METRICS_TOKEN
+    if expected:
+        provided = credentials.credentials if credentials else ""
+        if not secrets.compare_digest(provided, expected):
+            raise HTTPException(status_code=401, detail="无效的 metrics token")
+        return
+    host = request.client.host if request.client else None
+    if host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="未配置 metrics_token 时仅允许本机访问")
+
+
 def check_rate_limit(ip: str) -> bool:
     """检查登录频率限制，返回 True 表示允许，False 表示超过限制"""
     now = time.time()
@@ -140,22 +140,147 @@ const DashboardPage = {
                     </div>
                 </div>
             </div>
+
+            <!-- 工具调用耗时 -->
+            <div class="bg-white rounded-lg shadow p-6">
+                <h2 class="text-lg font-semibold text-gray-800 mb-4">工具调用耗时</h2>
+                <p v-if="!tools.length" class="text-sm text-gray-500">暂无工具调用记录</p>
+                <div v-else class="overflow-x-auto">
+                    <table class="min-w-full text-sm">
+                        <thead>
+                            <tr class="text-left text-gray-500 border-b">
+                                <th class="py-2 pr-4">工具</th>
+                                <th class="py-2 pr-4">调用</th>
+                                <th class="py-2 pr-4">失败</th>
+                                <th class="py-2 pr-4">进行中</th>
+                                <th class="py-2 pr-4">p50</th>
+                                <th class="py-2 pr-4">p95</th>
+                                <th class="py-2 pr-4">p99</th>
+                                <th class="py-2 pr-4">产物 p50</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            <tr v-for="item in tools" :key="item.tool" class="border-b last:border-0">
+                                <td class="py-2 pr-4 font-mono">{{ item.tool }}</td>
+                                <td class="py-2 pr-4">{{ item.calls }}</td>
+                                <td class="py-2 pr-4" :title="formatErrors(item.errors)">{{ item.failures }}</td>
+                                <td class="py-2 pr-4">{{ item.in_flight }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.latency?.p50) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.latency?.p95) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.latency?.p99) }}</td>
+                                <td class="py-2 pr-4">{{ formatBytes(item.artifact_bytes?.p50) }}</td>
+                            </tr>
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+
+            <!-- 消息流水线阶段耗时 -->
+            <div class="bg-white rounded-lg shadow p-6">
+                <h2 class="text-lg font-semibold text-gray-800 mb-4">消息处理阶段耗时</h2>
+                <p v-if="!pipeline.stages?.length" class="text-sm text-gray-500">暂无消息处理记录</p>
+                <div v-else class="overflow-x-auto">
+                    <table class="min-w-full text-sm">
+                        <thead>
+                            <tr class="text-left text-gray-500 border-b">
+                                <th class="py-2 pr-4">阶段</th>
+                                <th class="py-2 pr-4">次数</th>
+                                <th class="py-2 pr-4">平均</th>
+                                <th class="py-2 pr-4">p50</th>
+                                <th class="py-2 pr-4">p95</th>
+                                <th class="py-2 pr-4">p99</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            <tr v-for="item in pipeline.stages" :key="item.stage" class="border-b last:border-0">
+                                <td class="py-2 pr-4 font-mono">{{ item.stage }}</td>
+                                <td class="py-2 pr-4">{{ item.count }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.mean) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p50) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p95) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p99) }}</td>
+                            </tr>
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+
+            <!-- 地震预警送达耗时 -->
+            <div class="bg-white rounded-lg shadow p-6">
+                <h2 class="text-lg font-semibold text-gray-800 mb-4">地震预警送达耗时（近 30 天）</h2>
+                <p v-if="!alerts.stages?.length" class="text-sm text-gray-500">暂无已推送的预警</p>
+                <div v-else class="overflow-x-auto space-y-6">
+                    <table class="min-w-full text-sm">
+                        <thead>
+                            <tr class="text-left text-gray-500 border-b">
+                                <th class="py-2 pr-4">阶段</th>
+                                <th class="py-2 pr-4">次数</th>
+                                <th class="py-2 pr-4">平均</th>
+                                <th class="py-2 pr-4">p50</th>
+                                <th class="py-2 pr-4">p95</th>
+                                <th class="py-2 pr-4">p99</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            <tr v-for="item in alerts.stages" :key="item.stage" class="border-b last:border-0">
+                                <td class="py-2 pr-4 font-mono">{{ item.stage }}</td>
+                                <td class="py-2 pr-4">{{ item.count }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.mean) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p50) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p95) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p99) }}</td>
+                            </tr>
+                        </tbody>
+                    </table>
+                    <table class="min-w-full text-sm">
+                        <thead>
+                            <tr class="text-left text-gray-500 border-b">
+                                <th class="py-2 pr-4">群</th>
+                                <th class="py-2 pr-4">送达</th>
+                                <th class="py-2 pr-4">失败</th>
+                                <th class="py-2 pr-4">p50</th>
+                                <th class="py-2 pr-4">p95</th>
+                                <th class="py-2 pr-4">最大</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            <tr v-for="item in alerts.groups" :key="item.group" class="border-b last:border-0">
+                                <td class="py-2 pr-4 font-mono">{{ item.group }}</td>
+                                <td class="py-2 pr-4">{{ item.count }}</td>
+                                <td class="py-2 pr-4" :class="item.failures ? 'text-red-600' : ''">{{ item.failures }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p50) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.p95) }}</td>
+                                <td class="py-2 pr-4">{{ formatSeconds(item.max) }}</td>
+                            </tr>
+                        </tbody>
+                    </table>
+                </div>
+            </div>
         </div>
     `,
     setup() {
         const { ref, onMounted, onUnmounted } = Vue;
         const overview = ref({});
         const system = ref({});
+        const tools = ref([]);
+        const pipeline = ref({});
+        const alerts = ref({});
         let interval = null;
         
         const fetchData = async () => {
             try {
-                const [overviewData, systemData] = await Promise.all([
+                const [overviewData, systemData, toolData, pipelineData, alertData] = await Promise.all([
                     ApiClient.get('/status/overview'),
-                    ApiClient.get('/status/system')
+                    ApiClient.get('/status/system'),
+                    ApiClient.get('/status/tools'),
+                    ApiClient.get('/status/pipeline'),
+                    ApiClient.get('/status/alerts')
                 ]);
                 overview.value = overviewData;
                 system.value = systemData;
+                tools.value = toolData.tools || [];
+                pipeline.value = pipelineData;
+                alerts.value = alertData;
             } catch (err) {
                 showToast('加载数据失败: ' + err.message, 'error');
             }
@@ -173,6 +298,22 @@ const DashboardPage = {
             return parts.join(' ') || '少于1分钟';
         };
         
+        const formatSeconds = (value) => {
+            if (value === null || value === undefined) return '-';
+            return value < 1 ? `${Math.round(value * 1000)}ms` : `${value.toFixed(2)}s`;
+        };
+
+        const formatBytes = (value) => {
+            if (value === null || value === undefined) return '-';
+            if (value < 1024) return `${Math.round(value)}B`;
+            if (value < 1024 * 1024) return `${(value / 1024).toFixed(1)}KB`;
+            return `${(value / 1024 / 1024).toFixed(1)}MB`;
+        };
+
+        const formatErrors = (errors) => Object.entries(errors || {})
+            .map(([name, count]) => `${name}: ${count}`)
+            .join('\n');
+
         onMounted(() => {
             fetchData();
             interval = setInterval(fetchData, 30000);
@@ -182,6 +323,6 @@ const DashboardPage = {
             if (interval) clearInterval(interval);
         });
         
-        return { overview, system, formatUptime };
+        return { overview, system, tools, pipeline, alerts, formatUptime, formatSeconds, formatBytes, formatErrors };
     }
 };
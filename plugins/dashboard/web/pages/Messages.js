@@ -81,6 +81,8 @@ const MessagesPage = {
         const page = ref(1);
         const total = ref(0);
         const totalPages = ref(1);
+        // cursors[i] 为第 i + 1 页的 before 游标，第一页为 null
+        const cursors = ref([null]);
         const selectedGroup = ref(null);
         const selectedRole = ref('');
         const searchText = ref('');
@@ -98,7 +100,8 @@ const MessagesPage = {
             loading.value = true;
             try {
                 const params = new URLSearchParams();
-                params.append('page', page.value);
+                const cursor = cursors.value[page.value - 1];
+                if (cursor !== null && cursor !== undefined) params.append('before', cursor);
                 params.append('page_size', '50');
                 if (selectedGroup.value !== null) params.append('group_id', selectedGroup.value);
                 if (selectedRole.value) params.append('role', selectedRole.value);
@@ -107,7 +110,10 @@ const MessagesPage = {
                 const data = await ApiClient.get('/messages/?' + params);
                 messages.value = data.messages;
                 total.value = data.total;
-                totalPages.value = data.total_pages;
+                if (data.has_more) cursors.value[page.value] = data.next_cursor;
+                // 游标分页无法跳页；带过滤条件时总数有上限，至少保证“下一页”可用
+                const estimated = Math.max(1, Math.ceil(data.total / data.page_size));
+                totalPages.value = data.has_more ? Math.max(estimated, page.value + 1) : page.value;
             } catch (err) {
                 showToast('加载消息失败: ' + err.message, 'error');
             } finally {
@@ -117,10 +123,12 @@ const MessagesPage = {
 
         const onFilterChange = () => {
             page.value = 1;
+            cursors.value = [null];
             fetchMessages();
         };
 
         const onPageChange = (newPage) => {
+            if (newPage < 1 || newPage > cursors.value.length) return;
             page.value = newPage;
             fetchMessages();
         };
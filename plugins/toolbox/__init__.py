@@ -315,7 +315,7 @@ async def send_pending_update_changelog(lock_info: UpdateLockInfo) -> None:
 
 
 async def _set_wake_show(group_id: int) -> str:
-    words = _group_settings().get(group_id, SET_WAKE_KEY)
+    words = await _group_settings().aget(group_id, SET_WAKE_KEY)
     if not words:
         return f"当前群未设置唤醒词，使用默认唤醒词「{EnvConfig.BOT_NAME}」。"
     return f"当前群唤醒词：{', '.join(words)}"
@@ -325,11 +325,11 @@ async def _set_wake_add(group_id: int, word: str) -> str:
     if not word.strip():
         return "⚠️ 唤醒词不能为空。"
     word = word.strip()
-    existing = _group_settings().get(group_id, SET_WAKE_KEY)
+    existing = await _group_settings().aget(group_id, SET_WAKE_KEY)
     if word in existing:
         return f"⚠️ 唤醒词「{word}」已存在。当前唤醒词：{', '.join(existing)}"
-    _group_settings().set(group_id, SET_WAKE_KEY, word)
-    updated = _group_settings().get(group_id, SET_WAKE_KEY)
+    await _group_settings().aset(group_id, SET_WAKE_KEY, word)
+    updated = await _group_settings().aget(group_id, SET_WAKE_KEY)
     return f"✅ 唤醒词「{word}」已添加。当前唤醒词：{', '.join(updated)}"
 
 
@@ -337,20 +337,20 @@ async def _set_wake_remove(group_id: int, word: str) -> str:
     word = word.strip()
     if not word:
         return "⚠️ 要移除的唤醒词不能为空。"
-    removed = _group_settings().remove(group_id, SET_WAKE_KEY, word)
+    removed = await _group_settings().aremove(group_id, SET_WAKE_KEY, word)
     if not removed:
-        existing = _group_settings().get(group_id, SET_WAKE_KEY)
+        existing = await _group_settings().aget(group_id, SET_WAKE_KEY)
         if existing:
             return f"⚠️ 未找到唤醒词「{word}」。当前唤醒词：{', '.join(existing)}"
         return f"⚠️ 未找到唤醒词「{word}」，且当前群未设置任何唤醒词。"
-    words = _group_settings().get(group_id, SET_WAKE_KEY)
+    words = await _group_settings().aget(group_id, SET_WAKE_KEY)
     if words:
         return f"✅ 唤醒词「{word}」已移除。当前唤醒词：{', '.join(words)}"
     return f"✅ 唤醒词「{word}」已移除。将使用默认唤醒词「{EnvConfig.BOT_NAME}」。"
 
 
 async def _set_wake_clear(group_id: int) -> str:
-    count = _group_settings().clear(group_id, SET_WAKE_KEY)
+    count = await _group_settings().aclear(group_id, SET_WAKE_KEY)
     if count == 0:
         return f"当前群未设置唤醒词，无需清空。使用默认唤醒词「{EnvConfig.BOT_NAME}」。"
     return f"✅ 已清空 {count} 个唤醒词，将使用默认唤醒词「{EnvConfig.BOT_NAME}」。"
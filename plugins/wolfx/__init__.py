@@ -2,18 +2,33 @@
 
 """Wolfx real-time earthquake feeds."""
 
+import asyncio
+
 from nonebot import get_driver, logger, require
 
 require("nonebot_plugin_alconna")
 
+from utils.markdown_render import earthquake_card
+
 from .cenc_client import cenc_websocket_service
 from .cenc_handler import process_cenc_event
 
 driver = get_driver()
+_warm_task: asyncio.Task | None = None
+
+
+async def _warm_earthquake_card() -> None:
+    try:
+        await earthquake_card.warm()
+    except Exception as exc:
+        logger.warning(f"地震卡片页预热失败，将在首次速报时重试: {exc}")
 
 
 @driver.on_startup
 async def start_wolfx_service() -> None:
+    global _warm_task
+    # 在后台预热卡片页，不阻塞启动。
+    _warm_task = asyncio.create_task(_warm_earthquake_card())
     if cenc_websocket_service.start(process_cenc_event):
         logger.info("Wolfx CENC WebSocket 监听服务已启动")
     else:
@@ -23,3 +38,6 @@ async def start_wolfx_service() -> None:
 @driver.on_shutdown
 async def stop_wolfx_service() -> None:
     await cenc_websocket_service.stop()
+    if _warm_task is not None and not _warm_task.done():
+        _warm_task.cancel()
+    await earthquake_card.close()
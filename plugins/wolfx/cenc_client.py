@@ -20,7 +20,7 @@ CENC_STABLE_CONNECTION_SECONDS = 30.0
 
 
 class CencEventHandler(Protocol):
-    def __call__(self, data: dict[str, Any], *, is_snapshot: bool) -> Awaitable[Any]: ...
+    def __call__(self, data: dict[str, Any], *, is_snapshot: bool, received_at: float) -> Awaitable[Any]: ...
 
 
 class CencWebSocketService:
@@ -123,9 +123,11 @@ class CencWebSocketService:
         snapshot_pending = True
         while True:
             raw_message = await asyncio.wait_for(websocket.recv(), timeout=self._receive_timeout)
+            # 接收时间在解析前记录，作为告警延迟时间线的起点。
+            received_at = time.time()
             data = self._decode_message(raw_message)
             if data is not None:
-                snapshot_pending = await self._dispatch_message(websocket, data, snapshot_pending)
+                snapshot_pending = await self._dispatch_message(websocket, data, snapshot_pending, received_at)
 
     @staticmethod
     def _decode_message(raw_message: Any) -> dict[str, Any] | None:
@@ -142,7 +144,9 @@ class CencWebSocketService:
             return None
         return data
 
-    async def _dispatch_message(self, websocket: Any, data: dict[str, Any], snapshot_pending: bool) -> bool:
+    async def _dispatch_message(
+        self, websocket: Any, data: dict[str, Any], snapshot_pending: bool, received_at: float
+    ) -> bool:
         message_type = data.get("type")
         if message_type == "heartbeat":
             await websocket.send(CENC_PING_COMMAND)
@@ -156,7 +160,7 @@ class CencWebSocketService:
         if self._handler is None:
             raise RuntimeError("Wolfx CENC WebSocket event handler is not configured")
         try:
-            await self._handler(data, is_snapshot=snapshot_pending)
+            await self._handler(data, is_snapshot=snapshot_pending, received_at=received_at)
         except asyncio.CancelledError:
             raise
         except Exception:
@@ -2,17 +2,19 @@
 
 import asyncio
 import datetime
-import json
+import time
 import traceback
 import zoneinfo
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from nonebot import logger
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
 from utils.alconna import Target, UniMessage
+from utils.alert_latency import AlertTimeline
 from utils.configs import EnvConfig
-from utils.database import EventDatabase
+from utils.database import AlertTimingDatabase, ProcessedEventStore
 from utils.markdown_render import playwright_render
 
 CENC_EVENT_NAME = "eq_cenc"
@@ -21,7 +23,8 @@ CENC_SNAPSHOT_MAX_AGE = datetime.timedelta(minutes=10)
 CENC_SNAPSHOT_MAX_FUTURE = datetime.timedelta(minutes=5)
 CENC_TIMEZONE = zoneinfo.ZoneInfo("Asia/Shanghai")
 
-event_database = EventDatabase()
+processed_events = ProcessedEventStore(CENC_EVENT_NAME, legacy_timestamp_name=CENC_EVENT_NAME)
+alert_timings = AlertTimingDatabase()
 _cenc_event_lock = asyncio.Lock()
 
 
@@ -77,49 +80,60 @@ def _is_fresh_snapshot(payload: CencEewPayload, now_cn: datetime.datetime | None
     return -CENC_SNAPSHOT_MAX_FUTURE <= age <= CENC_SNAPSHOT_MAX_AGE
 
 
-def _load_event_ids(stored_value: str | None) -> list[str]:
-    if not stored_value:
-        return []
-    try:
-        parsed = json.loads(stored_value)
-    except json.JSONDecodeError:
-        # 兼容旧 HTTP 轮询实现保存的单个 report ID。
-        return [stored_value]
-    if not isinstance(parsed, list):
-        return [stored_value]
-    return list(dict.fromkeys(str(event_id) for event_id in parsed if str(event_id)))
-
-
-async def _store_event_id(event_id: str, stored_value: str | None, processed_event_ids: list[str]) -> None:
-    serialized = json.dumps([*processed_event_ids, event_id], ensure_ascii=False)
-    if stored_value is None:
-        await event_database.insert(CENC_EVENT_NAME, serialized)
-    else:
-        await event_database.update(CENC_EVENT_NAME, serialized)
-
-
 async def process_cenc_event(
     data: dict,
     *,
     is_snapshot: bool = False,
     now_cn: datetime.datetime | None = None,
+    received_at: float | None = None,
 ) -> CencEventResult:
     """Process one CENC report without coupling it to the scheduler plugin."""
+    received_at = received_at if received_at is not None else time.time()
+    timeline = AlertTimeline("cenc", data, received_at=received_at, is_snapshot=is_snapshot)
     try:
         payload = CencEewPayload.model_validate(data)
     except ValidationError as exc:
         logger.warning("忽略字段无效的 CENC 地震预警: %s", exc)
         return CencEventResult([], 0, "cenc ignored: invalid payload")
 
+    timeline.event_id = payload.event_id
+    timeline.report_id = payload.report_id
+    timeline.report_num = payload.report_num
+    report_time = _parse_report_time(payload.report_time)
+    timeline.published_at = report_time.timestamp() if report_time is not None else None
+    try:
+        return await _handle_cenc_event(payload, timeline, is_snapshot=is_snapshot, now_cn=now_cn)
+    except BaseException:
+        timeline.outcome = "error"
+        raise
+    finally:
+        await _record_timeline(timeline)
+
+
+async def _record_timeline(timeline: AlertTimeline) -> None:
+    try:
+        await alert_timings.record(timeline.finish())
+    except Exception as exc:
+        logger.warning("记录 CENC 预警时间线失败 (event_id=%s): %s", timeline.event_id, exc)
+
+
+async def _handle_cenc_event(
+    payload: CencEewPayload,
+    timeline: AlertTimeline,
+    *,
+    is_snapshot: bool,
+    now_cn: datetime.datetime | None,
+) -> CencEventResult:
+    # 锁只覆盖"查重 → 判定 → 记录"，EventID 落库后渲染与推送不再阻塞其他报文。
     async with _cenc_event_lock:
-        stored_value = await event_database.select(CENC_EVENT_NAME)
-        processed_event_ids = _load_event_ids(stored_value)
-        if payload.event_id in processed_event_ids:
+        if await processed_events.contains(payload.event_id):
             logger.debug(
                 "CENC 地震已推送过 (event_id=%s, report_num=%s)，跳过",
                 payload.event_id,
                 payload.report_num,
             )
+            timeline.deduped_at = time.time()
+            timeline.outcome = "duplicate"
             return CencEventResult([], 0, "cenc ignored: duplicate event")
 
         if payload.magnitude < CENC_MINIMUM_MAGNITUDE:
@@ -128,33 +142,82 @@ async def process_cenc_event(
                 payload.magnitude,
                 CENC_MINIMUM_MAGNITUDE,
             )
+            timeline.deduped_at = time.time()
+            timeline.outcome = "below_threshold"
             return CencEventResult([], 0, "cenc ignored: below threshold")
 
-        if is_snapshot and not _is_fresh_snapshot(payload, now_cn):
-            await _store_event_id(payload.event_id, stored_value, processed_event_ids)
-            logger.info("CENC 快照已过期，仅建立去重基线 (event_id=%s)", payload.event_id)
-            return CencEventResult([], 0, "cenc snapshot baseline stored")
-
         # 先持久化 EventID，确保同一次地震的后续报次不会重复推送。
-        await _store_event_id(payload.event_id, stored_value, processed_event_ids)
-        logger.info(
-            "检测到%s发生%.1f级地震 (event_id=%s, report_num=%s)",
-            payload.hypocenter,
-            payload.magnitude,
-            payload.event_id,
-            payload.report_num,
-        )
+        await processed_events.add(payload.event_id)
+        timeline.deduped_at = time.time()
+
+    if is_snapshot and not _is_fresh_snapshot(payload, now_cn):
+        logger.info("CENC 快照已过期，仅建立去重基线 (event_id=%s)", payload.event_id)
+        timeline.outcome = "baseline"
+        return CencEventResult([], 0, "cenc snapshot baseline stored")
+
+    logger.info(
+        "检测到%s发生%.1f级地震 (event_id=%s, report_num=%s)",
+        payload.hypocenter,
+        payload.magnitude,
+        payload.event_id,
+        payload.report_num,
+    )
+
+    modes = {int(group): _group_alert_mode(group) for group in EnvConfig.EARTHQUAKE_GROUP_ID}
+    text_groups = [group for group, mode in modes.items() if mode != "card"]
+    card_groups = [group for group, mode in modes.items() if mode != "text"]
+    # 卡片与文字速报并行：先把文字发出去，再在截止时间内等卡片。
+    render_task = asyncio.create_task(_render_card(payload, timeline)) if card_groups else None
+    card_deadline = asyncio.get_running_loop().time() + EnvConfig.EARTHQUAKE_CARD_DEADLINE_SECONDS
+
+    text = _alert_text(payload)
+    notified = await _send_to_groups(lambda: UniMessage.text(text), text_groups, timeline, kind="text")
+    image = await _wait_for_card(render_task, card_deadline, payload.event_id)
+    if image:
+        notified += await _send_to_groups(lambda: UniMessage().image(raw=image), card_groups, timeline, kind="card")
+    else:
+        # 只要卡片的群拿不到卡片时改发文字，保证不漏报。
+        fallback = [group for group in card_groups if modes[group] == "card"]
+        notified += await _send_to_groups(lambda: UniMessage.text(text), fallback, timeline, kind="text")
+
+    timeline.outcome = "sent"
+    groups_sent = list(dict.fromkeys(notified))
+    summary = f"cenc sent {len(groups_sent)} group(s)"
+    if card_groups and not image:
+        summary += ", card skipped"
+    return CencEventResult(groups_sent=groups_sent, messages_sent=len(notified), output_summary=summary)
+
+
+def _group_alert_mode(group: int | str) -> str:
+    return EnvConfig.EARTHQUAKE_GROUP_ALERT_MODE.get(str(group), EnvConfig.EARTHQUAKE_ALERT_MODE)
 
-        detail = [
-            {"label": "⏱️发震时间", "value": payload.origin_time},
-            {"label": "🗺️震中位置", "value": payload.hypocenter},
-            {"label": "🌐纬度", "value": payload.latitude},
-            {"label": "🌐经度", "value": payload.longitude},
-        ]
-        if payload.max_intensity is not None:
-            detail.append({"label": "💢最大烈度", "value": str(payload.max_intensity)})
 
-        image = await playwright_render(
+def _alert_text(payload: CencEewPayload) -> str:
+    lines = [
+        f"【CENC地震速报】{payload.hypocenter}发生{payload.magnitude:.1f}级地震",
+        f"⏱️发震时间：{payload.origin_time}",
+        f"🌐纬度 {payload.latitude}，经度 {payload.longitude}",
+    ]
+    if payload.depth is not None:
+        lines.append(f"🕳️震源深度：{payload.depth:g} 千米")
+    if payload.max_intensity is not None:
+        lines.append(f"💢最大烈度：{payload.max_intensity}")
+    return "\n".join(lines)
+
+
+async def _render_card(payload: CencEewPayload, timeline: AlertTimeline) -> bytes | None:
+    detail = [
+        {"label": "⏱️发震时间", "value": payload.origin_time},
+        {"label": "🗺️震中位置", "value": payload.hypocenter},
+        {"label": "🌐纬度", "value": payload.latitude},
+        {"label": "🌐经度", "value": payload.longitude},
+    ]
+    if payload.max_intensity is not None:
+        detail.append({"label": "💢最大烈度", "value": str(payload.max_intensity)})
+
+    timeline.render_started_at = time.time()
+    try:
+        return await playwright_render(
             CENC_EVENT_NAME,
             {
                 "title": "CENC地震速报",
@@ -165,21 +228,44 @@ async def process_cenc_event(
                 "depth": payload.depth,
             },
         )
-        if not image:
-            return CencEventResult([], 0, "cenc render returned no image")
-
-        message = UniMessage().image(raw=image)
-        groups_sent: list[int] = []
-        for group in EnvConfig.EARTHQUAKE_GROUP_ID:
-            try:
-                await message.send(target=Target.group(str(group)))
-                groups_sent.append(int(group))
-            except Exception as exc:
-                error_traceback = "".join(traceback.format_exception(exc))
-                logger.error("CENC 地震预警推送到群 %s 失败:\n%s", group, error_traceback)
-
-        return CencEventResult(
-            groups_sent=groups_sent,
-            messages_sent=len(groups_sent),
-            output_summary=f"cenc sent {len(groups_sent)} group(s)",
+    finally:
+        timeline.render_finished_at = time.time()
+
+
+async def _wait_for_card(render_task: asyncio.Task | None, deadline: float, event_id: str) -> bytes | None:
+    if render_task is None:
+        return None
+    try:
+        async with asyncio.timeout_at(deadline):
+            return await render_task
+    except TimeoutError:
+        logger.warning(
+            "CENC 地震卡片渲染超过 %.0f 秒，放弃补发 (event_id=%s)",
+            EnvConfig.EARTHQUAKE_CARD_DEADLINE_SECONDS,
+            event_id,
         )
+    except Exception as exc:
+        logger.warning("CENC 地震卡片渲染失败，放弃补发 (event_id=%s): %s", event_id, exc)
+    return None
+
+
+async def _send_to_groups(
+    build_message: Callable[[], UniMessage], groups: list[int], timeline: AlertTimeline, *, kind: str
+) -> list[int]:
+    if not groups:
+        return []
+    message = build_message()
+
+    async def send(group: int) -> int | None:
+        try:
+            await message.send(target=Target.group(str(group)))
+        except Exception as exc:
+            timeline.delivered(group, ok=False, kind=kind)
+            error_traceback = "".join(traceback.format_exception(exc))
+            logger.error("CENC 地震预警推送到群 %s 失败:\n%s", group, error_traceback)
+            return None
+        timeline.delivered(group, ok=True, kind=kind)
+        return group
+
+    results = await asyncio.gather(*(send(group) for group in groups))
+    return [group for group in results if group is not None]
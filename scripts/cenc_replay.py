@@ -0,0 +1,234 @@
+# ruff: noqa: E402, I001
+
+"""Replay recorded Wolfx CENC payloads through the alert pipeline against a fake bot.
+
+Payloads come from a JSONL file (raw CENC messages, or exported ``alert_timing``
+rows carrying ``payload_json``) or straight from the ``alert_timing`` table of a
+database. Each run dedups into a throwaway database and sends to a fake bot
+with a fixed per-send latency, so runs on different commits measure the same
+receive → dedup → render → delivery path. Stages measured from the publish time
+are left out because the recorded reports are old. Payloads are replayed one at
+a time, as the WebSocket listener does, and never as snapshots.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Self
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+PLUGINS_DIR = ROOT_DIR / "plugins"
+plugins_pkg = types.ModuleType("plugins")
+plugins_pkg.__path__ = [str(PLUGINS_DIR)]
+sys.modules.setdefault("plugins", plugins_pkg)
+
+wolfx_pkg = types.ModuleType("plugins.wolfx")
+wolfx_pkg.__path__ = [str(PLUGINS_DIR / "wolfx")]
+sys.modules.setdefault("plugins.wolfx", wolfx_pkg)
+
+from plugins.wolfx import cenc_handler
+from utils.alert_latency import AlertTimeline, alert_latency_summary
+from utils.database import AlertTimingDatabase, ProcessedEventStore, get_engine
+from utils.db_executor import shutdown_database_executor
+from utils.markdown_render import earthquake_card
+
+REPORT_SCHEMA_VERSION = 1
+REPLAY_STAGES = ("dedup", "render", "first_delivery", "last_delivery", "card_delivery")
+DEFAULT_GROUPS = 3
+DEFAULT_SEND_LATENCY_MS = 50.0
+
+
+def load_payloads(path: Path) -> list[dict[str, Any]]:
+    """Read one payload per JSONL line; ``alert_timing`` exports are unwrapped."""
+    payloads: list[dict[str, Any]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        payloads.append(json.loads(record["payload_json"]) if "payload_json" in record else record)
+    return payloads
+
+
+async def load_recorded_payloads(database_url: str, *, limit: int = 500) -> list[dict[str, Any]]:
+    """Recorded CENC payloads from ``alert_timing``, oldest first."""
+    rows = await AlertTimingDatabase(get_engine(database_url)).recent("cenc", limit=limit)
+    return [json.loads(row.payload_json) for row in reversed(rows)]
+
+
+class FakeBot:
+    """Stands in for ``UniMessage`` and ``Target``: a group send only waits ``send_latency`` seconds."""
+
+    def __init__(self, send_latency: float):
+        self.send_latency = send_latency
+        self.sent: list[str] = []
+        self.images = 0
+        self.texts = 0
+
+    def __call__(self) -> Self:
+        return self
+
+    @staticmethod
+    def group(group_id: str) -> str:
+        return group_id
+
+    def text(self, text: str) -> Self:
+        self.texts += 1
+        return self
+
+    def image(self, *, raw: bytes) -> Self:
+        self.images += 1
+        return self
+
+    async def send(self, *, target: str) -> None:
+        await asyncio.sleep(self.send_latency)
+        self.sent.append(target)
+
+
+class _TimelineRecorder:
+    def __init__(self):
+        self.timelines: list[AlertTimeline] = []
+
+    async def record(self, timing) -> None:
+        self.timelines.append(AlertTimeline.from_row(timing))
+
+
+@contextmanager
+def _patched(target: Any, **attributes: Any) -> Iterator[None]:
+    previous = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(target, name, value)
+
+
+async def replay(
+    payloads: list[dict[str, Any]],
+    *,
+    groups: int = DEFAULT_GROUPS,
+    send_latency_ms: float = DEFAULT_SEND_LATENCY_MS,
+    render_latency_ms: float | None = None,
+) -> dict[str, Any]:
+    """Run ``payloads`` through ``process_cenc_event`` and summarize the per-stage latency."""
+    bot = FakeBot(send_latency_ms / 1000)
+    recorder = _TimelineRecorder()
+    handler_patches: dict[str, Any] = {"UniMessage": bot, "Target": bot, "alert_timings": recorder}
+    if render_latency_ms is not None:
+
+        async def fake_render(_name: str, _packed_args: dict) -> bytes:
+            await asyncio.sleep(render_latency_ms / 1000)
+            return b"replay-card"
+
+        handler_patches["playwright_render"] = fake_render
+
+    with tempfile.TemporaryDirectory(prefix="cenc-replay-") as workdir:
+        engine = get_engine(f"sqlite:///{Path(workdir) / 'replay.db'}")
+        handler_patches["processed_events"] = ProcessedEventStore(cenc_handler.CENC_EVENT_NAME, engine=engine)
+        group_ids = [900_000 + index for index in range(groups)]
+        started_at = time.perf_counter()
+        try:
+            with (
+                _patched(cenc_handler, **handler_patches),
+                _patched(cenc_handler.EnvConfig, EARTHQUAKE_GROUP_ID=group_ids),
+            ):
+                for payload in payloads:
+                    await cenc_handler.process_cenc_event(payload)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            if render_latency_ms is None:
+                await earthquake_card.close()
+            engine.dispose()
+            shutdown_database_executor()
+
+    summary = alert_latency_summary(recorder.timelines)
+    return {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "created_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {
+            "groups": groups,
+            "send_latency_ms": send_latency_ms,
+            "render": "playwright" if render_latency_ms is None else f"fake:{render_latency_ms:g}ms",
+        },
+        "payloads": len(payloads),
+        "wall_seconds": elapsed,
+        "outcomes": summary["outcomes"],
+        "stages": {
+            item["stage"]: {key: value for key, value in item.items() if key != "stage"}
+            for item in summary["stages"]
+            if item["stage"] in REPLAY_STAGES
+        },
+    }
+
+
+def compare_reports(current: dict, baseline: dict) -> dict[str, dict[str, float | None]]:
+    """Ratio of current to baseline p50/p95 per stage; below 1 means faster."""
+    comparison: dict[str, dict[str, float | None]] = {}
+    for stage, stats in current.get("stages", {}).items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        comparison[stage] = {
+            metric: stats[metric] / previous[metric] if previous[metric] else None for metric in ("p50", "p95")
+        }
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded CENC payloads through the alert pipeline.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", type=Path, help="JSONL file of CENC payloads or exported alert_timing rows.")
+    source.add_argument("--database", help="Database URL to read recorded payloads from alert_timing.")
+    parser.add_argument("--limit", type=int, default=500, help="Most recent payloads to read from --database.")
+    parser.add_argument("--groups", type=int, default=DEFAULT_GROUPS, help="Number of fake target groups.")
+    parser.add_argument("--send-latency-ms", type=float, default=DEFAULT_SEND_LATENCY_MS, help="Fake send latency.")
+    parser.add_argument(
+        "--fake-render-ms", type=float, default=None, help="Replace the Playwright card with a fixed delay."
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier report to compare p50/p95 against.")
+    args = parser.parse_args()
+
+    async def run() -> dict:
+        if args.input is not None:
+            payloads = load_payloads(args.input)
+        else:
+            payloads = await load_recorded_payloads(args.database, limit=args.limit)
+        return await replay(
+            payloads,
+            groups=args.groups,
+            send_latency_ms=args.send_latency_ms,
+            render_latency_ms=args.fake_render_ms,
+        )
+
+    report = asyncio.run(run())
+    if args.baseline is not None:
+        report["comparison"] = compare_reports(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output is None:
+        print(payload)
+    else:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
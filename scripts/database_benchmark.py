@@ -0,0 +1,464 @@
+# ruff: noqa: E402, I001, S311
+
+"""Reproducible benchmarks for the message database over a synthetic history.
+
+The generated database is cached next to a params file and reused while the
+generation parameters stay the same, so repeated runs on different commits
+measure the same data. ``cold`` runs dispose the connection pool before each
+iteration, which empties SQLite's per-connection page cache; the OS page cache
+is left as is.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils import database as db_module
+from utils.database import (
+    Message,
+    MessageAttachment,
+    MessageDatabase,
+    ensure_attachment_schema,
+    ensure_database_performance_indexes,
+    ensure_message_fts,
+    ensure_message_schema,
+    ensure_message_stats,
+    get_engine,
+)
+from utils.db_executor import shutdown_database_executor
+from utils.message_normalizer import NORMALIZED_VERSION, DerivedMessage
+
+REPORT_SCHEMA_VERSION = 1
+DEFAULT_WORKDIR = Path("cache/benchmark")
+HISTORY_START_MS = 1_704_038_400_000  # 2024-01-01 00:00:00 +08:00
+ATTACHMENT_TTL_MS = 30 * 86400 * 1000
+GENERATION_BATCH_SIZE = 10_000
+VOCABULARY = (
+    "今天",
+    "晚上",
+    "地震",
+    "台风",
+    "天气预报",
+    "数据库",
+    "性能优化",
+    "机器人",
+    "图片",
+    "视频",
+    "吃饭",
+    "游戏",
+    "开黑",
+    "作业",
+    "考试",
+    "火箭发射",
+    "空间站",
+    "日食",
+    "极光",
+    "群主",
+    "哈哈哈",
+    "好的",
+    "收到",
+    "为什么",
+    "怎么办",
+    "Python",
+    "SQLite",
+    "benchmark",
+    "release",
+    "bug",
+    "deploy",
+    "GPU",
+    "model",
+    "prompt",
+    "token",
+    "server",
+)
+FTS_QUERIES = tuple(word for word in VOCABULARY if len(word) >= db_module.MESSAGE_FTS_MIN_QUERY_LENGTH)
+LIKE_QUERIES = tuple(word for word in VOCABULARY if len(word) < db_module.MESSAGE_FTS_MIN_QUERY_LENGTH)
+
+
+@dataclass(slots=True, frozen=True)
+class GenerationParams:
+    messages: int
+    groups: int
+    users: int
+    days: int
+    attachment_ratio: float
+    private_ratio: float
+    seed: int
+
+
+@dataclass(slots=True)
+class Scenario:
+    name: str
+    run: Callable[[random.Random], Awaitable[object]]
+    prepare: Callable[[random.Random], Awaitable[None]] | None = None
+
+
+def _group_ids(params: GenerationParams) -> list[int]:
+    return [100_000 + index for index in range(params.groups)]
+
+
+def _user_ids(params: GenerationParams) -> list[int]:
+    return [10_000 + index for index in range(params.users)]
+
+
+def _time_step(params: GenerationParams) -> int:
+    return max(1, params.days * 86400 * 1000 // max(1, params.messages))
+
+
+def _content(rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 24)))
+
+
+def _message_rows(params: GenerationParams, rng: random.Random):
+    groups = _group_ids(params)
+    users = _user_ids(params)
+    step = _time_step(params)
+    for index in range(params.messages):
+        msg_time = HISTORY_START_MS + index * step
+        user_id = rng.choice(users)
+        group_id = None if rng.random() < params.private_ratio else rng.choice(groups)
+        role = "assistant" if rng.random() < 0.1 else "user"
+        yield (
+            msg_time,
+            index + 1,
+            user_id,
+            group_id,
+            "Assistant" if role == "assistant" else f"user{user_id}",
+            role,
+            _content(rng),
+            NORMALIZED_VERSION,
+            "complete",
+            db_module.MESSAGE_SOURCE_TYPE_NORMAL,
+        )
+
+
+def _attachment_row(msg_time: int, user_id: int, group_id: int | None, expires_at: int) -> tuple:
+    workspace_key = str(group_id) if group_id is not None else str(user_id)
+    file_name = f"{msg_time}_0.png"
+    return (
+        msg_time,
+        user_id,
+        group_id,
+        workspace_key,
+        "image",
+        file_name,
+        "image/png",
+        f"cache/sandbox/memory/{workspace_key}/images/{file_name}",
+        f"/memory/{workspace_key}/images/{file_name}",
+        msg_time,
+        expires_at,
+    )
+
+
+_MESSAGE_INSERT = (
+    "INSERT INTO message (time, msg_id, user_id, group_id, user_name, role, content, "
+    "normalized_version, normalized_status, source_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_ATTACHMENT_INSERT = (
+    "INSERT OR IGNORE INTO messageattachment (msg_time, user_id, group_id, workspace_key, kind, file_name, "
+    "mime_type, physical_path, virtual_path, created_at, expires_at, source_type, metadata_json) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'message', '{}')"
+)
+
+
+def generate_database(path: Path, params: GenerationParams) -> dict[str, float]:
+    """Create the synthetic database; FTS and stats tables are built after the bulk load."""
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    engine = get_engine(f"sqlite:///{path}")
+    rng = random.Random(params.seed)
+    timings: dict[str, float] = {}
+
+    started_at = time.perf_counter()
+    Message.metadata.create_all(engine, tables=[Message.__table__, MessageAttachment.__table__])
+    ensure_message_schema(engine)
+    ensure_attachment_schema(engine)
+    batch: list[tuple] = []
+    attachments: list[tuple] = []
+    with engine.begin() as conn:
+        for row in _message_rows(params, rng):
+            batch.append(row)
+            if rng.random() < params.attachment_ratio:
+                attachments.append(_attachment_row(row[0], row[2], row[3], row[0] + ATTACHMENT_TTL_MS))
+            if len(batch) >= GENERATION_BATCH_SIZE:
+                conn.exec_driver_sql(_MESSAGE_INSERT, batch)
+                batch.clear()
+        if batch:
+            conn.exec_driver_sql(_MESSAGE_INSERT, batch)
+        if attachments:
+            conn.exec_driver_sql(_ATTACHMENT_INSERT, attachments)
+    timings["bulk_load"] = time.perf_counter() - started_at
+
+    for name, step in (
+        ("indexes", ensure_database_performance_indexes),
+        ("fts_rebuild", ensure_message_fts),
+        ("stats_backfill", ensure_message_stats),
+    ):
+        started_at = time.perf_counter()
+        step(engine)
+        timings[name] = time.perf_counter() - started_at
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+    return timings
+
+
+def _summarize(samples: list[float]) -> dict[str, float | int]:
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.5) * 1000,
+        "p95_ms": percentile(0.95) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def build_scenarios(database: MessageDatabase, params: GenerationParams) -> list[Scenario]:  # noqa: C901
+    groups = _group_ids(params)
+    users = _user_ids(params)
+    # 复用的库里可能已有上次基准写入的消息，从当前最大时间戳之后继续写。
+    with database.engine.connect() as conn:
+        latest = conn.exec_driver_sql("SELECT max(time) FROM message").scalar()
+    next_time = [max(latest or 0, HISTORY_START_MS + params.days * 86400 * 1000)]
+
+    async def insert(rng: random.Random):
+        next_time[0] += 1
+        await database.insert(
+            next_time[0], None, rng.choice(users), rng.choice(groups), "bench", "user", _content(rng)
+        )
+
+    async def prepare_message(rng: random.Random):
+        await database.prepare_message(group_id=rng.choice(groups), query_numbers=20)
+
+    def search(sort: str, queries: tuple[str, ...]):
+        async def run(rng: random.Random):
+            await database.search_messages(
+                group_id=rng.choice(groups), user_id=None, content_query=rng.choice(queries), limit=50, sort=sort
+            )
+
+        return run
+
+    async def search_recent(rng: random.Random):
+        await database.search_messages(group_id=rng.choice(groups), user_id=None, limit=50)
+
+    async def replace_derived(rng: random.Random):
+        parent_time = HISTORY_START_MS + rng.randrange(params.messages) * _time_step(params)
+        derived = [
+            DerivedMessage(sender_name="forwarded", content=_content(rng), raw_segments_json="[]", forward_id="bench")
+            for _ in range(5)
+        ]
+        await database.replace_derived_messages(
+            parent_msg_time=parent_time,
+            parent_msg_id=None,
+            user_id=rng.choice(users),
+            group_id=rng.choice(groups),
+            role="user",
+            derived_messages=derived,
+            normalized_version=NORMALIZED_VERSION,
+        )
+
+    expired_batch = max(1, min(1000, params.messages // 100))
+
+    async def seed_expired_attachments(rng: random.Random):
+        base = -(rng.randrange(1, 1 << 40) * 10_000)
+        rows = [_attachment_row(base - index, rng.choice(users), None, 0) for index in range(expired_batch)]
+
+        def _do():
+            with database.engine.begin() as conn:
+                conn.exec_driver_sql(_ATTACHMENT_INSERT, rows)
+
+        await asyncio.to_thread(_do)
+
+    async def cleanup_attachments(_rng: random.Random):
+        await database.cleanup_expired_attachments(now_ms=1)
+
+    scenarios = [
+        Scenario("insert", insert),
+        Scenario("prepare_message", prepare_message),
+        Scenario("search_recent", search_recent),
+        Scenario("replace_derived_messages", replace_derived),
+        Scenario("cleanup_expired_attachments", cleanup_attachments, prepare=seed_expired_attachments),
+    ]
+    if LIKE_QUERIES:
+        scenarios.append(Scenario("search_like", search("time", LIKE_QUERIES)))
+    if db_module.message_fts_ready(database.engine):
+        scenarios.append(Scenario("search_fts_relevance", search("relevance", FTS_QUERIES)))
+        scenarios.append(Scenario("search_fts_time", search("time", FTS_QUERIES)))
+    return scenarios
+
+
+async def run_scenarios(
+    database: MessageDatabase,
+    scenarios: list[Scenario],
+    *,
+    iterations: int,
+    seed: int,
+    variants: tuple[str, ...] = ("warm", "cold"),
+) -> dict[str, dict[str, dict[str, float | int]]]:
+    results: dict[str, dict[str, dict[str, float | int]]] = {}
+    for scenario in scenarios:
+        results[scenario.name] = {}
+        for variant in variants:
+            rng = random.Random(f"{seed}:{scenario.name}:{variant}")
+            if variant == "warm":
+                # 预热一轮，避免首次建立连接与编译语句的开销混进稳态数据。
+                if scenario.prepare is not None:
+                    await scenario.prepare(rng)
+                await scenario.run(rng)
+            samples: list[float] = []
+            for _ in range(iterations):
+                if scenario.prepare is not None:
+                    await scenario.prepare(rng)
+                if variant == "cold":
+                    database.engine.dispose()
+                started_at = time.perf_counter()
+                await scenario.run(rng)
+                samples.append(time.perf_counter() - started_at)
+            results[scenario.name][variant] = _summarize(samples)
+    return results
+
+
+def compare_reports(current: dict, baseline: dict) -> dict[str, dict[str, float | None]]:
+    """Ratio of current to baseline p50/p95 per scenario and variant; below 1 means faster."""
+    comparison: dict[str, dict[str, float | None]] = {}
+    for name, variants in current.get("scenarios", {}).items():
+        for variant, stats in variants.items():
+            previous = baseline.get("scenarios", {}).get(name, {}).get(variant)
+            if not previous:
+                continue
+            comparison[f"{name}.{variant}"] = {
+                metric: stats[metric] / previous[metric] if previous[metric] else None
+                for metric in ("p50_ms", "p95_ms")
+            }
+    return comparison
+
+
+def _database_summary(path: Path) -> dict[str, int]:
+    with sqlite3.connect(path) as conn:
+        messages = conn.execute("SELECT count(*) FROM message").fetchone()[0]
+        attachments = conn.execute("SELECT count(*) FROM messageattachment").fetchone()[0]
+    return {"size_bytes": path.stat().st_size, "messages": messages, "attachments": attachments}
+
+
+def _load_or_generate(path: Path, params: GenerationParams, *, regenerate: bool) -> dict[str, float] | None:
+    params_path = path.with_suffix(".params.json")
+    if not regenerate and path.exists() and params_path.exists():
+        if json.loads(params_path.read_text(encoding="utf-8")) == asdict(params):
+            return None
+    timings = generate_database(path, params)
+    params_path.write_text(json.dumps(asdict(params), indent=2), encoding="utf-8")
+    return timings
+
+
+async def run_benchmark(
+    params: GenerationParams,
+    *,
+    workdir: Path = DEFAULT_WORKDIR,
+    iterations: int = 20,
+    regenerate: bool = False,
+    only: set[str] | None = None,
+) -> dict:
+    workdir = workdir.resolve()
+    path = workdir / f"frontier-bench-{params.messages}.db"
+    generation = _load_or_generate(path, params, regenerate=regenerate)
+    summary = _database_summary(path)
+    previous_cwd = os.getcwd()
+    previous_database_file = db_module.DATABASE_FILE
+    # 附件路径按工作目录解析，基准里产生的文件都留在 workdir 下。
+    os.chdir(workdir)
+    db_module.DATABASE_FILE = f"sqlite:///{path}"
+    try:
+        database = MessageDatabase()
+        scenarios = [
+            scenario for scenario in build_scenarios(database, params) if only is None or scenario.name in only
+        ]
+        results = await run_scenarios(database, scenarios, iterations=iterations, seed=params.seed)
+        database.engine.dispose()
+    finally:
+        db_module.DATABASE_FILE = previous_database_file
+        os.chdir(previous_cwd)
+        shutdown_database_executor()
+    return {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "created_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": asdict(params),
+        "iterations": iterations,
+        "generation_seconds": generation,
+        "database": summary,
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Frontier message database on synthetic history.")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="Number of synthetic messages.")
+    parser.add_argument("--groups", type=int, default=300, help="Number of synthetic groups.")
+    parser.add_argument("--users", type=int, default=5_000, help="Number of synthetic users.")
+    parser.add_argument("--days", type=int, default=365, help="Days of history the messages are spread over.")
+    parser.add_argument("--attachment-ratio", type=float, default=0.05, help="Share of messages with an image.")
+    parser.add_argument("--private-ratio", type=float, default=0.1, help="Share of private-chat messages.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and query selection.")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per scenario and variant.")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR, help="Directory for the generated database.")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the database even if params match.")
+    parser.add_argument("--scenario", action="append", default=None, help="Run only this scenario; repeatable.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier report to compare p50/p95 against.")
+    args = parser.parse_args()
+
+    params = GenerationParams(
+        messages=args.messages,
+        groups=args.groups,
+        users=args.users,
+        days=args.days,
+        attachment_ratio=args.attachment_ratio,
+        private_ratio=args.private_ratio,
+        seed=args.seed,
+    )
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    report = asyncio.run(
+        run_benchmark(
+            params,
+            workdir=args.workdir,
+            iterations=args.iterations,
+            regenerate=args.regenerate,
+            only=set(args.scenario) if args.scenario else None,
+        )
+    )
+    if args.baseline is not None:
+        report["comparison"] = compare_reports(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output is None:
+        print(payload)
+    else:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
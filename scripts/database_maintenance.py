@@ -9,10 +9,12 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from utils.database import (
+    checkpoint_wal,
     cleanup_task_execution_history,
     get_database_diagnostics,
     get_engine,
     run_database_maintenance,
+    warm_database_cache,
 )
 
 
@@ -32,6 +34,14 @@ def main() -> None:
     maintain_parser = subparsers.add_parser("maintain", help="Run PRAGMA optimize and optional WAL checkpoint.")
     maintain_parser.add_argument("--checkpoint", action="store_true", help="Run a passive WAL checkpoint.")
 
+    checkpoint_parser = subparsers.add_parser("checkpoint", help="Run a WAL checkpoint and report its duration.")
+    checkpoint_parser.add_argument(
+        "--mode", choices=["passive", "full", "restart", "truncate"], default="passive", help="Checkpoint mode."
+    )
+
+    warmup_parser = subparsers.add_parser("warmup", help="Read hot indexes into the OS page cache.")
+    warmup_parser.add_argument("--budget-seconds", type=float, default=30.0, help="Stop after this many seconds.")
+
     cleanup_parser = subparsers.add_parser("cleanup-history", help="Prune task execution history.")
     cleanup_parser.add_argument(
         "--older-than-days", type=int, default=None, help="Delete rows older than this many days."
@@ -49,6 +59,16 @@ def main() -> None:
         print(json.dumps(run_database_maintenance(engine, checkpoint=args.checkpoint), ensure_ascii=False, indent=2))
         return
 
+    if args.command == "checkpoint":
+        print(json.dumps(checkpoint_wal(engine, mode=args.mode), ensure_ascii=False, indent=2))
+        return
+
+    if args.command == "warmup":
+        print(
+            json.dumps(warm_database_cache(engine, budget_seconds=args.budget_seconds), ensure_ascii=False, indent=2)
+        )
+        return
+
     if args.command == "cleanup-history":
         cutoff = _retention_cutoff(args.older_than_days)
         deleted = cleanup_task_execution_history(engine, older_than=cutoff, keep_per_job=args.keep_per_job)
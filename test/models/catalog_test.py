@@ -16,6 +16,7 @@ from models import (
     get_model_display_name,
     list_models,
     load_catalog,
+    resolve_model,
 )
 
 
@@ -135,6 +136,28 @@ def test_get_model_and_unknown_model() -> None:
     assert get_model("custom", "private-model") is None
 
 
+def test_resolve_model_accepts_proxy_and_provider_prefixed_ids() -> None:
+    direct = resolve_model("google", "gemini-2.5-flash")
+
+    assert direct is not None
+    assert resolve_model("openai", "openrouter/google/gemini-2.5-flash") is direct
+    assert resolve_model("openai", "google/gemini-2.5-flash") is direct
+    assert resolve_model("custom", "gateway/private-model") is None
+
+
+def test_catalog_index_rebuilds_after_reload() -> None:
+    before = get_model("openai", "gpt-5.6-sol")
+
+    load_catalog.cache_clear()
+    after = get_model("openai", "gpt-5.6-sol")
+
+    assert before is not None
+    assert after is not None
+    assert after == before
+    assert after is not before
+    assert any(model is after for model in load_catalog().models)
+
+
 def test_get_model_display_name_uses_lobehub_overlay_without_affecting_unknown_models() -> None:
     assert get_model_display_name("openai", "gpt-image-2") == "GPT Image 2"
     assert get_model_display_name("openai", "gateway/openai/gpt-image-2") == "GPT Image 2"
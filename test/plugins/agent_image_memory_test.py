@@ -239,8 +239,9 @@ async def test_agent_injects_staged_file_memory_path(monkeypatch, tmp_path):  #
         async def prepare_message(self, *_args, **_kwargs):
             return []
 
-        async def insert_attachment(self, **kwargs):
-            captured["attachment"] = kwargs
+        async def insert_attachments(self, attachments):
+            captured["attachment"] = attachments[0]
+            captured["attachment_batches"] = captured.get("attachment_batches", 0) + 1
 
     class DummyCognitive:
         working_dir = str(tmp_path / "sandbox")
@@ -333,6 +334,7 @@ async def test_agent_injects_staged_file_memory_path(monkeypatch, tmp_path):  #
     assert captured["attachment"]["kind"] == "file"
     assert captured["attachment"]["mime_type"] == "text/plain"
     assert captured["attachment"]["sha256"] == "file-sha256"
+    assert captured["attachment_batches"] == 1
 
 
 @pytest.mark.asyncio
@@ -1378,6 +1380,22 @@ async def test_gateway_approved_weather_request_routes_directly_to_agent(monkeyp
 
     assert calls["queue"] == 1
     assert sent_messages == []
+    from utils.tracing import recent_traces
+
+    trace = recent_traces(1)[0]
+    assert trace["name"] == "handle_common"
+    assert trace["error"] is None
+    assert trace["attributes"]["thread_id"] == str(agent.agent_thread_id("456", 123))
+    assert [stage["name"] for stage in trace["stages"]] == [
+        "extract",
+        "normalize",
+        "db_insert",
+        "history_load",
+        "gateway",
+        "media_download",
+        "staging",
+        "safety_check",
+    ]
 
 
 @pytest.mark.asyncio
@@ -1870,15 +1888,26 @@ async def test_daily_cache_cleanup_cleans_attachments_and_acp(monkeypatch):
             calls.append("attachments")
             return 2
 
+        async def archive_old_messages(self):
+            calls.append("archive")
+            return 5
+
+    class DummyAlertTimings:
+        async def prune(self):
+            calls.append("alert_timing")
+            return 3
+
     class DummyAcpService:
         async def cleanup_cache(self):
             calls.append("acp")
             return 1
 
     monkeypatch.setattr(agent, "messages_db", DummyMessagesDb())
+    monkeypatch.setattr(agent, "alert_timings", DummyAlertTimings())
     monkeypatch.setattr(agent, "acp_service", DummyAcpService())
     monkeypatch.setattr(agent.EnvConfig, "IMAGE_AUTO_CLEANUP", True)
+    monkeypatch.setattr(agent.EnvConfig, "MESSAGE_RETENTION_DAYS", 90)
 
     await agent.run_daily_cache_cleanup()
 
-    assert calls == ["attachments", "acp"]
+    assert calls == ["attachments", "archive", "alert_timing", "acp"]
@@ -1,5 +1,6 @@
 # ruff: noqa: S101
 
+import asyncio
 import datetime
 import importlib
 import json
@@ -10,7 +11,7 @@ from typing import cast
 
 import pytest
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlmodel import create_engine
+from sqlmodel import Session, create_engine
 
 PACKAGE_ROOT = Path(__file__).resolve().parents[2] / "plugins"
 
@@ -24,6 +25,7 @@ sys.modules.setdefault("plugins.clockwork", clockwork_pkg)
 
 task_manager_module = importlib.import_module("plugins.clockwork.task_manager")
 task_models_module = importlib.import_module("plugins.clockwork.task_models")
+job_pool_module = importlib.import_module("plugins.clockwork.job_pool")
 agent_task_handler_module = importlib.import_module("plugins.clockwork.agent_task_handler")
 
 TaskExecutor = task_manager_module.TaskExecutor
@@ -33,6 +35,9 @@ TaskExecutionHistory = task_models_module.TaskExecutionHistory
 TaskGroupMapping = task_models_module.TaskGroupMapping
 ScheduledTaskMetadata = task_models_module.ScheduledTaskMetadata
 TaskRunResult = task_models_module.TaskRunResult
+JobClass = job_pool_module.JobClass
+JobPool = job_pool_module.JobPool
+JOB_CLASSES = job_pool_module.JOB_CLASSES
 
 
 def test_cenc_is_not_a_clockwork_task_anymore():
@@ -147,6 +152,51 @@ async def test_register_scheduled_task_metadata_and_permissions(task_manager):
     assert not await task_manager.user_can_manage_task("scheduled_1", "999")
 
 
+@pytest.mark.asyncio
+async def test_list_task_overviews_joins_groups_and_metadata_with_cache(task_manager):
+    await task_manager.register_task(
+        job_id="system_job",
+        name="System",
+        handler_module="module",
+        handler_function="func",
+        trigger_type="interval",
+        trigger_args={"minutes": 5},
+        group_ids=[2, 1],
+    )
+    for job_id, owner in (("auto_a", "123"), ("auto_b", "456")):
+        await task_manager.register_scheduled_task(
+            job_id=job_id,
+            name=job_id,
+            prompt="hi",
+            trigger_type="interval",
+            trigger_args={"minutes": 5},
+            owner_user_id=owner,
+            target_type="group",
+            target_id="789",
+        )
+    await task_manager.archive_task("auto_b")
+
+    overviews = await task_manager.list_task_overviews()
+    assert [item.task.job_id for item in overviews] == ["system_job", "auto_a"]
+    assert overviews[0].groups == [1, 2]
+    assert overviews[0].metadata is None
+    assert overviews[1].groups == [789]
+    assert overviews[1].metadata is not None and overviews[1].metadata.owner_user_id == "123"
+
+    archived = await task_manager.list_task_overviews(include_archived=True, owner_user_id="456")
+    assert [item.task.job_id for item in archived] == ["auto_b"]
+
+    with Session(task_manager.engine) as session:
+        session.add(TaskGroupMapping(job_id="system_job", group_id=3))
+        session.commit()
+    cached = await task_manager.list_task_overviews()
+    assert cached[0].groups == [1, 2]
+
+    await task_manager.update_task_groups("system_job", [5])
+    refreshed = await task_manager.list_task_overviews()
+    assert refreshed[0].groups == [5]
+
+
 @pytest.mark.asyncio
 async def test_log_execution_updates_stats(task_manager):
     await task_manager.register_task(
@@ -163,6 +213,72 @@ async def test_log_execution_updates_stats(task_manager):
     assert stats["success_runs"] == 1
 
 
+@pytest.mark.asyncio
+async def test_log_execution_buffers_history_and_flushes_in_one_batch(monkeypatch, task_manager):
+    await task_manager.register_task(
+        job_id="burst",
+        name="Task",
+        handler_module="module",
+        handler_function="func",
+        trigger_type="interval",
+        trigger_args={"minutes": 1},
+        group_ids=[],
+    )
+    await task_manager.log_execution(job_id="burst", status="success", execution_time=100)
+    await task_manager.log_execution(job_id="burst", status="failed", execution_time=101)
+    task_manager._on_job_missed(types.SimpleNamespace(job_id="burst", scheduled_run_time=None))
+
+    assert await task_manager.flush_execution_history() == 3
+    assert await task_manager.flush_execution_history() == 0
+    stats = await task_manager.get_task_statistics("burst")
+    assert stats["total_runs"] == 3
+    assert stats["success_runs"] == 1
+    assert stats["failed_runs"] == 1
+    assert {item["status"] for item in stats["recent_history"]} == {"success", "failed", "missed"}
+
+    monkeypatch.setattr(task_manager_module, "EXECUTION_HISTORY_FLUSH_DELAY", 0)
+    await task_manager.log_execution(job_id="burst", status="success", execution_time=200)
+    await asyncio.sleep(0.01)
+    assert task_manager._pending_history == []
+    assert task_manager._history_flush_task is None
+
+
+@pytest.mark.asyncio
+async def test_history_readers_survive_failed_flush_and_retry_later(monkeypatch, task_manager):
+    await task_manager.register_task(
+        job_id="busy",
+        name="Task",
+        handler_module="module",
+        handler_function="func",
+        trigger_type="interval",
+        trigger_args={"minutes": 1},
+        group_ids=[],
+    )
+    real_run_database = task_manager_module.run_database
+    failures = {"left": 1}
+
+    async def flaky_run_database(engine, func, *, write=False):
+        if write and failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("database is locked")
+        return await real_run_database(engine, func, write=write)
+
+    monkeypatch.setattr(task_manager_module, "run_database", flaky_run_database)
+    monkeypatch.setattr(task_manager_module, "EXECUTION_HISTORY_FLUSH_DELAY", 0.01)
+    await task_manager.log_execution(job_id="busy", status="success", execution_time=100)
+
+    # 读取前的落盘失败不影响查询，记录留在缓冲里并自动安排重试。
+    assert await task_manager.get_execution_history("busy") == []
+    assert len(task_manager._pending_history) == 1
+    assert task_manager._history_flush_task is not None
+
+    await asyncio.sleep(0.05)
+    assert task_manager._pending_history == []
+    assert task_manager._history_flush_task is None
+    stats = await task_manager.get_task_statistics("busy")
+    assert stats["success_runs"] == 1
+
+
 @pytest.mark.asyncio
 async def test_task_executor_execute_paths(monkeypatch, task_manager):
     handler_called = {"count": 0}
@@ -201,6 +317,179 @@ async def test_task_executor_execute_paths(monkeypatch, task_manager):
     assert "RuntimeError: boom" in (failed_history[0].error_traceback or "")
 
 
+@pytest.mark.asyncio
+async def test_task_executor_fires_from_snapshot_without_database_reads(monkeypatch, task_manager):
+    calls = []
+
+    async def handler(**kwargs):
+        calls.append(kwargs["job_id"])
+        return None
+
+    handler_module = types.ModuleType("clockwork_snapshot_handlers")
+    handler_module.handler = handler  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "clockwork_snapshot_handlers", handler_module)
+    await task_manager.register_task(
+        job_id="minutely",
+        name="Task",
+        handler_module="clockwork_snapshot_handlers",
+        handler_function="handler",
+        trigger_type="interval",
+        trigger_args={"minutes": 1},
+        group_ids=[7],
+    )
+    executor = TaskExecutor(task_manager)
+    assert await executor.preload_handlers() == 1
+
+    async def no_database(engine, func, *, write=False):
+        raise AssertionError("任务触发时不应访问数据库")
+
+    monkeypatch.setattr(task_manager_module, "run_database", no_database)
+    await executor.execute("minutely")
+    await executor.execute("minutely")
+    monkeypatch.undo()
+    monkeypatch.setitem(sys.modules, "clockwork_snapshot_handlers", handler_module)
+
+    assert calls == ["minutely", "minutely"]
+    history = await task_manager.get_execution_history("minutely")
+    assert [record.status for record in history] == ["success", "success"]
+    assert json.loads(history[0].groups_sent or "[]") == [7]
+
+    await task_manager.disable_task("minutely")
+    await executor.execute("minutely")
+    assert calls == ["minutely", "minutely"]
+    statuses = [record.status for record in await task_manager.get_execution_history("minutely")]
+    assert sorted(statuses) == ["skipped", "success", "success"]
+
+
+@pytest.mark.asyncio
+async def test_job_pool_admits_by_priority_within_class_limits():
+    classes = {
+        "reminder": JobClass("reminder", priority=1, limit=2, timeout=1),
+        "agent": JobClass("agent", priority=3, limit=1, timeout=1),
+    }
+    pool = JobPool(classes, limit=2)
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def run(name: str, label: str) -> None:
+        async with pool.slot(name):
+            order.append(label)
+            await release.wait()
+
+    first_agent = asyncio.create_task(run("agent", "agent-1"))
+    await asyncio.sleep(0)
+    second_agent = asyncio.create_task(run("agent", "agent-2"))
+    reminder = asyncio.create_task(run("reminder", "reminder"))
+    await asyncio.sleep(0)
+    # agent 分类名额已满，提醒不必等待排在前面的 agent 任务。
+    assert order == ["agent-1", "reminder"]
+    assert pool.running() == 2 and pool.waiting() == 1
+
+    late_reminder = asyncio.create_task(run("reminder", "reminder-2"))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first_agent, second_agent, reminder, late_reminder)
+    assert order[2:] == ["reminder-2", "agent-2"]
+    assert pool.running() == 0 and pool.waiting() == 0
+
+
+@pytest.mark.asyncio
+async def test_task_executor_staggers_recurring_agent_tasks_but_not_reminders(monkeypatch, task_manager):
+    sleeps: list[float] = []
+    real_sleep = asyncio.sleep
+    release = asyncio.Event()
+    started: list[str] = []
+    jitter = 7.25
+
+    async def fake_sleep(delay):
+        if delay == jitter:
+            sleeps.append(delay)
+        await real_sleep(0)
+
+    async def handler(*, job_id):
+        started.append(job_id)
+        await release.wait()
+
+    for job_id, trigger_type, trigger_args in (
+        ("daily_1", "cron", {"hour": 8}),
+        ("daily_2", "cron", {"hour": 8}),
+        ("remind_1", "date", {"run_date": "2099-01-01 09:00:00"}),
+        ("remind_2", "date", {"run_date": "2099-01-01 09:00:00"}),
+    ):
+        await task_manager.register_task(
+            job_id=job_id,
+            name="Task",
+            handler_module=TaskManager.AGENT_TASK_HANDLER_MODULE,
+            handler_function=TaskManager.AGENT_TASK_HANDLER_FUNCTION,
+            trigger_type=trigger_type,
+            trigger_args=trigger_args,
+            group_ids=[],
+        )
+    agent_class = JOB_CLASSES["agent"]
+    classes = {**JOB_CLASSES, "agent": JobClass("agent", agent_class.priority, 1, agent_class.timeout, jitter)}
+    executor = TaskExecutor(task_manager, JobPool(classes))
+    monkeypatch.setattr(executor, "_load_handler", lambda m, f: handler)
+    monkeypatch.setattr(task_manager_module.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(task_manager_module.random, "uniform", lambda _low, high: high)
+
+    jobs = [asyncio.create_task(executor.execute(job_id)) for job_id in ("remind_1", "remind_2", "daily_1", "daily_2")]
+    for _ in range(20):
+        await real_sleep(0)
+    # 两个一次性提醒同时触发也不错峰；第二个周期性任务错峰后才排队等 agent 名额。
+    assert sorted(started) == ["daily_1", "remind_1", "remind_2"]
+    assert sleeps == [jitter]
+    assert executor.pool.running("agent") == 1
+    assert executor.pool.waiting() == 1
+    release.set()
+    await asyncio.gather(*jobs)
+    assert sorted(started) == ["daily_1", "daily_2", "remind_1", "remind_2"]
+    assert sleeps == [jitter]
+    assert JOB_CLASSES["agent"].start_jitter > 0
+    assert JOB_CLASSES["reminder"].start_jitter == 0
+
+
+@pytest.mark.asyncio
+async def test_task_executor_records_timeout_and_cancels_on_shutdown(monkeypatch, task_manager):
+    started = asyncio.Event()
+
+    async def hanging_handler(**kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    # "stuck" 用单任务超时覆盖分类默认值，只能由 shutdown 取消。
+    for job_id, timeout_seconds in (("slow", None), ("stuck", 3600)):
+        await task_manager.register_task(
+            job_id=job_id,
+            name="Task",
+            handler_module="module",
+            handler_function="daily_news",
+            trigger_type="interval",
+            trigger_args={"minutes": 1},
+            group_ids=[],
+            timeout_seconds=timeout_seconds,
+        )
+    pool = JobPool({"broadcast": JobClass("broadcast", priority=2, limit=2, timeout=0.01)}, limit=2)
+    executor = TaskExecutor(task_manager, pool)
+    monkeypatch.setattr(executor, "_load_handler", lambda m, f: hanging_handler)
+
+    await executor.execute("slow")
+    stats = await task_manager.get_task_statistics("slow")
+    assert stats["failed_runs"] == 1
+    history = await task_manager.get_execution_history("slow")
+    assert history[0].status == "timeout"
+    assert history[0].error_message == "执行超时（0.01 秒）"
+
+    started.clear()
+    job = asyncio.create_task(executor.execute("stuck"))
+    await started.wait()
+    assert executor.pool.running("broadcast") == 1
+    await executor.shutdown()
+    assert job.cancelled()
+    assert executor.pool.running() == 0
+    history = await task_manager.get_execution_history("stuck")
+    assert [record.status for record in history] == ["cancelled"]
+
+
 @pytest.mark.asyncio
 async def test_date_scheduled_task_archives_after_success(monkeypatch, task_manager):
     async def handler(**kwargs):
@@ -505,6 +794,7 @@ async def test_agent_task_final_group_delivery_mentions_owner(monkeypatch):
 
     monkeypatch.setattr(clockwork_pkg, "task_manager", DummyTaskManager(), raising=False)
     monkeypatch.setattr(agent_task_handler_module, "FrontierCognitive", lambda: DummyCognitive())
+    monkeypatch.setattr(agent_task_handler_module, "_shared_cognitive", None)
     monkeypatch.setattr(agent_task_handler_module, "get_bot", lambda: DummyBot(), raising=False)
 
     result = await agent_task_handler_module.run_agent_task("scheduled_1")
@@ -516,3 +806,30 @@ async def test_agent_task_final_group_delivery_mentions_owner(monkeypatch):
     assert [segment.type for segment in calls[0]["message"]] == ["mention", "text"]
     assert calls[0]["message"][0].data == {"user_id": 456}
     assert calls[0]["message"][1].data == {"text": " 该喝水了"}
+
+
+@pytest.mark.asyncio
+async def test_agent_tasks_in_one_window_share_tool_cache(monkeypatch):
+    from utils import tool_helpers
+
+    monkeypatch.setattr(agent_task_handler_module, "_windows", {})
+    caches = []
+    release = asyncio.Event()
+
+    async def run(now: float) -> None:
+        async with agent_task_handler_module.coalesced_window(now):
+            caches.append(tool_helpers._tool_result_cache.get())
+            await release.wait()
+
+    window = agent_task_handler_module.AGENT_TASK_WINDOW_SECONDS
+    first = asyncio.create_task(run(window * 10))
+    second = asyncio.create_task(run(window * 10 + 1))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(first, second)
+    await run(window * 11)
+
+    assert caches[0] is caches[1]
+    assert caches[2] is not caches[0]
+    assert list(agent_task_handler_module._windows) == [11]
+    assert tool_helpers._tool_result_cache.get() is None
@@ -1,13 +1,16 @@
 # ruff: noqa: S101, S106
 
+import time
 import types
 from typing import cast
 
 import pytest
 from fastapi import HTTPException
+from sqlmodel import Session, create_engine
 from starlette.requests import Request
 
 from plugins.dashboard.api import auth_routes, messages_routes, settings_routes, status_routes, tasks_routes
+from utils.database import AlertTiming, AlertTimingDatabase, Message, ensure_message_fts, ensure_message_stats
 
 
 @pytest.mark.asyncio
@@ -51,7 +54,7 @@ async def test_status_overview_handles_missing_task_plugin(monkeypatch):
         ),
     )
 
-    monkeypatch.setattr(status_routes, "Message", types.SimpleNamespace)
+    monkeypatch.setattr(status_routes, "count_messages_from_stats", lambda _engine: 7)
     monkeypatch.setattr(status_routes, "User", types.SimpleNamespace)
     monkeypatch.setattr(
         status_routes,
@@ -62,55 +65,77 @@ async def test_status_overview_handles_missing_task_plugin(monkeypatch):
 
     result = await status_routes.get_status_overview(user={})
     assert result["database"]["task_count"] == 0
+    assert result["database"]["message_count"] == 7
+
+
+@pytest.fixture
+def messages_engine(monkeypatch):
+    engine = create_engine("sqlite://")
+    Message.metadata.create_all(engine)
+    ensure_message_fts(engine)
+    ensure_message_stats(engine)
+    with Session(engine) as session:
+        for index in range(5):
+            session.add(
+                Message(
+                    time=1000 + index,
+                    user_id=1,
+                    group_id=10,
+                    user_name="Alice",
+                    role="user",
+                    content="天气不错" if index % 2 else "今天吃什么",
+                )
+            )
+        session.add(Message(time=2000, user_id=2, group_id=20, user_name="Bob", role="user", content="天气不错"))
+        session.commit()
+    monkeypatch.setattr(messages_routes, "engine", engine)
+    messages_routes._total_cache.clear()
+    return engine
 
 
 @pytest.mark.asyncio
-async def test_messages_list_filters(monkeypatch):
-    class DummySession:
-        def __enter__(self):
-            return self
+async def test_messages_list_pages_with_keyset_cursor(messages_engine):
+    first = await messages_routes.list_messages(group_id=10, page_size=2, user={})
+    assert [m["time"] for m in first["messages"]] == [1004, 1003]
+    assert (first["total"], first["has_more"], first["next_cursor"]) == (5, True, 1003)
 
-        def __exit__(self, exc_type, exc, tb):
-            return None
+    second = await messages_routes.list_messages(group_id=10, before=first["next_cursor"], page_size=2, user={})
+    third = await messages_routes.list_messages(group_id=10, before=second["next_cursor"], page_size=2, user={})
+    assert [m["time"] for m in second["messages"]] == [1002, 1001]
+    assert [m["time"] for m in third["messages"]] == [1000]
+    assert (third["has_more"], third["next_cursor"]) == (False, None)
 
-        def exec(self, *_args, **_kwargs):
-            class DummyResult:
-                def one(self):
-                    return 0
 
-                def all(self):
-                    return []
+@pytest.mark.asyncio
+async def test_messages_list_search_uses_fts_and_caches_total(messages_engine):
+    result = await messages_routes.list_messages(search="天气不错", page_size=50, user={})
+    assert [m["time"] for m in result["messages"]] == [2000, 1003, 1001]
+    assert (result["total"], result["total_capped"]) == (3, False)
 
-            return DummyResult()
+    with Session(messages_engine) as session:
+        session.add(Message(time=3000, user_id=3, group_id=30, user_name="C", role="user", content="天气不错"))
+        session.commit()
+    cached = await messages_routes.list_messages(search="天气不错", page_size=50, user={})
+    assert cached["total"] == 3
+    assert len(cached["messages"]) == 4
 
-    monkeypatch.setattr(messages_routes, "Session", lambda _engine: DummySession())
-    monkeypatch.setattr(
-        messages_routes, "Message", types.SimpleNamespace(time=types.SimpleNamespace(desc=lambda: None))
-    )
+    short = await messages_routes.list_messages(search="吃", page_size=50, user={})
+    assert [m["time"] for m in short["messages"]] == [1004, 1002, 1000]
 
-    def fake_select(*_args, **_kwargs):
-        return types.SimpleNamespace(
-            where=lambda *_a, **_k: types.SimpleNamespace(
-                where=lambda *_aa, **_kk: types.SimpleNamespace(
-                    order_by=lambda *_aaa, **_kkk: types.SimpleNamespace(
-                        offset=lambda *_aaaa, **_kkkk: types.SimpleNamespace(
-                            limit=lambda *_aaaaa, **_kkkkk: types.SimpleNamespace()
-                        )
-                    )
-                )
-            ),
-            subquery=lambda: types.SimpleNamespace(),
-            select_from=lambda *_a, **_k: types.SimpleNamespace(),
-            order_by=lambda *_a, **_k: types.SimpleNamespace(
-                offset=lambda *_aa, **_kk: types.SimpleNamespace(limit=lambda *_aaa, **_kkk: types.SimpleNamespace())
-            ),
-        )
 
-    monkeypatch.setattr(messages_routes, "select", fake_select)
-    monkeypatch.setattr(messages_routes, "func", types.SimpleNamespace(count=lambda: None))
+@pytest.mark.asyncio
+async def test_message_aggregates_read_stats_tables(monkeypatch):
+    monkeypatch.setattr(
+        messages_routes,
+        "list_group_message_stats",
+        lambda _engine: [{"group_id": 1, "message_count": 3, "last_time": 10}],
+    )
+    monkeypatch.setattr(messages_routes, "list_user_message_stats", lambda _engine, *, limit: [{"limit": limit}])
+    monkeypatch.setattr(messages_routes, "list_daily_message_stats", lambda _engine, *, days: [{"days": days}])
 
-    result = await messages_routes.list_messages(user={}, page=1, page_size=50)
-    assert result["total"] == 0
+    assert (await messages_routes.list_groups(user={}))["groups"][0]["message_count"] == 3
+    assert (await messages_routes.list_users(user={}))["users"] == [{"limit": 200}]
+    assert (await messages_routes.list_daily_volume(days=7, user={}))["days"] == [{"days": 7}]
 
 
 @pytest.mark.asyncio
@@ -385,3 +410,79 @@ jwt_secret = "secret"
     assert configs.EnvConfig.VIDEO_POLL_TIMEOUT_SECONDS == 600
     assert configs.EnvConfig.AGENT_LLM_TIMEOUT_SECONDS == 1500
     assert configs.EnvConfig.AGENT_JOB_TIMEOUT_SECONDS == 5400
+
+
+@pytest.mark.asyncio
+async def test_status_tools_returns_tool_metrics(monkeypatch):
+    monkeypatch.setattr(status_routes, "tool_metrics_summary", lambda: [{"tool": "demo", "calls": 1}])
+
+    result = await status_routes.get_tool_metrics(user={})
+
+    assert result == {"tools": [{"tool": "demo", "calls": 1}]}
+
+
+@pytest.mark.asyncio
+async def test_status_alerts_summarizes_sent_rows_and_counts_other_outcomes(monkeypatch):
+    database = AlertTimingDatabase(create_engine("sqlite://"))
+    now_ms = int(time.time() * 1000)
+    for index, outcome in enumerate(["sent", "duplicate", "duplicate", "duplicate"]):
+        received_at = now_ms - (4 - index) * 1000
+        await database.record(
+            AlertTiming(
+                source="cenc",
+                event_id=f"e{index}",
+                report_id=f"r{index}",
+                report_num=1,
+                outcome=outcome,
+                received_at=received_at,
+                deliveries_json=f'[{{"group": 1, "kind": "text", "at": {received_at + 500}, "ok": true}}]',
+                payload_json="{}",
+            )
+        )
+    monkeypatch.setattr(status_routes, "alert_timings", database)
+    monkeypatch.setattr(status_routes, "ALERT_SUMMARY_MAX_ROWS", 1)
+
+    result = await status_routes.get_alert_latency(limit=2, user={})
+
+    assert result["outcomes"] == {"sent": 1, "duplicate": 3}
+    stages = {item["stage"]: item for item in result["stages"]}
+    assert stages["first_delivery"]["count"] == 1
+    assert [item["outcome"] for item in result["recent"]] == ["duplicate", "duplicate"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_renders_prometheus_text(monkeypatch):
+    from plugins.dashboard.api import metrics_routes
+
+    monkeypatch.setattr(
+        metrics_routes, "REGISTRY", types.SimpleNamespace(render_prometheus=lambda: "# TYPE x counter\nx 1\n")
+    )
+
+    response = await metrics_routes.get_metrics(_access=None)
+
+    assert response.body == b"# TYPE x counter\nx 1\n"
+    assert response.media_type.startswith("text/plain; version=0.0.4")
+
+
+@pytest.mark.asyncio
+async def test_metrics_access_requires_token_or_loopback(monkeypatch):
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from plugins.dashboard import auth
+
+    def request_from(host):
+        return cast(Request, types.SimpleNamespace(client=types.SimpleNamespace(host=host)))
+
+    monkeypatch.setattr(auth.EnvConfig, "DASHBOARD_METRICS_TOKEN", "", raising=False)
+    await auth.require_metrics_access(request_from("127.0.0.1"), None)
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.require_metrics_access(request_from("10.0.0.2"), None)
+    assert exc_info.value.status_code == 403
+
+    monkeypatch.setattr(auth.EnvConfig, "DASHBOARD_METRICS_TOKEN", "scrape-secret")
+    good = HTTPAuthorizationCredentials(scheme="Bearer", credentials="scrape-secret")
+    bad = HTTPAuthorizationCredentials(scheme="Bearer", credentials="wrong")
+    await auth.require_metrics_access(request_from("10.0.0.2"), good)
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.require_metrics_access(request_from("127.0.0.1"), bad)
+    assert exc_info.value.status_code == 401
@@ -44,21 +44,33 @@ class FakeWebSocket:
         return message
 
 
-class FakeEventDatabase:
+class FakeProcessedEventStore:
     def __init__(self):
-        self.value = None
+        self.event_ids = []
 
-    async def select(self, name):
-        assert name == "eq_cenc"
-        return self.value
+    async def contains(self, event_id):
+        return event_id in self.event_ids
 
-    async def insert(self, name, event_id):
-        assert name == "eq_cenc"
-        self.value = event_id
+    async def add(self, event_id):
+        if event_id in self.event_ids:
+            return False
+        self.event_ids.append(event_id)
+        return True
+
+
+class FakeAlertTimings:
+    def __init__(self):
+        self.rows = []
 
-    async def update(self, name, event_id):
-        assert name == "eq_cenc"
-        self.value = event_id
+    async def record(self, timing):
+        self.rows.append(timing)
+
+
+@pytest.fixture(autouse=True)
+def alert_timings(monkeypatch):
+    timings = FakeAlertTimings()
+    monkeypatch.setattr(cenc_handler, "alert_timings", timings)
+    return timings
 
 
 def _cenc_payload(
@@ -89,7 +101,8 @@ def _cenc_payload(
 async def test_consume_queries_handles_heartbeat_and_survives_handler_error():
     events = []
 
-    async def handler(data, *, is_snapshot):
+    async def handler(data, *, is_snapshot, received_at):
+        assert isinstance(received_at, float)
         events.append((data["EventID"], is_snapshot))
         if data["EventID"] == "event-1":
             raise RuntimeError("bad event")
@@ -160,8 +173,8 @@ async def test_start_is_singleton_and_stop_cancels_listener(monkeypatch):
         started.set()
         await asyncio.Future()
 
-    async def handler(data: dict[str, Any], *, is_snapshot: bool) -> None:
-        del data, is_snapshot
+    async def handler(data: dict[str, Any], *, is_snapshot: bool, received_at: float) -> None:
+        del data, is_snapshot, received_at
 
     monkeypatch.setattr(service, "_run", blocked_run)
 
@@ -177,8 +190,8 @@ async def test_start_is_singleton_and_stop_cancels_listener(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_cenc_event_is_sent_once_and_continues_after_group_error(monkeypatch):
-    database = FakeEventDatabase()
+async def test_cenc_event_is_sent_once_and_continues_after_group_error(monkeypatch, alert_timings):
+    database = FakeProcessedEventStore()
     rendered = []
     sent_targets = []
 
@@ -201,20 +214,18 @@ async def test_cenc_event_is_sent_once_and_continues_after_group_error(monkeypat
                 raise RuntimeError("send failed")
             sent_targets.append(target)
 
-    monkeypatch.setattr(cenc_handler, "event_database", database)
+    monkeypatch.setattr(cenc_handler, "processed_events", database)
     monkeypatch.setattr(cenc_handler, "playwright_render", fake_render)
     monkeypatch.setattr(cenc_handler, "Target", DummyTarget)
     monkeypatch.setattr(cenc_handler, "UniMessage", DummyUniMessage)
     monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [101, 202])
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_ALERT_MODE", "card")
 
-    first = await cenc_handler.process_cenc_event(_cenc_payload())
-    duplicate = await cenc_handler.process_cenc_event(
-        _cenc_payload(report_id="report-2", report_num=2, magnitude=4.5)
-    )
+    first = await cenc_handler.process_cenc_event(_cenc_payload(), received_at=1_000.0)
+    duplicate = await cenc_handler.process_cenc_event(_cenc_payload(report_id="report-2", report_num=2, magnitude=4.5))
 
     assert not hasattr(cenc_handler, "httpx_client")
-    assert database.value is not None
-    assert json.loads(database.value) == ["event-1"]
+    assert database.event_ids == ["event-1"]
     assert len(rendered) == 1
     assert rendered[0][0] == "eq_cenc"
     assert rendered[0][1]["depth"] is None
@@ -222,11 +233,22 @@ async def test_cenc_event_is_sent_once_and_continues_after_group_error(monkeypat
     assert first.groups_sent == [202]
     assert duplicate.messages_sent == 0
     assert duplicate.output_summary == "cenc ignored: duplicate event"
+    assert [row.outcome for row in alert_timings.rows] == ["sent", "duplicate"]
+    sent = alert_timings.rows[0]
+    assert sent.received_at == 1_000_000
+    assert sent.published_at is not None
+    assert sent.received_at <= sent.deduped_at <= sent.render_started_at <= sent.render_finished_at
+    deliveries = json.loads(sent.deliveries_json)
+    assert [(item["group"], item["kind"], item["ok"]) for item in deliveries] == [
+        (101, "card", False),
+        (202, "card", True),
+    ]
+    assert json.loads(sent.payload_json)["EventID"] == "event-1"
 
 
 @pytest.mark.asyncio
 async def test_cenc_low_magnitude_can_be_promoted_by_later_report(monkeypatch):
-    database = FakeEventDatabase()
+    database = FakeProcessedEventStore()
     rendered = []
 
     async def fake_render(*_args, **_kwargs):
@@ -240,26 +262,23 @@ async def test_cenc_low_magnitude_can_be_promoted_by_later_report(monkeypatch):
         async def send(self, *, target):
             raise AssertionError(f"no groups configured, unexpected target {target}")
 
-    monkeypatch.setattr(cenc_handler, "event_database", database)
+    monkeypatch.setattr(cenc_handler, "processed_events", database)
     monkeypatch.setattr(cenc_handler, "playwright_render", fake_render)
     monkeypatch.setattr(cenc_handler, "UniMessage", DummyUniMessage)
     monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [])
 
     below_threshold = await cenc_handler.process_cenc_event(_cenc_payload(magnitude=2.9))
-    promoted = await cenc_handler.process_cenc_event(
-        _cenc_payload(report_id="report-2", report_num=2, magnitude=3.1)
-    )
+    promoted = await cenc_handler.process_cenc_event(_cenc_payload(report_id="report-2", report_num=2, magnitude=3.1))
 
     assert below_threshold.output_summary == "cenc ignored: below threshold"
-    assert database.value is not None
-    assert json.loads(database.value) == ["event-1"]
-    assert rendered == [True]
+    assert database.event_ids == ["event-1"]
+    assert rendered == []
     assert promoted.output_summary == "cenc sent 0 group(s)"
 
 
 @pytest.mark.asyncio
-async def test_cenc_snapshot_freshness_and_invalid_payload(monkeypatch):
-    database = FakeEventDatabase()
+async def test_cenc_snapshot_freshness_and_invalid_payload(monkeypatch, alert_timings):
+    database = FakeProcessedEventStore()
     rendered = []
     now_cn = datetime.datetime(2026, 7, 21, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=8)))
 
@@ -274,7 +293,7 @@ async def test_cenc_snapshot_freshness_and_invalid_payload(monkeypatch):
         async def send(self, *, target):
             raise AssertionError(f"no groups configured, unexpected target {target}")
 
-    monkeypatch.setattr(cenc_handler, "event_database", database)
+    monkeypatch.setattr(cenc_handler, "processed_events", database)
     monkeypatch.setattr(cenc_handler, "playwright_render", fake_render)
     monkeypatch.setattr(cenc_handler, "UniMessage", DummyUniMessage)
     monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [])
@@ -300,14 +319,19 @@ async def test_cenc_snapshot_freshness_and_invalid_payload(monkeypatch):
     assert fresh.output_summary == "cenc sent 0 group(s)"
     assert invalid_time.output_summary == "cenc snapshot baseline stored"
     assert invalid_payload.output_summary == "cenc ignored: invalid payload"
-    assert database.value is not None
-    assert json.loads(database.value) == ["stale", "fresh", "invalid-time"]
-    assert rendered == [True]
+    assert database.event_ids == ["stale", "fresh", "invalid-time"]
+    assert [(row.event_id, row.outcome, row.is_snapshot) for row in alert_timings.rows] == [
+        ("stale", "baseline", True),
+        ("fresh", "sent", True),
+        ("invalid-time", "baseline", True),
+    ]
+    assert alert_timings.rows[2].published_at is None
+    assert rendered == []
 
 
 @pytest.mark.asyncio
 async def test_cenc_dedup_history_blocks_late_revision_after_another_event(monkeypatch):
-    database = FakeEventDatabase()
+    database = FakeProcessedEventStore()
     rendered = []
 
     async def fake_render(*_args, **_kwargs):
@@ -321,18 +345,110 @@ async def test_cenc_dedup_history_blocks_late_revision_after_another_event(monke
         async def send(self, *, target):
             raise AssertionError(f"no groups configured, unexpected target {target}")
 
-    monkeypatch.setattr(cenc_handler, "event_database", database)
+    monkeypatch.setattr(cenc_handler, "processed_events", database)
     monkeypatch.setattr(cenc_handler, "playwright_render", fake_render)
     monkeypatch.setattr(cenc_handler, "UniMessage", DummyUniMessage)
     monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [])
 
-    await cenc_handler.process_cenc_event(_cenc_payload(event_id="event-a"))
-    await cenc_handler.process_cenc_event(_cenc_payload(event_id="event-b"))
+    first = await cenc_handler.process_cenc_event(_cenc_payload(event_id="event-a"))
+    second = await cenc_handler.process_cenc_event(_cenc_payload(event_id="event-b"))
     late_revision = await cenc_handler.process_cenc_event(
         _cenc_payload(event_id="event-a", report_id="late-report", report_num=3, magnitude=4.8)
     )
 
-    assert database.value is not None
-    assert json.loads(database.value) == ["event-a", "event-b"]
-    assert rendered == [True, True]
+    assert database.event_ids == ["event-a", "event-b"]
+    assert [first.output_summary, second.output_summary] == ["cenc sent 0 group(s)"] * 2
+    assert rendered == []
     assert late_revision.output_summary == "cenc ignored: duplicate event"
+
+
+class RecordingUniMessage:
+    """Fake ``UniMessage`` that records (kind, target) for each send."""
+
+    sent: list[tuple[str, str]] = []
+
+    def __init__(self, kind: str = "card"):
+        self.kind = kind
+
+    @classmethod
+    def text(cls, text):
+        assert "CENC地震速报" in text
+        return cls("text")
+
+    def image(self, *, raw):
+        assert raw == b"earthquake-image"
+        return self
+
+    async def send(self, *, target):
+        self.sent.append((self.kind, target))
+
+    @staticmethod
+    def group(group_id):
+        return group_id
+
+
+@pytest.mark.asyncio
+async def test_cenc_text_alert_goes_out_before_card(monkeypatch, alert_timings):
+    render_started = asyncio.Event()
+    release_render = asyncio.Event()
+
+    async def slow_render(*_args, **_kwargs):
+        render_started.set()
+        await release_render.wait()
+        return b"earthquake-image"
+
+    sent: list[tuple[str, str]] = []
+    monkeypatch.setattr(RecordingUniMessage, "sent", sent)
+    monkeypatch.setattr(cenc_handler, "processed_events", FakeProcessedEventStore())
+    monkeypatch.setattr(cenc_handler, "playwright_render", slow_render)
+    monkeypatch.setattr(cenc_handler, "UniMessage", RecordingUniMessage)
+    monkeypatch.setattr(cenc_handler, "Target", RecordingUniMessage)
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [101, 202])
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_ALERT_MODE", "text_then_card")
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ALERT_MODE", {"202": "text"})
+
+    task = asyncio.create_task(cenc_handler.process_cenc_event(_cenc_payload()))
+    await render_started.wait()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert sorted(sent) == [("text", "101"), ("text", "202")]
+
+    release_render.set()
+    result = await task
+
+    assert sent[2:] == [("card", "101")]
+    assert result.groups_sent == [101, 202]
+    assert result.messages_sent == 3
+    assert result.output_summary == "cenc sent 2 group(s)"
+    row = alert_timings.rows[0]
+    assert row.outcome == "sent"
+    kinds = [(item["group"], item["kind"]) for item in json.loads(row.deliveries_json)]
+    assert sorted(kinds) == [(101, "card"), (101, "text"), (202, "text")]
+
+
+@pytest.mark.asyncio
+async def test_cenc_card_past_deadline_is_skipped_and_card_only_groups_get_text(monkeypatch, alert_timings):
+    async def stuck_render(*_args, **_kwargs):
+        await asyncio.sleep(10)
+        return b"earthquake-image"
+
+    sent: list[tuple[str, str]] = []
+    monkeypatch.setattr(RecordingUniMessage, "sent", sent)
+    monkeypatch.setattr(cenc_handler, "processed_events", FakeProcessedEventStore())
+    monkeypatch.setattr(cenc_handler, "playwright_render", stuck_render)
+    monkeypatch.setattr(cenc_handler, "UniMessage", RecordingUniMessage)
+    monkeypatch.setattr(cenc_handler, "Target", RecordingUniMessage)
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ID", [101, 202])
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_ALERT_MODE", "text_then_card")
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_GROUP_ALERT_MODE", {"202": "card"})
+    monkeypatch.setattr(cenc_handler.EnvConfig, "EARTHQUAKE_CARD_DEADLINE_SECONDS", 0.05)
+
+    result = await cenc_handler.process_cenc_event(_cenc_payload())
+
+    assert sent == [("text", "101"), ("text", "202")]
+    assert result.groups_sent == [101, 202]
+    assert result.output_summary == "cenc sent 2 group(s), card skipped"
+    row = alert_timings.rows[0]
+    assert row.outcome == "sent"
+    assert row.render_started_at is not None
+    assert row.render_finished_at is not None
@@ -117,6 +117,7 @@ def install_all_third_party_stubs():
         RunnableLambda=DummyRunnableLambda,
     )
     install_stub("langchain_core.language_models", ModelProfile=dict)
+    install_stub("langchain_core.callbacks", BaseCallbackHandler=type("BaseCallbackHandler", (), {}))
     install_stub("langchain_core.tools", tool=fake_tool)
     install_stub("langchain_openai", ChatOpenAI=type("ChatOpenAI", (), {"__init__": lambda self, **_kw: None}))
     install_stub("langchain_deepseek", ChatDeepSeek=type("ChatDeepSeek", (), {"__init__": lambda self, **_kw: None}))
@@ -59,3 +59,21 @@ async def test_http_client_aclose_all_unifies_lifecycle():
 
     # Second call is no-op
     assert await registry.aclose_all() == []
+
+
+@pytest.mark.asyncio
+async def test_instrumented_transport_records_latency_per_client(monkeypatch):
+    from utils import http_client as registry
+
+    async def fake_handle(_self, _request):
+        return registry.httpx2.Response(204)
+
+    monkeypatch.setattr(registry.AsyncHTTPTransport, "handle_async_request", fake_handle)
+    registry.HTTP_REQUEST_DURATION.clear()
+    transport = registry.InstrumentedTransport("metrics_probe")
+
+    async with registry.AsyncClient(transport=transport) as client:
+        response = await client.get("https://example.invalid/")
+
+    assert response.status_code == 204
+    assert registry.HTTP_REQUEST_DURATION.summary()[("metrics_probe", "2xx")]["count"] == 1
@@ -5,7 +5,7 @@ import types
 
 import pytest
 
-from utils.database import Message
+from utils.database import Message, MessageSearchPage, encode_search_cursor
 
 
 def _message(*, content: str = "这里提到了 Python 搜索功能", role: str = "user") -> Message:
@@ -28,7 +28,7 @@ async def test_search_messages_forwards_filters_and_uses_relevance_for_query(loa
     class DummyMessageDb:
         async def search_messages(self, **kwargs):
             captured.update(kwargs)
-            return [_message()]
+            return MessageSearchPage(messages=[_message()], next_cursor="next-page")
 
     monkeypatch.setattr(mod, "message_db", DummyMessageDb())
     result = await mod.search_messages(
@@ -37,7 +37,7 @@ async def test_search_messages_forwards_filters_and_uses_relevance_for_query(loa
         target_user_name="Ali",
         role="user",
         limit=20,
-        offset=10,
+        cursor=encode_search_cursor(sort="relevance", time=1714521600001, rank=-1.0, read=10),
         content_max_chars=600,
     )
 
@@ -52,10 +52,12 @@ async def test_search_messages_forwards_filters_and_uses_relevance_for_query(loa
         "end_time": None,
         "role": "user",
         "limit": 20,
-        "offset": 10,
+        "cursor": encode_search_cursor(sort="relevance", time=1714521600001, rank=-1.0, read=10),
         "sort": "relevance",
+        "include_archive": False,
     }
-    assert "找到 1 条聊天记录（相关度，offset=10）" in result
+    assert "找到 1 条聊天记录（相关度，已读取 11 条）" in result
+    assert "cursor=next-page" in result
     assert "msg_id=88" in result
     assert "user_id=111" in result
     assert "用户(Alice)" in result
@@ -69,7 +71,7 @@ async def test_search_messages_without_filters_returns_recent_current_scope(load
     class DummyMessageDb:
         async def search_messages(self, **kwargs):
             captured.update(kwargs)
-            return [_message(role="assistant")]
+            return MessageSearchPage(messages=[_message(role="assistant")])
 
     monkeypatch.setattr(mod, "message_db", DummyMessageDb())
     result = await mod.search_messages(config={"configurable": {"user_id": "456", "group_id": 123}})
@@ -78,8 +80,31 @@ async def test_search_messages_without_filters_returns_recent_current_scope(load
     assert captured["user_id"] == 456
     assert captured["content_query"] is None
     assert captured["sort"] == "time"
-    assert captured["offset"] == 0
+    assert captured["cursor"] is None
     assert "助手(Alice)" in result
+    assert "cursor=" not in result
+
+
+@pytest.mark.asyncio
+async def test_search_messages_with_archive_uses_time_order(load_tool_module, monkeypatch):
+    mod = load_tool_module("memory")
+    captured = {}
+
+    class DummyMessageDb:
+        async def search_messages(self, **kwargs):
+            captured.update(kwargs)
+            return MessageSearchPage(messages=[_message()])
+
+    monkeypatch.setattr(mod, "message_db", DummyMessageDb())
+    config = {"configurable": {"user_id": "456", "group_id": 123}}
+    result = await mod.search_messages(query="Python", config=config, include_archive=True)
+
+    assert captured["include_archive"] is True
+    assert captured["sort"] == "time"
+    assert "时间倒序" in result
+    assert "只支持按时间排序" in await mod.search_messages(
+        query="Python", config=config, sort="relevance", include_archive=True
+    )
 
 
 @pytest.mark.asyncio
@@ -90,7 +115,7 @@ async def test_search_messages_parses_iso_time_and_clamps_page_options(load_tool
     class DummyMessageDb:
         async def search_messages(self, **kwargs):
             captured.update(kwargs)
-            return [_message(content="x" * 200)]
+            return MessageSearchPage(messages=[_message(content="x" * 200)])
 
     monkeypatch.setattr(mod, "message_db", DummyMessageDb())
     result = await mod.search_messages(
@@ -98,12 +123,10 @@ async def test_search_messages_parses_iso_time_and_clamps_page_options(load_tool
         start_date="2026-07-20T00:00:00+08:00",
         end_date="2026-07-20",
         limit=999,
-        offset=-3,
         content_max_chars=5,
     )
 
     assert captured["limit"] == 200
-    assert captured["offset"] == 0
     assert captured["start_time"] < captured["end_time"]
     assert "x" * 100 not in result
     assert "x" * 99 + "…" in result
@@ -116,7 +139,9 @@ async def test_search_messages_rejects_invalid_options_and_read_cap(load_tool_mo
 
     assert "需要提供 query" in await mod.search_messages(config=config, sort="relevance")
     assert "日期格式错误" in await mod.search_messages(config=config, start_date="not-a-date")
-    assert "最多读取 1000 条" in await mod.search_messages(config=config, offset=1000)
+    exhausted = encode_search_cursor(sort="time", time=1, read=1000)
+    assert "最多读取 1000 条" in await mod.search_messages(config=config, cursor=exhausted)
+    assert "游标无效" in await mod.search_messages(config=config, cursor="???")
 
 
 @pytest.mark.asyncio
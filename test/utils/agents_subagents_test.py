@@ -9,6 +9,7 @@ from langchain.agents.middleware import ModelRetryMiddleware, ToolRetryMiddlewar
 from utils.agents.acp.service import AcpAgentConfig, AcpArtifact, AcpRunResult
 from utils.agents.subagents import acp as acp_subagents
 from utils.agents.subagents import document, memory, research
+from utils.tool_helpers import ToolMetricsMiddleware
 
 
 def test_build_memory_subagent_uses_basic_model_and_only_injected_tools(monkeypatch):
@@ -46,6 +47,7 @@ def test_build_memory_subagent_uses_basic_model_and_only_injected_tools(monkeypa
     assert [type(item) for item in captured["agent_kwargs"]["middleware"]] == [
         ToolRetryMiddleware,
         ModelRetryMiddleware,
+        ToolMetricsMiddleware,
     ]
     assert subagent["name"] == "memory-agent"
     assert subagent["runnable"] is runnable
@@ -81,6 +83,7 @@ def test_build_research_subagent_is_bounded_and_uses_only_injected_tools(monkeyp
         "ToolCallLimitMiddleware",
         "ModelCallLimitMiddleware",
         "ModelRetryMiddleware",
+        "ToolMetricsMiddleware",
     ]
     assert middleware[1].run_limit == 6
     assert middleware[2].run_limit == 5
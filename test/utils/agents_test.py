@@ -12,6 +12,7 @@ import pytest
 from PIL import Image
 
 from utils.agents import assistant as assistant_mod
+from utils.agents import capture as capture_mod
 from utils.agents import cognitive as cognitive_mod
 from utils.agents import inputs as inputs_mod
 from utils.agents import progress as progress_mod
@@ -638,6 +639,42 @@ async def test_chat_agent_acp_profile_removes_platform_tools_memory_and_delegati
     assert "可信身份或平台授权" in captured["system_prompt"]
 
 
+@pytest.mark.asyncio
+async def test_chat_agent_cancels_capture_intent_task_when_setup_fails(monkeypatch, tmp_path):
+    created_tasks = []
+    create_task = asyncio.create_task
+
+    def recording_create_task(coro, **kwargs):
+        task = create_task(coro, **kwargs)
+        created_tasks.append(task)
+        return task
+
+    async def unexpected_capture_check(_text):
+        raise AssertionError("capture intent check should be cancelled before it runs")
+
+    def failing_create_llm(**_kwargs):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(cognitive_mod.asyncio, "create_task", recording_create_task)
+    monkeypatch.setattr(cognitive_mod, "detect_browser_capture_intent", unexpected_capture_check)
+    monkeypatch.setattr(cognitive_mod, "create_llm", failing_create_llm)
+
+    frontier = cognitive_mod.FrontierCognitive.__new__(cognitive_mod.FrontierCognitive)
+    cast(Any, frontier).working_dir = str(tmp_path / "sandbox")
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        await frontier.chat_agent(
+            messages=[{"role": "user", "content": "打开 GitHub 官网截图"}],
+            user_id=1,
+            user_name="Alice",
+            user_text="打开 GitHub 官网截图",
+        )
+
+    assert len(created_tasks) == 1
+    await asyncio.gather(*created_tasks, return_exceptions=True)
+    assert created_tasks[0].cancelled()
+
+
 def test_build_agent_backend_creates_empty_soul_memory(tmp_path):
     working_dir = tmp_path / "sandbox"
     memory_dir = working_dir / "memory" / "123"
@@ -1474,3 +1511,34 @@ class TestChatAgentStreaming:
         assert "uni_messages" in result
         assert "error" in result
         assert "服务暂时不可用" in result["response"]["messages"][0].content
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("今天晚上吃什么", set()),
+        ("看看台风页面的雷达叠加", set()),
+        ("你看这个截图 https://example.com", None),
+        ("帮我截图 https://example.com", {"webpage_screenshot"}),
+        ("把 www.example.com 录屏一下", {"webpage_recording"}),
+        ("B站首页什么样的", None),
+    ],
+)
+def test_heuristic_capture_intent_resolves_obvious_cases(text, expected):
+    assert capture_mod.heuristic_capture_intent(text) == expected
+
+
+async def test_detect_browser_capture_intent_skips_llm_for_plain_chat_and_caches_results(monkeypatch):
+    calls = []
+
+    async def fake_signal_structured(**kwargs):
+        calls.append(kwargs["user_prompt"])
+        return capture_mod.BrowserCaptureIntent(screenshot=True, recording=False)
+
+    monkeypatch.setattr("utils.signal_llm.signal_structured", fake_signal_structured)
+    monkeypatch.setattr(capture_mod, "_capture_intent_cache", type(capture_mod._capture_intent_cache)())
+
+    assert await capture_mod.detect_browser_capture_intent("早上好") == set()
+    assert await capture_mod.detect_browser_capture_intent("打开 GitHub 官网") == {"webpage_screenshot"}
+    assert await capture_mod.detect_browser_capture_intent("  打开 github   官网 ") == {"webpage_screenshot"}
+    assert calls == ["打开 GitHub 官网"]
@@ -0,0 +1,105 @@
+# ruff: noqa: S101
+
+import json
+
+import pytest
+from sqlmodel import create_engine
+
+from utils.alert_latency import ALERT_STAGE_DURATION, AlertTimeline, alert_latency_summary
+from utils.database import AlertTimingDatabase
+
+
+def _timeline(received_at: float, *, outcome: str = "sent", deliveries=((1, 0.5, True), (2, 1.5, True))):
+    timeline = AlertTimeline("test", {"EventID": f"e{received_at:g}"}, received_at=received_at, event_id="e")
+    timeline.published_at = received_at - 2.0
+    timeline.deduped_at = received_at + 0.01
+    timeline.render_started_at = received_at + 0.02
+    timeline.render_finished_at = received_at + 0.4
+    for group, offset, ok in deliveries:
+        timeline.delivered(group, ok, at=received_at + offset)
+    timeline.outcome = outcome
+    return timeline
+
+
+def test_alert_timeline_durations_and_row_round_trip():
+    timeline = _timeline(100.0, deliveries=((1, 0.5, True), (2, 0.9, False), (3, 1.5, True)))
+
+    stages = timeline.durations()
+    assert stages["receive"] == pytest.approx(2.0)
+    assert stages["render"] == pytest.approx(0.38)
+    assert stages["first_delivery"] == pytest.approx(0.5)
+    assert stages["last_delivery"] == pytest.approx(1.5)
+    assert stages["end_to_end"] == pytest.approx(3.5)
+
+    before = ALERT_STAGE_DURATION.summary().get(("test", "end_to_end"), {}).get("count", 0)
+    row = timeline.finish()
+    assert ALERT_STAGE_DURATION.summary()[("test", "end_to_end")]["count"] == before + 1
+    assert row.received_at == 100_000
+    assert json.loads(row.deliveries_json)[1] == {"group": 2, "kind": "card", "at": 100_900, "ok": False}
+
+    assert stages["card_delivery"] == pytest.approx(1.5)
+
+    restored = AlertTimeline.from_row(row)
+    assert restored.durations() == pytest.approx(stages)
+    assert restored.payload == {"EventID": "e100"}
+
+
+def test_alert_timeline_counts_first_notification_per_group():
+    timeline = AlertTimeline("test", {}, received_at=100.0)
+    timeline.delivered(1, ok=True, at=100.2, kind="text")
+    timeline.delivered(2, ok=True, at=100.3, kind="text")
+    timeline.delivered(1, ok=True, at=104.0, kind="card")
+    timeline.delivered(2, ok=False, at=104.1, kind="card")
+
+    stages = timeline.durations()
+
+    assert timeline.notified() == {1: pytest.approx(100.2), 2: pytest.approx(100.3)}
+    assert stages["first_delivery"] == pytest.approx(0.2)
+    assert stages["last_delivery"] == pytest.approx(0.3)
+    assert stages["card_delivery"] == pytest.approx(4.0)
+
+
+def test_alert_latency_summary_only_counts_sent_reports():
+    timelines = [
+        _timeline(100.0),
+        _timeline(200.0, deliveries=((1, 1.0, True), (2, 3.0, False))),
+        _timeline(300.0, outcome="duplicate", deliveries=()),
+    ]
+
+    summary = alert_latency_summary(timelines)
+
+    assert summary["outcomes"] == {"sent": 2, "duplicate": 1}
+    stages = {item["stage"]: item for item in summary["stages"]}
+    assert stages["last_delivery"]["count"] == 2
+    assert stages["last_delivery"]["p50"] == pytest.approx(1.0)
+    assert stages["last_delivery"]["max"] == pytest.approx(1.5)
+    groups = {item["group"]: item for item in summary["groups"]}
+    assert groups[1]["count"] == 2
+    assert groups[2]["count"] == 1
+    assert groups[2]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_alert_timing_database_returns_recent_rows_first():
+    database = AlertTimingDatabase(create_engine("sqlite://"))
+    for received_at, outcome in ((100.0, "sent"), (200.0, "duplicate"), (300.0, "sent")):
+        await database.record(_timeline(received_at, outcome=outcome).finish())
+
+    rows = await database.recent("test")
+    assert [row.received_at for row in rows] == [300_000, 200_000, 100_000]
+    assert [row.received_at for row in await database.recent("test", since_ms=150_000, outcome="sent")] == [300_000]
+    assert await database.recent("other") == []
+
+
+@pytest.mark.asyncio
+async def test_alert_timing_database_counts_outcomes_and_prunes_old_rows():
+    database = AlertTimingDatabase(create_engine("sqlite://"))
+    day_ms = 86400 * 1000
+    for received_at, outcome in ((100.0, "sent"), (200.0, "duplicate"), (300.0, "duplicate"), (86_700.0, "sent")):
+        await database.record(_timeline(received_at, outcome=outcome).finish())
+
+    assert await database.count_outcomes("test") == {"sent": 2, "duplicate": 2}
+    assert await database.count_outcomes("test", since_ms=250_000) == {"sent": 1, "duplicate": 1}
+
+    assert await database.prune(retention_days=1, now_ms=86_700_000 + day_ms // 2) == 3
+    assert [row.received_at for row in await database.recent("test")] == [86_700_000]
@@ -0,0 +1,55 @@
+# ruff: noqa: S101
+
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.cenc_replay import compare_reports, load_payloads, replay
+
+
+def _payload(event_id: str, report_num: int = 1, magnitude: float = 4.2) -> dict:
+    return {
+        "type": "cenc_eew",
+        "ID": f"{event_id}-{report_num}",
+        "EventID": event_id,
+        "ReportTime": "2026-07-21 12:00:00",
+        "ReportNum": report_num,
+        "OriginTime": "2026-07-21 11:59:30",
+        "HypoCenter": "测试震中",
+        "Latitude": 30.5,
+        "Longitude": 104.1,
+        "Magnitude": magnitude,
+    }
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_pipeline_stages_against_fake_bot(tmp_path: Path):
+    corpus = tmp_path / "cenc.jsonl"
+    corpus.write_text(
+        "\n".join(
+            [
+                json.dumps(_payload("a", magnitude=2.5)),
+                json.dumps({"payload_json": json.dumps(_payload("a", report_num=2))}),
+                json.dumps(_payload("a", report_num=3)),
+                "",
+                json.dumps(_payload("b")),
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    payloads = load_payloads(corpus)
+    report = await replay(payloads, groups=2, send_latency_ms=1, render_latency_ms=5)
+
+    assert report["payloads"] == 4
+    assert report["outcomes"] == {"below_threshold": 1, "sent": 2, "duplicate": 1}
+    assert set(report["stages"]) == {"dedup", "render", "first_delivery", "last_delivery", "card_delivery"}
+    assert report["stages"]["render"]["count"] == 2
+    assert report["stages"]["render"]["p50"] >= 0.004  # 时间线按毫秒存储
+    assert report["stages"]["last_delivery"]["p50"] >= report["stages"]["first_delivery"]["p50"]
+    # 文字速报先于卡片送达
+    assert report["stages"]["card_delivery"]["p50"] > report["stages"]["last_delivery"]["p50"]
+
+    comparison = compare_reports(report, {"stages": {"render": {"p50": report["stages"]["render"]["p50"], "p95": 0}}})
+    assert comparison == {"render": {"p50": pytest.approx(1.0), "p95": None}}
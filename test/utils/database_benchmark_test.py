@@ -0,0 +1,55 @@
+# ruff: noqa: S101
+
+from pathlib import Path
+
+import pytest
+
+from scripts.database_benchmark import GenerationParams, compare_reports, run_benchmark
+from utils import database as db_module
+
+_SMALL_HISTORY = GenerationParams(
+    messages=400, groups=5, users=20, days=30, attachment_ratio=0.2, private_ratio=0.1, seed=7
+)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_every_scenario_and_reuses_generated_database(tmp_path: Path):
+    database_file = db_module.DATABASE_FILE
+
+    report = await run_benchmark(_SMALL_HISTORY, workdir=tmp_path, iterations=2)
+
+    assert db_module.DATABASE_FILE == database_file
+    assert report["database"]["messages"] == 400
+    assert report["database"]["attachments"] > 0
+    assert set(report["generation_seconds"]) == {"bulk_load", "indexes", "fts_rebuild", "stats_backfill"}
+    assert {
+        "insert",
+        "prepare_message",
+        "search_recent",
+        "search_like",
+        "search_fts_relevance",
+        "search_fts_time",
+        "replace_derived_messages",
+        "cleanup_expired_attachments",
+    } <= set(report["scenarios"])
+    for variants in report["scenarios"].values():
+        assert set(variants) == {"warm", "cold"}
+        assert variants["warm"]["count"] == 2
+        assert variants["warm"]["min_ms"] <= variants["warm"]["p50_ms"] <= variants["warm"]["max_ms"]
+
+    rerun = await run_benchmark(_SMALL_HISTORY, workdir=tmp_path, iterations=1, only={"search_recent"})
+
+    assert rerun["generation_seconds"] is None
+    assert set(rerun["scenarios"]) == {"search_recent"}
+
+
+def test_compare_reports_returns_ratios_against_baseline():
+    baseline = {"scenarios": {"insert": {"warm": {"p50_ms": 2.0, "p95_ms": 4.0}}}}
+    current = {
+        "scenarios": {
+            "insert": {"warm": {"p50_ms": 1.0, "p95_ms": 4.0}, "cold": {"p50_ms": 3.0, "p95_ms": 5.0}},
+            "search_recent": {"warm": {"p50_ms": 1.0, "p95_ms": 1.0}},
+        }
+    }
+
+    assert compare_reports(current, baseline) == {"insert.warm": {"p50_ms": 0.5, "p95_ms": 1.0}}
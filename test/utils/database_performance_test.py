@@ -21,6 +21,7 @@ def test_get_engine_configures_sqlite_for_concurrent_bot_workload(tmp_path: Path
         assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
         assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
         assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() >= 5000
+        assert conn.exec_driver_sql("PRAGMA wal_autocheckpoint").scalar() == db_module.SQLITE_WAL_AUTOCHECKPOINT_PAGES
 
 
 def test_message_database_creates_query_shaped_indexes(tmp_path: Path, monkeypatch):
@@ -173,8 +174,8 @@ async def test_search_messages_uses_fts_for_content_query_and_preserves_scope(tm
     group_results = await database.search_messages(group_id=123, user_id=1, content_query="Python", limit=10)
     private_results = await database.search_messages(group_id=None, user_id=1, content_query="Python", limit=10)
 
-    assert [message.msg_id for message in group_results] == [11, 10]
-    assert [message.msg_id for message in private_results] == [13]
+    assert [message.msg_id for message in group_results.messages] == [11, 10]
+    assert [message.msg_id for message in private_results.messages] == [13]
 
 
 @pytest.mark.asyncio
@@ -186,7 +187,7 @@ async def test_search_messages_keeps_like_fallback_for_short_cjk_query(tmp_path:
 
     results = await database.search_messages(group_id=123, user_id=1, content_query="讨论", limit=10)
 
-    assert [message.msg_id for message in results] == [10]
+    assert [message.msg_id for message in results.messages] == [10]
 
 
 def test_database_diagnostics_reports_pragmas_counts_indexes_and_fts(tmp_path: Path, monkeypatch):
@@ -213,6 +214,54 @@ def test_run_database_maintenance_reports_optimize_and_checkpoint(tmp_path: Path
     assert "wal_checkpoint" in result
 
 
+def test_choose_wal_checkpoint_mode_prefers_idle_and_quiet_hours():
+    choose = db_module.choose_wal_checkpoint_mode
+    small = 1024 * 1024
+
+    assert choose(wal_bytes=0, idle_seconds=60, hour=4) is None
+    assert choose(wal_bytes=small, idle_seconds=0.1, hour=12) is None
+    assert choose(wal_bytes=small, idle_seconds=60, hour=12) == "PASSIVE"
+    assert choose(wal_bytes=small, idle_seconds=60, hour=4) == "TRUNCATE"
+    assert choose(wal_bytes=small, idle_seconds=0.1, hour=4) is None
+    assert choose(wal_bytes=db_module.WAL_CHECKPOINT_BUSY_BYTES, idle_seconds=0.1, hour=12) == "PASSIVE"
+    assert choose(wal_bytes=db_module.WAL_CHECKPOINT_TRUNCATE_BYTES, idle_seconds=60, hour=12) == "TRUNCATE"
+
+
+@pytest.mark.asyncio
+async def test_wal_checkpoint_cycle_records_duration_in_diagnostics(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(db_module, "DATABASE_FILE", f"sqlite:///{tmp_path / 'frontier-test.db'}")
+    monkeypatch.setattr(db_module, "WAL_CHECKPOINT_QUIET_HOURS", range(0))
+    database = MessageDatabase()
+    await database.insert(1000, 10, 1, 123, "Alice", "user", "hello")
+
+    assert db_module.wal_size_bytes(database.engine) > 0
+    assert await db_module.run_wal_checkpoint_cycle(database.engine) is None
+
+    monkeypatch.setitem(db_module._last_write_at, database.engine, 0.0)
+    result = await db_module.run_wal_checkpoint_cycle(database.engine)
+
+    assert result is not None
+    assert result["mode"] == "PASSIVE"
+    assert result["busy"] is False
+    assert result["checkpointed_frames"] == result["wal_frames"]
+    diagnostics = cast(dict[str, Any], db_module.get_database_diagnostics(database.engine))
+    assert diagnostics["checkpoints"]["last"] == result
+    assert diagnostics["checkpoints"]["durations"]["passive"]["count"] >= 1
+    assert diagnostics["pragmas"]["journal_size_limit"] == db_module.SQLITE_JOURNAL_SIZE_LIMIT_BYTES
+
+
+def test_warm_database_cache_reads_hot_indexes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(db_module, "DATABASE_FILE", f"sqlite:///{tmp_path / 'frontier-test.db'}")
+    database = MessageDatabase()
+
+    timings = db_module.warm_database_cache(database.engine)
+
+    assert "ix_message_group_time" in timings
+    assert "message_group_stats" in timings
+    assert "message_fts_data" in timings
+    assert db_module.warm_database_cache(database.engine, budget_seconds=0) == {}
+
+
 def test_message_fts_initialization_logs_rebuild(tmp_path: Path, monkeypatch, caplog):
     monkeypatch.setattr(db_module, "DATABASE_FILE", f"sqlite:///{tmp_path / 'frontier-test.db'}")
     caplog.set_level("INFO", logger="utils.database")
@@ -259,13 +308,21 @@ async def test_search_messages_can_sort_fts_results_by_relevance(tmp_path: Path,
         limit=10,
         sort="relevance",
     )
+    by_relevance_first = await database.search_messages(
+        group_id=123,
+        user_id=1,
+        content_query="Python",
+        role="user",
+        limit=1,
+        sort="relevance",
+    )
     relevance_second_page = await database.search_messages(
         group_id=123,
         user_id=1,
         content_query="Python",
         role="user",
         limit=1,
-        offset=1,
+        cursor=by_relevance_first.next_cursor,
         sort="relevance",
     )
     assistant_results = await database.search_messages(
@@ -277,10 +334,12 @@ async def test_search_messages_can_sort_fts_results_by_relevance(tmp_path: Path,
         sort="relevance",
     )
 
-    assert [message.msg_id for message in by_time] == [11, 10]
-    assert by_relevance[0].msg_id == 10
-    assert [message.msg_id for message in relevance_second_page] == [11]
-    assert [message.msg_id for message in assistant_results] == [12]
+    assert [message.msg_id for message in by_time.messages] == [11, 10]
+    assert by_relevance.messages[0].msg_id == 10
+    assert [message.msg_id for message in by_relevance_first.messages] == [10]
+    assert [message.msg_id for message in relevance_second_page.messages] == [11]
+    assert relevance_second_page.next_cursor is None
+    assert [message.msg_id for message in assistant_results.messages] == [12]
 
 
 def test_cleanup_task_execution_history_applies_day_and_per_job_retention(tmp_path: Path, monkeypatch):
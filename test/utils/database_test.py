@@ -1,13 +1,15 @@
 # ruff: noqa: S101
 
+import datetime
 import json
+import zoneinfo
 from io import BytesIO
 from pathlib import Path
 
 import pytest
 from PIL import Image
 from sqlalchemy import inspect, text
-from sqlmodel import create_engine
+from sqlmodel import Session, create_engine, select
 
 from utils import database as db_module
 from utils.database import (
@@ -76,6 +78,47 @@ def test_ensure_message_schema_adds_normalization_columns(memory_engine):
     assert row == (0, "legacy", MESSAGE_SOURCE_TYPE_NORMAL)
 
 
+def _insert_raw_message(engine, time_ms: int, user_id: int, group_id: int | None, user_name: str) -> None:
+    with Session(engine) as session:
+        session.add(
+            Message(time=time_ms, user_id=user_id, group_id=group_id, user_name=user_name, role="user", content="hi")
+        )
+        session.commit()
+
+
+def test_message_stats_backfill_and_triggers(memory_engine):
+    Message.metadata.create_all(memory_engine)
+    # 2023-11-15 06:13:20 (UTC+8)
+    _insert_raw_message(memory_engine, 1_700_000_000_000, 1, 10, "Alice")
+    db_module.ensure_message_stats(memory_engine)
+
+    _insert_raw_message(memory_engine, 1_700_000_001_000, 1, 10, "Alice2")
+    _insert_raw_message(memory_engine, 1_700_090_000_000, 2, None, "Bob")
+
+    assert db_module.count_messages_from_stats(memory_engine) == 3
+    assert db_module.list_group_message_stats(memory_engine) == [
+        {"group_id": 10, "message_count": 2, "last_time": 1_700_000_001_000}
+    ]
+    users = {row["user_id"]: row for row in db_module.list_user_message_stats(memory_engine)}
+    assert users[1]["user_name"] == "Alice2"
+    assert users[1]["message_count"] == 2
+    assert db_module.list_daily_message_stats(memory_engine) == [
+        {"day": "2023-11-15", "message_count": 2},
+        {"day": "2023-11-16", "message_count": 1},
+    ]
+
+    with memory_engine.begin() as conn:
+        conn.execute(text("DELETE FROM message WHERE time = 1700000001000"))
+        conn.execute(text("UPDATE message SET group_id = 11 WHERE time = 1700000000000"))
+
+    assert db_module.count_messages_from_stats(memory_engine) == 2
+    assert db_module.list_group_message_stats(memory_engine) == [
+        {"group_id": 11, "message_count": 1, "last_time": 1_700_000_000_000}
+    ]
+    users = {row["user_id"]: row for row in db_module.list_user_message_stats(memory_engine)}
+    assert (users[1]["message_count"], users[1]["last_time"]) == (1, 1_700_000_000_000)
+
+
 @pytest.mark.asyncio
 async def test_message_database_select_and_prepare(monkeypatch, memory_engine):
     database = MessageDatabase()
@@ -183,6 +226,101 @@ async def test_insert_images_records_memory_file_attachment(monkeypatch, memory_
     assert attachment.file_size == len(b"image-bytes")
 
 
+@pytest.mark.asyncio
+async def test_insert_attachments_upserts_batch_by_physical_path(monkeypatch, memory_engine, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    database = MessageDatabase()
+    database.engine = memory_engine
+    MessageAttachment.metadata.create_all(memory_engine)
+
+    def attachment(name: str, size: int) -> dict[str, object]:
+        return {
+            "msg_time": 1000,
+            "msg_id": 101,
+            "user_id": 1,
+            "group_id": 123,
+            "kind": "file",
+            "physical_path": f"cache/sandbox/memory/123/files/{name}",
+            "virtual_path": f"/memory/123/files/{name}",
+            "file_name": name,
+            "file_size": size,
+            "expires_at": 9_999_999_999_999,
+        }
+
+    first = await database.insert_attachments([attachment("a.txt", 1), attachment("b.txt", 2)])
+    second = await database.insert_attachments([attachment("b.txt", 20), attachment("c.txt", 3)])
+
+    assert [item.file_name for item in first] == ["a.txt", "b.txt"]
+    assert [(item.file_name, item.file_size) for item in second] == [("b.txt", 20), ("c.txt", 3)]
+    assert second[0].id == first[1].id
+    assert second[0].created_at == first[1].created_at
+    with Session(memory_engine) as session:
+        assert len(session.exec(select(MessageAttachment)).all()) == 3
+
+
+@pytest.mark.asyncio
+async def test_insert_message_with_media_writes_rows_in_one_transaction(monkeypatch, memory_engine, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    database = MessageDatabase()
+    database.engine = memory_engine
+    Message.metadata.create_all(memory_engine)
+    MessageAttachment.metadata.create_all(memory_engine)
+
+    image_buffer = BytesIO()
+    Image.new("RGB", (2, 2), "red").save(image_buffer, format="PNG")
+    attachments = await database.insert(
+        1000, 101, 1, 123, "Alice", "user", "[图片]", media=[resolve_media(image_buffer.getvalue(), "image")]
+    )
+
+    assert [item.virtual_path for item in attachments] == ["/memory/123/images/1000_0.png"]
+    assert (tmp_path / "cache/sandbox/memory/123/images/1000_0.png").is_file()
+    assert [item.msg_id for item in await database.select_image_attachments_by_msg_time(1000)] == [101]
+
+
+@pytest.mark.asyncio
+async def test_insert_message_with_media_removes_files_when_insert_fails(monkeypatch, memory_engine, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    database = MessageDatabase()
+    database.engine = memory_engine
+    Message.metadata.create_all(memory_engine)
+    MessageAttachment.metadata.create_all(memory_engine)
+    await database.insert(1000, 100, 1, 123, "Alice", "user", "先到的消息")
+
+    with pytest.raises(Exception, match="UNIQUE"):
+        await database.insert(1000, 101, 1, 123, "Alice", "user", "[图片]", media=[resolve_media(b"image", "image")])
+
+    assert await database.select_image_attachments_by_msg_time(1000) == []
+    assert not any(path.is_file() for path in (tmp_path / "cache").rglob("*"))
+
+
+def test_ensure_attachment_schema_deduplicates_legacy_rows(memory_engine):
+    with memory_engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE messageattachment (
+                    id INTEGER PRIMARY KEY, msg_time INTEGER, msg_id INTEGER, user_id INTEGER, group_id INTEGER,
+                    workspace_key TEXT, kind TEXT, source_type TEXT, file_name TEXT, mime_type TEXT,
+                    file_size INTEGER, sha256 TEXT, physical_path TEXT, virtual_path TEXT,
+                    created_at INTEGER, expires_at INTEGER, metadata_json TEXT
+                )
+                """
+            )
+        )
+        for row_id in (1, 2):
+            conn.execute(
+                text("INSERT INTO messageattachment (id, physical_path, file_name) VALUES (:id, 'p', :name)"),
+                {"id": row_id, "name": f"v{row_id}"},
+            )
+
+    db_module.ensure_attachment_schema(memory_engine)
+
+    with memory_engine.connect() as conn:
+        assert conn.execute(text("SELECT id, file_name FROM messageattachment")).all() == [(2, "v2")]
+    indexes = inspect(memory_engine).get_indexes("messageattachment")
+    assert any(index["unique"] and index["column_names"] == ["physical_path"] for index in indexes)
+
+
 @pytest.mark.asyncio
 async def test_repair_legacy_media_attachments_corrects_suffix_and_mime(monkeypatch, memory_engine, tmp_path):
     monkeypatch.chdir(tmp_path)
@@ -380,8 +518,8 @@ async def test_prepare_message_excludes_forward_node_derived_records(monkeypatch
     search_results = await database.search_messages(group_id=123, user_id=1, content_query="derived content", limit=10)
 
     assert all(message.source_type != MESSAGE_SOURCE_TYPE_FORWARD_NODE for message in selected)
-    assert all(message.source_type == MESSAGE_SOURCE_TYPE_NORMAL for message in search_results)
-    assert [message.msg_id for message in search_results] == [10]
+    assert all(message.source_type == MESSAGE_SOURCE_TYPE_NORMAL for message in search_results.messages)
+    assert [message.msg_id for message in search_results.messages] == [10]
     assert len(prepared) == 1
     assert "derived content" in prepared[0]["content"]
 
@@ -400,22 +538,136 @@ async def test_search_messages_filters_history_by_scope_name_id_and_content(monk
     await database.insert(5000, 14, 1, None, "Alice", "user", "private Python")
 
     group_content = await database.search_messages(group_id=123, user_id=1, content_query="Python", limit=10)
-    assert [message.msg_id for message in group_content] == [15, 10]
+    assert [message.msg_id for message in group_content.messages] == [15, 10]
+    assert group_content.next_cursor is None
 
     alice_messages = await database.search_messages(group_id=123, user_id=1, target_user_name="Ali", limit=10)
-    assert [message.msg_id for message in alice_messages] == [12, 10]
+    assert [message.msg_id for message in alice_messages.messages] == [12, 10]
 
     exact_message = await database.search_messages(group_id=123, user_id=1, msg_id=11, limit=10)
-    assert [message.user_name for message in exact_message] == ["Bob"]
+    assert [message.user_name for message in exact_message.messages] == ["Bob"]
 
     assistant_messages = await database.search_messages(group_id=123, user_id=1, role="assistant", limit=10)
-    assert [message.msg_id for message in assistant_messages] == [15]
+    assert [message.msg_id for message in assistant_messages.messages] == [15]
 
-    second_page = await database.search_messages(group_id=123, user_id=1, limit=2, offset=2)
-    assert [message.msg_id for message in second_page] == [11, 10]
+    first_page = await database.search_messages(group_id=123, user_id=1, limit=2)
+    second_page = await database.search_messages(group_id=123, user_id=1, limit=2, cursor=first_page.next_cursor)
+    assert [message.msg_id for message in first_page.messages] == [15, 12]
+    assert [message.msg_id for message in second_page.messages] == [11, 10]
+    assert second_page.next_cursor is None
 
     private_messages = await database.search_messages(group_id=None, user_id=1, content_query="Python", limit=10)
-    assert [message.msg_id for message in private_messages] == [14]
+    assert [message.msg_id for message in private_messages.messages] == [14]
+
+
+@pytest.mark.asyncio
+async def test_search_messages_fts_relevance_cursor_pages_without_gaps(monkeypatch, memory_engine):
+    database = MessageDatabase()
+    database.engine = memory_engine
+    Message.metadata.create_all(memory_engine)
+    db_module.ensure_message_fts(memory_engine)
+
+    contents = ["Python", "Python Python 讨论", "聊 Python", "Python 与 Python", "没有关键词", "再聊 Python"]
+    for index, content in enumerate(contents):
+        await database.insert(1000 + index, 10 + index, 1, 123, "Alice", "user", content)
+
+    everything = await database.search_messages(
+        group_id=123, user_id=1, content_query="Python", limit=10, sort="relevance"
+    )
+    paged: list[int] = []
+    cursor = None
+    while True:
+        page = await database.search_messages(
+            group_id=123, user_id=1, content_query="Python", limit=2, cursor=cursor, sort="relevance"
+        )
+        paged.extend(message.time for message in page.messages)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert paged == [message.time for message in everything.messages]
+    assert len(paged) == 5
+    assert db_module.decode_search_cursor(cursor)["read"] == 4
+    with pytest.raises(ValueError):
+        await database.search_messages(group_id=123, user_id=1, content_query="Python", cursor=cursor, sort="time")
+    with pytest.raises(ValueError):
+        await database.search_messages(group_id=123, user_id=1, cursor="not-a-cursor")
+
+
+def _shanghai_ms(*args: int) -> int:
+    return int(datetime.datetime(*args, tzinfo=zoneinfo.ZoneInfo("Asia/Shanghai")).timestamp() * 1000)
+
+
+@pytest.mark.asyncio
+async def test_archive_old_messages_moves_history_into_monthly_archives(monkeypatch, memory_engine, tmp_path):
+    database = MessageDatabase()
+    database.engine = memory_engine
+    database.archive_dir = str(tmp_path / "archive")
+    Message.metadata.create_all(memory_engine)
+    db_module.ensure_message_fts(memory_engine)
+    db_module.ensure_message_stats(memory_engine)
+
+    january = _shanghai_ms(2024, 1, 31, 23, 30)
+    february = _shanghai_ms(2024, 2, 1, 0, 30)
+    recent = _shanghai_ms(2024, 6, 1)
+    await database.insert(january, 1, 1, 123, "Alice", "user", "一月 Python 记录")
+    await database.insert(january + 1, 2, 1, 123, "Alice", "user", "一月闲聊")
+    await database.insert(february, 3, 2, 123, "Bob", "user", "二月 Python 记录")
+    await database.insert(recent, 4, 1, 123, "Alice", "user", "最近的 Python 记录")
+    stats_before = (
+        db_module.count_messages_from_stats(memory_engine),
+        db_module.list_group_message_stats(memory_engine),
+        db_module.list_user_message_stats(memory_engine),
+        db_module.list_daily_message_stats(memory_engine),
+    )
+
+    archived = await database.archive_old_messages(retention_days=30, now_ms=_shanghai_ms(2024, 6, 15))
+
+    assert archived == 3
+    assert [month for month, _path in db_module.list_message_archives(database.archive_dir)] == ["2024-02", "2024-01"]
+    # 统计表是累计数据：归档只搬走消息行，总数、群/用户排行与每日消息量都不变。
+    assert db_module.count_messages_from_stats(memory_engine) == 4
+    assert (
+        db_module.count_messages_from_stats(memory_engine),
+        db_module.list_group_message_stats(memory_engine),
+        db_module.list_user_message_stats(memory_engine),
+        db_module.list_daily_message_stats(memory_engine),
+    ) == stats_before
+    assert {item["user_id"] for item in db_module.list_user_message_stats(memory_engine)} == {1, 2}
+    assert await database.archive_old_messages(retention_days=30, now_ms=_shanghai_ms(2024, 6, 15)) == 0
+
+    hot_only = await database.search_messages(group_id=123, user_id=1, content_query="Python", limit=10)
+    assert [message.msg_id for message in hot_only.messages] == [4]
+
+    first_page = await database.search_messages(
+        group_id=123, user_id=1, content_query="Python", limit=2, include_archive=True
+    )
+    second_page = await database.search_messages(
+        group_id=123, user_id=1, content_query="Python", limit=2, cursor=first_page.next_cursor, include_archive=True
+    )
+    assert [message.msg_id for message in first_page.messages] == [4, 3]
+    assert [message.msg_id for message in second_page.messages] == [1]
+    assert second_page.next_cursor is None
+
+    january_only = await database.search_messages(
+        group_id=123, user_id=1, start_time=january, end_time=january + 1000, limit=10, include_archive=True
+    )
+    assert [message.msg_id for message in january_only.messages] == [2, 1]
+    with memory_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM message")).scalar_one() == 1
+        assert conn.execute(text("PRAGMA database_list")).all()[-1][1] != db_module.MESSAGE_ARCHIVE_SCHEMA
+
+
+def test_message_fts_ready_is_cached_until_refreshed(memory_engine):
+    Message.metadata.create_all(memory_engine)
+    assert db_module.message_fts_ready(memory_engine) is False
+
+    with memory_engine.begin() as conn:
+        conn.execute(text("CREATE VIRTUAL TABLE message_fts USING fts5(content)"))
+    assert db_module.message_fts_ready(memory_engine) is False
+
+    db_module.run_database_maintenance(memory_engine)
+    assert db_module.message_fts_ready(memory_engine) is True
 
 
 @pytest.mark.asyncio
@@ -464,6 +716,54 @@ async def test_event_database_ops(monkeypatch, memory_engine):
     assert await database.select("event") is None
 
 
+@pytest.mark.asyncio
+async def test_processed_event_store_dedups_and_expires(memory_engine):
+    store = db_module.ProcessedEventStore("eq", ttl_seconds=60, engine=memory_engine)
+
+    assert await store.contains("a", now_ms=1_000) is False
+    assert await store.add("a", now_ms=1_000) is True
+    assert await store.add("a", now_ms=2_000) is False
+    assert await store.contains("a", now_ms=2_000) is True
+    # 过期后同一 EventID 可以重新记录。
+    assert await store.contains("a", now_ms=62_000) is False
+    assert await store.add("a", now_ms=62_000) is True
+
+    reloaded = db_module.ProcessedEventStore("eq", ttl_seconds=60, engine=memory_engine)
+    assert await reloaded.contains("a", now_ms=63_000) is True
+    assert await reloaded.contains("a", now_ms=123_000) is False
+
+
+@pytest.mark.asyncio
+async def test_processed_event_store_falls_back_to_database_beyond_cache(memory_engine):
+    writer = db_module.ProcessedEventStore("eq", cache_size=2, engine=memory_engine)
+    for index, event_id in enumerate(("a", "b", "c")):
+        await writer.add(event_id, now_ms=1_000 + index)
+
+    store = db_module.ProcessedEventStore("eq", cache_size=2, engine=memory_engine)
+    assert await store.contains("a", now_ms=2_000) is True
+    assert await store.contains("missing", now_ms=2_000) is False
+    assert await store.add("a", now_ms=2_000) is False
+
+
+@pytest.mark.asyncio
+async def test_processed_event_store_prunes_and_migrates_legacy_list(memory_engine):
+    TimeStamp.metadata.create_all(memory_engine)
+    with Session(memory_engine) as session:
+        session.add(TimeStamp(name="eq_cenc", id=json.dumps(["old-1", "old-2"])))
+        session.commit()
+
+    store = db_module.ProcessedEventStore("eq", ttl_seconds=60, legacy_timestamp_name="eq_cenc", engine=memory_engine)
+    assert await store.contains("old-2", now_ms=1_000) is True
+    with Session(memory_engine) as session:
+        assert session.get(TimeStamp, "eq_cenc") is None
+
+    await store.add("new", now_ms=50_000)
+    assert await store.prune(now_ms=100_000) == 2
+    with Session(memory_engine) as session:
+        remaining = session.exec(select(db_module.ProcessedEvent.event_id)).all()
+    assert remaining == ["new"]
+
+
 # ── GroupSettingsManager 测试 ────────────────────────────────
 
 
@@ -531,3 +831,27 @@ class TestGroupSettingsManager:
         GroupSettings.metadata.create_all(memory_engine)
         manager = GroupSettingsManager(memory_engine)
         assert manager.clear(123, "wake_word") == 0
+
+    @pytest.mark.asyncio
+    async def test_async_api_runs_on_database_executor(self, tmp_path):
+        engine = db_module.get_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+        GroupSettings.metadata.create_all(engine)
+        manager = GroupSettingsManager(engine)
+
+        await manager.aset(123, "wake_word", "小天")
+        await manager.aset(123, "wake_word", "小助手")
+        assert await manager.aget(123, "wake_word") == ["小天", "小助手"]
+        assert await manager.aremove(123, "wake_word", "小天") is True
+        assert await manager.aclear(123, "wake_word") == 1
+
+
+def test_cached_engine_records_statement_timing():
+    db_module.DB_QUERY_DURATION.clear()
+    engine = db_module._cached_engine("sqlite:///:memory:")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert db_module.DB_QUERY_DURATION.summary()[("SELECT",)]["count"] >= 1
+    assert db_module._statement_kind("  insert into t values (1)") == "INSERT"
+    assert db_module._statement_kind("VACUUM") == "OTHER"
@@ -0,0 +1,73 @@
+# ruff: noqa: S101
+
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+
+from utils import db_executor
+from utils.db_executor import DatabaseExecutor
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+@pytest.fixture
+def executor():
+    executor = DatabaseExecutor(readers=3, name="test-db")
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_writes_run_serially_on_one_thread(executor):
+    threads: set[str] = set()
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def write():
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(executor.write(write) for _ in range(5)))
+
+    assert max_active == 1
+    assert len(threads) == 1
+    assert next(iter(threads)).startswith("test-db-write")
+
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently_and_keep_context(executor):
+    barrier = threading.Barrier(3, timeout=2)
+    _request_id.set("req-1")
+
+    def read(value: int) -> tuple[int, str | None]:
+        barrier.wait()
+        return value * 2, _request_id.get()
+
+    results = await asyncio.gather(*(executor.read(read, value) for value in range(3)))
+
+    assert results == [(0, "req-1"), (2, "req-1"), (4, "req-1")]
+
+
+@pytest.mark.asyncio
+async def test_calls_record_queue_wait_and_duration(executor):
+    db_executor.DB_CALL_DURATION.clear()
+    db_executor.DB_QUEUE_WAIT.clear()
+
+    await executor.read(lambda: None)
+    with pytest.raises(ValueError):
+        await executor.write(lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+    assert db_executor.DB_CALL_DURATION.summary()[("read",)]["count"] == 1
+    assert db_executor.DB_CALL_DURATION.summary()[("write",)]["count"] == 1
+    assert db_executor.DB_QUEUE_WAIT.summary()[("write",)]["count"] == 1
+    assert db_executor.DB_CALLS_IN_FLIGHT.value(mode="write") == 0
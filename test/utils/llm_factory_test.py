@@ -52,6 +52,18 @@ def test_catalog_profile_accepts_proxy_prefixed_model_id(monkeypatch):
     assert mock_cls.call_args.kwargs["profile"]["max_input_tokens"] == 1_048_576
 
 
+def test_catalog_profile_is_memoized_and_returned_as_copy():
+    first = factory.get_langchain_model_profile("gemini-2.5-flash", "google")
+    assert first is not None
+    first["max_input_tokens"] = 1
+
+    second = factory.get_langchain_model_profile("gemini-2.5-flash", "google")
+
+    assert second is not None
+    assert second["max_input_tokens"] == 1_048_576
+    assert ("gemini-2.5-flash", "google") in factory._catalog_profiles
+
+
 def test_gpt_routes_to_openai(monkeypatch):
     mock_cls = MagicMock()
     monkeypatch.setattr(factory, "ChatOpenAI", mock_cls)
@@ -570,3 +582,17 @@ def test_vendor_prefix_stripped_deepseek(monkeypatch):
 
     kw = mock_cls.call_args.kwargs
     assert kw["model"] == "deepseek/deepseek-v4-flash"
+
+
+def test_create_llm_attaches_token_usage_callback(monkeypatch):
+    mock_cls = MagicMock()
+    monkeypatch.setattr(factory, "ChatOpenAI", mock_cls)
+    factory.LLM_TOKENS.clear()
+
+    factory.create_llm(model="gpt-4o")
+    (callback,) = mock_cls.call_args.kwargs["callbacks"]
+    message = MagicMock(usage_metadata={"input_tokens": 120, "output_tokens": 30})
+    callback.on_llm_end(MagicMock(generations=[[MagicMock(message=message)]]))
+
+    assert factory.LLM_TOKENS.value(model="gpt-4o", direction="input") == 120
+    assert factory.LLM_TOKENS.value(model="gpt-4o", direction="output") == 30
@@ -7,10 +7,13 @@ from PIL import Image
 
 from utils.media import (
     detect_mime_type,
+    detect_mime_type_async,
     inline_media_bytes,
     media_block_kind,
     normalize_image_for_model,
+    normalize_image_for_model_async,
     resolve_media,
+    resolve_media_async,
     standard_media_block,
 )
 
@@ -84,3 +87,44 @@ def test_normalize_image_for_model_converts_unsupported_image():
 
 def test_normalize_image_for_model_rejects_invalid_bytes():
     assert normalize_image_for_model(b"not-an-image") is None
+
+
+def test_detect_mime_type_resolves_image_signatures_without_pillow(monkeypatch):
+    monkeypatch.setattr("utils.media.PILImage.open", lambda *_args, **_kwargs: (_ for _ in ()).throw(AssertionError))
+
+    assert detect_mime_type(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8) == "image/png"
+    assert detect_mime_type(b"\xff\xd8\xff\xe0" + b"\x00" * 8) == "image/jpeg"
+    assert detect_mime_type(b"GIF89a" + b"\x00" * 8) == "image/gif"
+    assert detect_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+
+
+def test_normalize_image_for_model_downscales_oversized_image():
+    buffer = BytesIO()
+    Image.new("RGB", (400, 100), "red").save(buffer, format="JPEG")
+
+    normalized = normalize_image_for_model(buffer.getvalue(), max_dimension=200)
+
+    assert normalized is not None
+    assert normalized.mime_type == "image/jpeg"
+    with Image.open(BytesIO(normalized.data)) as image:
+        assert image.size == (200, 50)
+
+
+def test_normalize_image_for_model_keeps_small_image_under_max_dimension():
+    payload = _image_bytes("PNG")
+
+    normalized = normalize_image_for_model(payload, max_dimension=200)
+
+    assert normalized is not None
+    assert normalized.data == payload
+
+
+async def test_async_media_helpers_match_sync_results():
+    payload = _image_bytes("BMP")
+
+    assert await detect_mime_type_async(payload, kind="image") == detect_mime_type(payload, kind="image")
+    assert (await resolve_media_async(b"%PDF-1.7\n", "file")).mime_type == "application/pdf"
+    normalized = await normalize_image_for_model_async(payload)
+    assert normalized is not None
+    assert normalized.mime_type == "image/jpeg"
+    assert await normalize_image_for_model_async(b"not-an-image") is None
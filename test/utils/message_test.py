@@ -105,26 +105,9 @@ class DummyReplyCheckDb:
 
 
 def patch_reply_check_prompt(monkeypatch, prompt_text: str) -> None:
-    import builtins
-
-    original_open = builtins.open
-
-    class DummyPromptFile:
-        def __enter__(self):
-            return self
-
-        def __exit__(self, *_args):
-            return None
-
-        def read(self):
-            return prompt_text
-
-    def fake_open(path, *args, **kwargs):
-        if str(path).endswith("reply_check.md"):
-            return DummyPromptFile()
-        return original_open(path, *args, **kwargs)
-
-    monkeypatch.setattr(builtins, "open", fake_open)
+    prompt_path = message_module.REPLY_CHECK_PROMPT_PATH
+    prompt_path.parent.mkdir(parents=True, exist_ok=True)
+    prompt_path.write_text(prompt_text, encoding="utf-8")
 
 
 @pytest.fixture(autouse=True)
@@ -133,9 +116,12 @@ def clear_reply_check_state(monkeypatch):
     monkeypatch.setattr(message_module.EnvConfig, "AGENT_AUTO_REPLY_WHITELIST_MODE", False)
     monkeypatch.setattr(message_module.EnvConfig, "AGENT_AUTO_REPLY_WHITELIST_GROUP_LIST", [])
     monkeypatch.setattr(message_module.EnvConfig, "AGENT_AUTO_REPLY_BLACKLIST_GROUP_LIST", [])
+    monkeypatch.setattr(message_module, "REPLY_CHECK_DEBOUNCE_SECONDS", 0)
     message_module._reply_check_last_checked_at.clear()
+    message_module._reply_check_batches.clear()
     yield
     message_module._reply_check_last_checked_at.clear()
+    message_module._reply_check_batches.clear()
 
 
 @pytest.fixture
@@ -884,6 +870,51 @@ async def test_message_gateway_test_group_uses_database_assistant_reply_cooldown
     assert calls == 0
 
 
+@pytest.mark.asyncio
+async def test_message_gateway_reply_check_batches_messages_within_debounce_window(monkeypatch):
+    prompts = []
+
+    async def fake_signal_structured(_system_prompt, user_prompt, *_args, **_kwargs):
+        prompts.append(user_prompt)
+        return DummyReplyCheckTrue()
+
+    monkeypatch.setattr(message_module.EnvConfig, "AGENT_WHITELIST_MODE", False)
+    monkeypatch.setattr(message_module.EnvConfig, "AGENT_BLACKLIST_GROUP_LIST", [])
+    monkeypatch.setattr(message_module.EnvConfig, "AGENT_BLACKLIST_PERSON_LIST", [])
+    monkeypatch.setattr(message_module, "signal_structured", fake_signal_structured)
+    monkeypatch.setattr(message_module, "REPLY_CHECK_DEBOUNCE_SECONDS", 0.05)
+    patch_reply_check_prompt(monkeypatch, "{name}")
+    history = [{"role": "user", "content": "这个报错怎么解决？"}]
+
+    first, latest = await asyncio.gather(
+        _message_gateway(DummyTestGroupEvent("这个报错怎么解决？"), []),
+        _message_gateway(DummyTestGroupEvent("有人知道为什么会失败吗？"), history),
+    )
+
+    assert first is False
+    assert latest is True
+    assert len(prompts) == 1
+    assert "这个报错怎么解决？" in prompts[0]
+    assert "有人知道为什么会失败吗？" in prompts[0]
+    assert not message_module._reply_check_batches
+
+
+def test_load_reply_check_prompt_reloads_only_when_file_changes(monkeypatch):
+    import os
+
+    patch_reply_check_prompt(monkeypatch, "first {name}")
+    assert message_module.load_reply_check_prompt() == "first {name}"
+
+    prompt_path = message_module.REPLY_CHECK_PROMPT_PATH
+    stat = prompt_path.stat()
+    prompt_path.write_text("other {name}", encoding="utf-8")
+    os.utime(prompt_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert message_module.load_reply_check_prompt() == "first {name}"
+
+    os.utime(prompt_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert message_module.load_reply_check_prompt() == "other {name}"
+
+
 @pytest.mark.asyncio
 async def test_message_check_text(monkeypatch):
     """CONTENT_CHECK_ENABLED=True 时，调用 text_det 进行检测"""
@@ -0,0 +1,89 @@
+# ruff: noqa: S101
+
+import pytest
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    from utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "latency", ("tool",), buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 0.5, 1.5, 3.0):
+        histogram.observe(value, tool="t")
+
+    assert histogram.quantile(0.5, tool="t") == pytest.approx(1.0)
+    assert histogram.quantile(0.75, tool="t") == pytest.approx(2.0)
+    assert histogram.quantile(0.5, tool="missing") is None
+    summary = histogram.summary()[("t",)]
+    assert summary["count"] == 4
+    assert summary["sum"] == pytest.approx(5.5)
+    assert set(summary) == {"count", "sum", "p50", "p95", "p99"}
+
+
+def test_registry_renders_prometheus_text_format():
+    from utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "errors", ("tool", "exception")).inc(tool='a"b', exception="ValueError")
+    registry.gauge("in_flight", "in flight", ("tool",)).set(2, tool="a")
+    registry.histogram("duration_seconds", "duration", buckets=(0.1, 1.0)).observe(0.5)
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{tool="a\\"b",exception="ValueError"} 1' in text
+    assert 'in_flight{tool="a"} 2' in text
+    assert 'duration_seconds_bucket{le="0.1"} 0' in text
+    assert 'duration_seconds_bucket{le="1"} 1' in text
+    assert 'duration_seconds_bucket{le="+Inf"} 1' in text
+    assert "duration_seconds_count 1" in text
+    assert text.endswith("\n")
+
+
+def test_registry_reuses_metrics_and_rejects_conflicts():
+    from utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "calls", ("tool",))
+
+    assert registry.counter("calls_total", "calls", ("tool",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("calls_total", "calls", ("tool",))
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+    counter.inc(tool="a")
+    registry.reset()
+    assert counter.value(tool="a") == 0
+
+
+def test_render_runs_collectors_for_browser_gauges():
+    import types
+
+    from utils.metrics import BROWSER_PAGES, MetricsRegistry, browser_pages_collector
+
+    browser = types.SimpleNamespace(
+        is_connected=lambda: True,
+        contexts=[types.SimpleNamespace(pages=[1, 2]), types.SimpleNamespace(pages=[3])],
+    )
+    registry = MetricsRegistry()
+    registry.add_collector(browser_pages_collector("probe", lambda: browser))
+    registry.add_collector(lambda: 1 / 0)
+
+    registry.render_prometheus()
+    assert BROWSER_PAGES.value(browser="probe") == 3
+
+    browser = None
+    registry.render_prometheus()
+    assert BROWSER_PAGES.value(browser="probe") == 0
+
+
+def test_metric_subclass_must_implement_render_and_clear():
+    from utils.metrics import _Metric
+
+    class HalfMetric(_Metric):
+        def render(self) -> list[str]:
+            return []
+
+    with pytest.raises(TypeError, match="clear"):
+        HalfMetric("frontier_half", "missing clear")
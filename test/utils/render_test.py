@@ -61,101 +61,112 @@ async def test_html_to_image_keeps_raw_html_tags(monkeypatch, tmp_path):
     assert list((tmp_path / "cache").glob("*.html")) == []
 
 
-@pytest.mark.asyncio
-async def test_playwright_render_eq_usgs(monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    (tmp_path / "templates").mkdir()
-    (tmp_path / "templates" / "earthquake.html").write_text(
-        "<html><body><div id='card'>ok</div></body></html>",
-        encoding="utf-8",
-    )
-    (tmp_path / "cache").mkdir()
+class DummyCardPage:
+    def __init__(self, *, ready=True, fail_evaluate=False):
+        self.ready = ready
+        self.fail_evaluate = fail_evaluate
+        self.urls = []
+        self.injected = []
+        self.waited = []
+        self.closed = False
 
-    class DummyPage:
-        async def goto(self, *_args, **_kwargs):
-            return None
+    def on(self, *_args, **_kwargs):
+        return None
 
-        async def wait_for_load_state(self, *_args, **_kwargs):
-            return None
+    def is_closed(self):
+        return self.closed
 
-        async def wait_for_timeout(self, *_args, **_kwargs):
-            return None
+    async def goto(self, url, **_kwargs):
+        self.urls.append(url)
 
-        async def query_selector(self, *_args, **_kwargs):
-            async def screenshot(**_kw):
-                return b"img"
+    async def wait_for_function(self, *_args, **_kwargs):
+        return None
 
-            return types.SimpleNamespace(screenshot=screenshot)
+    async def evaluate(self, _script, data):
+        if self.fail_evaluate:
+            raise RuntimeError("page crashed")
+        self.injected.append(data)
 
-    class DummyBrowser:
-        async def new_page(self):
-            return DummyPage()
+    async def wait_for_selector(self, selector, **_kwargs):
+        self.waited.append(selector)
+        if not self.ready:
+            raise render.PlaywrightTimeoutError("not ready")
 
-        async def close(self):
-            return None
+    async def query_selector(self, selector):
+        assert selector == "#card"
+
+        async def screenshot(**_kw):
+            return b"img"
+
+        return types.SimpleNamespace(screenshot=screenshot)
+
+    async def close(self):
+        self.closed = True
+
+
+def _use_card_pages(monkeypatch, pages):
+    opened = []
+
+    class DummyBrowser:
+        async def new_page(self, **_kwargs):
+            page = pages.pop(0)
+            opened.append(page)
+            return page
 
     async def fake_get_browser():
         return DummyBrowser()
 
     monkeypatch.setattr(render, "_get_browser", fake_get_browser)
+    monkeypatch.setattr(render, "earthquake_card", render.EarthquakeCardPage())
+    return opened
 
+
+def _earthquake_payload(**overrides):
     payload = {
         "title": "Earthquake",
-        "detail": [],
+        "detail": [{"label": "纬度", "value": 30.5}],
         "latitude": 0,
         "longitude": 0,
         "magnitude": 1,
         "depth": 10,
     }
-    result = await render.playwright_render("eq_usgs", payload)
-    assert result == b"img"
+    payload.update(overrides)
+    return payload
 
 
 @pytest.mark.asyncio
-async def test_playwright_render_eq_cenc_with_depth_units(monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    (tmp_path / "templates").mkdir()
-    (tmp_path / "templates" / "earthquake.html").write_text(
-        "<html><body><div id='card'>ok</div></body></html>",
-        encoding="utf-8",
-    )
-    (tmp_path / "cache").mkdir()
+async def test_playwright_render_eq_reuses_warm_card_page(monkeypatch):
+    opened = _use_card_pages(monkeypatch, [DummyCardPage()])
 
-    class DummyPage:
-        async def goto(self, *_args, **_kwargs):
-            return None
-
-        async def wait_for_load_state(self, *_args, **_kwargs):
-            return None
-
-        async def wait_for_timeout(self, *_args, **_kwargs):
-            return None
-
-        async def query_selector(self, *_args, **_kwargs):
-            async def screenshot(**_kw):
-                return b"img"
-
-            return types.SimpleNamespace(screenshot=screenshot)
-
-    class DummyBrowser:
-        async def new_page(self):
-            return DummyPage()
-
-        async def close(self):
-            return None
+    await render.earthquake_card.warm()
+    first = await render.playwright_render("eq_usgs", _earthquake_payload())
+    second = await render.playwright_render(
+        "eq_cenc", _earthquake_payload(magnitude=1.0, depth="12.5千米", latitude="30.5")
+    )
 
-    async def fake_get_browser():
-        return DummyBrowser()
+    assert first == second == b"img"
+    assert len(opened) == 1
+    page = opened[0]
+    assert page.urls[0].endswith("/earthquake.html")
+    assert [(data["magnitude"], data["depth"]) for data in page.injected] == [("1.0", "10.0"), ("1.0", "12.5")]
+    assert page.injected[1]["latitude"] == 30.5
+    assert page.injected[0]["detail"] == [{"label": "纬度", "value": "30.5"}]
+    assert page.waited == [f"html[data-frontier-ready='{data['token']}']" for data in page.injected]
+    assert await render.playwright_render("unknown", _earthquake_payload()) is None
 
-    monkeypatch.setattr(render, "_get_browser", fake_get_browser)
 
-    payload = {
-        "title": "Earthquake",
-        "detail": [],
-        "latitude": 0,
-        "longitude": 0,
-        "magnitude": 1,
-        "depth": "10千米",
-    }
-    result = await render.playwright_render("eq_cenc", payload)
-    assert result == b"img"
+@pytest.mark.asyncio
+async def test_playwright_render_eq_screenshots_when_not_ready_and_recovers(monkeypatch):
+    slow, crashing, healthy = DummyCardPage(ready=False), DummyCardPage(fail_evaluate=True), DummyCardPage()
+    opened = _use_card_pages(monkeypatch, [slow, crashing, healthy])
+
+    # 就绪标记超时仍然截图。
+    assert await render.playwright_render("eq_cenc", _earthquake_payload(depth=None)) == b"img"
+    assert slow.injected[0]["depth"] == "10.0"
+
+    # 页面被关闭后重新打开；新页面出错时再重建一次。
+    slow.closed = True
+    assert await render.playwright_render("eq_cenc", _earthquake_payload()) == b"img"
+    assert opened == [slow, crashing, healthy]
+    assert crashing.closed is True
+    assert len(healthy.injected) == 1
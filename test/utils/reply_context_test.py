@@ -8,6 +8,7 @@ import pytest
 from sqlmodel import create_engine
 
 from utils import database as db_module
+from utils import reply_context
 from utils.database import Message, MessageAttachment, MessageDatabase
 from utils.message_normalizer import NORMALIZED_VERSION, segments_to_raw_json
 from utils.reply_context import build_reply_context
@@ -167,6 +168,50 @@ async def test_build_reply_context_loads_quoted_images_from_attachments(monkeypa
     assert "[下方已附加引用图片 1 张]" in quote_text
 
 
+@pytest.mark.asyncio
+async def test_build_reply_context_keeps_quoted_images_when_message_insert_fails(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(db_module, "DATABASE_FILE", "sqlite://")
+    monkeypatch.setattr(reply_context.EnvConfig, "IMAGE_ENABLED", True)
+    database = MessageDatabase()
+    database.engine = engine
+    Message.metadata.create_all(engine)
+    MessageAttachment.metadata.create_all(engine)
+    # 同一秒内的另一条消息占用了 time 主键，引用消息本身写不进去。
+    await database.insert(time=1_000, msg_id=777, user_id=222, group_id=123, user_name="Bob", role="user", content="x")
+
+    async def fake_get(_url):
+        return types.SimpleNamespace(content=b"quoted-image")
+
+    class DummyBot:
+        async def get_message(self, **_kwargs):
+            return types.SimpleNamespace(
+                message_seq=900,
+                sender_id=111,
+                time=1,
+                segments=[{"type": "image", "data": {"temp_url": "https://example.com/a.jpg", "summary": "image"}}],
+                group_member=types.SimpleNamespace(nickname="Alice"),
+                friend=None,
+            )
+
+    monkeypatch.setattr(reply_context, "_httpx_client", types.SimpleNamespace(get=fake_get))
+    event = types.SimpleNamespace(
+        self_id="1",
+        reply=None,
+        data=types.SimpleNamespace(message_scene="group", peer_id=123),
+    )
+
+    _quote_text, images = await _build_reply_context(DummyBot(), event, 900, 123, database)
+
+    assert images == [b"quoted-image"]
+    assert await database.select_by_msg_id(msg_id=900, group_id=123) is None
+    attachments = await database.select_image_attachments_by_msg_time(1_000)
+    assert [attachment.msg_id for attachment in attachments] == [900]
+    files = [path.relative_to(tmp_path) for path in (tmp_path / "cache").rglob("*") if path.is_file()]
+    assert [str(path) for path in files] == [attachment.physical_path for attachment in attachments]
+
+
 @pytest.mark.asyncio
 async def test_build_reply_context_marks_unavailable_unindexed_image():
     class DummyMessagesDb:
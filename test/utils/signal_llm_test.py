@@ -1,5 +1,7 @@
 # ruff: noqa: S101
 
+import asyncio
+
 import pytest
 from pydantic import BaseModel, Field
 
@@ -10,6 +12,13 @@ class Gateway(BaseModel):
     is_safe: bool = Field(default=False)
 
 
+@pytest.fixture(autouse=True)
+def clear_signal_cache():
+    signal_llm.SignalLLM.clear_cache()
+    yield
+    signal_llm.SignalLLM.clear_cache()
+
+
 @pytest.mark.asyncio
 async def test_signal_structured_uses_json_mode_and_signal_model_config(monkeypatch):
     captured = {}
@@ -89,3 +98,64 @@ async def test_signal_llm_class_allows_explicit_model_override(monkeypatch):
     assert captured["method"] == "json_mode"
     assert captured["messages"][0][0] == "system"
     assert "Return ONLY valid JSON" in captured["messages"][0][1]
+
+
+@pytest.mark.asyncio
+async def test_signal_llm_reuses_bound_runnable_and_coalesces_inflight_prompts(monkeypatch):
+    created = []
+    invocations = []
+    release = asyncio.Event()
+
+    class DummyRunnable:
+        async def ainvoke(self, messages):
+            invocations.append(messages)
+            await release.wait()
+            return Gateway(is_safe=True)
+
+    class DummyModel:
+        def with_structured_output(self, schema, *, method):
+            return DummyRunnable()
+
+    def fake_create_llm(**kwargs):
+        created.append(kwargs)
+        return DummyModel()
+
+    monkeypatch.setattr(signal_llm, "create_llm", fake_create_llm)
+    llm = signal_llm.SignalLLM(model="signal-model", provider="deepseek")
+
+    pending = [asyncio.create_task(llm.structured("sys", "same prompt", Gateway)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*pending)
+    await signal_llm.SignalLLM(model="signal-model", provider="deepseek").structured("sys", "other prompt", Gateway)
+
+    assert all(result.is_safe for result in results)
+    assert len(created) == 1
+    assert len(invocations) == 2
+    assert not signal_llm.SignalLLM._inflight
+
+
+@pytest.mark.asyncio
+async def test_signal_llm_cache_is_dropped_when_provider_config_reloads(monkeypatch):
+    created = []
+
+    class DummyRunnable:
+        async def ainvoke(self, _messages):
+            return Gateway()
+
+    class DummyModel:
+        def with_structured_output(self, schema, *, method):
+            return DummyRunnable()
+
+    def fake_create_llm(**kwargs):
+        created.append(kwargs)
+        return DummyModel()
+
+    monkeypatch.setattr(signal_llm, "create_llm", fake_create_llm)
+    llm = signal_llm.SignalLLM(model="signal-model", provider="deepseek")
+
+    await llm.structured("", "prompt", Gateway)
+    monkeypatch.setattr(signal_llm.EnvConfig, "LLM_PROVIDERS", dict(signal_llm.EnvConfig.LLM_PROVIDERS))
+    await llm.structured("", "prompt", Gateway)
+
+    assert len(created) == 2
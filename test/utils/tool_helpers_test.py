@@ -1,6 +1,9 @@
 # ruff: noqa: S101
 
 import base64
+import types
+
+import pytest
 
 
 def test_tool_state_view_extracts_user_and_decodes_media():
@@ -75,3 +78,103 @@ def test_tool_state_view_decodes_standard_media_blocks():
 
     assert [item.data for item in view.iter_media("image_url", "image_url", "data:image/")] == [b"standard-image"]
     assert [item.data for item in view.iter_media("video_url", "video_url", "data:video/")] == [b"standard-video"]
+
+
+@pytest.fixture
+def reset_metrics():
+    from utils.metrics import REGISTRY
+
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("reset_metrics")
+async def test_tool_timer_records_latency_errors_and_artifact_size():
+    from utils.tool_helpers import TOOL_ERRORS, TOOL_IN_FLIGHT, tool_metrics_summary, tool_timer
+
+    async with tool_timer("demo_tool") as recorder:
+        assert TOOL_IN_FLIGHT.value(tool="demo_tool") == 1
+        recorder.record_result(("ok", b"x" * 2048))
+
+    with pytest.raises(TimeoutError):
+        async with tool_timer("demo_tool"):
+            raise TimeoutError
+
+    (summary,) = tool_metrics_summary()
+    assert summary["tool"] == "demo_tool"
+    assert summary["calls"] == 2
+    assert summary["failures"] == 1
+    assert summary["errors"] == {"TimeoutError": 1}
+    assert summary["in_flight"] == 0
+    assert summary["latency"]["p95"] is not None
+    assert summary["artifact_bytes"]["count"] == 1
+    assert summary["artifact_bytes"]["sum"] == 2050
+    assert TOOL_ERRORS.value(tool="demo_tool", exception="TimeoutError") == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("reset_metrics")
+async def test_tool_metrics_middleware_counts_nested_timer_once():
+    from utils.tool_helpers import TOOL_DURATION, ToolMetricsMiddleware, tool_metrics_summary, tool_timer
+
+    async def handler(_request):
+        async with tool_timer("ens_normal", {"scenario": "雷达"}):
+            return types.SimpleNamespace(content="failed", tool_call_id="c1", status="error", artifact=b"abc")
+
+    request = types.SimpleNamespace(tool_call={"name": "ens_normal", "args": {}, "id": "c1"}, tool=None)
+    result = await ToolMetricsMiddleware().awrap_tool_call(request, handler)
+
+    assert result.status == "error"
+    assert TOOL_DURATION.summary()[("ens_normal",)]["count"] == 1
+    (summary,) = tool_metrics_summary()
+    assert summary["errors"] == {"ToolError": 1}
+    assert summary["artifact_bytes"]["sum"] == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("reset_metrics")
+async def test_tool_result_cache_middleware_shares_results_within_window():
+    import asyncio
+
+    from utils.tool_helpers import TOOL_CACHE_HITS, ToolResultCache, ToolResultCacheMiddleware, use_tool_result_cache
+
+    class ToolMessage(types.SimpleNamespace):
+        def model_copy(self, *, update):
+            return ToolMessage(**{**vars(self), **update})
+
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        calls.append(request.tool_call["id"])
+        await release.wait()
+        status = "error" if request.tool_call["args"].get("fail") else "success"
+        return ToolMessage(content="晴", tool_call_id=request.tool_call["id"], status=status)
+
+    def request(call_id: str, name: str = "mars_weather", **args):
+        return types.SimpleNamespace(tool_call={"name": name, "args": args, "id": call_id}, tool=None)
+
+    middleware = ToolResultCacheMiddleware({"mars_weather"})
+    release.set()
+    # 没有协同窗口时直接执行，不做复用。
+    assert (await middleware.awrap_tool_call(request("plain"), handler)).tool_call_id == "plain"
+    calls.clear()
+    release.clear()
+
+    with use_tool_result_cache(ToolResultCache()):
+        first = asyncio.create_task(middleware.awrap_tool_call(request("c1"), handler))
+        second = asyncio.create_task(middleware.awrap_tool_call(request("c2"), handler))
+        other = asyncio.create_task(middleware.awrap_tool_call(request("c3", name="tarot"), handler))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first, second, other)
+        failed = await middleware.awrap_tool_call(request("c4", fail=True), handler)
+        retried = await middleware.awrap_tool_call(request("c5", fail=True), handler)
+
+    assert calls == ["c1", "c3", "c4", "c5"]
+    assert [result.tool_call_id for result in results] == ["c1", "c2", "c3"]
+    assert results[1].content == "晴"
+    assert failed.status == retried.status == "error"
+    assert TOOL_CACHE_HITS.value(tool="mars_weather") == 1
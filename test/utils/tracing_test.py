@@ -0,0 +1,90 @@
+# ruff: noqa: S101
+
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_tracing(monkeypatch):
+    from utils import tracing
+    from utils.metrics import REGISTRY
+
+    monkeypatch.setattr(tracing.EnvConfig, "TRACE_EXPORT_PATH", "", raising=False)
+    REGISTRY.reset()
+    tracing.clear_traces()
+    yield
+    REGISTRY.reset()
+    tracing.clear_traces()
+
+
+class _Finished(Exception):
+    pass
+
+
+def test_trace_records_nested_spans_and_stage_breakdown():
+    from utils.tracing import recent_traces, set_trace_attribute, stage_breakdown, start_trace, trace_span
+
+    with pytest.raises(_Finished), start_trace("pipeline", non_error=(_Finished,), user_id="1") as trace:
+        with trace_span("extract"):
+            pass
+        with trace_span("agent") as agent_span, trace_span("tool"):
+            pass
+        set_trace_attribute("thread_id", "t-1")
+        raise _Finished
+
+    (recorded,) = recent_traces()
+    assert recorded["trace_id"] == trace.trace_id
+    assert recorded["error"] is None
+    assert recorded["attributes"] == {"user_id": "1", "thread_id": "t-1"}
+    assert [stage["name"] for stage in recorded["stages"]] == ["extract", "agent", "tool"]
+    tool_span = trace.spans[-1]
+    assert agent_span is not None
+    assert tool_span.parent_id == agent_span.span_id
+    assert {item["stage"] for item in stage_breakdown("pipeline")} == {"extract", "agent", "tool"}
+
+
+def test_trace_span_is_noop_outside_trace_and_marks_errors():
+    from utils.tracing import recent_traces, start_trace, trace_span
+
+    with trace_span("orphan") as span:
+        assert span is None
+
+    with pytest.raises(ValueError), start_trace("pipeline"), trace_span("db_insert"):
+        raise ValueError("boom")
+
+    (recorded,) = recent_traces()
+    assert recorded["error"] == "ValueError"
+    assert recorded["stages"] == [
+        {"name": "db_insert", "duration": recorded["stages"][0]["duration"], "error": "ValueError"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_trace_spans_follow_tasks_and_export_otlp_json(tmp_path, monkeypatch):
+    from utils import tracing
+
+    export_path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.EnvConfig, "TRACE_EXPORT_PATH", str(export_path), raising=False)
+
+    async def stage(name: str):
+        with tracing.trace_span(name):
+            await asyncio.sleep(0)
+
+    with tracing.start_trace("pipeline", group_id=123):
+        await asyncio.gather(stage("media"), stage("files"))
+
+    for _ in range(50):
+        if export_path.exists():
+            break
+        await asyncio.sleep(0.01)
+    document = json.loads(export_path.read_text(encoding="utf-8").splitlines()[0])
+    spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = spans[0]
+    assert root["name"] == "pipeline"
+    assert root["parentSpanId"] == ""
+    assert {"key": "group_id", "value": {"intValue": "123"}} in root["attributes"]
+    assert {span["name"] for span in spans[1:]} == {"media", "files"}
+    assert all(span["parentSpanId"] == root["spanId"] for span in spans[1:])
+    assert all(span["traceId"] == root["traceId"] for span in spans)
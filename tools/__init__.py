@@ -35,6 +35,18 @@ _PTC_READ_PREFIXES = {
     "milky_system": ("get_",),
     "scheduled_task": ("list_",),
 }
+# Public data lookups that return the same result for the same arguments
+# within a few minutes; agent runs in one coalescing window may share them.
+_MEMOIZABLE_MODULES = {
+    "aurora",
+    "comet",
+    "earthquake",
+    "radar",
+    "rocket",
+    "space_weather",
+    "typhoon",
+    "weather",
+}
 _RESEARCH_TOOL_NAMES = {
     "tavily_crawl",
     "tavily_extract",
@@ -145,6 +157,13 @@ class ModuleTools:
         """Return bounded web research tools owned by the research subagent."""
         return [tool for tool in self.mcp_tools if tool.name in _RESEARCH_TOOL_NAMES]
 
+    @property
+    def memoizable_tool_names(self) -> frozenset[str]:
+        """Return tools whose results may be shared by coalesced agent runs."""
+        return frozenset(
+            name for name, metadata in self.tool_metadata.items() if metadata.get("module") in _MEMOIZABLE_MODULES
+        )
+
     @property
     def main_tools(self):
         _ = self.mcp_tools  # 确保 MCP 工具已加载
@@ -6,14 +6,13 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from nonebot import get_bot, logger
 
-from utils.database import Message, MessageDatabase
+from utils.database import MessageDatabase, MessageSearchPage, decode_search_cursor
 from utils.milky_tools import format_messages
 
 _SHANGHAI = zoneinfo.ZoneInfo("Asia/Shanghai")
 # 以约 200K tokens 的有效上下文预算规划：典型 QQ 短消息最多读取 1,000 条，
 # 每页 200 条；超长消息仍由 content_max_chars 单独截断。
 _MAX_PAGE_SIZE = 200
-_MAX_OFFSET = 5000
 _MAX_MEMORY_MESSAGES = 1000
 _MIN_CONTENT_CHARS = 100
 _MAX_CONTENT_CHARS = 4000
@@ -37,9 +36,7 @@ def _parse_datetime_to_ms(value: str, *, end_of_day: bool = False) -> int:
     try:
         parsed = datetime.datetime.fromisoformat(raw.replace("Z", "+00:00"))
     except ValueError as exc:
-        raise ValueError(
-            f"无法解析时间「{raw}」，请使用 YYYY-MM-DD、YYYY-MM-DD HH:MM 或 ISO 8601 格式"
-        ) from exc
+        raise ValueError(f"无法解析时间「{raw}」，请使用 YYYY-MM-DD、YYYY-MM-DD HH:MM 或 ISO 8601 格式") from exc
 
     if date_only and end_of_day:
         parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999000)
@@ -79,19 +76,17 @@ def _truncate_content(content: str, limit: int) -> str:
 
 
 def _format_search_results(
-    messages: list[Message],
+    page: MessageSearchPage,
     *,
     sort: str,
-    offset: int,
-    limit: int,
+    already_read: int,
     content_max_chars: int,
 ) -> str:
+    messages = page.messages
     sort_label = "相关度" if sort == "relevance" else "时间倒序"
-    lines = [f"找到 {len(messages)} 条聊天记录（{sort_label}，offset={offset}）："]
+    lines = [f"找到 {len(messages)} 条聊天记录（{sort_label}，已读取 {already_read + len(messages)} 条）："]
     for msg in messages:
-        timestamp = datetime.datetime.fromtimestamp(msg.time / 1000, tz=_SHANGHAI).strftime(
-            "%Y-%m-%d %H:%M:%S"
-        )
+        timestamp = datetime.datetime.fromtimestamp(msg.time / 1000, tz=_SHANGHAI).strftime("%Y-%m-%d %H:%M:%S")
         scope = f"群{msg.group_id}" if msg.group_id is not None else "私聊"
         message_id = msg.msg_id if msg.msg_id is not None else "无"
         name = msg.user_name or ("助手" if msg.role == "assistant" else str(msg.user_id))
@@ -100,9 +95,9 @@ def _format_search_results(
             f"- [{timestamp}] {scope} msg_id={message_id} user_id={msg.user_id} "
             f"{role_label}({name}): {_truncate_content(msg.content, content_max_chars)}"
         )
-    if len(messages) == limit and offset + len(messages) < _MAX_MEMORY_MESSAGES:
-        lines.append(f"可能还有更多记录；下一页使用 offset={offset + len(messages)}。")
-    if offset + len(messages) >= _MAX_MEMORY_MESSAGES:
+    if page.next_cursor and already_read + len(messages) < _MAX_MEMORY_MESSAGES:
+        lines.append(f"还有更多记录；下一页使用 cursor={page.next_cursor}，并保持其他筛选条件不变。")
+    if already_read + len(messages) >= _MAX_MEMORY_MESSAGES:
         lines.append(f"⚠️ 已达到单次记忆任务最多 {_MAX_MEMORY_MESSAGES} 条记录的读取上限。")
     return "\n".join(lines)
 
@@ -119,14 +114,15 @@ async def search_messages(  # noqa: C901
     role: Literal["user", "assistant"] | None = None,
     sort: Literal["auto", "time", "relevance"] = "auto",
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
     content_max_chars: int = 800,
+    include_archive: bool = False,
 ) -> str:
     """搜索当前群聊或私聊的本地聊天记忆。
 
     所有筛选条件都可选；不传条件时返回当前会话最近的消息。关键词查询默认按
-    FTS5 相关度排序，其他查询默认按时间倒序。可通过 offset 分页，但单个记忆
-    任务最多读取 1000 条记录。
+    FTS5 相关度排序，其他查询默认按时间倒序。结果末尾给出的 cursor 可用于
+    继续翻页，但单个记忆任务最多读取 1000 条记录。
 
     Args:
         query: 可选消息关键词，支持部分匹配。
@@ -138,8 +134,10 @@ async def search_messages(  # noqa: C901
         role: 可选消息角色 user 或 assistant。
         sort: auto、time 或 relevance；relevance 必须提供 query。
         limit: 本页数量，范围 1–200。
-        offset: 分页偏移，范围 0–5000；同一任务不要读取超过 1000 条。
+        cursor: 可选分页游标，取自上一页结果；同一任务不要读取超过 1000 条。
         content_max_chars: 每条消息最多返回字符数，范围 100–4000。
+        include_archive: 是否继续检索已归档的早期记录；较慢，仅在明确需要很久以前的聊天时开启，
+            开启后固定按时间倒序，翻页时需保持开启。
     """
     content_query = _clean_optional_text(query)
     user_name_query = _clean_optional_text(target_user_name)
@@ -166,16 +164,23 @@ async def search_messages(  # noqa: C901
     if context_error:
         return context_error
 
-    query_limit = max(1, min(limit, _MAX_PAGE_SIZE))
-    query_offset = max(0, min(offset, _MAX_OFFSET))
-    if query_offset >= _MAX_MEMORY_MESSAGES:
-        return f"单次记忆任务最多读取 {_MAX_MEMORY_MESSAGES} 条记录，请缩小查询范围。"
-    query_limit = min(query_limit, _MAX_MEMORY_MESSAGES - query_offset)
     max_chars = max(_MIN_CONTENT_CHARS, min(content_max_chars, _MAX_CONTENT_CHARS))
-    resolved_sort = "relevance" if sort == "auto" and content_query else "time"
+    if sort == "relevance" and include_archive:
+        return "检索归档记录时只支持按时间排序。"
+    resolved_sort = "relevance" if sort == "auto" and content_query and not include_archive else "time"
+    cursor = _clean_optional_text(cursor)
+    already_read = 0
+    if cursor:
+        try:
+            already_read = int(decode_search_cursor(cursor)["read"])
+        except ValueError:
+            return "分页游标无效，请去掉 cursor 重新查询。"
+    if already_read >= _MAX_MEMORY_MESSAGES:
+        return f"单次记忆任务最多读取 {_MAX_MEMORY_MESSAGES} 条记录，请缩小查询范围。"
+    query_limit = min(max(1, min(limit, _MAX_PAGE_SIZE)), _MAX_MEMORY_MESSAGES - already_read)
 
     try:
-        messages = await message_db.search_messages(
+        page = await message_db.search_messages(
             group_id=group_id,
             user_id=current_user_id,
             content_query=content_query,
@@ -186,19 +191,21 @@ async def search_messages(  # noqa: C901
             end_time=end_ms,
             role=role,
             limit=query_limit,
-            offset=query_offset,
+            cursor=cursor,
             sort=resolved_sort,
+            include_archive=include_archive,
         )
+    except ValueError:
+        return "分页游标无效，请去掉 cursor 重新查询。"
     except Exception as exc:
         logger.error(f"消息搜索失败: {type(exc).__name__}: {exc}")
         return "消息搜索失败，请稍后重试。"
-    if not messages:
+    if not page.messages:
         return "未找到匹配的聊天记录。"
     return _format_search_results(
-        messages,
+        page,
         sort=resolved_sort,
-        offset=query_offset,
-        limit=query_limit,
+        already_read=already_read,
         content_max_chars=max_chars,
     )
 
@@ -1,8 +1,39 @@
 """Signal-LLM gate for browser capture tools."""
 
+import re
+from collections import OrderedDict
+
 from nonebot import logger
 from pydantic import BaseModel, Field
 
+CAPTURE_INTENT_CACHE_SIZE = 256
+CAPTURE_HEURISTIC_MAX_LENGTH = 300
+_URL_PATTERN = re.compile(
+    r"https?://\S+|www\.\S+|\b[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|net|org|cn|io|dev|app|gov|edu|me|tv)\b",
+    re.IGNORECASE,
+)
+_SCREENSHOT_KEYWORDS = ("截图", "截屏", "截个图", "截张图", "快照", "拍照", "screenshot", "snapshot")
+_RECORDING_KEYWORDS = ("录屏", "录制", "录视频", "录下来", "录一段", "录个", "record")
+# 单独的“看看”在闲聊里太常见，不作为查看网页的信号。
+_VIEW_KEYWORDS = (
+    "长啥样",
+    "什么样",
+    "啥样",
+    "样子",
+    "外观",
+    "打开",
+    "访问",
+    "首页",
+    "网站",
+    "网页",
+    "页面",
+    "官网",
+)
+# 用户在谈论已有截图，而不是要求截图。
+_SCREENSHOT_REFERENCE_PHRASES = ("这个截图", "这张截图", "截图里", "截图中", "截图上", "看截图", "发的截图")
+_WEATHER_PRODUCT_KEYWORDS = ("台风", "雷达", "云图", "卫星", "天气图", "风场")
+_capture_intent_cache: OrderedDict[str, frozenset[str]] = OrderedDict()
+
 
 class BrowserCaptureIntent(BaseModel):
     """Signal LLM 对用户消息的截图/录屏意图判断结果。"""
@@ -13,10 +44,62 @@ class BrowserCaptureIntent(BaseModel):
     recording: bool = Field(description="用户是否要求录制网页视频（录屏/录制/录视频等）")
 
 
+def _normalize_capture_text(user_text: str) -> str:
+    return " ".join(user_text.split()).lower()
+
+
+def heuristic_capture_intent(user_text: str) -> set[str] | None:
+    """本地预判截图/录屏意图；返回 ``None`` 表示无法确定，需要 Signal LLM 判断。
+
+    没有任何网址、捕获关键词或查看网页的措辞时直接判定为不需要；
+    同时出现网址与明确的截图/录屏关键词时直接放行。
+    """
+    text = _normalize_capture_text(user_text)
+    if not text:
+        return set()
+    has_url = bool(_URL_PATTERN.search(text))
+    wants_screenshot = any(keyword in text for keyword in _SCREENSHOT_KEYWORDS) and not any(
+        phrase in text for phrase in _SCREENSHOT_REFERENCE_PHRASES
+    )
+    wants_recording = any(keyword in text for keyword in _RECORDING_KEYWORDS)
+    mentions_view = any(keyword in text for keyword in _VIEW_KEYWORDS)
+
+    if not (has_url or wants_screenshot or wants_recording or mentions_view):
+        return set()
+    if not has_url and not (wants_screenshot or wants_recording):
+        if any(keyword in text for keyword in _WEATHER_PRODUCT_KEYWORDS):
+            return set()
+        if len(text) > CAPTURE_HEURISTIC_MAX_LENGTH:
+            # 长段落里顺带提到的“页面”“网站”几乎都不是捕获请求，避免为长消息付出一次模型调用。
+            return set()
+    if has_url and (wants_screenshot or wants_recording):
+        tools: set[str] = set()
+        if wants_screenshot:
+            tools.add("webpage_screenshot")
+        if wants_recording:
+            tools.add("webpage_recording")
+        return tools
+    return None
+
+
+def _cache_capture_intent(key: str, tools: set[str]) -> None:
+    _capture_intent_cache[key] = frozenset(tools)
+    _capture_intent_cache.move_to_end(key)
+    while len(_capture_intent_cache) > CAPTURE_INTENT_CACHE_SIZE:
+        _capture_intent_cache.popitem(last=False)
+
+
 async def detect_browser_capture_intent(user_text: str | None) -> set[str]:
     """仅在用户明确要求查看网页外观时暴露截图或录屏工具。"""
     if not user_text:
         return set()
+    heuristic = heuristic_capture_intent(user_text)
+    if heuristic is not None:
+        return heuristic
+    cache_key = _normalize_capture_text(user_text)
+    if (cached := _capture_intent_cache.get(cache_key)) is not None:
+        _capture_intent_cache.move_to_end(cache_key)
+        return set(cached)
     from utils.signal_llm import signal_structured
 
     try:
@@ -49,4 +132,5 @@ async def detect_browser_capture_intent(user_text: str | None) -> set[str]:
         tools.add("webpage_screenshot")
     if result.recording:
         tools.add("webpage_recording")
+    _cache_capture_intent(cache_key, tools)
     return tools
@@ -26,7 +26,9 @@ from utils.agent_context import FrontierRuntimeContext
 from utils.configs import EnvConfig
 from utils.harness_profiles import register_frontier_harness_profiles
 from utils.llm_factory import create_llm, model_supports_native_web_search, provider_uses_responses_api
-from utils.media import inline_media_bytes, media_block_kind
+from utils.media import inline_media_bytes, media_block_kind, run_media_task
+from utils.metrics import REGISTRY
+from utils.tool_helpers import ToolMetricsMiddleware, ToolResultCacheMiddleware
 
 from .capture import detect_browser_capture_intent
 from .inputs import filter_messages_for_model_capabilities
@@ -95,6 +97,11 @@ ACP_CLIENT_PROMPT_HINT = """
 历史或代表任何用户作出外部写操作。"""
 
 
+AGENT_TURN_DURATION = REGISTRY.histogram(
+    "frontier_agent_turn_seconds", "Agent 单轮执行耗时（秒）", ("capability", "status")
+)
+
+
 class NativeWebSearchMiddleware(AgentMiddleware):
     """Inject provider-native web search only after local-tool middleware.
 
@@ -180,43 +187,73 @@ class FrontierCognitive:
         access_profile: Literal["frontier", "acp"] = "frontier",
         enable_acp_subagents: bool = True,
     ):
-        uses_responses_api = provider_uses_responses_api(
-            EnvConfig.ADVAN_MODEL,
-            EnvConfig.ADVAN_MODEL_PROVIDER,
-        )
-        model_kwargs: dict = {
-            "model": EnvConfig.ADVAN_MODEL,
-            "streaming": False,
-            "max_retries": 2,
-            "timeout": EnvConfig.AGENT_LLM_TIMEOUT_SECONDS,
-            "provider": EnvConfig.ADVAN_MODEL_PROVIDER,
-        }
-        if uses_responses_api:
-            model_kwargs["reasoning_effort"] = capability
-            model_kwargs["verbosity"] = "low"
-        model = create_llm(**model_kwargs)
-        messages = filter_messages_for_model_capabilities(
-            messages,
-            EnvConfig.ADVAN_MODEL,
-            role="advanced",
-        )
-        working_dir = getattr(self, "working_dir", os.path.join(os.getcwd(), "cache", "sandbox"))
-        thread_id = thread_id_override or agent_thread_id(user_id, group_id)
-        if not isinstance(thread_id, uuid.UUID):
-            thread_id = uuid.uuid5(namespace=uuid.NAMESPACE_OID, name=str(thread_id))
-        workspace_key = str(group_id) if group_id is not None else str(user_id)
-        backend = build_agent_backend(working_dir, workspace_key)
-        workspace_dir = os.path.join(working_dir, "workspaces", workspace_key)
-        system_prompt = self.load_system_prompt(group_id, wake_word, workspace_key)
-        if access_profile == "acp":
-            system_prompt += ACP_CLIENT_PROMPT_HINT
-
-        effective_tools = [] if access_profile == "acp" else list(self.tools)
-        allowed_capture_tools = (
-            await detect_browser_capture_intent(user_text)
-            if access_profile == "frontier"
-            else set()
+        # 截图/录屏意图判断与 Agent 图的准备并行；本地预判命中时不会产生模型调用。
+        capture_task = (
+            asyncio.create_task(detect_browser_capture_intent(user_text)) if access_profile == "frontier" else None
         )
+        try:
+            uses_responses_api = provider_uses_responses_api(
+                EnvConfig.ADVAN_MODEL,
+                EnvConfig.ADVAN_MODEL_PROVIDER,
+            )
+            model_kwargs: dict = {
+                "model": EnvConfig.ADVAN_MODEL,
+                "streaming": False,
+                "max_retries": 2,
+                "timeout": EnvConfig.AGENT_LLM_TIMEOUT_SECONDS,
+                "provider": EnvConfig.ADVAN_MODEL_PROVIDER,
+            }
+            if uses_responses_api:
+                model_kwargs["reasoning_effort"] = capability
+                model_kwargs["verbosity"] = "low"
+            model = create_llm(**model_kwargs)
+            # 图片校验/转换是 CPU 密集的 Pillow 解码，放到媒体线程池避免阻塞事件循环。
+            messages = await run_media_task(
+                filter_messages_for_model_capabilities,
+                messages,
+                EnvConfig.ADVAN_MODEL,
+                role="advanced",
+            )
+            working_dir = getattr(self, "working_dir", os.path.join(os.getcwd(), "cache", "sandbox"))
+            thread_id = thread_id_override or agent_thread_id(user_id, group_id)
+            if not isinstance(thread_id, uuid.UUID):
+                thread_id = uuid.uuid5(namespace=uuid.NAMESPACE_OID, name=str(thread_id))
+            workspace_key = str(group_id) if group_id is not None else str(user_id)
+            backend = build_agent_backend(working_dir, workspace_key)
+            workspace_dir = os.path.join(working_dir, "workspaces", workspace_key)
+            system_prompt = self.load_system_prompt(group_id, wake_word, workspace_key)
+            if access_profile == "acp":
+                system_prompt += ACP_CLIENT_PROMPT_HINT
+
+            ptc_tools = list(getattr(self, "ptc_tools", [])) if access_profile == "frontier" else []
+            native_web_search = model_supports_native_web_search(
+                EnvConfig.ADVAN_MODEL,
+                EnvConfig.ADVAN_MODEL_PROVIDER,
+            )
+            if native_web_search:
+                logger.info("主 Agent 已挂载服务端原生 web_search 工具")
+                system_prompt += WEB_SEARCH_PROMPT_HINT
+            else:
+                logger.debug("当前模型路由不支持服务端原生 web_search，跳过挂载")
+            subagents = []
+            if access_profile == "frontier":
+                memory_subagent = getattr(self, "memory_subagent", None) or build_memory_subagent(
+                    agent_tools.subagent_tools["memory"]
+                )
+                subagents.append(memory_subagent)
+                if research_subagent := getattr(self, "research_subagent", None):
+                    subagents.append(research_subagent)
+            if document_subagent := getattr(self, "document_subagent", None):
+                subagents.append(document_subagent)
+            if access_profile == "frontier" and enable_acp_subagents:
+                subagents.extend(build_acp_subagents())
+
+            effective_tools = [] if access_profile == "acp" else list(self.tools)
+            allowed_capture_tools = await capture_task if capture_task is not None else set()
+        finally:
+            # 中途异常或运行被取消时不留下仍会调用模型的孤儿任务。
+            if capture_task is not None and not capture_task.done():
+                capture_task.cancel()
         if allowed_capture_tools:
             for restricted_tool in agent_tools.restricted_tools:
                 if restricted_tool.name in allowed_capture_tools:
@@ -229,29 +266,6 @@ class FrontierCognitive:
             for restricted_tool in agent_tools.restricted_tools:
                 if restricted_tool.name in ("ens_normal", "ens_professional"):
                     effective_tools.append(restricted_tool)
-
-        ptc_tools = list(getattr(self, "ptc_tools", [])) if access_profile == "frontier" else []
-        native_web_search = model_supports_native_web_search(
-            EnvConfig.ADVAN_MODEL,
-            EnvConfig.ADVAN_MODEL_PROVIDER,
-        )
-        if native_web_search:
-            logger.info("主 Agent 已挂载服务端原生 web_search 工具")
-            system_prompt += WEB_SEARCH_PROMPT_HINT
-        else:
-            logger.debug("当前模型路由不支持服务端原生 web_search，跳过挂载")
-        subagents = []
-        if access_profile == "frontier":
-            memory_subagent = getattr(self, "memory_subagent", None) or build_memory_subagent(
-                agent_tools.subagent_tools["memory"]
-            )
-            subagents.append(memory_subagent)
-            if research_subagent := getattr(self, "research_subagent", None):
-                subagents.append(research_subagent)
-        if document_subagent := getattr(self, "document_subagent", None):
-            subagents.append(document_subagent)
-        if access_profile == "frontier" and enable_acp_subagents:
-            subagents.extend(build_acp_subagents())
         # These third-party middleware classes intentionally use different
         # context type parameters while sharing the same runtime protocol.
         middleware: list[Any] = [
@@ -260,7 +274,9 @@ class FrontierCognitive:
                 detector=r"sk-[a-zA-Z0-9]{32}",
                 strategy="mask",
             ),
+            ToolResultCacheMiddleware(),
             ToolRetryMiddleware(),
+            ToolMetricsMiddleware(),
             ModelRetryMiddleware(),
             FilesystemFileSearchMiddleware(root_path=workspace_dir),
             CodeInterpreterMiddleware(ptc=ptc_tools),
@@ -334,6 +350,7 @@ class FrontierCognitive:
                 progress_reporter,
                 ProgressEvent(type="done", message="Agent 执行失败", detail={"success": False}),
             )
+            AGENT_TURN_DURATION.observe(time.time() - start_time, capability=capability, status="error")
             return {
                 "response": {"messages": [AIMessage("💥 服务暂时不可用，请稍后重试。")]},
                 "total_time": time.time() - start_time,
@@ -348,6 +365,7 @@ class FrontierCognitive:
         final_response = ai_messages[-1] if ai_messages else AIMessage("智能代理处理完成，但没有生成响应。")
 
         processing_time = time.time() - start_time
+        AGENT_TURN_DURATION.observe(processing_time, capability=capability, status="ok")
         logger.info(f"Agent烤熟了~🥓 (耗时: {processing_time:.2f}s)")
         await emit_progress(
             progress_reporter,
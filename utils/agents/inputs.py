@@ -5,6 +5,7 @@ from typing import Literal
 
 from utils.llm_factory import model_supports
 from utils.media import (
+    MODEL_IMAGE_MAX_DIMENSION,
     inline_media_bytes,
     media_block_kind,
     normalize_image_for_model,
@@ -49,7 +50,7 @@ def _normalize_inline_image_part(part: object) -> tuple[object | None, bool]:
             return None, True
         return part, False
 
-    normalized = normalize_image_for_model(decoded[0])
+    normalized = normalize_image_for_model(decoded[0], max_dimension=MODEL_IMAGE_MAX_DIMENSION)
     if normalized is None:
         logger.warning("忽略 Pillow 无法识别或转换的图片")
         return None, True
@@ -11,6 +11,7 @@ from langchain.agents.middleware import ModelRetryMiddleware, ToolRetryMiddlewar
 
 from utils.configs import EnvConfig
 from utils.llm_factory import create_llm
+from utils.tool_helpers import ToolMetricsMiddleware
 
 MEMORY_SUBAGENT_NAME = "memory-agent"
 _SHANGHAI = zoneinfo.ZoneInfo("Asia/Shanghai")
@@ -40,7 +41,7 @@ def build_memory_subagent(tools: Sequence[Any]) -> CompiledSubAgent:
 - 只返回最终结论，不返回中间工具调用过程或大段原始记录。
 - 只回答主 Agent 委托的记忆问题，不处理普通问答，也不尝试调用任何其他能力。
 """,
-        middleware=[ToolRetryMiddleware(), ModelRetryMiddleware()],
+        middleware=[ToolRetryMiddleware(), ModelRetryMiddleware(), ToolMetricsMiddleware()],
         debug=EnvConfig.AGENT_DEBUG_MODE,
     )
     return CompiledSubAgent(
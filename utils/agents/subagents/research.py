@@ -14,6 +14,7 @@ from langchain.agents.middleware import (
 
 from utils.configs import EnvConfig
 from utils.llm_factory import create_llm
+from utils.tool_helpers import ToolMetricsMiddleware
 
 RESEARCH_SUBAGENT_NAME = "research-agent"
 
@@ -40,6 +41,7 @@ def build_research_subagent(tools: Sequence[Any]) -> CompiledSubAgent:
         ToolCallLimitMiddleware(run_limit=6, exit_behavior="end"),
         ModelCallLimitMiddleware(run_limit=5, exit_behavior="end"),
         ModelRetryMiddleware(),
+        ToolMetricsMiddleware(),
     ]
     runnable = create_agent(
         model=model,
@@ -0,0 +1,212 @@
+"""Per-report timelines for real-time alerts, from publication to each group delivery.
+
+Every validated report gets an :class:`AlertTimeline` stamped at receipt,
+dedup, render start/end and each per-group send. Finishing a timeline feeds
+the stage histograms in :mod:`utils.metrics` and yields an ``AlertTiming``
+row; the rows (raw payload included) back the dashboard percentiles and are
+the corpus for ``scripts/cenc_replay.py``.
+"""
+
+import json
+import math
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Self
+
+from utils.database import AlertTiming
+from utils.metrics import REGISTRY
+
+ALERT_STAGES = ("receive", "dedup", "render", "first_delivery", "last_delivery", "card_delivery", "end_to_end")
+ALERT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0, 120.0)
+ALERT_STAGE_DURATION = REGISTRY.histogram(
+    "frontier_alert_stage_seconds",
+    "预警各阶段耗时（秒）：receive 为发布到接收，其余从接收算起，end_to_end 为发布到最后一个群收到首条通知",
+    ("source", "stage"),
+    buckets=ALERT_LATENCY_BUCKETS,
+)
+ALERT_DELIVERY_DURATION = REGISTRY.histogram(
+    "frontier_alert_delivery_seconds",
+    "预警从接收到各群收到首条通知的耗时（秒）",
+    ("source", "group"),
+    buckets=ALERT_LATENCY_BUCKETS,
+)
+
+
+def _ms(value: float | None) -> int | None:
+    return None if value is None else round(value * 1000)
+
+
+def _seconds(value: int | None) -> float | None:
+    return None if value is None else value / 1000
+
+
+@dataclass(slots=True)
+class AlertDelivery:
+    group: int
+    at: float
+    ok: bool
+    kind: str = "card"  # text / card
+
+
+@dataclass(slots=True)
+class AlertTimeline:
+    """一条报文的时间线；时间均为 Unix 秒，与报文里的发布时间可直接相减。"""
+
+    source: str
+    payload: dict[str, Any]
+    received_at: float = field(default_factory=time.time)
+    is_snapshot: bool = False
+    event_id: str = ""
+    report_id: str = ""
+    report_num: int = 0
+    published_at: float | None = None
+    deduped_at: float | None = None
+    render_started_at: float | None = None
+    render_finished_at: float | None = None
+    deliveries: list[AlertDelivery] = field(default_factory=list)
+    outcome: str = "pending"
+
+    def delivered(self, group: int, ok: bool, at: float | None = None, *, kind: str = "card") -> None:
+        self.deliveries.append(AlertDelivery(int(group), time.time() if at is None else at, ok, kind))
+
+    def notified(self) -> dict[int, float]:
+        """每个群第一次成功收到通知（文字或卡片）的时间。"""
+        notified: dict[int, float] = {}
+        for delivery in self.deliveries:
+            if delivery.ok and (delivery.group not in notified or delivery.at < notified[delivery.group]):
+                notified[delivery.group] = delivery.at
+        return notified
+
+    def durations(self) -> dict[str, float]:
+        stages: dict[str, float] = {}
+
+        def span(stage: str, start: float | None, end: float | None) -> None:
+            if start is not None and end is not None:
+                stages[stage] = end - start
+
+        span("receive", self.published_at, self.received_at)
+        span("dedup", self.received_at, self.deduped_at)
+        span("render", self.render_started_at, self.render_finished_at)
+        notified = self.notified().values()
+        if notified:
+            span("first_delivery", self.received_at, min(notified))
+            span("last_delivery", self.received_at, max(notified))
+            span("end_to_end", self.published_at, max(notified))
+        cards = [delivery.at for delivery in self.deliveries if delivery.ok and delivery.kind == "card"]
+        if cards:
+            span("card_delivery", self.received_at, max(cards))
+        return stages
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "report_id": self.report_id,
+            "report_num": self.report_num,
+            "outcome": self.outcome,
+            "is_snapshot": self.is_snapshot,
+            "received_at": self.received_at,
+            "stages": self.durations(),
+            "deliveries": [
+                {"group": item.group, "kind": item.kind, "seconds": item.at - self.received_at, "ok": item.ok}
+                for item in self.deliveries
+            ],
+        }
+
+    def finish(self) -> AlertTiming:
+        """计入直方图并转换为待持久化的行。"""
+        # 发布时间来自对端时钟，偏差可能让 receive 为负，直方图里按 0 计。
+        for stage, duration in self.durations().items():
+            ALERT_STAGE_DURATION.observe(max(0.0, duration), source=self.source, stage=stage)
+        for group, at in self.notified().items():
+            ALERT_DELIVERY_DURATION.observe(max(0.0, at - self.received_at), source=self.source, group=str(group))
+        return AlertTiming(
+            source=self.source,
+            event_id=self.event_id,
+            report_id=self.report_id,
+            report_num=self.report_num,
+            outcome=self.outcome,
+            is_snapshot=self.is_snapshot,
+            published_at=_ms(self.published_at),
+            received_at=_ms(self.received_at),
+            deduped_at=_ms(self.deduped_at),
+            render_started_at=_ms(self.render_started_at),
+            render_finished_at=_ms(self.render_finished_at),
+            deliveries_json=json.dumps(
+                [
+                    {"group": item.group, "kind": item.kind, "at": _ms(item.at), "ok": item.ok}
+                    for item in self.deliveries
+                ]
+            ),
+            payload_json=json.dumps(self.payload, ensure_ascii=False),
+        )
+
+    @classmethod
+    def from_row(cls, row: AlertTiming) -> Self:
+        return cls(
+            source=row.source,
+            payload=json.loads(row.payload_json),
+            received_at=row.received_at / 1000,
+            is_snapshot=row.is_snapshot,
+            event_id=row.event_id,
+            report_id=row.report_id,
+            report_num=row.report_num,
+            published_at=_seconds(row.published_at),
+            deduped_at=_seconds(row.deduped_at),
+            render_started_at=_seconds(row.render_started_at),
+            render_finished_at=_seconds(row.render_finished_at),
+            deliveries=[
+                AlertDelivery(int(item["group"]), item["at"] / 1000, bool(item["ok"]), item.get("kind", "card"))
+                for item in json.loads(row.deliveries_json)
+            ],
+            outcome=row.outcome,
+        )
+
+
+def _percentiles(samples: list[float]) -> dict[str, Any]:
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+    }
+
+
+def alert_latency_summary(timelines: Iterable[AlertTimeline]) -> dict[str, Any]:
+    """按阶段与群汇总已推送报文的耗时分位数（秒），供 Dashboard 查询。"""
+    stage_samples: dict[str, list[float]] = {}
+    group_samples: dict[int, list[float]] = {}
+    group_failures: dict[int, int] = {}
+    outcomes: dict[str, int] = {}
+    for timeline in timelines:
+        outcomes[timeline.outcome] = outcomes.get(timeline.outcome, 0) + 1
+        if timeline.outcome != "sent":
+            continue
+        for stage, duration in timeline.durations().items():
+            stage_samples.setdefault(stage, []).append(duration)
+        for group, at in timeline.notified().items():
+            group_samples.setdefault(group, []).append(at - timeline.received_at)
+        for delivery in timeline.deliveries:
+            if not delivery.ok:
+                group_failures[delivery.group] = group_failures.get(delivery.group, 0) + 1
+    return {
+        "outcomes": outcomes,
+        "stages": [
+            {"stage": stage, **_percentiles(stage_samples[stage])} for stage in ALERT_STAGES if stage in stage_samples
+        ],
+        "groups": [
+            {
+                "group": group,
+                "failures": group_failures.get(group, 0),
+                **(_percentiles(group_samples[group]) if group in group_samples else {"count": 0}),
+            }
+            for group in sorted(group_samples.keys() | group_failures.keys())
+        ],
+    }
@@ -18,11 +18,14 @@ from typing import Any
 import imageio_ffmpeg
 from playwright.async_api import async_playwright
 
+from utils.metrics import REGISTRY, browser_pages_collector
+
 logger = logging.getLogger(__name__)
 
 _browser: Any = None
 _playwright: Any = None
 _browser_lock = Lock()
+REGISTRY.add_collector(browser_pages_collector("capture", lambda: _browser))
 
 # 浏览器崩溃相关的错误消息特征
 _CRASH_MSG_SNIPPETS = (
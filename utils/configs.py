@@ -7,7 +7,7 @@ import sys
 import tomllib
 from collections.abc import Mapping
 from pathlib import Path
-from typing import Any, ClassVar
+from typing import Any, ClassVar, Literal
 
 import dotenv
 from pydantic import BaseModel, ConfigDict, Field, SecretStr
@@ -141,6 +141,9 @@ class LimitConfig(_FrozenConfig):
     agent_job_timeout_seconds: int = Field(default=3600, ge=1)
 
 
+EarthquakeAlertMode = Literal["text_then_card", "text", "card"]
+
+
 class NotificationConfig(_FrozenConfig):
     test_group_id: tuple[int | str, ...] = ()
     announce_group_id: tuple[int | str, ...] = ()
@@ -148,6 +151,10 @@ class NotificationConfig(_FrozenConfig):
     earth_now_group_id: tuple[int | str, ...] = ()
     news_summary_group_id: tuple[int | str, ...] = ()
     earthquake_group_id: tuple[int | str, ...] = ()
+    # text_then_card：先发文字速报再补发卡片；text：只发文字；card：只发卡片（超时后改发文字）
+    earthquake_alert_mode: EarthquakeAlertMode = "text_then_card"
+    earthquake_group_alert_mode: dict[str, EarthquakeAlertMode] = Field(default_factory=dict)
+    earthquake_card_deadline_seconds: float = Field(default=20.0, gt=0)
     nrc_merchant_group_id: tuple[int | str, ...] = ()
 
 
@@ -159,16 +166,22 @@ class StorageConfig(_FrozenConfig):
     max_inline_images: int = Field(default=4, ge=0)
     max_inline_media_bytes: int = Field(default=20 * 1024 * 1024, ge=0)
     image_auto_cleanup: bool = True
+    message_retention_days: int = Field(default=0, ge=0)
+    message_archive_dir: str = "cache/message_archive"
+    wal_checkpoint_interval_seconds: int = Field(default=10, ge=0)
+    database_warmup: bool = False
 
 
 class DebugConfig(_FrozenConfig):
     agent_debug_mode: bool = False
+    trace_export_path: str = ""
 
 
 class DashboardConfig(_FrozenConfig):
     password: str = "admin"  # noqa: S105 - backward-compatible insecure default warning
     jwt_secret: str = _DEFAULT_DASHBOARD_JWT_SECRET
     jwt_expire_hours: int = Field(default=24, ge=1)
+    metrics_token: str = ""
 
 
 class ContentCheckConfig(_FrozenConfig):
@@ -722,7 +735,8 @@ def parse_config(config: Mapping[str, Any]) -> FrontierSettings:
             )
         },
         "notifications": {
-            field: _pick(notifications, legacy_message, field, []) for field in NotificationConfig.model_fields
+            field: _pick(notifications, legacy_message, field, info.get_default(call_default_factory=True))
+            for field, info in NotificationConfig.model_fields.items()
         },
         "storage": {
             "query_message_numbers": _pick(storage, legacy_database, "query_message_numbers", 100),
@@ -742,6 +756,10 @@ def parse_config(config: Mapping[str, Any]) -> FrontierSettings:
                 20 * 1024 * 1024,
             ),
             "image_auto_cleanup": _pick(storage, legacy_image_memory, "image_auto_cleanup", True, "auto_cleanup"),
+            "message_retention_days": storage.get("message_retention_days", 0),
+            "message_archive_dir": storage.get("message_archive_dir", "cache/message_archive"),
+            "wal_checkpoint_interval_seconds": storage.get("wal_checkpoint_interval_seconds", 10),
+            "database_warmup": storage.get("database_warmup", False),
         },
         "debug": _section(config, "debug"),
         "dashboard": _section(config, "dashboard"),
@@ -855,6 +873,9 @@ class EnvConfig:
     EARTH_NOW_GROUP_ID: ClassVar[list[int | str]]
     NEWS_SUMMARY_GROUP_ID: ClassVar[list[int | str]]
     EARTHQUAKE_GROUP_ID: ClassVar[list[int | str]]
+    EARTHQUAKE_ALERT_MODE: ClassVar[str]
+    EARTHQUAKE_GROUP_ALERT_MODE: ClassVar[dict[str, str]]
+    EARTHQUAKE_CARD_DEADLINE_SECONDS: ClassVar[float]
     NRC_MERCHANT_GROUP_ID: ClassVar[list[int | str]]
 
     # Storage, diagnostics, and dashboard
@@ -865,10 +886,16 @@ class EnvConfig:
     MAX_INLINE_IMAGES: ClassVar[int]
     MAX_INLINE_MEDIA_BYTES: ClassVar[int]
     IMAGE_AUTO_CLEANUP: ClassVar[bool]
+    MESSAGE_RETENTION_DAYS: ClassVar[int]
+    MESSAGE_ARCHIVE_DIR: ClassVar[str]
+    WAL_CHECKPOINT_INTERVAL_SECONDS: ClassVar[int]
+    DATABASE_WARMUP: ClassVar[bool]
     AGENT_DEBUG_MODE: ClassVar[bool]
+    TRACE_EXPORT_PATH: ClassVar[str]
     DASHBOARD_PASSWORD: ClassVar[str]
     DASHBOARD_JWT_SECRET: ClassVar[str]
     DASHBOARD_JWT_EXPIRE_HOURS: ClassVar[int]
+    DASHBOARD_METRICS_TOKEN: ClassVar[str]
     CONTENT_CHECK_ENABLED: ClassVar[bool]
 
     @classmethod
@@ -927,6 +954,9 @@ class EnvConfig:
             "EARTH_NOW_GROUP_ID": list(settings.notifications.earth_now_group_id),
             "NEWS_SUMMARY_GROUP_ID": list(settings.notifications.news_summary_group_id),
             "EARTHQUAKE_GROUP_ID": list(settings.notifications.earthquake_group_id),
+            "EARTHQUAKE_ALERT_MODE": settings.notifications.earthquake_alert_mode,
+            "EARTHQUAKE_GROUP_ALERT_MODE": dict(settings.notifications.earthquake_group_alert_mode),
+            "EARTHQUAKE_CARD_DEADLINE_SECONDS": settings.notifications.earthquake_card_deadline_seconds,
             "NRC_MERCHANT_GROUP_ID": list(settings.notifications.nrc_merchant_group_id),
             "TEST_GROUP_ID": list(settings.notifications.test_group_id),
             "QUERY_MESSAGE_NUMBERS": settings.storage.query_message_numbers,
@@ -936,10 +966,16 @@ class EnvConfig:
             "MAX_INLINE_IMAGES": settings.storage.max_inline_images,
             "MAX_INLINE_MEDIA_BYTES": settings.storage.max_inline_media_bytes,
             "IMAGE_AUTO_CLEANUP": settings.storage.image_auto_cleanup,
+            "MESSAGE_RETENTION_DAYS": settings.storage.message_retention_days,
+            "MESSAGE_ARCHIVE_DIR": settings.storage.message_archive_dir,
+            "WAL_CHECKPOINT_INTERVAL_SECONDS": settings.storage.wal_checkpoint_interval_seconds,
+            "DATABASE_WARMUP": settings.storage.database_warmup,
             "AGENT_DEBUG_MODE": settings.debug.agent_debug_mode,
+            "TRACE_EXPORT_PATH": settings.debug.trace_export_path,
             "DASHBOARD_PASSWORD": settings.dashboard.password,
             "DASHBOARD_JWT_SECRET": _runtime_dashboard_secret(settings.dashboard.jwt_secret),
             "DASHBOARD_JWT_EXPIRE_HOURS": settings.dashboard.jwt_expire_hours,
+            "DASHBOARD_METRICS_TOKEN": settings.dashboard.metrics_token,
             "CONTENT_CHECK_ENABLED": settings.content_check.enabled,
         }
         for field in LimitConfig.model_fields:
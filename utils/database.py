@@ -1,4 +1,5 @@
 import asyncio
+import base64
 import datetime
 import hashlib
 import json
@@ -7,37 +8,66 @@ import os
 import posixpath
 import time
 import zoneinfo
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from functools import lru_cache
 
-from sqlalchemy import Engine, event, inspect, text
+from sqlalchemy import Engine, delete, event, inspect, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Field, Session, SQLModel, col, create_engine, desc, func, select
 
+from utils.db_executor import DB_READ_WORKERS, get_database_executor
 from utils.media import ResolvedMedia, resolve_media
+from utils.metrics import REGISTRY
 
 DATABASE_FILE = "sqlite:///frontier.db"
 SQLITE_BUSY_TIMEOUT_MS = 5000
 SQLITE_CACHE_SIZE_KIB = 65536
 SQLITE_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+# 托管检查点负责日常回写；自动检查点只作为调度器停摆时的上限（4 KiB 页约 64 MiB）。
+SQLITE_WAL_AUTOCHECKPOINT_PAGES = 16384
+SQLITE_JOURNAL_SIZE_LIMIT_BYTES = 64 * 1024 * 1024
+WAL_CHECKPOINT_IDLE_SECONDS = 5.0
+WAL_CHECKPOINT_BUSY_BYTES = 16 * 1024 * 1024
+WAL_CHECKPOINT_TRUNCATE_BYTES = SQLITE_JOURNAL_SIZE_LIMIT_BYTES
+WAL_CHECKPOINT_QUIET_HOURS = range(3, 6)
 MESSAGE_FTS_MIN_QUERY_LENGTH = 3
 MESSAGE_SOURCE_TYPE_NORMAL = "message"
 MESSAGE_SOURCE_TYPE_FORWARD_NODE = "forward_node"
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "frontier_db_query_seconds",
+    "SQLite 语句执行耗时（秒）",
+    ("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_CHECKPOINT_DURATION = REGISTRY.histogram(
+    "frontier_db_checkpoint_seconds",
+    "SQLite WAL 检查点耗时（秒）",
+    ("mode",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_DB_STATEMENT_KINDS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "PRAGMA", "CREATE", "WITH"})
+_DB_WRITE_STATEMENT_KINDS = frozenset({"INSERT", "UPDATE", "DELETE", "REPLACE"})
+_WAL_CHECKPOINT_MODES = frozenset({"PASSIVE", "FULL", "RESTART", "TRUNCATE"})
+# 按 engine 记录最近一次写语句（monotonic）与最近一次检查点结果，供检查点调度与诊断使用。
+_last_write_at: dict[Engine, float] = {}
+_last_checkpoint: dict[Engine, dict[str, object]] = {}
 logger = logging.getLogger(__name__)
 
 
-async def _run_in_thread(func, *args, **kwargs):
-    """将同步数据库操作放入线程池执行，避免阻塞 asyncio 事件循环。"""
-    return await asyncio.to_thread(func, *args, **kwargs)
-
-
 def _engine_uses_memory_database(engine: Engine) -> bool:
     return engine.url.get_backend_name() == "sqlite" and _is_memory_database(str(engine.url))
 
 
-async def _run_database(engine: Engine, func, *args, **kwargs):
+async def run_database(engine: Engine, func, *, write: bool = False):
+    """读操作走并发读线程池，写操作交给唯一的写线程串行执行；内存数据库直接同步执行。"""
     if _engine_uses_memory_database(engine):
-        return func(*args, **kwargs)
-    return await _run_in_thread(func, *args, **kwargs)
+        return func()
+    executor = get_database_executor()
+    return await (executor.write(func) if write else executor.read(func))
 
 
 def _is_memory_database(database_url: str) -> bool:
@@ -51,6 +81,8 @@ def _configure_sqlite_connection(dbapi_connection, _connection_record, *, memory
         cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
         if not memory_database:
             cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA wal_autocheckpoint={SQLITE_WAL_AUTOCHECKPOINT_PAGES}")
+            cursor.execute(f"PRAGMA journal_size_limit={SQLITE_JOURNAL_SIZE_LIMIT_BYTES}")
         cursor.execute("PRAGMA synchronous=NORMAL")
         cursor.execute("PRAGMA temp_store=MEMORY")
         cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
@@ -60,6 +92,38 @@ def _configure_sqlite_connection(dbapi_connection, _connection_record, *, memory
         cursor.close()
 
 
+def _statement_kind(statement: str) -> str:
+    parts = statement.split(None, 1)
+    keyword = parts[0].upper() if parts else ""
+    return keyword if keyword in _DB_STATEMENT_KINDS else "OTHER"
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+    starts = conn.info.get("query_start")
+    kind = _statement_kind(statement)
+    if kind in _DB_WRITE_STATEMENT_KINDS:
+        _last_write_at[conn.engine] = time.monotonic()
+    if starts:
+        DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), statement=kind)
+
+
+def _handle_database_error(exception_context) -> None:
+    connection = exception_context.connection
+    starts = connection.info.get("query_start") if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_database_error)
+
+
 @lru_cache(maxsize=8)
 def _cached_engine(database_url: str) -> Engine:
     kwargs: dict[str, object] = {}
@@ -68,6 +132,9 @@ def _cached_engine(database_url: str) -> Engine:
         kwargs["connect_args"] = {"check_same_thread": False}
     if memory_database:
         kwargs["poolclass"] = StaticPool
+    else:
+        # 读线程各占一个连接，另留给写线程和事件循环上的同步调用。
+        kwargs["pool_size"] = DB_READ_WORKERS + 2
     engine = create_engine(database_url, **kwargs)
     event.listen(
         engine,
@@ -78,6 +145,7 @@ def _cached_engine(database_url: str) -> Engine:
             memory_database=memory_database,
         ),
     )
+    _instrument_engine(engine)
     return engine
 
 
@@ -114,6 +182,11 @@ def ensure_database_performance_indexes(engine: Engine) -> None:
             ]
         )
 
+    if "alert_timing" in table_names:
+        statements.append(
+            "CREATE INDEX IF NOT EXISTS ix_alert_timing_source_received ON alert_timing (source, received_at DESC)"
+        )
+
     if "taskexecutionhistory" in table_names:
         statements.extend(
             [
@@ -165,6 +238,40 @@ def ensure_message_schema(engine: Engine) -> None:
             conn.execute(text(statement))
 
 
+def ensure_attachment_schema(engine: Engine) -> None:
+    """保证 ``messageattachment.physical_path`` 唯一，供附件批量 upsert 的 ``ON CONFLICT`` 使用。
+
+    旧库没有该约束：先按路径保留 id 最大的一行去重，再补建唯一索引。
+    """
+    inspector = inspect(engine)
+    if "messageattachment" not in set(inspector.get_table_names()):
+        return
+    unique_columns = [
+        constraint["column_names"] for constraint in inspector.get_unique_constraints("messageattachment")
+    ]
+    unique_columns += [
+        index["column_names"] for index in inspector.get_indexes("messageattachment") if index["unique"]
+    ]
+    if ["physical_path"] in unique_columns:
+        return
+    with engine.begin() as conn:
+        removed = conn.execute(
+            text(
+                """
+                DELETE FROM messageattachment
+                WHERE id NOT IN (SELECT max(id) FROM messageattachment GROUP BY physical_path)
+                """
+            )
+        ).rowcount
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ux_messageattachment_physical_path "
+                "ON messageattachment (physical_path)"
+            )
+        )
+    logger.info("Attachment physical_path unique index created: duplicates_removed=%s", removed)
+
+
 def _table_exists(conn, table_name: str) -> bool:
     return (
         conn.execute(
@@ -206,7 +313,16 @@ def get_database_diagnostics(engine: Engine | None = None) -> dict[str, object]:
 
         pragmas = {
             name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
-            for name in ["journal_mode", "synchronous", "foreign_keys", "busy_timeout", "cache_size", "mmap_size"]
+            for name in [
+                "journal_mode",
+                "synchronous",
+                "foreign_keys",
+                "busy_timeout",
+                "cache_size",
+                "mmap_size",
+                "wal_autocheckpoint",
+                "journal_size_limit",
+            ]
         }
         checkpoint = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").first()
 
@@ -223,6 +339,10 @@ def get_database_diagnostics(engine: Engine | None = None) -> dict[str, object]:
             "wal_size_bytes": wal_size,
             "pragmas": pragmas,
             "wal_checkpoint": tuple(checkpoint) if checkpoint is not None else None,
+            "checkpoints": {
+                "last": _last_checkpoint.get(engine),
+                "durations": {key[0]: stats for key, stats in DB_CHECKPOINT_DURATION.summary().items()},
+            },
             "tables": table_diagnostics,
             "fts": fts_diagnostics,
         }
@@ -230,13 +350,107 @@ def get_database_diagnostics(engine: Engine | None = None) -> dict[str, object]:
 
 def run_database_maintenance(engine: Engine | None = None, *, checkpoint: bool = False) -> dict[str, object]:
     engine = engine or get_engine()
+    refresh_message_fts_ready(engine)
     with engine.begin() as conn:
         conn.execute(text("PRAGMA optimize"))
-        result: dict[str, object] = {"optimized": True}
-        if checkpoint:
-            row = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").first()
-            result["wal_checkpoint"] = tuple(row) if row is not None else None
-        return result
+    result: dict[str, object] = {"optimized": True}
+    if checkpoint:
+        row = checkpoint_wal(engine, mode="PASSIVE")
+        result["wal_checkpoint"] = (int(row["busy"]), row["wal_frames"], row["checkpointed_frames"])
+    return result
+
+
+def wal_size_bytes(engine: Engine) -> int:
+    db_path = getattr(engine.url, "database", None)
+    wal_path = f"{db_path}-wal" if db_path else None
+    return os.path.getsize(wal_path) if wal_path and os.path.exists(wal_path) else 0
+
+
+def checkpoint_wal(engine: Engine | None = None, *, mode: str = "PASSIVE") -> dict[str, object]:
+    """执行一次 WAL 检查点并记录耗时；结果同时保存为该 engine 的最近一次检查点。"""
+    mode = mode.upper()
+    if mode not in _WAL_CHECKPOINT_MODES:
+        raise ValueError(f"unsupported checkpoint mode: {mode}")
+    engine = engine or get_engine()
+    started_at = time.perf_counter()
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").first()
+    elapsed = time.perf_counter() - started_at
+    DB_CHECKPOINT_DURATION.observe(elapsed, mode=mode.lower())
+    busy, wal_frames, checkpointed_frames = tuple(row) if row is not None else (0, -1, -1)
+    result: dict[str, object] = {
+        "mode": mode,
+        "busy": bool(busy),
+        "wal_frames": wal_frames,
+        "checkpointed_frames": checkpointed_frames,
+        "duration": elapsed,
+        "finished_at": int(time.time() * 1000),
+    }
+    _last_checkpoint[engine] = result
+    return result
+
+
+def choose_wal_checkpoint_mode(*, wal_bytes: int, idle_seconds: float, hour: int) -> str | None:
+    """空闲时做 PASSIVE；空闲且处于凌晨低峰或 WAL 文件过大时 TRUNCATE 收缩文件；忙碌时只在 WAL 超过阈值后 PASSIVE。
+
+    PASSIVE 不等待读写者，放在后台线程执行不会拖慢写入；TRUNCATE 需要等读者退出，只在空闲时做。
+    """
+    if wal_bytes <= 0:
+        return None
+    idle = idle_seconds >= WAL_CHECKPOINT_IDLE_SECONDS
+    if idle and (hour in WAL_CHECKPOINT_QUIET_HOURS or wal_bytes >= WAL_CHECKPOINT_TRUNCATE_BYTES):
+        return "TRUNCATE"
+    if idle or wal_bytes >= WAL_CHECKPOINT_BUSY_BYTES:
+        return "PASSIVE"
+    return None
+
+
+async def run_wal_checkpoint_cycle(engine: Engine | None = None) -> dict[str, object] | None:
+    """检查点调度的一次 tick：按空闲时长、时段与 WAL 大小决定是否以及如何做检查点。"""
+    engine = engine or get_engine()
+    if _engine_uses_memory_database(engine):
+        return None
+    last_write = _last_write_at.get(engine)
+    idle_seconds = time.monotonic() - last_write if last_write is not None else float("inf")
+    hour = datetime.datetime.now(zoneinfo.ZoneInfo("Asia/Shanghai")).hour
+    mode = choose_wal_checkpoint_mode(wal_bytes=wal_size_bytes(engine), idle_seconds=idle_seconds, hour=hour)
+    if mode is None:
+        return None
+    # TRUNCATE 会阻塞新写入，交给写线程执行，进程内的写入在队列里等待而不是撞上 busy_timeout。
+    result = await run_database(engine, lambda: checkpoint_wal(engine, mode=mode), write=mode != "PASSIVE")
+    if result["busy"]:
+        logger.debug("WAL checkpoint busy: %s", result)
+    return result
+
+
+def warm_database_cache(engine: Engine | None = None, *, budget_seconds: float = 30.0) -> dict[str, float]:
+    """顺序扫描热点索引、统计表与 FTS5 索引，把页面预读进 OS 页缓存与 mmap；超过预算时停止。"""
+    engine = engine or get_engine()
+    targets = [
+        ("ix_message_group_time", "SELECT count(*) FROM message INDEXED BY ix_message_group_time"),
+        ("ix_message_user_group_time", "SELECT count(*) FROM message INDEXED BY ix_message_user_group_time"),
+        ("ix_message_group_role_time", "SELECT count(*) FROM message INDEXED BY ix_message_group_role_time"),
+        *((table, f"SELECT count(*) FROM {table}") for table in MESSAGE_STATS_TABLES),  # noqa: S608
+        ("message_fts_idx", "SELECT count(*) FROM message_fts_idx"),
+        ("message_fts_data", "SELECT sum(length(block)) FROM message_fts_data"),
+    ]
+    timings: dict[str, float] = {}
+    deadline = time.monotonic() + budget_seconds
+    with engine.connect() as conn:
+        existing = {
+            row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_schema WHERE type IN ('table', 'index')")
+        }
+        for name, statement in targets:
+            if name not in existing:
+                continue
+            if time.monotonic() >= deadline:
+                logger.info("Database warmup stopped at budget: remaining from %s", name)
+                break
+            started_at = time.perf_counter()
+            conn.exec_driver_sql(statement).scalar()
+            timings[name] = time.perf_counter() - started_at
+    logger.info("Database warmup finished: %s", {name: round(elapsed, 3) for name, elapsed in timings.items()})
+    return timings
 
 
 def cleanup_task_execution_history(
@@ -367,6 +581,221 @@ def ensure_message_fts(engine: Engine) -> None:
         else:
             logger.info("FTS5 message index ready")
         conn.execute(text("PRAGMA optimize"))
+    refresh_message_fts_ready(engine)
+
+
+MESSAGE_STATS_TABLES = ("message_group_stats", "message_user_stats", "message_daily_stats")
+# 消息时间为毫秒时间戳，按 Asia/Shanghai（固定 UTC+8）划分日期桶。
+_MESSAGE_STATS_DAY_EXPR = "date({row}.time / 1000, 'unixepoch', '+8 hours')"
+
+
+def _message_stats_add_sql(row: str) -> str:
+    day = _MESSAGE_STATS_DAY_EXPR.format(row=row)
+    return f"""
+        INSERT INTO message_group_stats (group_id, message_count, last_time)
+        SELECT {row}.group_id, 1, {row}.time WHERE {row}.group_id IS NOT NULL
+        ON CONFLICT(group_id) DO UPDATE SET
+            message_count = message_count + 1,
+            last_time = max(last_time, excluded.last_time);
+        INSERT INTO message_user_stats (user_id, user_name, message_count, last_time)
+        VALUES ({row}.user_id, {row}.user_name, 1, {row}.time)
+        ON CONFLICT(user_id) DO UPDATE SET
+            user_name = CASE
+                WHEN excluded.last_time >= last_time THEN coalesce(excluded.user_name, user_name)
+                ELSE coalesce(user_name, excluded.user_name)
+            END,
+            message_count = message_count + 1,
+            last_time = max(last_time, excluded.last_time);
+        INSERT INTO message_daily_stats (day, message_count) VALUES ({day}, 1)
+        ON CONFLICT(day) DO UPDATE SET message_count = message_count + 1;
+    """  # noqa: S608
+
+
+def _message_stats_remove_sql(row: str) -> str:
+    day = _MESSAGE_STATS_DAY_EXPR.format(row=row)
+    # 删除最新一条消息时才需要回查 last_time，依赖 (group_id, time) / (user_id, ...) 索引。
+    return f"""
+        UPDATE message_group_stats SET
+            message_count = message_count - 1,
+            last_time = CASE WHEN last_time = {row}.time
+                THEN (SELECT max(time) FROM message WHERE group_id = {row}.group_id)
+                ELSE last_time END
+        WHERE group_id = {row}.group_id;
+        DELETE FROM message_group_stats WHERE group_id = {row}.group_id AND message_count <= 0;
+        UPDATE message_user_stats SET
+            message_count = message_count - 1,
+            last_time = CASE WHEN last_time = {row}.time
+                THEN (SELECT max(time) FROM message WHERE user_id = {row}.user_id)
+                ELSE last_time END
+        WHERE user_id = {row}.user_id;
+        DELETE FROM message_user_stats WHERE user_id = {row}.user_id AND message_count <= 0;
+        UPDATE message_daily_stats SET message_count = message_count - 1 WHERE day = {day};
+        DELETE FROM message_daily_stats WHERE day = {day} AND message_count <= 0;
+    """  # noqa: S608
+
+
+def _backfill_message_stats(conn) -> None:
+    day = _MESSAGE_STATS_DAY_EXPR.format(row="message")
+    conn.execute(text("DELETE FROM message_group_stats"))
+    conn.execute(text("DELETE FROM message_user_stats"))
+    conn.execute(text("DELETE FROM message_daily_stats"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO message_group_stats (group_id, message_count, last_time)
+            SELECT group_id, count(*), max(time) FROM message
+            WHERE group_id IS NOT NULL GROUP BY group_id
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO message_user_stats (user_id, user_name, message_count, last_time)
+            SELECT
+                user_id,
+                (SELECT latest.user_name FROM message AS latest
+                 WHERE latest.user_id = message.user_id AND latest.user_name IS NOT NULL
+                 ORDER BY latest.time DESC LIMIT 1),
+                count(*),
+                max(time)
+            FROM message GROUP BY user_id
+            """
+        )
+    )
+    conn.execute(
+        text(f"INSERT INTO message_daily_stats (day, message_count) SELECT {day}, count(*) FROM message GROUP BY 1")  # noqa: S608
+    )
+
+
+def ensure_message_stats(engine: Engine) -> None:
+    """创建由触发器增量维护的消息统计表，Dashboard 直接读取而不必全表 ``GROUP BY``。
+
+    统计行与消息写入处于同一事务；首次创建时从现有消息回填一次。
+    """
+    if "message" not in set(inspect(engine).get_table_names()):
+        return
+
+    with engine.begin() as conn:
+        tables_exist = all(_table_exists(conn, table_name) for table_name in MESSAGE_STATS_TABLES)
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS message_group_stats (
+                    group_id INTEGER PRIMARY KEY,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    last_time INTEGER
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS message_user_stats (
+                    user_id INTEGER PRIMARY KEY,
+                    user_name TEXT,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    last_time INTEGER
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS message_daily_stats (
+                    day TEXT PRIMARY KEY,
+                    message_count INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS message_ai_stats AFTER INSERT ON message BEGIN {_message_stats_add_sql('new')} END"
+            )
+        )
+        conn.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS message_ad_stats AFTER DELETE ON message BEGIN {_message_stats_remove_sql('old')} END"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS message_au_stats AFTER UPDATE OF time, user_id, group_id, user_name "
+                f"ON message BEGIN {_message_stats_remove_sql('old')} {_message_stats_add_sql('new')} END"
+            )
+        )
+        if not tables_exist:
+            started_at = time.monotonic()
+            _backfill_message_stats(conn)
+            logger.info("Message stats backfill finished: elapsed=%.2fs", time.monotonic() - started_at)
+
+
+def _message_stats_ready(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        if all(_table_exists(conn, table_name) for table_name in MESSAGE_STATS_TABLES):
+            return True
+    ensure_message_stats(engine)
+    with engine.connect() as conn:
+        return all(_table_exists(conn, table_name) for table_name in MESSAGE_STATS_TABLES)
+
+
+def count_messages_from_stats(engine: Engine | None = None, *, group_id: int | None = None) -> int:
+    """消息总数（或单个群的消息数），按统计表读取；日期桶数量远小于消息行数。"""
+    engine = engine or get_engine()
+    if not _message_stats_ready(engine):
+        return 0
+    with engine.connect() as conn:
+        if group_id is not None:
+            count = conn.execute(
+                text("SELECT message_count FROM message_group_stats WHERE group_id = :group_id"),
+                {"group_id": group_id},
+            ).scalar()
+            return int(count or 0)
+        return int(conn.execute(text("SELECT coalesce(sum(message_count), 0) FROM message_daily_stats")).scalar_one())
+
+
+def list_group_message_stats(engine: Engine | None = None) -> list[dict[str, int | None]]:
+    engine = engine or get_engine()
+    if not _message_stats_ready(engine):
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT group_id, message_count, last_time FROM message_group_stats "
+                "ORDER BY message_count DESC, group_id"
+            )
+        ).all()
+    return [{"group_id": row[0], "message_count": row[1], "last_time": row[2]} for row in rows]
+
+
+def list_user_message_stats(engine: Engine | None = None, *, limit: int = 200) -> list[dict[str, object]]:
+    engine = engine or get_engine()
+    if not _message_stats_ready(engine):
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT user_id, user_name, message_count, last_time FROM message_user_stats "
+                "ORDER BY message_count DESC, user_id LIMIT :limit"
+            ),
+            {"limit": limit},
+        ).all()
+    return [{"user_id": row[0], "user_name": row[1], "message_count": row[2], "last_time": row[3]} for row in rows]
+
+
+def list_daily_message_stats(engine: Engine | None = None, *, days: int = 30) -> list[dict[str, object]]:
+    engine = engine or get_engine()
+    if not _message_stats_ready(engine):
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT day, message_count FROM message_daily_stats ORDER BY day DESC LIMIT :days"),
+            {"days": days},
+        ).all()
+    return [{"day": row[0], "message_count": row[1]} for row in reversed(rows)]
 
 
 def _fts_query(value: str) -> str:
@@ -374,6 +803,52 @@ def _fts_query(value: str) -> str:
     return f'"{escaped}"'
 
 
+# 按 engine 缓存 message_fts 是否存在；只在建表（ensure_message_fts）与数据库维护时刷新。
+_message_fts_ready: dict[Engine, bool] = {}
+
+
+def refresh_message_fts_ready(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        ready = _table_exists(conn, "message_fts")
+    _message_fts_ready[engine] = ready
+    return ready
+
+
+def message_fts_ready(engine: Engine) -> bool:
+    ready = _message_fts_ready.get(engine)
+    if ready is None:
+        ready = refresh_message_fts_ready(engine)
+    return ready
+
+
+def message_fts_condition(content_query: str):
+    """``message.time`` 命中 FTS5 trigram 索引的过滤条件，可直接用于 ``select(Message).where(...)``。"""
+    return text("message.time IN (SELECT rowid FROM message_fts WHERE message_fts MATCH :fts_query)").bindparams(
+        fts_query=_fts_query(content_query)
+    )
+
+
+def encode_search_cursor(*, sort: str, time: int, rank: float | None = None, read: int = 0) -> str:
+    """把最后一条结果的 ``(rank, time)`` 编码成不透明游标；``read`` 记录已读取条数。"""
+    payload = json.dumps({"s": sort, "t": time, "r": rank, "n": read}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str, *, sort: str | None = None) -> dict[str, object]:
+    """解码游标；给出 ``sort`` 时同时校验游标与排序方式一致。"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        decoded = {"time": int(payload["t"]), "rank": payload.get("r"), "read": int(payload.get("n", 0))}
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError("invalid search cursor") from exc
+    if sort is None:
+        return decoded
+    if payload.get("s") != sort or (sort == "relevance" and not isinstance(decoded["rank"], int | float)):
+        raise ValueError("search cursor does not match sort order")
+    return decoded
+
+
 def build_message_metadata(
     *,
     timestamp_ms: int,
@@ -420,6 +895,37 @@ class TimeStamp(SQLModel, table=True):
     id: str | None
 
 
+class ProcessedEvent(SQLModel, table=True):
+    """已处理的外部事件（如地震预警 EventID），用于跨重启去重。"""
+
+    __tablename__ = "processed_event"
+
+    source: str = Field(primary_key=True)
+    event_id: str = Field(primary_key=True)
+    received_at: int = Field(index=True)  # 毫秒时间戳，按它做 TTL 清理
+
+
+class AlertTiming(SQLModel, table=True):
+    """一条预警报文从发布、接收到逐群送达的时间线（毫秒时间戳），原始 payload 留作回放。"""
+
+    __tablename__ = "alert_timing"
+
+    id: int | None = Field(default=None, primary_key=True)
+    source: str
+    event_id: str = Field(index=True)
+    report_id: str
+    report_num: int
+    outcome: str  # sent / duplicate / below_threshold / baseline / error
+    is_snapshot: bool = False
+    published_at: int | None = None
+    received_at: int
+    deduped_at: int | None = None
+    render_started_at: int | None = None
+    render_finished_at: int | None = None
+    deliveries_json: str = "[]"  # [{"group": ..., "kind": "text" / "card", "at": ..., "ok": ...}]
+    payload_json: str
+
+
 class MessageAttachment(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     msg_time: int = Field(index=True)
@@ -433,7 +939,7 @@ class MessageAttachment(SQLModel, table=True):
     mime_type: str | None = None
     file_size: int | None = None
     sha256: str | None = None
-    physical_path: str
+    physical_path: str = Field(unique=True)
     virtual_path: str
     created_at: int
     expires_at: int
@@ -475,77 +981,166 @@ def _prune_empty_attachment_dirs(path: str) -> None:
         current = os.path.dirname(current)
 
 
+# 冲突时覆盖的列：created_at 保留首次写入时间，metadata_json 由调用方决定是否覆盖。
+_ATTACHMENT_UPSERT_COLUMNS = (
+    "msg_time",
+    "msg_id",
+    "user_id",
+    "group_id",
+    "workspace_key",
+    "kind",
+    "source_type",
+    "file_name",
+    "mime_type",
+    "file_size",
+    "sha256",
+    "virtual_path",
+    "expires_at",
+)
+_MEDIA_DIRECTORIES = {"image": "images", "audio": "audio", "video": "videos", "file": "files"}
+
+
+def _upsert_attachment_rows(
+    session: Session, rows: list[dict[str, object]], *, update_metadata: bool = True
+) -> list[MessageAttachment]:
+    """以 ``physical_path`` 为键批量 ``INSERT ... ON CONFLICT DO UPDATE``，返回与 ``rows`` 顺序一致的记录。
+
+    调用方负责提交事务，便于与消息写入放在同一事务中。
+    """
+    if not rows:
+        return []
+    statement = sqlite_insert(MessageAttachment).values(rows)
+    columns = (*_ATTACHMENT_UPSERT_COLUMNS, "metadata_json") if update_metadata else _ATTACHMENT_UPSERT_COLUMNS
+    statement = statement.on_conflict_do_update(
+        index_elements=["physical_path"],
+        set_={column: statement.excluded[column] for column in columns},
+    )
+    session.execute(statement)
+    paths = [str(row["physical_path"]) for row in rows]
+    attachments = session.exec(select(MessageAttachment).where(col(MessageAttachment.physical_path).in_(paths))).all()
+    by_path = {attachment.physical_path: attachment for attachment in attachments}
+    return [by_path[path] for path in dict.fromkeys(paths)]
+
+
+def _attachment_row(
+    *,
+    msg_time: int,
+    msg_id: int | None,
+    user_id: int,
+    group_id: int | None,
+    kind: str,
+    physical_path: str,
+    virtual_path: str,
+    file_name: str,
+    file_size: int | None,
+    expires_at: int,
+    source_type: str = "message",
+    mime_type: str | None = None,
+    sha256: str | None = None,
+    metadata_json: str = "{}",
+    created_at: int | None = None,
+) -> dict[str, object]:
+    return {
+        "msg_time": msg_time,
+        "msg_id": msg_id,
+        "user_id": user_id,
+        "group_id": group_id,
+        "workspace_key": _message_workspace_key(user_id, group_id),
+        "kind": kind,
+        "source_type": source_type,
+        "file_name": file_name,
+        "mime_type": mime_type,
+        "file_size": file_size,
+        "sha256": sha256,
+        "physical_path": physical_path,
+        "virtual_path": virtual_path,
+        "created_at": int(time.time() * 1000) if created_at is None else created_at,
+        "expires_at": expires_at,
+        "metadata_json": metadata_json,
+    }
+
+
+def _write_media_files(
+    *,
+    msg_time: int,
+    msg_id: int | None,
+    user_id: int,
+    group_id: int | None,
+    media: list[ResolvedMedia],
+    source_type: str = "message",
+) -> list[dict[str, object]]:
+    """把媒体字节写入工作区并返回待写入的附件行；文件 I/O 不占用数据库写线程。"""
+    from utils.configs import EnvConfig
+
+    now_ms = int(time.time() * 1000)
+    expires_ms = now_ms + EnvConfig.MEDIA_TTL_DAYS * 86400 * 1000
+    rows: list[dict[str, object]] = []
+    for index, item in enumerate(media):
+        file_name = f"{msg_time}_{index}{item.extension}"
+        file_path, virtual_path = _attachment_paths(user_id, group_id, _MEDIA_DIRECTORIES[item.kind], file_name)
+        full_path = os.path.join(os.getcwd(), file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as file:
+            file.write(item.data)
+        rows.append(
+            _attachment_row(
+                msg_time=msg_time,
+                msg_id=msg_id,
+                user_id=user_id,
+                group_id=group_id,
+                kind=item.kind,
+                physical_path=file_path,
+                virtual_path=virtual_path,
+                file_name=file_name,
+                file_size=len(item.data),
+                expires_at=expires_ms,
+                source_type=source_type,
+                mime_type=item.mime_type,
+                sha256=_sha256_bytes(item.data),
+                created_at=now_ms,
+            )
+        )
+    return rows
+
+
+def _discard_unindexed_media_files(engine, rows: list[dict[str, object]]) -> None:
+    """事务回滚后删除没有附件记录的已落盘文件；同路径已有记录的文件仍归原记录所有。"""
+    paths = [str(row["physical_path"]) for row in rows]
+    with Session(engine) as session:
+        indexed = set(
+            session.exec(
+                select(MessageAttachment.physical_path).where(col(MessageAttachment.physical_path).in_(paths))
+            ).all()
+        )
+    for path in paths:
+        full_path = os.path.join(os.getcwd(), path)
+        if path not in indexed and os.path.exists(full_path):
+            os.remove(full_path)
+            _prune_empty_attachment_dirs(full_path)
+
+
 class _MessageAttachmentManager:
     """通用附件索引：记录、查询和按 DB 清理文件。"""
 
     def __init__(self, engine):
         self.engine = engine
 
-    async def insert_attachment(
-        self,
-        *,
-        msg_time: int,
-        msg_id: int | None,
-        user_id: int,
-        group_id: int | None,
-        kind: str,
-        physical_path: str,
-        virtual_path: str,
-        file_name: str,
-        file_size: int | None,
-        expires_at: int,
-        source_type: str = "message",
-        mime_type: str | None = None,
-        sha256: str | None = None,
-        metadata_json: str = "{}",
-    ) -> MessageAttachment:
+    async def insert_attachment(self, **fields) -> MessageAttachment:
+        return (await self.insert_attachments([fields]))[0]
+
+    async def insert_attachments(self, attachments: list[dict[str, object]]) -> list[MessageAttachment]:
+        """在一个事务内批量写入或更新附件记录；每项字段与 ``insert_attachment`` 相同。"""
+        rows = [_attachment_row(**fields) for fields in attachments]
+        if not rows:
+            return []
+
         def _do():
-            workspace_key = _message_workspace_key(user_id, group_id)
-            now_ms = int(time.time() * 1000)
-            with Session(self.engine) as session:
-                attachment = session.exec(
-                    select(MessageAttachment).where(MessageAttachment.physical_path == physical_path).limit(1)
-                ).first()
-                if attachment is None:
-                    attachment = MessageAttachment(
-                        msg_time=msg_time,
-                        msg_id=msg_id,
-                        user_id=user_id,
-                        group_id=group_id,
-                        workspace_key=workspace_key,
-                        kind=kind,
-                        source_type=source_type,
-                        file_name=file_name,
-                        mime_type=mime_type,
-                        file_size=file_size,
-                        sha256=sha256,
-                        physical_path=physical_path,
-                        virtual_path=virtual_path,
-                        created_at=now_ms,
-                        expires_at=expires_at,
-                        metadata_json=metadata_json,
-                    )
-                else:
-                    attachment.msg_time = msg_time
-                    attachment.msg_id = msg_id
-                    attachment.user_id = user_id
-                    attachment.group_id = group_id
-                    attachment.workspace_key = workspace_key
-                    attachment.kind = kind
-                    attachment.source_type = source_type
-                    attachment.file_name = file_name
-                    attachment.mime_type = mime_type
-                    attachment.file_size = file_size
-                    attachment.sha256 = sha256
-                    attachment.virtual_path = virtual_path
-                    attachment.expires_at = expires_at
-                    attachment.metadata_json = metadata_json
-                session.add(attachment)
+            with Session(self.engine, expire_on_commit=False) as session:
+                inserted = _upsert_attachment_rows(session, rows)
                 session.commit()
-                session.refresh(attachment)
-                return attachment
+                return inserted
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do, write=True)
 
     async def insert_images(self, msg_time: int, user_id: int, group_id: int | None, images: list[bytes]) -> list[str]:
         attachments = await self.insert_media(
@@ -567,73 +1162,26 @@ class _MessageAttachmentManager:
         media: list[ResolvedMedia],
         source_type: str = "message",
     ) -> list[MessageAttachment]:
-        """Persist downloaded media and create attachment rows in one DB operation."""
+        """Persist downloaded media, then upsert all attachment rows in one transaction."""
+        if not media:
+            return []
+        rows = await asyncio.to_thread(
+            _write_media_files,
+            msg_time=msg_time,
+            msg_id=msg_id,
+            user_id=user_id,
+            group_id=group_id,
+            media=media,
+            source_type=source_type,
+        )
 
         def _do():
-            from utils.configs import EnvConfig
-
-            now_ms = int(time.time() * 1000)
-            expires_ms = now_ms + EnvConfig.MEDIA_TTL_DAYS * 86400 * 1000
-            workspace_key = _message_workspace_key(user_id, group_id)
-            directories = {"image": "images", "audio": "audio", "video": "videos", "file": "files"}
-            inserted: list[MessageAttachment] = []
-            with Session(self.engine) as session:
-                for index, item in enumerate(media):
-                    file_name = f"{msg_time}_{index}{item.extension}"
-                    file_path, virtual_path = _attachment_paths(
-                        user_id,
-                        group_id,
-                        directories[item.kind],
-                        file_name,
-                    )
-                    full_path = os.path.join(os.getcwd(), file_path)
-                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    with open(full_path, "wb") as file:
-                        file.write(item.data)
-
-                    attachment = session.exec(
-                        select(MessageAttachment).where(MessageAttachment.physical_path == file_path).limit(1)
-                    ).first()
-                    if attachment is None:
-                        attachment = MessageAttachment(
-                            msg_time=msg_time,
-                            msg_id=msg_id,
-                            user_id=user_id,
-                            group_id=group_id,
-                            workspace_key=workspace_key,
-                            kind=item.kind,
-                            source_type=source_type,
-                            file_name=file_name,
-                            mime_type=item.mime_type,
-                            file_size=len(item.data),
-                            sha256=_sha256_bytes(item.data),
-                            physical_path=file_path,
-                            virtual_path=virtual_path,
-                            created_at=now_ms,
-                            expires_at=expires_ms,
-                        )
-                    else:
-                        attachment.msg_time = msg_time
-                        attachment.msg_id = msg_id
-                        attachment.user_id = user_id
-                        attachment.group_id = group_id
-                        attachment.workspace_key = workspace_key
-                        attachment.kind = item.kind
-                        attachment.source_type = source_type
-                        attachment.file_name = file_name
-                        attachment.mime_type = item.mime_type
-                        attachment.file_size = len(item.data)
-                        attachment.sha256 = _sha256_bytes(item.data)
-                        attachment.virtual_path = virtual_path
-                        attachment.expires_at = expires_ms
-                    session.add(attachment)
-                    inserted.append(attachment)
+            with Session(self.engine, expire_on_commit=False) as session:
+                inserted = _upsert_attachment_rows(session, rows, update_metadata=False)
                 session.commit()
-                for attachment in inserted:
-                    session.refresh(attachment)
-            return inserted
+                return inserted
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do, write=True)
 
     async def select_by_msg_time(self, msg_time: int) -> list[MessageAttachment]:
         def _do():
@@ -645,7 +1193,7 @@ class _MessageAttachmentManager:
                 )
                 return session.exec(statement).all()
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     async def select_by_msg_times(
         self, msg_times: list[int], *, kind: str | None = None
@@ -663,7 +1211,7 @@ class _MessageAttachmentManager:
                     attachments_by_time.setdefault(attachment.msg_time, []).append(attachment)
             return attachments_by_time
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     @staticmethod
     def load_files(records: list[MessageAttachment]) -> tuple[list[bytes], int]:
@@ -694,7 +1242,7 @@ class _MessageAttachmentManager:
                 session.commit()
             return cleaned
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do, write=True)
 
     async def repair_legacy_media_attachments(self, limit: int = 200) -> tuple[int, int]:
         """Gradually repair legacy image rows whose `.jpg` suffix did not match their bytes.
@@ -755,7 +1303,7 @@ class _MessageAttachmentManager:
                 session.commit()
             return verified, corrected
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do, write=True)
 
 
 class GroupSettingsManager:
@@ -827,17 +1375,194 @@ class GroupSettingsManager:
 
         return _do()
 
+    # 异步接口：在数据库执行器上运行，供事件循环中的调用方使用。
+
+    async def aget(self, group_id: int, key: str) -> list[str]:
+        return await run_database(self.engine, lambda: self.get(group_id, key))
+
+    async def aset(self, group_id: int, key: str, value: str) -> None:
+        await run_database(self.engine, lambda: self.set(group_id, key, value), write=True)
+
+    async def aremove(self, group_id: int, key: str, value: str) -> bool:
+        return await run_database(self.engine, lambda: self.remove(group_id, key, value), write=True)
+
+    async def aclear(self, group_id: int, key: str) -> int:
+        return await run_database(self.engine, lambda: self.clear(group_id, key), write=True)
+
+
+MESSAGE_ARCHIVE_SCHEMA = "message_archive"
+MESSAGE_ARCHIVE_BATCH_SIZE = 5000
+_MESSAGE_ARCHIVE_PREFIX = "messages-"
+_SHANGHAI = zoneinfo.ZoneInfo("Asia/Shanghai")
+# 已建好表、索引与 FTS 的归档库路径；同一进程内不再重复检查。
+_ready_message_archives: set[str] = set()
+
+
+def _message_archive_dir() -> str:
+    from utils.configs import EnvConfig
+
+    return EnvConfig.MESSAGE_ARCHIVE_DIR
+
+
+def message_archive_month_bounds(month: str) -> tuple[int, int]:
+    """返回 ``YYYY-MM``（东八区）对应的 ``[start, end)`` 毫秒时间戳。"""
+    start = datetime.datetime.strptime(month, "%Y-%m").replace(tzinfo=_SHANGHAI)
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def message_archive_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, f"{_MESSAGE_ARCHIVE_PREFIX}{month}.db")
+
+
+def list_message_archives(archive_dir: str | None = None) -> list[tuple[str, str]]:
+    """按月份倒序列出归档库 ``(month, path)``。"""
+    archive_dir = archive_dir or _message_archive_dir()
+    if not os.path.isdir(archive_dir):
+        return []
+    archives: list[tuple[str, str]] = []
+    for name in os.listdir(archive_dir):
+        stem, suffix = os.path.splitext(name)
+        if suffix != ".db" or not stem.startswith(_MESSAGE_ARCHIVE_PREFIX):
+            continue
+        month = stem.removeprefix(_MESSAGE_ARCHIVE_PREFIX)
+        try:
+            message_archive_month_bounds(month)
+        except ValueError:
+            continue
+        archives.append((month, os.path.join(archive_dir, name)))
+    return sorted(archives, reverse=True)
+
+
+def _ensure_message_archive(path: str) -> None:
+    """归档库与热库使用同一套 message 表、索引和 FTS5 触发器，ATTACH 后可用相同查询检索。"""
+    if path in _ready_message_archives and os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Message.metadata.create_all(engine, tables=[Message.__table__])
+        ensure_database_performance_indexes(engine)
+        ensure_message_fts(engine)
+    finally:
+        _message_fts_ready.pop(engine, None)
+        engine.dispose()
+    _ready_message_archives.add(path)
+
+
+@contextmanager
+def attach_message_archive(conn, path: str) -> Iterator[None]:
+    """在当前连接上以 ``message_archive`` 挂载归档库，退出时卸载，避免连接回池后仍带着它。"""
+    conn.exec_driver_sql(f"ATTACH DATABASE ? AS {MESSAGE_ARCHIVE_SCHEMA}", (path,))
+    try:
+        yield
+    finally:
+        conn.rollback()
+        conn.exec_driver_sql(f"DETACH DATABASE {MESSAGE_ARCHIVE_SCHEMA}")
+
+
+def _snapshot_message_stats(conn, batch: str, params: dict) -> dict[str, list[dict]]:
+    """读取本批消息涉及的统计行；删除触发器会把它们减掉，归档后原样写回以保留累计统计。"""
+    if not all(_table_exists(conn, table_name) for table_name in MESSAGE_STATS_TABLES):
+        return {}
+    keys = {
+        "message_group_stats": ("group_id", "batch.group_id"),
+        "message_user_stats": ("user_id", "batch.user_id"),
+        "message_daily_stats": ("day", _MESSAGE_STATS_DAY_EXPR.format(row="batch")),
+    }
+    snapshot: dict[str, list[dict]] = {}
+    for table_name, (key, value) in keys.items():
+        query = (
+            f"SELECT * FROM {table_name} WHERE {key} IN "  # noqa: S608
+            f"(SELECT {value} FROM main.message AS batch WHERE batch.time IN ({batch}))"
+        )
+        snapshot[table_name] = [dict(row._mapping) for row in conn.execute(text(query), params)]
+    return snapshot
+
+
+def _restore_message_stats(conn, snapshot: dict[str, list[dict]]) -> None:
+    for table_name, rows in snapshot.items():
+        if not rows:
+            continue
+        columns = list(rows[0])
+        conn.execute(
+            text(
+                f"INSERT OR REPLACE INTO {table_name} ({', '.join(columns)}) "  # noqa: S608
+                f"VALUES ({', '.join(':' + column for column in columns)})"
+            ),
+            rows,
+        )
+
+
+def archive_message_batch(
+    engine: Engine | None = None,
+    *,
+    older_than: int,
+    archive_dir: str | None = None,
+    batch_size: int = MESSAGE_ARCHIVE_BATCH_SIZE,
+) -> tuple[str | None, int]:
+    """把早于 ``older_than`` 的最旧一批消息迁入所在月份的归档库，返回 ``(month, moved)``。
+
+    每批一个事务且只处理一个月份，调用方循环调用直到 ``moved`` 为 0，
+    这样长时间的归档不会一直占着写锁。消息统计表记录累计数据，归档不会减少计数。
+    """
+    engine = engine or get_engine()
+    archive_dir = archive_dir or _message_archive_dir()
+    with engine.connect() as conn:
+        if not _table_exists(conn, "message"):
+            return None, 0
+        oldest = conn.execute(
+            text("SELECT min(time) FROM message WHERE time < :older_than"), {"older_than": older_than}
+        ).scalar()
+    if oldest is None:
+        return None, 0
+
+    month = datetime.datetime.fromtimestamp(oldest / 1000, tz=_SHANGHAI).strftime("%Y-%m")
+    _month_start, month_end = message_archive_month_bounds(month)
+    path = message_archive_path(archive_dir, month)
+    _ensure_message_archive(path)
+
+    columns = ", ".join(column.name for column in Message.__table__.columns)
+    params = {"upper": min(month_end, older_than), "batch_size": max(1, batch_size)}
+    batch = "SELECT time FROM main.message WHERE time < :upper ORDER BY time LIMIT :batch_size"
+    with engine.connect() as conn, attach_message_archive(conn, path):
+        # WAL 下跨库事务不保证原子：崩溃后同一批可能两边都有，重跑时 OR IGNORE 跳过已归档的行。
+        conn.execute(
+            text(
+                f"""
+                INSERT OR IGNORE INTO {MESSAGE_ARCHIVE_SCHEMA}.message ({columns})
+                SELECT {columns} FROM main.message WHERE time IN ({batch})
+                """  # noqa: S608
+            ),
+            params,
+        )
+        stats = _snapshot_message_stats(conn, batch, params)
+        conn.execute(text(f"DELETE FROM main.message WHERE time IN ({batch})"), params)  # noqa: S608
+        moved = int(conn.execute(text("SELECT changes()")).scalar_one())
+        _restore_message_stats(conn, stats)
+        conn.commit()
+    return month, moved
+
+
+@dataclass(slots=True)
+class MessageSearchPage:
+    messages: list[Message] = field(default_factory=list)
+    next_cursor: str | None = None
+
 
 class MessageDatabase:
     def __init__(self):
         self.engine = get_engine()
+        self.archive_dir: str | None = None
         self._attachments = _MessageAttachmentManager(self.engine)
         Message.metadata.create_all(self.engine)
         ensure_message_schema(self.engine)
         MessageAttachment.metadata.create_all(self.engine)
+        ensure_attachment_schema(self.engine)
         GroupSettings.metadata.create_all(self.engine)
         ensure_database_performance_indexes(self.engine)
         ensure_message_fts(self.engine)
+        ensure_message_stats(self.engine)
 
     async def insert(
         self,
@@ -855,9 +1580,25 @@ class MessageDatabase:
         parent_msg_id: int | None = None,
         parent_msg_time: int | None = None,
         parent_forward_id: str | None = None,
-    ):
+        media: list[ResolvedMedia] | None = None,
+    ) -> list[MessageAttachment]:
+        """写入一条消息；传入 ``media`` 时先落盘文件，再把附件记录与消息放进同一事务。"""
+        attachment_rows = (
+            await asyncio.to_thread(
+                _write_media_files,
+                msg_time=time,
+                msg_id=msg_id,
+                user_id=user_id,
+                group_id=group_id,
+                media=media,
+                source_type=source_type,
+            )
+            if media
+            else []
+        )
+
         def _do():
-            with Session(self.engine) as session:
+            with Session(self.engine, expire_on_commit=False) as session:
                 message = Message(
                     time=time,
                     msg_id=msg_id,
@@ -875,9 +1616,16 @@ class MessageDatabase:
                     parent_forward_id=parent_forward_id,
                 )
                 session.add(message)
+                attachments = _upsert_attachment_rows(session, attachment_rows, update_metadata=False)
                 session.commit()
+                return attachments
 
-        await _run_database(self.engine, _do)
+        try:
+            return await run_database(self.engine, _do, write=True)
+        except Exception:
+            if attachment_rows:
+                await run_database(self.engine, lambda: _discard_unindexed_media_files(self.engine, attachment_rows))
+            raise
 
     async def select(
         self,
@@ -901,7 +1649,7 @@ class MessageDatabase:
                 results = session.exec(statement)
                 return results.all()
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     async def select_by_msg_id(self, *, msg_id: int, group_id: int | None) -> Message | None:
         def _do():
@@ -915,7 +1663,7 @@ class MessageDatabase:
                 statement = statement.order_by(desc(Message.time)).limit(1)
                 return session.exec(statement).first()
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     async def update_message_normalization(
         self,
@@ -939,7 +1687,7 @@ class MessageDatabase:
                 session.add(message)
                 session.commit()
 
-        await _run_database(self.engine, _do)
+        await run_database(self.engine, _do, write=True)
 
     @staticmethod
     def _derived_message_time(parent_msg_time: int, ordinal: int) -> int:
@@ -988,7 +1736,7 @@ class MessageDatabase:
                     inserted.append(message)
                 session.commit()
 
-        await _run_database(self.engine, _do)
+        await run_database(self.engine, _do, write=True)
 
     async def prepare_message(  # noqa: C901
         self,
@@ -1075,6 +1823,10 @@ class MessageDatabase:
         self._attachments.engine = self.engine
         return await self._attachments.insert_attachment(**kwargs)
 
+    async def insert_attachments(self, attachments: list[dict[str, object]]) -> list[MessageAttachment]:
+        self._attachments.engine = self.engine
+        return await self._attachments.insert_attachments(attachments)
+
     async def select_image_attachments_by_msg_time(self, msg_time: int) -> list[MessageAttachment]:
         self._attachments.engine = self.engine
         attachments = await self._attachments.select_by_msg_time(msg_time)
@@ -1103,7 +1855,7 @@ class MessageDatabase:
                 )
                 return int(session.exec(statement).one())
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     async def latest_group_role_message_time(self, *, group_id: int, role: str) -> int | None:
         def _do():
@@ -1118,7 +1870,7 @@ class MessageDatabase:
                 )
                 return session.exec(statement).first()
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
 
     @staticmethod
     def _like_pattern(value: str) -> str:
@@ -1128,18 +1880,13 @@ class MessageDatabase:
     def _can_use_fts(self, content_query: str | None) -> bool:
         if not content_query or len(content_query.strip()) < MESSAGE_FTS_MIN_QUERY_LENGTH:
             return False
-        with self.engine.connect() as conn:
-            return (
-                conn.execute(
-                    text("SELECT 1 FROM sqlite_schema WHERE type = 'table' AND name = 'message_fts' LIMIT 1")
-                ).first()
-                is not None
-            )
+        return message_fts_ready(self.engine)
 
     def _search_messages_fts(
         self,
         session: Session,
         *,
+        schema: str | None = None,
         group_id: int | None,
         user_id: int | None,
         content_query: str,
@@ -1150,12 +1897,12 @@ class MessageDatabase:
         end_time: int | None,
         role: str | None,
         limit: int,
-        offset: int,
+        cursor: dict[str, object] | None,
         sort: str,
-    ) -> list[Message]:
+    ) -> list[tuple[Message, float]]:
         params: dict[str, object] = {
             "fts_query": _fts_query(content_query),
-            "limit": max(1, min(limit, 500)),
+            "limit": limit,
             "scope": "private" if group_id is None else "group",
             "group_id": group_id,
             "user_id": user_id,
@@ -1166,7 +1913,8 @@ class MessageDatabase:
             "start_time": start_time,
             "end_time": end_time,
             "role": role,
-            "offset": max(0, min(offset, 5000)),
+            "cursor_time": cursor["time"] if cursor else None,
+            "cursor_rank": cursor["rank"] if cursor else None,
         }
 
         if group_id is None:
@@ -1179,34 +1927,20 @@ class MessageDatabase:
                 params["target_user_id_enabled"] = 1
 
         if sort == "relevance":
-            query = text(
-                """
-            SELECT m.time
-            FROM message_fts
-            JOIN message AS m ON m.time = message_fts.rowid
-            WHERE message_fts MATCH :fts_query
-              AND (
-                (:scope = 'group' AND m.group_id = :group_id)
-                OR (:scope = 'private' AND m.user_id = :user_id AND m.group_id IS NULL)
-              )
-              AND m.source_type = 'message'
-              AND (:target_user_id_enabled = 0 OR m.user_id = :target_user_id)
-              AND (:target_user_name IS NULL OR m.user_name LIKE :target_user_name ESCAPE '\\')
-              AND (:msg_id IS NULL OR m.msg_id = :msg_id)
-              AND (:start_time IS NULL OR m.time >= :start_time)
-              AND (:end_time IS NULL OR m.time <= :end_time)
-              AND (:role IS NULL OR m.role = :role)
-            ORDER BY bm25(message_fts), m.time DESC
-            LIMIT :limit
-            OFFSET :offset
-                """
+            keyset = (
+                "(:cursor_time IS NULL OR bm25(message_fts) > :cursor_rank "
+                "OR (bm25(message_fts) = :cursor_rank AND m.time < :cursor_time))"
             )
+            order_by = "bm25(message_fts), m.time DESC"
         else:
-            query = text(
-                """
-            SELECT m.time
-            FROM message_fts
-            JOIN message AS m ON m.time = message_fts.rowid
+            keyset = "(:cursor_time IS NULL OR m.time < :cursor_time)"
+            order_by = "m.time DESC"
+        prefix = f"{schema}." if schema else ""
+        query = text(
+            f"""
+            SELECT m.time, bm25(message_fts)
+            FROM {prefix}message_fts AS message_fts
+            JOIN {prefix}message AS m ON m.time = message_fts.rowid
             WHERE message_fts MATCH :fts_query
               AND (
                 (:scope = 'group' AND m.group_id = :group_id)
@@ -1219,22 +1953,112 @@ class MessageDatabase:
               AND (:start_time IS NULL OR m.time >= :start_time)
               AND (:end_time IS NULL OR m.time <= :end_time)
               AND (:role IS NULL OR m.role = :role)
-            ORDER BY m.time DESC
+              AND {keyset}
+            ORDER BY {order_by}
             LIMIT :limit
-            OFFSET :offset
-                """
-            )
+            """  # noqa: S608
+        )
 
         rows = session.connection().execute(query, params).all()
-        ids = [int(row[0]) for row in rows]
-        if not ids:
+        ranks = {int(row[0]): float(row[1]) for row in rows}
+        if not ranks:
             return []
 
-        messages = session.exec(select(Message).where(col(Message.time).in_(ids))).all()
+        messages = session.exec(select(Message).where(col(Message.time).in_(list(ranks)))).all()
         messages_by_id = {message.time: message for message in messages}
-        return [messages_by_id[message_id] for message_id in ids if message_id in messages_by_id]
+        return [
+            (messages_by_id[message_id], rank) for message_id, rank in ranks.items() if message_id in messages_by_id
+        ]
+
+    def _search_messages_like(  # noqa: C901
+        self,
+        session: Session,
+        *,
+        group_id: int | None,
+        user_id: int | None,
+        content_query: str | None,
+        target_user_id: int | None,
+        target_user_name: str | None,
+        msg_id: int | None,
+        start_time: int | None,
+        end_time: int | None,
+        role: str | None,
+        limit: int,
+        cursor: dict[str, object] | None,
+    ) -> list[tuple[Message, None]]:
+        statement = select(Message).where(Message.source_type == MESSAGE_SOURCE_TYPE_NORMAL)
+        if group_id is None:
+            if user_id is None:
+                return []
+            statement = statement.where(Message.user_id == user_id).where(Message.group_id.is_(None))  # type: ignore
+            if target_user_id is not None and target_user_id != user_id:
+                return []
+        else:
+            statement = statement.where(Message.group_id == group_id)
+            if target_user_id is not None:
+                statement = statement.where(Message.user_id == target_user_id)
+
+        if content_query:
+            statement = statement.where(col(Message.content).like(self._like_pattern(content_query), escape="\\"))
+        if target_user_name:
+            statement = statement.where(col(Message.user_name).like(self._like_pattern(target_user_name), escape="\\"))
+        if msg_id is not None:
+            statement = statement.where(Message.msg_id == msg_id)
+        if start_time is not None:
+            statement = statement.where(Message.time >= start_time)
+        if end_time is not None:
+            statement = statement.where(Message.time <= end_time)
+        if role is not None:
+            statement = statement.where(Message.role == role)
+        if cursor is not None:
+            statement = statement.where(Message.time < cursor["time"])
+
+        statement = statement.order_by(desc(Message.time)).limit(limit)
+        return [(message, None) for message in session.exec(statement).all()]
+
+    def _search_message_archives(
+        self, rows: list, *, use_fts: bool, content_query: str | None, limit: int, filters: dict[str, object]
+    ) -> list[tuple[Message, float | None]]:
+        """热库不足一页时按月份倒序继续检索归档库；归档库的消息都早于热库，按时间续接即可。"""
+        cursor = filters["cursor"]
+        start_time, end_time = filters["start_time"], filters["end_time"]
+        for month, path in list_message_archives(self.archive_dir):
+            if len(rows) >= limit:
+                break
+            month_start, month_end = message_archive_month_bounds(month)
+            if start_time is not None and month_end <= start_time:
+                break
+            if (end_time is not None and month_start > end_time) or (cursor and month_start >= cursor["time"]):
+                continue
+            with self.engine.connect() as conn, attach_message_archive(conn, path):
+                fts_available = use_fts and (
+                    conn.exec_driver_sql(
+                        f"SELECT 1 FROM {MESSAGE_ARCHIVE_SCHEMA}.sqlite_schema WHERE name = 'message_fts'"  # noqa: S608
+                    ).first()
+                    is not None
+                )
+                archive_conn = conn.execution_options(schema_translate_map={None: MESSAGE_ARCHIVE_SCHEMA})
+                with Session(bind=archive_conn) as session:
+                    if fts_available:
+                        rows.extend(
+                            self._search_messages_fts(
+                                session,
+                                schema=MESSAGE_ARCHIVE_SCHEMA,
+                                **filters,
+                                content_query=content_query or "",
+                                limit=limit - len(rows),
+                                sort="time",
+                            )
+                        )
+                    else:
+                        rows.extend(
+                            self._search_messages_like(
+                                session, **filters, content_query=content_query, limit=limit - len(rows)
+                            )
+                        )
+        return rows
 
-    async def search_messages(  # noqa: C901
+    async def search_messages(
         self,
         *,
         group_id: int | None,
@@ -1247,65 +2071,89 @@ class MessageDatabase:
         end_time: int | None = None,
         role: str | None = None,
         limit: int = 50,
-        offset: int = 0,
+        cursor: str | None = None,
         sort: str = "time",
-    ) -> list[Message]:
-        def _do():  # noqa: C901
-            with Session(self.engine) as session:
-                if self._can_use_fts(content_query):
-                    return self._search_messages_fts(
-                        session,
-                        group_id=group_id,
-                        user_id=user_id,
-                        content_query=content_query or "",
-                        target_user_id=target_user_id,
-                        target_user_name=target_user_name,
-                        msg_id=msg_id,
-                        start_time=start_time,
-                        end_time=end_time,
-                        role=role,
-                        limit=limit,
-                        offset=offset,
-                        sort=sort,
-                    )
+        include_archive: bool = False,
+    ) -> MessageSearchPage:
+        """按游标分页搜索聊天记忆；``cursor`` 为上一页返回的 ``next_cursor``，无效时抛出 ValueError。
 
-                statement = select(Message).where(Message.source_type == MESSAGE_SOURCE_TYPE_NORMAL)
-                if group_id is None:
-                    if user_id is None:
-                        return []
-                    statement = statement.where(Message.user_id == user_id).where(Message.group_id.is_(None))  # type: ignore
-                    if target_user_id is not None and target_user_id != user_id:
-                        return []
-                else:
-                    statement = statement.where(Message.group_id == group_id)
-                    if target_user_id is not None:
-                        statement = statement.where(Message.user_id == target_user_id)
+        ``include_archive`` 为真时，热库结果不足一页会继续检索月度归档库，此时固定按时间倒序。
+        """
+        page_size = max(1, min(limit, 500))
+        use_fts = self._can_use_fts(content_query)
+        if not use_fts or include_archive:
+            sort = "time"
+        position = decode_search_cursor(cursor, sort=sort) if cursor else None
+        already_read = int(position["read"]) if position else 0
+        filters: dict[str, object] = {
+            "group_id": group_id,
+            "user_id": user_id,
+            "target_user_id": target_user_id,
+            "target_user_name": target_user_name,
+            "msg_id": msg_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "role": role,
+            "cursor": position,
+        }
 
-                if content_query:
-                    statement = statement.where(
-                        col(Message.content).like(self._like_pattern(content_query), escape="\\")
+        def _do():
+            with Session(self.engine) as session:
+                if use_fts:
+                    rows = self._search_messages_fts(
+                        session, **filters, content_query=content_query or "", limit=page_size + 1, sort=sort
                     )
-                if target_user_name:
-                    statement = statement.where(
-                        col(Message.user_name).like(self._like_pattern(target_user_name), escape="\\")
+                else:
+                    rows = self._search_messages_like(
+                        session, **filters, content_query=content_query, limit=page_size + 1
                     )
-                if msg_id is not None:
-                    statement = statement.where(Message.msg_id == msg_id)
-                if start_time is not None:
-                    statement = statement.where(Message.time >= start_time)
-                if end_time is not None:
-                    statement = statement.where(Message.time <= end_time)
-                if role is not None:
-                    statement = statement.where(Message.role == role)
+            if not include_archive:
+                return rows
+            return self._search_message_archives(
+                rows, use_fts=use_fts, content_query=content_query, limit=page_size + 1, filters=filters
+            )
 
-                statement = (
-                    statement.order_by(desc(Message.time))
-                    .limit(max(1, min(limit, 500)))
-                    .offset(max(0, min(offset, 5000)))
-                )
-                return session.exec(statement).all()
+        rows = await run_database(self.engine, _do)
+        page = MessageSearchPage(messages=[message for message, _rank in rows[:page_size]])
+        if len(rows) > page_size:
+            last_message, last_rank = rows[page_size - 1]
+            page.next_cursor = encode_search_cursor(
+                sort=sort, time=last_message.time, rank=last_rank, read=already_read + page_size
+            )
+        return page
+
+    async def archive_old_messages(self, *, retention_days: int | None = None, now_ms: int | None = None) -> int:
+        """把超过保留天数的消息分批迁入月度归档库，返回迁移条数；保留天数为 0 时不归档。
+
+        每批单独提交给写线程，归档期间新消息的写入可以穿插进行。
+        """
+        if retention_days is None:
+            from utils.configs import EnvConfig
+
+            retention_days = EnvConfig.MESSAGE_RETENTION_DAYS
+        if retention_days <= 0:
+            return 0
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        older_than = now_ms - retention_days * 86400 * 1000
+        archived: dict[str, int] = {}
+        while True:
+            month, moved = await run_database(
+                self.engine,
+                lambda: archive_message_batch(self.engine, older_than=older_than, archive_dir=self.archive_dir),
+                write=True,
+            )
+            if not moved or month is None:
+                break
+            archived[month] = archived.get(month, 0) + moved
+        if archived:
 
-        return await _run_database(self.engine, _do)
+            def _optimize():
+                with self.engine.begin() as conn:
+                    conn.execute(text("PRAGMA optimize"))
+
+            await run_database(self.engine, _optimize, write=True)
+            logger.info("Message history archived: %s", archived)
+        return sum(archived.values())
 
 
 class EventDatabase:
@@ -1320,7 +2168,7 @@ class EventDatabase:
                 session.add(target)
                 session.commit()
 
-        await _run_database(self.engine, _do)
+        await run_database(self.engine, _do, write=True)
 
     async def delete(self, name):
         def _do():
@@ -1330,7 +2178,7 @@ class EventDatabase:
                     session.delete(target)
                     session.commit()
 
-        await _run_database(self.engine, _do)
+        await run_database(self.engine, _do, write=True)
 
     async def update(self, name, id):
         def _do():
@@ -1341,7 +2189,7 @@ class EventDatabase:
                     session.add(target)
                     session.commit()
 
-        await _run_database(self.engine, _do)
+        await run_database(self.engine, _do, write=True)
 
     async def select(self, name):
         def _do():
@@ -1350,4 +2198,244 @@ class EventDatabase:
                 if target:
                     return target.id
 
-        return await _run_database(self.engine, _do)
+        return await run_database(self.engine, _do)
+
+
+PROCESSED_EVENT_TTL_SECONDS = 30 * 86400
+PROCESSED_EVENT_CACHE_SIZE = 4096
+PROCESSED_EVENT_PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _legacy_event_ids(stored_value: str | None) -> list[str]:
+    if not stored_value:
+        return []
+    try:
+        parsed = json.loads(stored_value)
+    except json.JSONDecodeError:
+        # 兼容旧 HTTP 轮询实现保存的单个 report ID。
+        return [stored_value]
+    if not isinstance(parsed, list):
+        return [stored_value]
+    return list(dict.fromkeys(str(event_id) for event_id in parsed if str(event_id)))
+
+
+class ProcessedEventStore:
+    """按 (source, event_id) 主键去重的已处理事件表，前面挡一层内存 LRU。
+
+    写入只插入一行，过期记录（超过 ``ttl_seconds``）在写入时按间隔顺带清理。首次访问时
+    载入未过期的记录；只要它们都装得进 LRU，未命中即可判定为新事件而不必查库。
+    ``legacy_timestamp_name`` 指向旧版保存在 ``TimeStamp`` 中的 JSON 列表，首次载入时迁移并删除。
+    """
+
+    def __init__(
+        self,
+        source: str,
+        *,
+        ttl_seconds: float = PROCESSED_EVENT_TTL_SECONDS,
+        cache_size: int = PROCESSED_EVENT_CACHE_SIZE,
+        prune_interval_seconds: float = PROCESSED_EVENT_PRUNE_INTERVAL_SECONDS,
+        legacy_timestamp_name: str | None = None,
+        engine: Engine | None = None,
+    ):
+        self.engine = engine or get_engine()
+        ProcessedEvent.metadata.create_all(self.engine)
+        self.source = source
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.cache_size = max(1, cache_size)
+        self.prune_interval_ms = int(prune_interval_seconds * 1000)
+        self.legacy_timestamp_name = legacy_timestamp_name
+        self._recent: OrderedDict[str, int] = OrderedDict()
+        self._loaded = False
+        self._complete = False
+        self._last_pruned_at = 0
+
+    def _remember(self, event_id: str, received_at: int) -> None:
+        self._recent[event_id] = received_at
+        self._recent.move_to_end(event_id)
+        if len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+            self._complete = False
+
+    def _expired(self, cutoff: int):
+        return delete(ProcessedEvent).where(
+            col(ProcessedEvent.source) == self.source, col(ProcessedEvent.received_at) < cutoff
+        )
+
+    def _forget_expired(self, cutoff: int) -> None:
+        self._recent = OrderedDict((key, value) for key, value in self._recent.items() if value >= cutoff)
+
+    async def _ensure_loaded(self, now_ms: int) -> None:
+        if self._loaded:
+            return
+        cutoff = now_ms - self.ttl_ms
+        legacy_name = self.legacy_timestamp_name
+
+        def _do() -> list[tuple[str, int]]:
+            with Session(self.engine) as session:
+                legacy = session.get(TimeStamp, legacy_name) if legacy_name else None
+                if legacy is not None:
+                    event_ids = _legacy_event_ids(legacy.id)
+                    if event_ids:
+                        session.execute(
+                            sqlite_insert(ProcessedEvent)
+                            .values(
+                                [
+                                    {"source": self.source, "event_id": event_id, "received_at": now_ms}
+                                    for event_id in event_ids
+                                ]
+                            )
+                            .on_conflict_do_nothing()
+                        )
+                    session.delete(legacy)
+                    session.commit()
+                    logger.info("Migrated %d legacy processed event ids for %s", len(event_ids), self.source)
+                rows = session.exec(
+                    select(ProcessedEvent.event_id, ProcessedEvent.received_at)
+                    .where(ProcessedEvent.source == self.source, col(ProcessedEvent.received_at) >= cutoff)
+                    .order_by(desc(col(ProcessedEvent.received_at)))
+                    .limit(self.cache_size + 1)
+                ).all()
+                return [(event_id, received_at) for event_id, received_at in rows]
+
+        rows = await run_database(self.engine, _do, write=legacy_name is not None)
+        self._recent.clear()
+        for event_id, received_at in reversed(rows[: self.cache_size]):
+            self._recent[event_id] = received_at
+        self._complete = len(rows) <= self.cache_size
+        self._loaded = True
+
+    async def contains(self, event_id: str, *, now_ms: int | None = None) -> bool:
+        """``event_id`` 是否在 TTL 内处理过。"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        await self._ensure_loaded(now_ms)
+        cutoff = now_ms - self.ttl_ms
+        received_at = self._recent.get(event_id)
+        if received_at is not None:
+            if received_at >= cutoff:
+                self._recent.move_to_end(event_id)
+                return True
+            del self._recent[event_id]
+            return False
+        if self._complete:
+            return False
+
+        def _do() -> int | None:
+            with Session(self.engine) as session:
+                return session.exec(
+                    select(ProcessedEvent.received_at).where(
+                        ProcessedEvent.source == self.source,
+                        ProcessedEvent.event_id == event_id,
+                        col(ProcessedEvent.received_at) >= cutoff,
+                    )
+                ).first()
+
+        received_at = await run_database(self.engine, _do)
+        if received_at is None:
+            return False
+        self._remember(event_id, received_at)
+        return True
+
+    async def add(self, event_id: str, *, now_ms: int | None = None) -> bool:
+        """记录 ``event_id``；已在 TTL 内记录过时返回 False。"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        await self._ensure_loaded(now_ms)
+        cutoff = now_ms - self.ttl_ms
+        prune = now_ms - self._last_pruned_at >= self.prune_interval_ms
+        insert = sqlite_insert(ProcessedEvent).values(source=self.source, event_id=event_id, received_at=now_ms)
+        # 主键冲突时只有旧记录已过期才覆盖，rowcount 为 0 说明 TTL 内已处理过。
+        insert = insert.on_conflict_do_update(
+            index_elements=["source", "event_id"],
+            set_={"received_at": insert.excluded.received_at},
+            where=col(ProcessedEvent.received_at) < cutoff,
+        )
+
+        def _do() -> tuple[bool, int]:
+            with Session(self.engine) as session:
+                inserted = session.execute(insert).rowcount > 0
+                pruned = session.execute(self._expired(cutoff)).rowcount if prune else 0
+                session.commit()
+                return inserted, pruned
+
+        inserted, pruned = await run_database(self.engine, _do, write=True)
+        if prune:
+            self._last_pruned_at = now_ms
+            if pruned:
+                self._forget_expired(cutoff)
+        if inserted:
+            self._remember(event_id, now_ms)
+        return inserted
+
+    async def prune(self, *, now_ms: int | None = None) -> int:
+        """删除超过 TTL 的记录，返回删除行数。"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff = now_ms - self.ttl_ms
+
+        def _do() -> int:
+            with Session(self.engine) as session:
+                deleted = session.execute(self._expired(cutoff)).rowcount
+                session.commit()
+                return deleted
+
+        deleted = await run_database(self.engine, _do, write=True)
+        self._last_pruned_at = now_ms
+        self._forget_expired(cutoff)
+        return deleted
+
+
+ALERT_TIMING_RETENTION_DAYS = 90
+
+
+class AlertTimingDatabase:
+    def __init__(self, engine: Engine | None = None):
+        self.engine = engine or get_engine()
+        AlertTiming.metadata.create_all(self.engine)
+
+    async def record(self, timing: AlertTiming) -> None:
+        def _do():
+            with Session(self.engine) as session:
+                session.add(timing)
+                session.commit()
+
+        await run_database(self.engine, _do, write=True)
+
+    async def recent(
+        self, source: str, *, limit: int = 500, since_ms: int | None = None, outcome: str | None = None
+    ) -> list[AlertTiming]:
+        """按接收时间倒序返回最近的时间线。"""
+
+        def _do() -> list[AlertTiming]:
+            with Session(self.engine) as session:
+                statement = select(AlertTiming).where(AlertTiming.source == source)
+                if since_ms is not None:
+                    statement = statement.where(col(AlertTiming.received_at) >= since_ms)
+                if outcome is not None:
+                    statement = statement.where(AlertTiming.outcome == outcome)
+                statement = statement.order_by(desc(col(AlertTiming.received_at)), desc(col(AlertTiming.id)))
+                return list(session.exec(statement.limit(limit)).all())
+
+        return await run_database(self.engine, _do)
+
+    async def count_outcomes(self, source: str, *, since_ms: int | None = None) -> dict[str, int]:
+        """按结果统计时间线条数，Dashboard 不必为此读出全部行。"""
+
+        def _do() -> dict[str, int]:
+            with Session(self.engine) as session:
+                statement = select(AlertTiming.outcome, func.count()).where(AlertTiming.source == source)
+                if since_ms is not None:
+                    statement = statement.where(col(AlertTiming.received_at) >= since_ms)
+                return dict(session.exec(statement.group_by(AlertTiming.outcome)).all())
+
+        return await run_database(self.engine, _do)
+
+    async def prune(self, *, retention_days: int = ALERT_TIMING_RETENTION_DAYS, now_ms: int | None = None) -> int:
+        """删除超过保留天数的时间线，返回删除条数。"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff = now_ms - retention_days * 86400 * 1000
+
+        def _do() -> int:
+            with Session(self.engine) as session:
+                result = session.exec(delete(AlertTiming).where(col(AlertTiming.received_at) < cutoff))
+                session.commit()
+                return result.rowcount
+
+        return await run_database(self.engine, _do, write=True)
@@ -0,0 +1,96 @@
+"""Dedicated thread pools for SQLite access.
+
+Reads run on a small bounded pool so they can proceed concurrently under WAL,
+while every write goes through a single worker thread. Serializing writes in
+process matches SQLite's one-writer model, so bursts of inserts queue here
+instead of contending for the database lock and waiting out ``busy_timeout``.
+The pools are separate from ``asyncio.to_thread`` so database calls neither
+starve nor are starved by Pillow and file I/O on the default executor.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from utils.metrics import REGISTRY
+
+DB_READ_WORKERS = min(4, os.cpu_count() or 1)
+DB_CALL_DURATION = REGISTRY.histogram(
+    "frontier_db_call_seconds",
+    "数据库执行器单次调用耗时（不含排队，秒）",
+    ("mode",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_QUEUE_WAIT = REGISTRY.histogram(
+    "frontier_db_queue_wait_seconds",
+    "数据库执行器排队等待耗时（秒）",
+    ("mode",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_CALLS_IN_FLIGHT = REGISTRY.gauge("frontier_db_calls_in_flight", "数据库执行器中排队或执行中的调用数", ("mode",))
+
+
+class DatabaseExecutor:
+    """并发读线程池 + 单线程写入者；所有调用都记录排队与执行耗时。"""
+
+    def __init__(self, *, readers: int = DB_READ_WORKERS, name: str = "frontier-db"):
+        self._readers = ThreadPoolExecutor(max_workers=max(1, readers), thread_name_prefix=f"{name}-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-write")
+
+    async def read[T](self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._submit(self._readers, "read", func, *args, **kwargs)
+
+    async def write[T](self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._submit(self._writer, "write", func, *args, **kwargs)
+
+    async def _submit[T](
+        self, pool: ThreadPoolExecutor, mode: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        # 与 asyncio.to_thread 一致：复制 contextvars，让 trace span 等上下文跟随到工作线程。
+        context = contextvars.copy_context()
+
+        def _call() -> T:
+            started_at = time.perf_counter()
+            DB_QUEUE_WAIT.observe(started_at - queued_at, mode=mode)
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                DB_CALL_DURATION.observe(time.perf_counter() - started_at, mode=mode)
+
+        DB_CALLS_IN_FLIGHT.inc(mode=mode)
+        try:
+            return await loop.run_in_executor(pool, _call)
+        finally:
+            DB_CALLS_IN_FLIGHT.dec(mode=mode)
+
+    def shutdown(self) -> None:
+        # 未开始的读取直接取消；已排队的写入要落盘，等待写线程清空队列。
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+
+
+_database_executor: DatabaseExecutor | None = None
+_database_executor_lock = threading.Lock()
+
+
+def get_database_executor() -> DatabaseExecutor:
+    global _database_executor
+    with _database_executor_lock:
+        if _database_executor is None:
+            _database_executor = DatabaseExecutor()
+        return _database_executor
+
+
+def shutdown_database_executor() -> None:
+    global _database_executor
+    with _database_executor_lock:
+        executor, _database_executor = _database_executor, None
+    if executor is not None:
+        executor.shutdown()
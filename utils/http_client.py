@@ -4,23 +4,52 @@
 shutdown 时调用 aclose_all() 统一关闭所有客户端。
 """
 
+import time
+
 import httpx2
 from nonebot import logger
 
+from utils.metrics import REGISTRY
+
 HTTP_BACKEND_NAME = "httpx2"
 AsyncClient = httpx2.AsyncClient
 AsyncHTTPTransport = httpx2.AsyncHTTPTransport
 HTTPError = httpx2.HTTPError
 ConnectError = httpx2.ConnectError
 
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "frontier_http_client_request_seconds", "命名 HTTP 客户端请求耗时（到响应头，秒）", ("client", "status")
+)
+
 _clients: dict[str, AsyncClient] = {}
 _aclose_all_called: bool = False
 
 
+class InstrumentedTransport(AsyncHTTPTransport):
+    """按客户端名称记录请求耗时；status 为 ``2xx``/``4xx`` 等状态码段，连接失败记为异常类型名。"""
+
+    def __init__(self, client_name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.client_name = client_name
+
+    async def handle_async_request(self, request):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await super().handle_async_request(request)
+            status = f"{response.status_code // 100}xx"
+            return response
+        except Exception as exc:
+            status = type(exc).__name__
+            raise
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, client=self.client_name, status=status)
+
+
 def get_http_client(name: str, *, timeout: float = 30.0) -> AsyncClient:
     """获取或创建命名的 HTTP 客户端。同名多次调用返回同一实例。"""
     if name not in _clients:
-        transport = AsyncHTTPTransport(http2=True, retries=3)
+        transport = InstrumentedTransport(name, http2=True, retries=3)
         _clients[name] = AsyncClient(transport=transport, timeout=timeout)
     return _clients[name]
 
@@ -4,18 +4,40 @@ from typing import TYPE_CHECKING, Any, cast
 from urllib.parse import urlsplit
 
 from langchain_anthropic import ChatAnthropic
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models import ModelProfile
 from langchain_deepseek import ChatDeepSeek
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
-from models import ApiMode, ModelFeature, ModelInput, ModelOutput, get_model, load_catalog
+from models import ApiMode, ModelCatalog, ModelFeature, ModelInput, ModelOutput, load_catalog, resolve_model
 from utils.configs import EnvConfig
+from utils.metrics import REGISTRY
 
 if TYPE_CHECKING:
     from langchain_core.language_models import BaseChatModel
 
+LLM_TOKENS = REGISTRY.counter("frontier_llm_tokens_total", "模型调用消耗的 token 数", ("model", "direction"))
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """把每次模型调用返回的 ``usage_metadata`` 按模型累计到 token 计数器。"""
+
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        for generations in getattr(response, "generations", None) or []:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                LLM_TOKENS.inc(usage.get("input_tokens") or 0, model=self.model, direction="input")
+                LLM_TOKENS.inc(usage.get("output_tokens") or 0, model=self.model, direction="output")
+
 
 @dataclass
 class ProviderConfig:
@@ -95,6 +117,10 @@ _PROVIDER_API_MODES = {
 }
 
 
+_catalog_profiles: dict[tuple[str, str], ModelProfile | None] = {}
+_catalog_profiles_source: ModelCatalog | None = None
+
+
 def _clean_optional(value: object) -> str:
     if not isinstance(value, str):
         return ""
@@ -242,17 +268,25 @@ def model_supports_native_web_search(model: str, provider: str | None = None) ->
 
 
 def get_langchain_model_profile(model: str, provider_type: str) -> ModelProfile | None:
-    """Translate a catalog model card into LangChain's runtime model profile."""
-    parts = model.split("/")
-    candidates = ["/".join(parts[index:]) for index in range(len(parts))]
-    card = next((match for candidate in candidates if (match := get_model(provider_type, candidate))), None)
-    if card is None:
-        catalog = load_catalog().models
-        for candidate in candidates:
-            matches = [item for item in catalog if item.id.lower() == candidate.lower()]
-            if len(matches) == 1:
-                card = matches[0]
-                break
+    """Translate a catalog model card into LangChain's runtime model profile.
+
+    Profiles are memoized per ``(model, provider_type)`` and dropped when the
+    catalog is reloaded; callers receive a copy they may mutate.
+    """
+    global _catalog_profiles_source
+    catalog = load_catalog()
+    if catalog is not _catalog_profiles_source:
+        _catalog_profiles.clear()
+        _catalog_profiles_source = catalog
+    key = (model, provider_type)
+    if key not in _catalog_profiles:
+        _catalog_profiles[key] = _build_langchain_model_profile(model, provider_type)
+    profile = _catalog_profiles[key]
+    return None if profile is None else cast(ModelProfile, dict(profile))
+
+
+def _build_langchain_model_profile(model: str, provider_type: str) -> ModelProfile | None:
+    card = resolve_model(provider_type, model)
     if card is None:
         return None
 
@@ -315,6 +349,7 @@ def create_llm(model: str, provider: str | None = None, **kwargs) -> BaseChatMod
             filtered["profile"] = catalog_profile
     if provider_type == "openai":
         filtered["use_responses_api"] = api_mode == ApiMode.RESPONSES.value
+    filtered["callbacks"] = [TokenUsageCallback(model)]
     base_url = _clean_optional(profile.get("base_url"))
     if base_url and config.base_url_field:
         filtered[config.base_url_field] = base_url
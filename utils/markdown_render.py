@@ -8,17 +8,25 @@ from pathlib import Path
 
 from bs4 import BeautifulSoup
 from markdown_it import MarkdownIt
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
 from utils.markdown_rich import render_rich_markdown_blocks
+from utils.metrics import REGISTRY, browser_pages_collector
 
 logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 CACHE_DIR = PROJECT_ROOT / "cache"
+EARTHQUAKE_CARD_TEMPLATE = "earthquake.html"
+EARTHQUAKE_CARD_VIEWPORT = {"width": 1280, "height": 800}
+EARTHQUAKE_CARD_LOAD_TIMEOUT_MS = 30_000
+EARTHQUAKE_CARD_READY_TIMEOUT_MS = 6_000
+EARTHQUAKE_CARD_MAX_RENDERS = 200
 _browser = None
 _browser_lock = Lock()
+REGISTRY.add_collector(browser_pages_collector("render", lambda: _browser))
 
 
 async def _get_browser():
@@ -215,61 +223,117 @@ async def html_to_image(html: str, css: str | None = None, width: int = 1000, se
     return image
 
 
-async def playwright_render(name: str, packed_args: dict):
-    """使用 Playwright + Jinja2 模板渲染指定类型的内容为图片。"""
-    import re
-    import secrets
+class EarthquakeCardPage:
+    """常驻的地震速报卡片页。
 
-    from jinja2 import Environment, FileSystemLoader
+    模板只加载一次，Leaflet 脚本、地图瓦片和字体在页面里保持预热；每次速报通过
+    ``window.renderEarthquake`` 注入数据，页面在瓦片与字体就绪后把本次的 token 写到
+    ``html[data-frontier-ready]``，随即截图，不再固定等待。页面按次数轮换，出错时重建一次。
+    """
 
-    trigger_mark = secrets.token_hex(16)
-    cache_file = f"{os.getcwd()}/cache/{trigger_mark}.html"
-    env = Environment(loader=FileSystemLoader("./templates/"), autoescape=True)
+    def __init__(self):
+        self._page = None
+        self._renders = 0
+        self._lock = Lock()
 
-    match name:
-        case "eq_usgs" | "eq_cenc":
-            template = env.get_template("earthquake.html")
-            depth = packed_args.get("depth")
-            if isinstance(depth, str):
-                pattern = re.compile(r"[\d.]+")
-                result = pattern.search(depth)
-                if result:
-                    depth = float(result.group(0))
-                else:
-                    depth = 10.0
-            elif depth is not None:
-                depth = float(depth)
-            else:
-                depth = 10.0
-
-            rendered_html = template.render(
-                title=packed_args["title"],
-                detail=packed_args["detail"],
-                latitude=float(packed_args["latitude"]),
-                longitude=float(packed_args["longitude"]),
-                magnitude=float(packed_args["magnitude"]),
-                depth=depth,
+    async def _open(self):
+        browser = await _get_browser()
+        page = await browser.new_page(viewport=EARTHQUAKE_CARD_VIEWPORT)
+        page.on("console", _on_console)
+        page.on("pageerror", _on_page_error)
+        try:
+            await page.goto((TEMPLATES_DIR / EARTHQUAKE_CARD_TEMPLATE).resolve().as_uri())
+            await page.wait_for_function(
+                "typeof window.renderEarthquake === 'function'",
+                timeout=EARTHQUAKE_CARD_LOAD_TIMEOUT_MS,
             )
-        case _:
+        except Exception:
+            await page.close()
+            raise
+        logger.info("地震卡片页已预热")
+        return page
+
+    async def _ensure_page(self):
+        page = self._page
+        if page is not None and not page.is_closed() and self._renders < EARTHQUAKE_CARD_MAX_RENDERS:
+            return page
+        await self._close()
+        self._page = await self._open()
+        self._renders = 0
+        return self._page
+
+    async def _close(self) -> None:
+        page, self._page = self._page, None
+        if page is not None and not page.is_closed():
+            try:
+                await page.close()
+            except Exception as e:
+                logger.debug("关闭地震卡片页失败: %s", e)
+
+    async def _render(self, data: dict) -> bytes | None:
+        page = await self._ensure_page()
+        self._renders += 1
+        token = secrets.token_hex(8)
+        # 不等待 renderEarthquake 的 Promise，就绪与否只看 DOM 标记。
+        await page.evaluate("data => { window.renderEarthquake(data); }", {**data, "token": token})
+        try:
+            await page.wait_for_selector(
+                f"html[data-frontier-ready='{token}']",
+                state="attached",
+                timeout=EARTHQUAKE_CARD_READY_TIMEOUT_MS,
+            )
+        except PlaywrightTimeoutError:
+            logger.warning("地震卡片 %d ms 内未就绪，直接截图", EARTHQUAKE_CARD_READY_TIMEOUT_MS)
+        element = await page.query_selector("#card")
+        if element is None:
             return None
+        return await element.screenshot()
 
-    with open(cache_file, "w", encoding="utf-8") as f:
-        f.write(rendered_html)
+    async def warm(self) -> None:
+        """提前打开卡片页，让首条速报不必等待脚本与瓦片加载。"""
+        async with self._lock:
+            await self._ensure_page()
 
-    browser = await _get_browser()
-    page = await browser.new_page()
-    try:
-        await page.goto(f"file://{cache_file}")
-        await page.wait_for_load_state("networkidle")
-        await page.wait_for_timeout(3000)
-        bytes_picture = None
-        element_handle = await page.query_selector("id=card")
-        if element_handle is not None:
-            bytes_picture = await element_handle.screenshot()
-    finally:
-        close_page = getattr(page, "close", None)
-        if close_page is not None:
-            await close_page()
-    os.remove(cache_file)
-    if bytes_picture:
-        return bytes_picture
+    async def render(self, data: dict) -> bytes | None:
+        async with self._lock:
+            try:
+                return await self._render(data)
+            except Exception as e:
+                logger.warning("地震卡片页渲染失败，重建页面后重试: %s", e)
+                await self._close()
+                return await self._render(data)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._close()
+
+
+earthquake_card = EarthquakeCardPage()
+
+
+def _earthquake_card_data(packed_args: dict) -> dict:
+    depth = packed_args.get("depth")
+    if isinstance(depth, str):
+        result = re.search(r"[\d.]+", depth)
+        depth = float(result.group(0)) if result else 10.0
+    elif depth is not None:
+        depth = float(depth)
+    else:
+        depth = 10.0
+    return {
+        "detail": [{"label": str(item["label"]), "value": str(item["value"])} for item in packed_args["detail"]],
+        "latitude": float(packed_args["latitude"]),
+        "longitude": float(packed_args["longitude"]),
+        # 页面用 textContent 直接写入；按旧模板的浮点数文本格式化，5.0 级不会显示成 5。
+        "magnitude": str(float(packed_args["magnitude"])),
+        "depth": str(depth),
+    }
+
+
+async def playwright_render(name: str, packed_args: dict):
+    """渲染指定类型的内容为图片；地震速报复用常驻卡片页。"""
+    match name:
+        case "eq_usgs" | "eq_cenc":
+            return await earthquake_card.render(_earthquake_card_data(packed_args))
+        case _:
+            return None
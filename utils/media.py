@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import mimetypes
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
@@ -23,6 +28,14 @@ _IMAGE_FORMAT_MIME = {
     "WEBP": "image/webp",
 }
 MODEL_IMAGE_MIME_TYPES = frozenset({"image/gif", "image/jpeg", "image/png", "image/webp"})
+MODEL_IMAGE_MAX_DIMENSION = 2048
+MEDIA_DECODE_WORKERS = min(4, os.cpu_count() or 1)
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
 _MIME_EXTENSIONS = {
     "application/pdf": ".pdf",
     "application/vnd.ms-powerpoint": ".ppt",
@@ -72,6 +85,47 @@ def _clean_declared_mime(value: str | None) -> str | None:
     return mime if "/" in mime else None
 
 
+_media_executor: ThreadPoolExecutor | None = None
+_media_executor_lock = threading.Lock()
+
+
+def _get_media_executor() -> ThreadPoolExecutor:
+    global _media_executor
+    with _media_executor_lock:
+        if _media_executor is None:
+            _media_executor = ThreadPoolExecutor(
+                max_workers=MEDIA_DECODE_WORKERS,
+                thread_name_prefix="frontier-media",
+            )
+        return _media_executor
+
+
+async def run_media_task[T](func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound media work on the bounded media pool instead of the event loop.
+
+    The pool is separate from ``asyncio.to_thread`` so a burst of large photos
+    can't starve database and file I/O of default executor threads.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_media_executor(), lambda: func(*args, **kwargs))
+
+
+def shutdown_media_executor() -> None:
+    global _media_executor
+    with _media_executor_lock:
+        executor, _media_executor = _media_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _image_signature_mime(data: bytes) -> str | None:
+    if match := next((mime for prefix, mime in _IMAGE_SIGNATURES if data.startswith(prefix)), None):
+        return match
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
 def _image_mime(data: bytes) -> str | None:
     try:
         with PILImage.open(BytesIO(data)) as image:
@@ -125,11 +179,21 @@ def detect_mime_type(
     file_name: str | None = None,
 ) -> str:
     """Detect a useful MIME type without trusting any single external hint."""
+    if signature_mime := _image_signature_mime(data):
+        return signature_mime
     if image_mime := _image_mime(data):
         return image_mime
     if magic_mime := _magic_mime(data):
         return magic_mime
+    return _fallback_mime(kind=kind, declared_mime=declared_mime, file_name=file_name)
 
+
+def _fallback_mime(
+    *,
+    kind: MediaKind | None,
+    declared_mime: str | None,
+    file_name: str | None,
+) -> str:
     declared = _clean_declared_mime(declared_mime)
     if declared and declared != "application/octet-stream":
         return declared
@@ -147,6 +211,29 @@ def detect_mime_type(
     return "application/octet-stream"
 
 
+async def detect_mime_type_async(
+    data: bytes,
+    *,
+    kind: MediaKind | None = None,
+    declared_mime: str | None = None,
+    file_name: str | None = None,
+) -> str:
+    """Async :func:`detect_mime_type` that only leaves the loop for Pillow header parsing.
+
+    Magic-byte signatures resolve on the loop; anything that needs Pillow runs
+    on the media pool.
+    """
+    if signature_mime := _image_signature_mime(data):
+        return signature_mime
+    return await run_media_task(
+        detect_mime_type,
+        data,
+        kind=kind,
+        declared_mime=declared_mime,
+        file_name=file_name,
+    )
+
+
 def extension_for_mime(mime_type: str, *, fallback_name: str | None = None) -> str:
     if extension := _MIME_EXTENSIONS.get(mime_type.lower()):
         return extension
@@ -178,33 +265,64 @@ def resolve_media(
     )
 
 
-def normalize_image_for_model(data: bytes) -> ResolvedMedia | None:
+async def resolve_media_async(
+    data: bytes,
+    kind: MediaKind,
+    *,
+    declared_mime: str | None = None,
+    file_name: str | None = None,
+) -> ResolvedMedia:
+    mime_type = await detect_mime_type_async(
+        data,
+        kind=kind,
+        declared_mime=declared_mime,
+        file_name=file_name,
+    )
+    return ResolvedMedia(
+        kind=kind,
+        data=data,
+        mime_type=mime_type,
+        extension=extension_for_mime(mime_type, fallback_name=file_name),
+        file_name=file_name,
+    )
+
+
+def normalize_image_for_model(data: bytes, *, max_dimension: int | None = None) -> ResolvedMedia | None:
     """Validate an image and convert unsupported formats for model APIs.
 
     Responses-compatible providers accept GIF, JPEG, PNG, and WebP. Supported
     input is preserved byte-for-byte after Pillow validates it; other decodable
     formats are converted to PNG when they contain transparency, otherwise JPEG.
+    When ``max_dimension`` is set, still images whose longest edge exceeds it
+    are downscaled during the same decode pass (JPEG uses DCT draft scaling).
     Invalid image bytes return ``None`` so one bad attachment can't fail the
     entire model request.
     """
     try:
         with PILImage.open(BytesIO(data)) as image:
             image_format = str(image.format or "").upper()
-            image.verify()
-
-        mime_type = _IMAGE_FORMAT_MIME.get(image_format)
-        if mime_type in MODEL_IMAGE_MIME_TYPES:
-            return ResolvedMedia(
-                kind="image",
-                data=data,
-                mime_type=mime_type,
-                extension=extension_for_mime(mime_type),
+            mime_type = _IMAGE_FORMAT_MIME.get(image_format)
+            oversized = (
+                max_dimension is not None
+                and max(image.size) > max_dimension
+                and not getattr(image, "is_animated", False)
             )
-
-        with PILImage.open(BytesIO(data)) as image:
+            if mime_type in MODEL_IMAGE_MIME_TYPES and not oversized:
+                image.verify()
+                return ResolvedMedia(
+                    kind="image",
+                    data=data,
+                    mime_type=mime_type,
+                    extension=extension_for_mime(mime_type),
+                )
+
+            if oversized and max_dimension is not None:
+                image.draft(image.mode, (max_dimension, max_dimension))
             image.seek(0)
             normalized = ImageOps.exif_transpose(image)
             normalized.load()
+            if oversized and max_dimension is not None:
+                normalized.thumbnail((max_dimension, max_dimension))
             has_alpha = normalized.mode in {"LA", "RGBA"} or "transparency" in normalized.info
             output = BytesIO()
             if has_alpha:
@@ -223,6 +341,15 @@ def normalize_image_for_model(data: bytes) -> ResolvedMedia | None:
         return None
 
 
+async def normalize_image_for_model_async(
+    data: bytes,
+    *,
+    max_dimension: int | None = None,
+) -> ResolvedMedia | None:
+    """Run :func:`normalize_image_for_model` on the bounded media pool."""
+    return await run_media_task(normalize_image_for_model, data, max_dimension=max_dimension)
+
+
 def standard_media_block(media: ResolvedMedia) -> dict[str, Any]:
     """Build a LangChain standard content block from inline bytes."""
     return {
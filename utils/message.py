@@ -4,7 +4,7 @@ import hashlib
 import re
 import time
 from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Literal
@@ -21,7 +21,7 @@ from utils.context_check import ImageCheck, TextCheck
 from utils.database import GroupSettingsManager, MessageDatabase, get_engine
 from utils.http_client import get_http_client
 from utils.markdown_render import markdown_to_image, markdown_to_text
-from utils.media import detect_mime_type
+from utils.media import detect_mime_type_async
 from utils.signal_llm import signal_structured
 
 httpx_client = get_http_client("message")
@@ -43,6 +43,10 @@ REPLY_CHECK_GROUP_COOLDOWN_SECONDS = 120
 REPLY_CHECK_ASSISTANT_REPLY_COOLDOWN_SECONDS = 20 * 60
 REPLY_CHECK_ACTIVE_GROUP_WINDOW_SECONDS = 60
 REPLY_CHECK_ACTIVE_GROUP_MESSAGE_LIMIT = 20
+REPLY_CHECK_DEBOUNCE_SECONDS = 2.0
+REPLY_CHECK_HISTORY_MESSAGES = 4
+REPLY_CHECK_MAX_CONTEXT_MESSAGES = 12
+REPLY_CHECK_PROMPT_PATH = Path("prompts/reply_check.md")
 REPLY_CHECK_STRONG_KEYWORDS = (
     "求助",
     "救命",
@@ -112,6 +116,20 @@ ACTIVE_TRIGGER_LOW_INFO_PHRASES = {
 }
 ACTIVE_TRIGGER_STRIP_CHARS = " \t\r\n:：,，.。!！?？~～…、/\\|[]()（）【】"
 _reply_check_last_checked_at: dict[int, float] = {}
+_reply_check_prompt_cache: tuple[Path, int, str] | None = None
+
+
+@dataclass(slots=True)
+class _ReplyCheckBatch:
+    """同一群在防抖窗口内等待判断的候选消息；只有最后一条会得到模型结论。"""
+
+    plaintexts: list[str] = field(default_factory=list)
+    messages: list = field(default_factory=list)
+    waiters: list[asyncio.Future[bool]] = field(default_factory=list)
+    task: asyncio.Task | None = None
+
+
+_reply_check_batches: dict[int, _ReplyCheckBatch] = {}
 _BLOCK_MATH_RE = re.compile(r"(?<!\\)\$\$(?!\$).+?(?<!\\)\$\$", re.DOTALL)
 _INLINE_MATH_RE = re.compile(r"(?<!\\)\$(?![\s\d$])[^$\n]+?(?<!\\)\$(?!\w)")
 _LATEX_DELIMITED_MATH_RE = re.compile(r"\\\[(.|\n)+?\\\]|\\\((.|\n)+?\\\)")
@@ -271,6 +289,52 @@ async def _reply_check_assistant_recently_replied(group_id: int, now_ms: int) ->
     return now_ms - latest_time < REPLY_CHECK_ASSISTANT_REPLY_COOLDOWN_SECONDS * 1000
 
 
+def load_reply_check_prompt() -> str:
+    """读取回复门控提示词模板；文件未修改时直接复用内存中的副本。"""
+    global _reply_check_prompt_cache
+    path = REPLY_CHECK_PROMPT_PATH.resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    cached = _reply_check_prompt_cache
+    if cached is None or cached[0] != path or cached[1] != mtime_ns:
+        cached = (path, mtime_ns, path.read_text(encoding="utf-8"))
+        _reply_check_prompt_cache = cached
+    return cached[2]
+
+
+async def _reply_check_classify(plaintexts: list[str], messages: list) -> bool:
+    reply_check_messages = [
+        *messages,
+        {"role": "user", "content": str({"metadata": {}, "content": plaintexts[-1]})},
+    ]
+    # 历史记录已包含窗口内先到的消息，只需按批量大小放宽截取范围。
+    context_size = min(REPLY_CHECK_HISTORY_MESSAGES + len(plaintexts), REPLY_CHECK_MAX_CONTEXT_MESSAGES)
+    temp_conv: list[dict] = reply_check_messages[-context_size:]
+    plain_conv = "\n".join(_reply_check_content_text(conv.get("content", "")) for conv in temp_conv)
+    system_prompt = load_reply_check_prompt().format(name=EnvConfig.BOT_NAME)
+    reply_check: ReplyCheck = await signal_structured(system_prompt, plain_conv, ReplyCheck)
+    return reply_check.should_reply == "true" and reply_check.confidence > 0.5
+
+
+async def _run_reply_check_batch(group_id: int, batch: _ReplyCheckBatch) -> None:
+    try:
+        await asyncio.sleep(REPLY_CHECK_DEBOUNCE_SECONDS)
+    finally:
+        if _reply_check_batches.get(group_id) is batch:
+            del _reply_check_batches[group_id]
+    *superseded, latest = batch.waiters
+    for waiter in superseded:
+        if not waiter.done():
+            waiter.set_result(False)
+    try:
+        decision = await _reply_check_classify(batch.plaintexts, batch.messages)
+    except Exception as exc:
+        if not latest.done():
+            latest.set_exception(exc)
+        return
+    if not latest.done():
+        latest.set_result(decision)
+
+
 async def _reply_check_should_reply(group_id: int, plaintext: str, messages: list) -> bool:
     now_ms = int(time.time() * 1000)
     now = time.monotonic()
@@ -279,21 +343,23 @@ async def _reply_check_should_reply(group_id: int, plaintext: str, messages: lis
         return False
     if await _reply_check_assistant_recently_replied(group_id, now_ms):
         return False
-    last_checked_at = _reply_check_last_checked_at.get(group_id)
-    if last_checked_at is not None and now - last_checked_at < REPLY_CHECK_GROUP_COOLDOWN_SECONDS:
-        return False
-    _reply_check_last_checked_at[group_id] = now
 
-    reply_check_messages = [
-        *messages,
-        {"role": "user", "content": str({"metadata": {}, "content": plaintext})},
-    ]
-    temp_conv: list[dict] = reply_check_messages[-5:]
-    plain_conv = "\n".join(_reply_check_content_text(conv.get("content", "")) for conv in temp_conv)
-    with open("prompts/reply_check.md", encoding="utf-8") as f:
-        system_prompt = f.read().format(name=EnvConfig.BOT_NAME)
-    reply_check: ReplyCheck = await signal_structured(system_prompt, plain_conv, ReplyCheck)
-    return reply_check.should_reply == "true" and reply_check.confidence > 0.5
+    batch = _reply_check_batches.get(group_id)
+    if batch is None:
+        last_checked_at = _reply_check_last_checked_at.get(group_id)
+        if last_checked_at is not None and now - last_checked_at < REPLY_CHECK_GROUP_COOLDOWN_SECONDS:
+            return False
+        _reply_check_last_checked_at[group_id] = now
+        batch = _ReplyCheckBatch()
+        _reply_check_batches[group_id] = batch
+        batch.task = asyncio.create_task(_run_reply_check_batch(group_id, batch))
+
+    # 防抖窗口内的后续候选消息并入同一次判断，结论只作用于最后一条。
+    waiter: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+    batch.plaintexts.append(plaintext)
+    batch.messages = messages
+    batch.waiters.append(waiter)
+    return await waiter
 
 
 async def _active_trigger_should_reply(plaintext: str, wake_words: list[str]) -> bool:
@@ -345,8 +411,8 @@ def _media_downloader(url: str, label: str) -> Callable[[], Awaitable[bytes | No
 
 
 def _first_file_url(data: dict) -> str | None:
-    for field in FILE_URL_FIELDS:
-        value = data.get(field)
+    for field_name in FILE_URL_FIELDS:
+        value = data.get(field_name)
         if value:
             return str(value)
     return None
@@ -471,7 +537,7 @@ async def stage_message_files(
                 file_size=len(file_bytes),
                 virtual_path=virtual_path,
                 local_path=target_path,
-                mime_type=detect_mime_type(file_bytes, kind="file", file_name=target_path.name),
+                mime_type=await detect_mime_type_async(file_bytes, kind="file", file_name=target_path.name),
                 sha256=hashlib.sha256(file_bytes).hexdigest(),
             )
         )
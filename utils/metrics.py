@@ -0,0 +1,290 @@
+"""In-process metrics registry with Prometheus text exposition."""
+
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+DEFAULT_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+LabelValues = tuple[str, ...]
+logger = logging.getLogger(__name__)
+
+
+def _label_values(labelnames: Sequence[str], labels: dict[str, Any]) -> LabelValues:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"指标标签不匹配: 期望 {list(labelnames)}，收到 {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _pairs(self, values: LabelValues) -> list[tuple[str, str]]:
+        return list(zip(self.labelnames, values, strict=True))
+
+    @abstractmethod
+    def render(self) -> list[str]: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counter 只能递增")
+        key = _label_values(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_values(self.labelnames, labels), 0.0)
+
+    def samples(self) -> dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_format_labels(self._pairs(key))} {_format_value(value)}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_values(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = _label_values(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(bound) for bound in buckets if not math.isinf(bound))
+        self.buckets = (*bounds, math.inf)
+        self._series: dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_values(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[index] += 1
+                    break
+            series.count += 1
+            series.sum += value
+
+    def _snapshot(self) -> dict[LabelValues, tuple[list[int], int, float]]:
+        with self._lock:
+            return {
+                key: (list(series.bucket_counts), series.count, series.sum) for key, series in self._series.items()
+            }
+
+    def quantile(self, q: float, **labels: Any) -> float | None:
+        """按桶线性插值估算分位数，与 PromQL 的 ``histogram_quantile`` 一致。"""
+        key = _label_values(self.labelnames, labels)
+        snapshot = self._snapshot().get(key)
+        if snapshot is None:
+            return None
+        return self._quantile(q, snapshot[0], snapshot[1])
+
+    def _quantile(self, q: float, bucket_counts: list[int], count: int) -> float | None:
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, bucket_counts, strict=True):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if math.isinf(bound):
+                    # 落在 +Inf 桶时只能给出最大有限上界。
+                    return lower
+                return lower + (bound - lower) * ((rank - cumulative) / bucket_count)
+            cumulative += bucket_count
+            if not math.isinf(bound):
+                lower = bound
+        return lower
+
+    def summary(self, quantiles: Sequence[float] = (0.5, 0.95, 0.99)) -> dict[LabelValues, dict[str, Any]]:
+        result: dict[LabelValues, dict[str, Any]] = {}
+        for key, (bucket_counts, count, total) in self._snapshot().items():
+            entry: dict[str, Any] = {"count": count, "sum": total}
+            for q in quantiles:
+                entry[f"p{round(q * 100):g}"] = self._quantile(q, bucket_counts, count)
+            result[key] = entry
+        return result
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, (bucket_counts, count, total) in sorted(self._snapshot().items()):
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts, strict=True):
+                cumulative += bucket_count
+                le = _format_labels([*pairs, ("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """进程内指标注册表；同名指标重复注册时返回已有实例。"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls: type[_Metric], name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同类型或标签注册")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """注册导出前调用的回调，用于刷新只能按需读取的 Gauge（如浏览器打开的页面数）。"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self) -> None:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as exc:
+                logger.debug("指标采集回调失败: %s: %s", type(exc).__name__, exc)
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus text exposition format (0.0.4) 输出全部指标。"""
+        self.collect()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        """清空全部样本但保留注册信息，主要供测试使用。"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+BROWSER_PAGES = REGISTRY.gauge("frontier_browser_pages_open", "Playwright 浏览器当前打开的页面数", ("browser",))
+BROWSER_CONNECTED = REGISTRY.gauge("frontier_browser_connected", "Playwright 浏览器是否已启动并连接", ("browser",))
+
+
+def browser_pages_collector(name: str, get_browser: Callable[[], Any]) -> Callable[[], None]:
+    """构造导出前读取浏览器上下文与页面数量的采集回调，用于观察浏览器利用率。"""
+
+    def collect() -> None:
+        browser = get_browser()
+        connected = browser is not None and browser.is_connected()
+        BROWSER_CONNECTED.set(1 if connected else 0, browser=name)
+        pages = sum(len(context.pages) for context in browser.contexts) if connected else 0
+        BROWSER_PAGES.set(pages, browser=name)
+
+    return collect
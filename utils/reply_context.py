@@ -1,3 +1,4 @@
+import asyncio
 import importlib
 import json
 import re
@@ -8,6 +9,7 @@ from nonebot.adapters.milky.event import MessageEvent
 from utils.configs import EnvConfig
 from utils.database import MESSAGE_SOURCE_TYPE_NORMAL, MessageDatabase
 from utils.http_client import get_http_client
+from utils.media import resolve_media_async
 from utils.message_normalizer import NORMALIZED_VERSION, normalize_segments, segments_to_raw_json
 
 _httpx_client = get_http_client("reply_context")
@@ -270,7 +272,9 @@ async def build_reply_context(  # noqa: C901
         if not image_records or missing_images:
             milky_message = await _fetch_reply_message_from_milky(bot, event, reply_seq)
             if milky_message:
-                _quoted_text, fetched_images, fetched_missing = await _extract_milky_message_content(bot, milky_message)
+                _quoted_text, fetched_images, fetched_missing = await _extract_milky_message_content(
+                    bot, milky_message
+                )
                 if fetched_images and EnvConfig.IMAGE_ENABLED:
                     try:
                         await messages_db.insert_images(
@@ -311,7 +315,14 @@ async def build_reply_context(  # noqa: C901
     role = "assistant" if str(milky_message.sender_id) == str(event.self_id) else "user"
     name = _sender_name_from_milky_message(milky_message)
     quoted_time = milky_message.time * 1000 if milky_message.time < 10_000_000_000 else milky_message.time
+    persisted_media = (
+        list(await asyncio.gather(*(resolve_media_async(image, "image") for image in images)))
+        if load_images and images and EnvConfig.IMAGE_ENABLED
+        else []
+    )
+    media_saved = False
     try:
+        # 引用图片与消息记录写入同一事务，省去单独的附件写入往返。
         await messages_db.insert(
             time=quoted_time,
             msg_id=milky_message.message_seq,
@@ -323,7 +334,9 @@ async def build_reply_context(  # noqa: C901
             raw_segments_json=normalized.raw_segments_json,
             normalized_version=normalized.normalized_version,
             normalized_status=normalized.status,
+            media=persisted_media or None,
         )
+        media_saved = True
         if normalized.derived_messages:
             await messages_db.replace_derived_messages(
                 parent_msg_time=quoted_time,
@@ -336,13 +349,15 @@ async def build_reply_context(  # noqa: C901
             )
     except Exception as e:
         logger.warning(f"⚠️ 写入引用消息记录失败 message_seq={reply_seq}: {type(e).__name__}: {e}")
-    if load_images and images and EnvConfig.IMAGE_ENABLED:
+    if persisted_media and not media_saved:
+        # 消息记录写入失败（如同一秒的时间戳主键冲突）时，图片仍单独建立附件索引。
         try:
-            await messages_db.insert_images(
+            await messages_db.insert_media(
                 msg_time=quoted_time,
+                msg_id=milky_message.message_seq,
                 user_id=int(milky_message.sender_id),
                 group_id=group_id,
-                images=images,
+                media=persisted_media,
             )
         except Exception as e:
             logger.warning(f"⚠️ 写入引用图片缓存失败 message_seq={reply_seq}: {type(e).__name__}: {e}")
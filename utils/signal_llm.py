@@ -1,4 +1,6 @@
-from typing import Any
+import asyncio
+import json
+from typing import Any, ClassVar
 
 from pydantic import BaseModel
 
@@ -10,8 +12,22 @@ _JSON_MODE_INSTRUCTION = (
 )
 
 
+def _freeze(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
 class SignalLLM:
-    """Low-overhead LLM wrapper for routing and structured decisions."""
+    """Low-overhead LLM wrapper for routing and structured decisions.
+
+    Bound structured runnables are shared by every instance, so the chat model
+    (and its pooled HTTP client) and schema binding are built once per
+    configuration. Identical prompts that are already in flight share a single
+    provider call. Both caches are dropped when ``EnvConfig`` is reloaded.
+    """
+
+    _runnables: ClassVar[dict[tuple, Any]] = {}
+    _runnables_source: ClassVar[object | None] = None
+    _inflight: ClassVar[dict[tuple, asyncio.Future]] = {}
 
     def __init__(
         self,
@@ -26,6 +42,11 @@ class SignalLLM:
         self.max_retries = max_retries
         self.timeout = timeout
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls._runnables.clear()
+        cls._runnables_source = None
+
     def _llm_kwargs(
         self,
         *,
@@ -55,6 +76,18 @@ class SignalLLM:
             return _JSON_MODE_INSTRUCTION
         return f"{system_prompt}\n\n{_JSON_MODE_INSTRUCTION}"
 
+    def _structured_runnable(self, schema: type[BaseModel], method: str, llm_kwargs: dict[str, Any]) -> Any:
+        cls = type(self)
+        if cls._runnables_source is not EnvConfig.LLM_PROVIDERS:
+            cls._runnables.clear()
+            cls._runnables_source = EnvConfig.LLM_PROVIDERS
+        key = (schema, method, _freeze(llm_kwargs))
+        runnable = cls._runnables.get(key)
+        if runnable is None:
+            runnable = create_llm(**llm_kwargs).with_structured_output(schema, method=method)
+            cls._runnables[key] = runnable
+        return runnable
+
     async def structured(
         self,
         system_prompt: str,
@@ -66,14 +99,21 @@ class SignalLLM:
         model_kwargs: dict | None = None,
         extra_body: dict | None = None,
     ) -> Any:
-        llm = create_llm(**self._llm_kwargs(temperature=temperature, model_kwargs=model_kwargs, extra_body=extra_body))
-        structured_llm = llm.with_structured_output(schema, method=method)
-        return await structured_llm.ainvoke(
-            [
-                ("system", self._system_prompt(system_prompt)),
-                ("human", user_prompt),
-            ]
-        )
+        llm_kwargs = self._llm_kwargs(temperature=temperature, model_kwargs=model_kwargs, extra_body=extra_body)
+        structured_llm = self._structured_runnable(schema, method, llm_kwargs)
+        messages = [
+            ("system", self._system_prompt(system_prompt)),
+            ("human", user_prompt),
+        ]
+        inflight_key = (schema, method, _freeze(llm_kwargs), _freeze(messages))
+        inflight = type(self)._inflight
+        future = inflight.get(inflight_key)
+        if future is None:
+            # 独立任务承载请求：某个等待者被取消时，不影响共享同一请求的其他调用方。
+            future = asyncio.ensure_future(structured_llm.ainvoke(messages))
+            inflight[inflight_key] = future
+            future.add_done_callback(lambda _done: inflight.pop(inflight_key, None))
+        return await asyncio.shield(future)
 
 
 async def signal_structured(
@@ -1,16 +1,32 @@
 """Shared helpers for media-capable tools."""
 
+import asyncio
+import json
 import time
-from collections.abc import Iterator
-from contextlib import asynccontextmanager
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
 from typing import Any
 
+from langchain.agents.middleware import AgentMiddleware
 from nonebot import logger
 
 from utils.media import inline_media_bytes, media_block_kind
+from utils.metrics import DEFAULT_SIZE_BUCKETS, REGISTRY
 from utils.video_service import MediaReference
 
+TOOL_DURATION = REGISTRY.histogram("frontier_tool_duration_seconds", "工具调用耗时（秒）", ("tool",))
+TOOL_ERRORS = REGISTRY.counter("frontier_tool_errors_total", "工具调用失败次数（按异常类型）", ("tool", "exception"))
+TOOL_IN_FLIGHT = REGISTRY.gauge("frontier_tool_in_flight", "正在执行的工具调用数", ("tool",))
+TOOL_ARTIFACT_BYTES = REGISTRY.histogram(
+    "frontier_tool_artifact_bytes", "工具返回产物的载荷大小（字节）", ("tool",), buckets=DEFAULT_SIZE_BUCKETS
+)
+TOOL_CACHE_HITS = REGISTRY.counter("frontier_tool_cache_hits_total", "协同执行窗口内复用的工具结果次数", ("tool",))
+_active_tool_timers: ContextVar[frozenset[str]] = ContextVar("active_tool_timers", default=frozenset())
+
 
 @dataclass(slots=True)
 class ToolStateView:
@@ -70,17 +86,238 @@ class ToolStateView:
             yield MediaReference(data=data, mime_type=mime_type)
 
 
+def _segment_payload_size(segment: Any) -> int:
+    raw = getattr(segment, "raw", None)
+    if raw is not None:
+        return artifact_payload_size(raw)
+    path = getattr(segment, "path", None)
+    if path:
+        try:
+            return Path(path).stat().st_size
+        except OSError:
+            return 0
+    text = getattr(segment, "text", None)
+    return len(text.encode()) if isinstance(text, str) else 0
+
+
+def artifact_payload_size(value: Any) -> int:
+    """估算工具返回值中二进制/文本载荷的字节数（UniMessage、元组、字节串等）。"""
+    if value is None:
+        return 0
+    if isinstance(value, bytes | bytearray | memoryview):
+        return len(value)
+    if isinstance(value, BytesIO):
+        return value.getbuffer().nbytes
+    if isinstance(value, str):
+        return len(value.encode())
+    if hasattr(value, "tool_call_id"):
+        # ToolMessage：只统计 artifact，content 已由模型上下文计量。
+        return artifact_payload_size(getattr(value, "artifact", None))
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list | tuple):
+        return sum(artifact_payload_size(item) for item in value)
+    return _segment_payload_size(value)
+
+
+class ToolCallRecorder:
+    """``tool_timer`` 产出的记录器，用于上报返回产物大小或非异常形式的失败。"""
+
+    __slots__ = ("error", "name", "payload_bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.payload_bytes: int | None = None
+        self.error: str | None = None
+
+    def record_result(self, result: Any) -> Any:
+        self.payload_bytes = artifact_payload_size(result)
+        return result
+
+    def record_error(self, error_type: str) -> None:
+        self.error = error_type
+
+
+def _observe_tool_call(name: str, elapsed: float, recorder: ToolCallRecorder, error: str | None) -> None:
+    TOOL_DURATION.observe(elapsed, tool=name)
+    if error is not None:
+        TOOL_ERRORS.inc(tool=name, exception=error)
+    if recorder.payload_bytes is not None:
+        TOOL_ARTIFACT_BYTES.observe(recorder.payload_bytes, tool=name)
+
+
 @asynccontextmanager
 async def tool_timer(name: str, params: dict | None = None):
-    """统一记录工具调用的开始/结束时间和日志。"""
-    start = time.time()
+    """统一记录工具调用的日志，并写入耗时直方图、在途计数、错误计数和产物大小指标。
+
+    同名工具的嵌套计时（中间件外层 + 工具内部）只由最外层写入指标，避免重复计数。
+    """
+    start = time.perf_counter()
     params_str = f", 参数: {params}" if params else ""
     logger.info(f"🛠️ 调用工具: {name}{params_str}")
+    active = _active_tool_timers.get()
+    record = name not in active
+    recorder = ToolCallRecorder(name)
+    token = _active_tool_timers.set(active | {name})
+    if record:
+        TOOL_IN_FLIGHT.inc(tool=name)
+    error: str | None = None
     try:
-        yield
-        elapsed = time.time() - start
-        logger.info(f"✅ 工具执行成功: {name} (耗时: {elapsed:.2f}s)")
-    except Exception:
-        elapsed = time.time() - start
-        logger.warning(f"⚠️ 工具执行失败: {name} (耗时: {elapsed:.2f}s)")
+        yield recorder
+        error = recorder.error
+    except BaseException as exc:
+        error = type(exc).__name__
         raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _active_tool_timers.reset(token)
+        if record:
+            TOOL_IN_FLIGHT.dec(tool=name)
+            _observe_tool_call(name, elapsed, recorder, error)
+        if error is None:
+            logger.info(f"✅ 工具执行成功: {name} (耗时: {elapsed:.2f}s)")
+        else:
+            logger.warning(f"⚠️ 工具执行失败: {name} (耗时: {elapsed:.2f}s, {error})")
+
+
+class ToolMetricsMiddleware(AgentMiddleware):
+    """Time every tool call (local, PTC and MCP) through ``tool_timer``.
+
+    Place it after ``ToolRetryMiddleware`` so each attempt is measured and
+    exceptions are still visible before the retry layer turns them into
+    error messages.
+    """
+
+    async def awrap_tool_call(self, request, handler):
+        name = str(request.tool_call.get("name") or getattr(request.tool, "name", None) or "unknown")
+        async with tool_timer(name) as recorder:
+            result = await handler(request)
+            # Command 等非 ToolMessage 结果没有 artifact / status，按成功处理。
+            if hasattr(result, "tool_call_id"):
+                recorder.record_result(result)
+                if getattr(result, "status", None) == "error":
+                    recorder.record_error("ToolError")
+            return result
+
+    def wrap_tool_call(self, request, handler):
+        return handler(request)
+
+
+class ToolResultCache:
+    """一个协同执行窗口内共享的工具结果。
+
+    相同工具、相同参数的调用只真正执行一次，并发的后来者等待首个调用的结果；首个调用
+    失败或返回错误时不缓存，等待者各自重新执行。
+    """
+
+    def __init__(self):
+        self._results: dict[tuple[str, str], asyncio.Future[Any]] = {}
+
+    @staticmethod
+    def key(name: str, args: Any) -> tuple[str, str]:
+        return name, json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+    async def run(self, key: tuple[str, str], call: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """返回 ``(结果, 是否复用)``。"""
+        future = self._results.get(key)
+        if future is not None:
+            shared = await asyncio.shield(future)
+            if shared is not None:
+                return shared, True
+            return await call(), False
+        future = self._results[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await call()
+            return result, False
+        finally:
+            cacheable = hasattr(result, "tool_call_id") and getattr(result, "status", None) != "error"
+            if not cacheable:
+                self._results.pop(key, None)
+            future.set_result(result if cacheable else None)
+
+
+_tool_result_cache: ContextVar[ToolResultCache | None] = ContextVar("tool_result_cache", default=None)
+
+
+@contextmanager
+def use_tool_result_cache(cache: ToolResultCache | None) -> Iterator[None]:
+    """在当前上下文内启用工具结果复用，Agent 图派生的工具任务会继承该上下文。"""
+    token = _tool_result_cache.set(cache)
+    try:
+        yield
+    finally:
+        _tool_result_cache.reset(token)
+
+
+class ToolResultCacheMiddleware(AgentMiddleware):
+    """Reuse results of public, deterministic tools inside a coalescing window.
+
+    Only active when ``use_tool_result_cache`` installed a cache for the
+    current run; outside of one every call goes straight to the handler.
+    Without explicit ``tool_names`` the memoizable set is read from
+    ``agent_tools`` on first cached use. Cached ``ToolMessage`` results are
+    re-addressed to the caller's ``tool_call_id``.
+    """
+
+    def __init__(self, tool_names: Iterable[str] | None = None):
+        super().__init__()
+        self.tool_names = frozenset(tool_names) if tool_names is not None else None
+
+    def _memoizable(self, name: str) -> bool:
+        if self.tool_names is None:
+            from tools import agent_tools
+
+            self.tool_names = agent_tools.memoizable_tool_names
+        return name in self.tool_names
+
+    async def awrap_tool_call(self, request, handler):
+        cache = _tool_result_cache.get()
+        name = str(request.tool_call.get("name") or getattr(request.tool, "name", None) or "unknown")
+        if cache is None or not self._memoizable(name):
+            return await handler(request)
+        result, shared = await cache.run(
+            ToolResultCache.key(name, request.tool_call.get("args")), lambda: handler(request)
+        )
+        if not shared:
+            return result
+        TOOL_CACHE_HITS.inc(tool=name)
+        logger.info(f"♻️ 复用工具结果: {name}")
+        return result.model_copy(update={"tool_call_id": request.tool_call.get("id")})
+
+    def wrap_tool_call(self, request, handler):
+        return handler(request)
+
+
+def tool_metrics_summary() -> list[dict[str, Any]]:
+    """按工具汇总调用次数、p50/p95/p99 耗时、错误分布、在途数与产物大小，供 Dashboard 查询。"""
+    tools: dict[str, dict[str, Any]] = {}
+
+    def entry(name: str) -> dict[str, Any]:
+        return tools.setdefault(
+            name,
+            {
+                "tool": name,
+                "calls": 0,
+                "failures": 0,
+                "in_flight": 0,
+                "latency": None,
+                "errors": {},
+                "artifact_bytes": None,
+            },
+        )
+
+    for (name,), stats in TOOL_DURATION.summary().items():
+        item = entry(name)
+        item["calls"] = stats["count"]
+        item["latency"] = stats
+    for (name, exception), count in TOOL_ERRORS.samples().items():
+        item = entry(name)
+        item["errors"][exception] = int(count)
+        item["failures"] += int(count)
+    for (name,), value in TOOL_IN_FLIGHT.samples().items():
+        if value:
+            entry(name)["in_flight"] = int(value)
+    for (name,), stats in TOOL_ARTIFACT_BYTES.summary().items():
+        entry(name)["artifact_bytes"] = stats
+    return sorted(tools.values(), key=lambda item: item["tool"])
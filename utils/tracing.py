@@ -0,0 +1,238 @@
+"""Lightweight contextvar-based span tracer for the message pipeline.
+
+Spans are recorded in-process: every finished trace feeds the per-stage
+histogram in :mod:`utils.metrics`, is kept in a bounded ring for the
+dashboard and, when ``[debug].trace_export_path`` is set, is appended to a
+local file as one OTLP/JSON ``resourceSpans`` document per line.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from nonebot import logger
+
+from utils.configs import EnvConfig
+from utils.metrics import REGISTRY
+
+RECENT_TRACE_LIMIT = 200
+STAGE_DURATION = REGISTRY.histogram(
+    "frontier_pipeline_stage_seconds", "消息处理流水线各阶段耗时（秒）", ("pipeline", "stage")
+)
+PIPELINE_DURATION = REGISTRY.histogram(
+    "frontier_pipeline_duration_seconds", "消息处理流水线端到端耗时（秒）", ("pipeline", "status")
+)
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    parent_id: str | None
+    span_id: str = field(default_factory=lambda: _new_id(8))
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+
+@dataclass(slots=True)
+class Trace:
+    name: str
+    trace_id: str = field(default_factory=lambda: _new_id(16))
+    root: Span | None = None
+    spans: list[Span] = field(default_factory=list)
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start_ms": root.start_ns // 1_000_000 if root else None,
+            "duration": root.duration if root else None,
+            "error": root.error if root else None,
+            "attributes": dict(self.attributes),
+            "stages": [
+                {"name": span.name, "duration": span.duration, "error": span.error}
+                for span in self.spans
+                if span is not root
+            ],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_recent_traces: deque[Trace] = deque(maxlen=RECENT_TRACE_LIMIT)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def set_trace_attribute(key: str, value: Any) -> None:
+    """为当前 trace 附加属性（如 thread_id），不在 trace 内时忽略。"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes[key] = value
+
+
+def _error_name(exc: BaseException, non_error: tuple[type[BaseException], ...]) -> str | None:
+    if isinstance(exc, non_error):
+        return None
+    return type(exc).__name__
+
+
+@contextmanager
+def trace_span(
+    name: str, *, non_error: tuple[type[BaseException], ...] = (), **attributes: Any
+) -> Iterator[Span | None]:
+    """记录当前 trace 下的一个阶段；不在 trace 内时不做任何事。"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    span = Span(
+        name=name, trace_id=trace.trace_id, parent_id=parent.span_id if parent else None, attributes=attributes
+    )
+    trace.spans.append(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = _error_name(exc, non_error)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, *, non_error: tuple[type[BaseException], ...] = (), **attributes: Any) -> Iterator[Trace]:
+    """开启一条 trace；结束时写入阶段直方图、最近 trace 列表和可选的本地导出文件。
+
+    ``non_error`` 中的异常（如 NoneBot 的 ``FinishedException``）视为正常结束。
+    """
+    trace = Trace(name=name, attributes=dict(attributes))
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with trace_span(name, non_error=non_error) as root:
+            trace.root = root
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        _finish_trace(trace)
+
+
+def _finish_trace(trace: Trace) -> None:
+    root = trace.root
+    for span in trace.spans:
+        if span is not root:
+            STAGE_DURATION.observe(span.duration, pipeline=trace.name, stage=span.name)
+    if root is not None:
+        PIPELINE_DURATION.observe(root.duration, pipeline=trace.name, status="error" if root.error else "ok")
+    _recent_traces.append(trace)
+    export_path = EnvConfig.TRACE_EXPORT_PATH
+    if export_path:
+        _export_trace(trace, Path(export_path))
+
+
+def recent_traces(limit: int = 20) -> list[dict[str, Any]]:
+    return [trace.to_dict() for trace in list(_recent_traces)[-limit:][::-1]]
+
+
+def stage_breakdown(pipeline: str) -> list[dict[str, Any]]:
+    """按阶段聚合耗时分位数，按平均耗时降序排列，供 Dashboard 查询。"""
+    stages = [
+        {"stage": stage, **stats, "mean": stats["sum"] / stats["count"] if stats["count"] else None}
+        for (name, stage), stats in STAGE_DURATION.summary().items()
+        if name == pipeline
+    ]
+    return sorted(stages, key=lambda item: item["mean"] or 0, reverse=True)
+
+
+def clear_traces() -> None:
+    _recent_traces.clear()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def trace_to_otlp(trace: Trace) -> dict[str, Any]:
+    """转换为 OTLP/JSON ``ExportTraceServiceRequest``，可直接交给 OpenTelemetry Collector 读取。"""
+    spans = []
+    for span in trace.spans:
+        attributes = dict(span.attributes)
+        if span is trace.root:
+            attributes.update(trace.attributes)
+        spans.append(
+            {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+                "attributes": _otlp_attributes(attributes),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+        )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": EnvConfig.BOT_NAME})},
+                "scopeSpans": [{"scope": {"name": "frontier.tracing"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def _append_line(path: Path, line: str) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as file:
+            file.write(line + "\n")
+    except OSError as exc:
+        logger.warning(f"Trace 导出失败: {path}: {exc}")
+
+
+def _export_trace(trace: Trace, path: Path) -> None:
+    line = json.dumps(trace_to_otlp(trace), ensure_ascii=False)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _append_line(path, line)
+        return
+    loop.run_in_executor(None, _append_line, path, line)